@@ -8,6 +8,7 @@ import plotly.graph_objects as go
 # noinspection PyPackageRequirements
 from opentelemetry import trace
 
+import image_export
 import setup
 
 
@@ -174,7 +175,7 @@ def __save_winners(log, start_year: int = 2000, end_year: int = datetime.datetim
 
     output_path = f"./images/winners-{start_year}-{end_year}/winners.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved winners table to {output_path}")
 
 
@@ -214,7 +215,7 @@ def __save_count(log, start_year: int = 2000, end_year: int = datetime.datetime.
     base_dir = f"./images/winners-{start_year}-{end_year}"
     output_path = f"{base_dir}/count.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved count table to {output_path}")
 
 
@@ -254,7 +255,7 @@ def __save_team_count(log, start_year: int = 2000, end_year: int = datetime.date
     base_dir = f"./images/winners-{start_year}-{end_year}"
     output_path = f"{base_dir}/team_count.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved constructors table to {output_path}")
 
 
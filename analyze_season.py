@@ -16,6 +16,7 @@ from fastf1.events import EventSchedule
 from opentelemetry import trace
 
 import constants
+import image_export
 import setup
 
 tracer = trace.get_tracer(__name__)
@@ -100,7 +101,7 @@ def __save_events(base_dir: str, log: structlog.stdlib.BoundLogger, schedule: Ev
         layout=go.Layout(autosize=True, margin=go.layout.Margin(autoexpand=True)))
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -315,7 +316,7 @@ def __main():
 
     output_path = f"{base_dir}/points.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved plot", path=output_path)
 
     if config.get_year() > now.year:
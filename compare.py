@@ -13,6 +13,7 @@ from opentelemetry import trace
 from pandas.core.interchange.dataframe_protocol import DataFrame
 
 import constants
+import image_export
 import setup
 
 tracer = trace.get_tracer(__name__)
@@ -410,7 +411,7 @@ def summary(log: structlog.stdlib.BoundLogger, comparison: Comparison):
 
     output_path = f"./images/comparison/{comparison.get_gp()}/{comparison.get_session()}/summary.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=1080)
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -0,0 +1,189 @@
+"""PNG export of plotly figures through one long-lived Kaleido browser per process.
+
+With Kaleido 1.x, each fig.write_image call starts a headless Chromium, loads plotly.js into it
+and closes it again, which costs far more than drawing a table. FigureRenderer starts the
+browser once, on the first export, and keeps it running until the process exits, so every
+export after the first only pays for the drawing itself. A batch of figures is drawn in the
+browser's tabs concurrently.
+
+Forked processes, e.g. the tracker's render workers, start a browser of their own on their
+first export instead of using the parent's.
+"""
+import asyncio
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import kaleido
+
+
+class FigureRenderer:
+    """Headless browser kept open in a background thread, turning plotly figures into PNG bytes.
+
+    Attributes:
+        __tabs: Number of browser tabs drawing figures concurrently.
+        __timeout: Seconds a single figure may take to draw.
+        __browser: Factory of the Kaleido browser, taking n and timeout.
+        __lock: Serializes starting and closing the browser.
+        __loop: Event loop of the background thread, None while stopped.
+        __thread: Thread running the browser, None while stopped.
+        __kaleido: Open browser, None while stopped.
+        __stop: Set to make the background thread close the browser.
+        __startup_seconds: Seconds the last start of the browser took.
+        __figures: Number of figures drawn.
+        __seconds: Total seconds spent drawing figures, startup excluded.
+    """
+
+    def __init__(self, tabs: int = 2, timeout: int = 90, browser: Callable[..., Any] = kaleido.Kaleido):
+        """Initialize FigureRenderer. The browser is started by start() or the first render().
+
+        Args:
+            tabs: Number of browser tabs drawing figures concurrently.
+            timeout: Seconds a single figure may take to draw.
+            browser: Factory of the Kaleido browser, taking n and timeout.
+        """
+        self.__tabs = tabs
+        self.__timeout = timeout
+        self.__browser = browser
+        self.__lock = threading.Lock()
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        self.__thread: threading.Thread | None = None
+        self.__kaleido = None
+        self.__stop: asyncio.Event | None = None
+        self.__startup_seconds = 0.0
+        self.__figures = 0
+        self.__seconds = 0.0
+
+    def is_running(self) -> bool:
+        return self.__thread is not None
+
+    def get_startup_seconds(self) -> float:
+        return self.__startup_seconds
+
+    def get_figures(self) -> int:
+        return self.__figures
+
+    def get_seconds(self) -> float:
+        return self.__seconds
+
+    def start(self):
+        """Start the browser, unless it is already running.
+
+        Raises:
+            Exception: Whatever the browser raised while starting, e.g. ChromeNotFoundError.
+        """
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            started = time.perf_counter()
+            ready: Future = Future()
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_until_complete, args=(self.__serve(ready),),
+                                      name="kaleido", daemon=True)
+            thread.start()
+            try:
+                ready.result()
+            except BaseException:
+                thread.join()
+                loop.close()
+                raise
+            self.__loop, self.__thread = loop, thread
+            self.__startup_seconds = time.perf_counter() - started
+
+    def render(self, figures: list[tuple[Any, int, int]]) -> list[bytes]:
+        """Draw a batch of figures, starting the browser first if needed.
+
+        Args:
+            figures: (figure, width, height) of each figure, a plotly Figure or its dict.
+
+        Returns:
+            PNG bytes of each figure, in the order of figures.
+        """
+        self.start()
+        started = time.perf_counter()
+        images = asyncio.run_coroutine_threadsafe(self.__render(figures), self.__loop).result()
+        self.__seconds += time.perf_counter() - started
+        self.__figures += len(figures)
+        return images
+
+    def close(self):
+        """Close the browser. A later render() starts a new one."""
+        with self.__lock:
+            if self.__thread is None:
+                return
+            self.__loop.call_soon_threadsafe(self.__stop.set)
+            self.__thread.join()
+            self.__loop.close()
+            self.__loop, self.__thread = None, None
+
+    async def __serve(self, ready: Future):
+        self.__stop = asyncio.Event()
+        try:
+            async with self.__browser(n=self.__tabs, timeout=self.__timeout) as browser:
+                self.__kaleido = browser
+                ready.set_result(None)
+                await self.__stop.wait()
+        except BaseException as e:
+            if ready.done():
+                raise
+            ready.set_exception(e)
+        finally:
+            self.__kaleido = None
+
+    async def __render(self, figures: list[tuple[Any, int, int]]) -> list[bytes]:
+        # each figure waits for a free tab, so a batch is drawn by all the tabs at once
+        return list(await asyncio.gather(*(
+            self.__kaleido.calc_fig(fig, opts={'format': 'png', 'width': width, 'height': height})
+            for fig, width, height in figures)))
+
+
+_renderer: FigureRenderer | None = None
+
+
+def get_renderer() -> FigureRenderer:
+    """Get the renderer of this process, creating it on first use.
+
+    Returns:
+        The renderer, whose browser is closed when the process exits.
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = FigureRenderer()
+        atexit.register(_renderer.close)
+    return _renderer
+
+
+def _forget_renderer():
+    # the browser thread of the parent does not exist in a forked child
+    global _renderer
+    _renderer = None
+
+
+os.register_at_fork(after_in_child=_forget_renderer)
+
+
+def write_image(fig, path: str, width: int, height: int):
+    """Save a plotly figure as PNG, like fig.write_image(path, width=width, height=height).
+
+    Args:
+        fig: Figure to save.
+        path: Output file path.
+        width: Image width in pixels.
+        height: Image height in pixels.
+    """
+    write_images([(fig, path, width, height)])
+
+
+def write_images(figures: list[tuple[Any, str, int, int]]):
+    """Save a batch of plotly figures as PNG, drawing them concurrently.
+
+    Args:
+        figures: (figure, output file path, width, height) of each figure.
+    """
+    images = get_renderer().render([(fig, width, height) for fig, _, width, height in figures])
+    for (_, path, _, _), image in zip(figures, images):
+        with open(path, 'wb') as file:
+            file.write(image)
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import image_export
+from image_export import FigureRenderer
+
+
+class FakeBrowser:
+    """Stands in for kaleido.Kaleido, which needs Chrome; counts how often it is opened."""
+    opened = 0
+
+    def __init__(self, n: int, timeout: int):
+        self.tabs = asyncio.Semaphore(n)
+
+    async def __aenter__(self):
+        FakeBrowser.opened += 1
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def calc_fig(self, fig, opts: dict) -> bytes:
+        async with self.tabs:
+            await asyncio.sleep(0)
+            return f"{fig['name']} {opts['width']}x{opts['height']}".encode()
+
+
+class BrokenBrowser(FakeBrowser):
+    async def __aenter__(self):
+        raise RuntimeError("Kaleido requires Google Chrome to be installed.")
+
+
+class FigureRendererTest(unittest.TestCase):
+    def setUp(self):
+        FakeBrowser.opened = 0
+
+    def test_starts_browser_once(self):
+        renderer = FigureRenderer(tabs=2, browser=FakeBrowser)
+        self.assertFalse(renderer.is_running())
+        self.assertEqual([b"a 10x20"], renderer.render([({'name': 'a'}, 10, 20)]))
+        self.assertEqual([b"b 30x40", b"c 50x60", b"d 70x80"],
+                         renderer.render([({'name': 'b'}, 30, 40), ({'name': 'c'}, 50, 60), ({'name': 'd'}, 70, 80)]))
+        self.assertEqual(1, FakeBrowser.opened)
+        self.assertEqual(4, renderer.get_figures())
+        renderer.close()
+        self.assertFalse(renderer.is_running())
+        renderer.render([({'name': 'e'}, 1, 1)])
+        self.assertEqual(2, FakeBrowser.opened)
+        renderer.close()
+
+    def test_failed_start_raises(self):
+        renderer = FigureRenderer(browser=BrokenBrowser)
+        with self.assertRaises(RuntimeError):
+            renderer.render([({'name': 'a'}, 10, 20)])
+        self.assertFalse(renderer.is_running())
+
+    def test_write_images(self):
+        image_export._renderer = FigureRenderer(browser=FakeBrowser)
+        try:
+            with tempfile.TemporaryDirectory() as d:
+                paths = [os.path.join(d, f"{name}.png") for name in ('a', 'b')]
+                image_export.write_images([({'name': 'a'}, paths[0], 10, 20), ({'name': 'b'}, paths[1], 30, 40)])
+                image_export.write_image({'name': 'c'}, paths[0], 50, 60)
+                with open(paths[0], 'rb') as file:
+                    self.assertEqual(b"c 50x60", file.read())
+                with open(paths[1], 'rb') as file:
+                    self.assertEqual(b"b 30x40", file.read())
+            self.assertEqual(1, FakeBrowser.opened)
+        finally:
+            image_export._renderer.close()
+            image_export._renderer = None
+
+
+if __name__ == '__main__':
+    unittest.main()
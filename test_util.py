@@ -1,6 +1,8 @@
+import os
+import tempfile
 import unittest
 
-from util import join_with_colon
+from util import AppendLog, join_with_colon, read_newest_first
 
 
 class Util(unittest.TestCase):
@@ -11,3 +13,29 @@ class Util(unittest.TestCase):
     def test_join_with_colon_concat(self):
         actual = join_with_colon('a', 'b')
         self.assertEqual('a : b', actual)
+
+    def test_append_log(self):
+        with tempfile.TemporaryDirectory() as d:
+            filepath = os.path.join(d, 'log.txt')
+            with AppendLog(filepath) as log_file:
+                log_file.write('a')
+                log_file.write('b')
+            with AppendLog(filepath) as log_file:
+                log_file.write('c')
+            with open(filepath, 'r', encoding='utf-8') as file:
+                self.assertEqual('a\nb\nc\n', file.read())
+            with AppendLog(filepath, truncate=True) as log_file:
+                log_file.write('d')
+            self.assertEqual(['d'], read_newest_first(filepath))
+
+    def test_read_newest_first(self):
+        with tempfile.TemporaryDirectory() as d:
+            filepath = os.path.join(d, 'log.txt')
+            with AppendLog(filepath) as log_file:
+                for i in range(20000):
+                    log_file.write(f'message {i}')
+            actual = read_newest_first(filepath)
+            self.assertEqual(20000, len(actual))
+            self.assertEqual('message 19999', actual[0])
+            self.assertEqual('message 0', actual[-1])
+            self.assertEqual(['message 19999', 'message 19998'], read_newest_first(filepath, 2))
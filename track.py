@@ -6,8 +6,10 @@ from typing import Final
 
 import fastf1
 from fastf1.core import DataNotLoadedError
-from fastf1.livetiming.data import LiveTimingData
 
+from tracker.livedata import IncrementalLiveTimingData
+from tracker.livesession import IncrementalSession
+from tracker.watcher import FileWatcher
 from visualizations import race, weather
 
 logging.basicConfig(
@@ -31,26 +33,34 @@ os.makedirs(images_path, exist_ok=True)
 
 filepath: Final = './live/data/source/' + config['FileName']
 log.info(filepath)
+watcher = FileWatcher(filepath, log, max_rate=config.get('Tracker', {}).get('MaxRenderRate', 1.0))
+
+livedata = IncrementalLiveTimingData(filepath, log)
+tables = None
+session_key = None
+stale = True
 
 while True:
     try:
         with open('./config.json', 'r', encoding='utf-8') as file:
             config = json.load(file)
-        keyword = 'SessionInfo'
-        output_file = './live/data/source/tmp.txt'
-        with open(filepath, "r", encoding="utf-8") as fin, open(output_file, "w", encoding="utf-8") as file:
-            for line in fin:
-                if keyword not in line:
-                    file.write(line)
-        livedata = LiveTimingData(output_file, _files_read=True)
-        livedata.load()
-        session = fastf1.get_session(config['Year'], config['Round'], 'Race')
-        session.load(livedata=livedata, telemetry=False)
+        # only the lines appended since the previous cycle are parsed
+        stale = livedata.update() > 0 or stale
+        if not stale:
+            watcher.wait(timeout=60)
+            continue
+        if session_key != (config['Year'], config['Round']):
+            tables = IncrementalSession(fastf1.get_session(config['Year'], config['Round'], 'Race'), livedata)
+            session_key = (config['Year'], config['Round'])
+        # only the new entries go into the session's tables; session.load() rebuilt them from every parsed message
+        tables.update()
+        session = tables.get_session()
         race.execute(session, log, "./live/data/results/images", "./live/data/results/logs",
                      config['Race']['LapTimeRange'], config['Race']['GapTopRange'], config['Race']['GapAheadRange'])
         weather.execute(session, log, "./live/data/results/images")
+        stale = False
     except DataNotLoadedError as e:
         log.warning(e)
         time.sleep(30)
         continue
-    time.sleep(60)
+    watcher.wait(timeout=60)
@@ -0,0 +1,539 @@
+"""Compressed, time-indexed archive of a recorded live feed.
+
+An archive is a data file of independently compressed chunks of recorded lines, plus a sidecar
+index (<archive>.idx) with one JSON line per chunk: its byte range, number of lines, first and
+last feed timestamp, and the topics in it. Readers find the chunks of a time range or topic from
+the index and decompress only those. Both files are append-only, so an archive can be written
+by the recorder and followed by the tracker while the session runs.
+
+Chunks are compressed with zstandard when it is installed, otherwise with zlib; the codec is
+recorded in the index.
+
+Usage:
+    python -m tracker.archive pack live/data/source/2025_AbuDhabi_Race.txt live/data/source/2025_AbuDhabi_Race.f1a
+    python -m tracker.archive cat live/data/source/2025_AbuDhabi_Race.f1a --start 2025-12-07T14:00:00Z --topic TimingData
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Final, Iterator
+
+from tracker import decoder
+from tracker.replay import message_time
+from tracker.tail import TailReader
+
+try:
+    # noinspection PyPackageRequirements
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUFFIX: Final = ".f1a"
+INDEX_SUFFIX: Final = ".idx"
+FORMAT: Final = "f1-archive"
+VERSION: Final = 1
+ZLIB: Final = "zlib"
+ZSTD: Final = "zstd"
+
+
+def is_archive(path: str | Path) -> bool:
+    """Whether a path names an archive rather than a plain recording, by its suffix."""
+    return Path(path).suffix == SUFFIX
+
+
+def index_path(path: str | Path) -> Path:
+    """Get the sidecar index path of an archive."""
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def default_codec() -> str:
+    return ZSTD if zstandard is not None else ZLIB
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    """Compress one chunk.
+
+    Raises:
+        ValueError: If the codec is unknown or its module is not installed.
+    """
+    if codec == ZLIB:
+        return zlib.compress(data, 6)
+    if codec == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    raise ValueError(f"codec {codec} is not available")
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """Decompress one chunk.
+
+    Raises:
+        ValueError: If the codec is unknown or its module is not installed.
+    """
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    if codec == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"codec {codec} is not available")
+
+
+def line_topic(line: str) -> str | None:
+    """Get the topic of a recorded line, ['Topic', data, 'timestamp'], without decoding it."""
+    if not line.startswith("['"):
+        return None
+    end = line.find("'", 2)
+    return line[2:end] if end > 2 else None
+
+
+def line_time(line: str) -> datetime.datetime | None:
+    """Get the feed timestamp of a recorded line as an aware datetime, None if it has none."""
+    return as_utc(message_time(line))
+
+
+def as_utc(t: datetime.datetime | None) -> datetime.datetime | None:
+    # the feed writes UTC with Z; naive times given on the command line are UTC too
+    return t if t is None or t.tzinfo is not None else t.replace(tzinfo=datetime.timezone.utc)
+
+
+class Chunk:
+    """Index entry of one compressed chunk.
+
+    Attributes:
+        __offset: Byte offset of the chunk in the data file.
+        __size: Compressed size in bytes.
+        __lines: Number of lines in the chunk.
+        __start: Earliest feed timestamp in the chunk, None if no line has one.
+        __end: Latest feed timestamp in the chunk, None if no line has one.
+        __topics: Topics of the lines in the chunk.
+    """
+
+    def __init__(self, offset: int, size: int, lines: int, start: datetime.datetime | None,
+                 end: datetime.datetime | None, topics: frozenset[str]):
+        self.__offset = offset
+        self.__size = size
+        self.__lines = lines
+        self.__start = start
+        self.__end = end
+        self.__topics = topics
+
+    def get_offset(self) -> int:
+        return self.__offset
+
+    def get_size(self) -> int:
+        return self.__size
+
+    def get_end_offset(self) -> int:
+        return self.__offset + self.__size
+
+    def get_lines(self) -> int:
+        return self.__lines
+
+    def get_start(self) -> datetime.datetime | None:
+        return self.__start
+
+    def get_end(self) -> datetime.datetime | None:
+        return self.__end
+
+    def get_topics(self) -> frozenset[str]:
+        return self.__topics
+
+    def overlaps(self, start: datetime.datetime | None, end: datetime.datetime | None) -> bool:
+        """Whether the chunk may hold lines in [start, end); chunks without timestamps always may."""
+        if self.__start is None:
+            return True
+        return (start is None or self.__end >= start) and (end is None or self.__start < end)
+
+    def to_json(self) -> str:
+        return json.dumps({'offset': self.__offset, 'size': self.__size, 'lines': self.__lines,
+                           'start': self.__start.isoformat() if self.__start else None,
+                           'end': self.__end.isoformat() if self.__end else None,
+                           'topics': sorted(self.__topics)}, separators=(',', ':'))
+
+    @staticmethod
+    def from_json(text: str) -> 'Chunk':
+        entry = json.loads(text)
+        return Chunk(entry['offset'], entry['size'], entry['lines'],
+                     datetime.datetime.fromisoformat(entry['start']) if entry['start'] else None,
+                     datetime.datetime.fromisoformat(entry['end']) if entry['end'] else None,
+                     frozenset(entry['topics']))
+
+
+class ArchiveWriter:
+    """Writes recorded lines to an archive, one compressed chunk at a time.
+
+    It is file-like enough for the recorder: write() takes text of complete lines and flush()
+    seals the buffered lines into a chunk once there are chunk_lines of them or the oldest is
+    chunk_seconds old, so that flushing after every message still gives chunks that compress
+    well. A chunk is written to the data file before its index line, so a crash leaves at most a
+    chunk without index entry, which the next writer opening the archive cuts off.
+
+    Attributes:
+        __path: Path of the data file.
+        __codec: Codec of the chunks.
+        __chunk_lines: Lines sealing a chunk.
+        __chunk_seconds: Seconds after which buffered lines are sealed on flush().
+        __data: Data file opened for appending.
+        __index: Index file opened for appending.
+        __buffer: Lines not yet sealed.
+        __partial: Text after the last line break written.
+        __buffered_since: Monotonic time the oldest buffered line was written.
+        __chunks: Number of chunks in the archive.
+    """
+
+    def __init__(self, path: str | Path, mode: str = 'a', codec: str | None = None, chunk_lines: int = 4096,
+                 chunk_seconds: float = 5.0):
+        """Open an archive for writing.
+
+        Args:
+            path: Path of the data file; the index is written next to it.
+            mode: 'a' to append to an existing archive, 'w' to start a new one.
+            codec: ZSTD or ZLIB for a new archive, None for zstd when installed; an existing
+                archive keeps its own codec.
+            chunk_lines: Lines sealing a chunk.
+            chunk_seconds: Seconds after which buffered lines are sealed on flush().
+        """
+        self.__path = Path(path)
+        self.__chunk_lines = chunk_lines
+        self.__chunk_seconds = chunk_seconds
+        self.__buffer: list[str] = []
+        self.__partial = ""
+        self.__buffered_since = 0.0
+        self.__chunks = 0
+        end = 0
+        codec = codec or default_codec()
+        if mode == 'a' and self.__path.exists() and index_path(path).exists():
+            reader = ArchiveReader(path)
+            codec = reader.get_codec()
+            self.__chunks = len(reader.get_chunks())
+            end = reader.get_chunks()[-1].get_end_offset() if reader.get_chunks() else 0
+        elif mode not in ('a', 'w'):
+            raise ValueError(f"mode must be 'a' or 'w', not {mode}")
+        compress(codec, b"")
+        self.__codec = codec
+        if self.__chunks or end:
+            self.__data = open(self.__path, 'r+b')
+            # cut off a chunk written before a crash but never indexed
+            self.__data.truncate(end)
+            self.__data.seek(end)
+            self.__index = open(index_path(path), 'a', encoding='utf-8')
+        else:
+            self.__data = open(self.__path, 'wb')
+            self.__index = open(index_path(path), 'w', encoding='utf-8')
+            self.__index.write(json.dumps({'format': FORMAT, 'version': VERSION, 'codec': codec}) + "\n")
+            self.__index.flush()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_path(self) -> Path:
+        return self.__path
+
+    def get_codec(self) -> str:
+        return self.__codec
+
+    def get_chunks(self) -> int:
+        return self.__chunks
+
+    def write(self, text: str):
+        """Buffer complete lines; text after the last line break waits for the rest of its line."""
+        lines = (self.__partial + text).split('\n')
+        self.__partial = lines.pop()
+        if lines and not self.__buffer:
+            self.__buffered_since = time.monotonic()
+        self.__buffer.extend(line for line in lines if line)
+        if len(self.__buffer) >= self.__chunk_lines:
+            self.seal()
+
+    def write_line(self, line: str):
+        """Buffer one line given without its line break."""
+        self.write(line + '\n')
+
+    def flush(self):
+        """Seal the buffered lines if there are enough of them or they waited chunk_seconds."""
+        if self.__buffer and time.monotonic() - self.__buffered_since >= self.__chunk_seconds:
+            self.seal()
+
+    def seal(self):
+        """Write the buffered lines as a chunk and index it."""
+        if not self.__buffer:
+            return
+        lines, self.__buffer = self.__buffer, []
+        times = [t for t in map(line_time, lines) if t is not None]
+        topics = frozenset(topic for topic in map(line_topic, lines) if topic is not None)
+        payload = compress(self.__codec, ('\n'.join(lines) + '\n').encode('utf-8'))
+        offset = self.__data.tell()
+        self.__data.write(payload)
+        self.__data.flush()
+        chunk = Chunk(offset, len(payload), len(lines), min(times) if times else None,
+                      max(times) if times else None, topics)
+        self.__index.write(chunk.to_json() + "\n")
+        self.__index.flush()
+        self.__chunks += 1
+
+    def close(self):
+        """Seal the buffered lines, including an unterminated last one, and close the files."""
+        if self.__partial:
+            self.__buffer.append(self.__partial)
+            self.__partial = ""
+        self.seal()
+        self.__data.close()
+        self.__index.close()
+
+
+class ArchiveReader:
+    """Reads an archive through its index, decompressing only the chunks asked for.
+
+    The index is read incrementally: refresh() picks up chunks appended since, so a reader can
+    follow an archive being written.
+
+    Attributes:
+        __path: Path of the data file.
+        __codec: Codec of the chunks, None until the index header is read.
+        __chunks: Index entries read so far, in file order.
+        __index_offset: Bytes of the index read so far.
+    """
+
+    def __init__(self, path: str | Path):
+        """Open an archive.
+
+        Args:
+            path: Path of the data file; the index is read from next to it.
+        """
+        self.__path = Path(path)
+        self.__codec: str | None = None
+        self.__chunks: list[Chunk] = []
+        self.__index_offset = 0
+        self.refresh()
+
+    def get_path(self) -> Path:
+        return self.__path
+
+    def get_codec(self) -> str | None:
+        return self.__codec
+
+    def get_chunks(self) -> list[Chunk]:
+        return self.__chunks
+
+    def refresh(self) -> int:
+        """Read the index entries appended since the previous call.
+
+        Returns:
+            Number of new chunks.
+
+        Raises:
+            ValueError: If the index is not one of an archive.
+        """
+        try:
+            with open(index_path(self.__path), 'rb') as file:
+                file.seek(self.__index_offset)
+                data = file.read()
+        except FileNotFoundError:
+            return 0
+        # a line still being written has no line break yet
+        complete = data[:data.rfind(b'\n') + 1]
+        self.__index_offset += len(complete)
+        added = 0
+        for line in complete.decode('utf-8').splitlines():
+            if self.__codec is None:
+                header = json.loads(line)
+                if header.get('format') != FORMAT or header.get('version') != VERSION:
+                    raise ValueError(f"{index_path(self.__path)} is not an index of a version {VERSION} archive")
+                self.__codec = header['codec']
+                continue
+            self.__chunks.append(Chunk.from_json(line))
+            added += 1
+        return added
+
+    def read_chunk(self, chunk: Chunk) -> list[str]:
+        """Decompress the lines of one chunk.
+
+        Returns:
+            Lines without line breaks.
+        """
+        with open(self.__path, 'rb') as file:
+            file.seek(chunk.get_offset())
+            data = file.read(chunk.get_size())
+        return decompress(self.__codec, data).decode('utf-8').splitlines()
+
+    def find(self, t: datetime.datetime) -> int:
+        """Find the first chunk that may hold lines at or after a time.
+
+        Args:
+            t: Feed time, aware or naive UTC.
+
+        Returns:
+            Index of the chunk, len(get_chunks()) if every chunk ends before t.
+        """
+        t = as_utc(t)
+        for i, chunk in enumerate(self.__chunks):
+            if chunk.get_end() is not None and chunk.get_end() >= t:
+                return i
+        return len(self.__chunks)
+
+    def lines(self, start: datetime.datetime | None = None, end: datetime.datetime | None = None,
+              topics: set[str] | None = None) -> Iterator[str]:
+        """Iterate over the lines of a time range and topics, in recorded order.
+
+        Only the chunks whose index entry overlaps the range and holds one of the topics are
+        decompressed. Lines without a timestamp, such as the initial state of every topic, are
+        returned with the chunk they are in.
+
+        Args:
+            start: Earliest feed time, None from the beginning.
+            end: Feed time to stop before, None to the end.
+            topics: Topics to return, None for all.
+
+        Yields:
+            Lines without line breaks.
+        """
+        start, end = as_utc(start), as_utc(end)
+        for chunk in self.__chunks:
+            if not chunk.overlaps(start, end) or (topics is not None and not topics & chunk.get_topics()):
+                continue
+            for line in self.read_chunk(chunk):
+                if topics is not None and line_topic(line) not in topics:
+                    continue
+                if start is not None or end is not None:
+                    t = line_time(line)
+                    if t is not None and ((start is not None and t < start) or (end is not None and t >= end)):
+                        continue
+                yield line
+
+
+class ArchiveTail:
+    """Follows an archive being written, with the interface of TailReader.
+
+    read_lines() returns the lines of the chunks indexed since the previous call. The offset is
+    the end of the last chunk returned in the data file, so a checkpoint of it resumes at the
+    next chunk.
+
+    Attributes:
+        __reader: Reads the index and the chunks.
+        __log: Logger instance for logging messages.
+        __offset: Byte offset in the data file just after the last chunk returned.
+        __next: Index of the next chunk to return.
+        __resets: Number of times reading restarted from the beginning.
+    """
+
+    def __init__(self, path: str | Path, log, offset: int = 0):
+        """Initialize ArchiveTail.
+
+        Args:
+            path: Path of the data file. It does not need to exist yet.
+            log: Logger instance for logging messages.
+            offset: Byte offset of the data file to start reading from, a chunk boundary.
+        """
+        self.__reader = ArchiveReader(path)
+        self.__log = log
+        self.__offset = offset
+        self.__next = 0
+        self.__resets = 0
+
+    def get_path(self) -> Path:
+        return self.__reader.get_path()
+
+    def get_offset(self) -> int:
+        return self.__offset
+
+    def get_resets(self) -> int:
+        return self.__resets
+
+    def read_lines(self) -> list[str]:
+        """Read the lines of the chunks indexed since the previous call.
+
+        Returns:
+            New lines without trailing line breaks. Empty if no chunk was added.
+        """
+        try:
+            size = os.path.getsize(self.get_path())
+        except FileNotFoundError:
+            return []
+        if size < self.__offset:
+            self.__log.warning("archive was truncated, reading from the beginning %s", self.get_path())
+            self.__reader = ArchiveReader(self.get_path())
+            self.__offset = 0
+            self.__next = 0
+            self.__resets += 1
+        else:
+            self.__reader.refresh()
+        lines = []
+        chunks = self.__reader.get_chunks()
+        while self.__next < len(chunks):
+            chunk = chunks[self.__next]
+            self.__next += 1
+            if chunk.get_offset() < self.__offset:
+                continue
+            lines.extend(self.__reader.read_chunk(chunk))
+            self.__offset = chunk.get_end_offset()
+        return lines
+
+
+def open_reader(path: str | Path, log, offset: int = 0) -> TailReader | ArchiveTail:
+    """Open a follower of a recording, an archive or a plain text file by its suffix.
+
+    Args:
+        path: Path of the recording.
+        log: Logger instance for logging messages.
+        offset: Byte offset to start reading from.
+
+    Returns:
+        ArchiveTail for an archive, TailReader otherwise.
+    """
+    if is_archive(path):
+        return ArchiveTail(path, log, offset)
+    return TailReader(path, log, offset)
+
+
+def pack(source: str | Path, path: str | Path, codec: str | None = None, chunk_lines: int = 4096) -> int:
+    """Pack a plain recording into a new archive.
+
+    Args:
+        source: Plain text recording.
+        path: Archive to write.
+        codec: Codec of the chunks, None for zstd when installed.
+        chunk_lines: Lines per chunk.
+
+    Returns:
+        Number of chunks written.
+    """
+    with open(source, 'r', encoding='utf-8') as file, ArchiveWriter(path, 'w', codec, chunk_lines) as writer:
+        for line in file:
+            writer.write(line if line.endswith('\n') else line + '\n')
+        writer.seal()
+        return writer.get_chunks()
+
+
+def __main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    packing = commands.add_parser('pack', help="pack a recording into an archive")
+    packing.add_argument('source', type=Path, help="recorded SignalRClient file")
+    packing.add_argument('archive', type=Path, help=f"archive to write, ending in {SUFFIX}")
+    packing.add_argument('--codec', choices=(ZSTD, ZLIB), help="default zstd when installed, else zlib")
+    packing.add_argument('--chunk-lines', type=int, default=4096, help="lines per chunk (default 4096)")
+    printing = commands.add_parser('cat', help="print the lines of a time range or topic")
+    printing.add_argument('archive', type=Path, help="archive to read")
+    printing.add_argument('--start', type=decoder.parse_time, help="earliest feed time (UTC)")
+    printing.add_argument('--end', type=decoder.parse_time, help="feed time to stop before (UTC)")
+    printing.add_argument('--topic', action='append', help="topic to print, repeatable (default all)")
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        chunks = pack(args.source, args.archive, args.codec, args.chunk_lines)
+        size = os.path.getsize(args.archive)
+        print(f"{chunks} chunks, {size} bytes ({size / max(os.path.getsize(args.source), 1):.1%} of the source)")
+    else:
+        reader = ArchiveReader(args.archive)
+        for line in reader.lines(args.start, args.end, set(args.topic) if args.topic else None):
+            print(line)
+
+
+if __name__ == "__main__":
+    __main()
@@ -0,0 +1,276 @@
+"""Catch up with a recording in parallel when the tracker starts mid-session.
+
+Started an hour into a session, the tracker would otherwise decode and handle the whole file
+line by line before drawing its first chart. Instead, the unread part of the file is memory
+mapped and split at line boundaries into chunks, which a process pool decodes:
+
+- CarData.z and Position.z lines, most of the bytes of a recording, are inflated and turned
+  into per-driver sample arrays, concatenated over the chunk.
+- The other lines are rewritten into one JSON array text (see decoder.to_json), which the
+  tracker parses with a single json.loads call. Decoded dicts are not returned, as pickling
+  them back costs more than decoding them.
+
+The results are applied to the race in file order, which is the order the live pipeline would
+apply them in, so the race ends up in the same state. Reading then continues from the end of
+the last complete line with the usual tail reader.
+"""
+import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Iterator
+
+import numpy
+
+from tracker import decoder, telemetry
+from tracker.archive import line_topic
+from tracker.datasets import CAR_DATA, TRACK_POSITIONS
+from tracker.pools import process_pool
+
+# bytes per chunk handed to a worker; large enough for the pickling of a result not to dominate
+CHUNK_BYTES = 4 << 20
+
+
+class ChunkResult:
+    """Decoded content of one chunk of the source file.
+
+    Attributes:
+        __begin: Byte offset of the first line of the chunk.
+        __end: Byte offset just after the last line of the chunk.
+        __text: JSON array of the messages other than telemetry, in file order.
+        __messages: Number of messages in text.
+        __car_data: Map of driver number -> (sample times, samples x CAR_COLUMNS values).
+        __positions: Map of driver number -> (sample times, samples x POSITION_COLUMNS values).
+        __invalid: Lines that are not valid messages.
+        __errors: (error, topic) of the telemetry lines whose payload could not be inflated.
+    """
+
+    def __init__(self, begin: int, end: int, text: str, messages: int, car_data: dict, positions: dict,
+                 invalid: list[str], errors: list[tuple[str, str]]):
+        self.__begin = begin
+        self.__end = end
+        self.__text = text
+        self.__messages = messages
+        self.__car_data = car_data
+        self.__positions = positions
+        self.__invalid = invalid
+        self.__errors = errors
+
+    def get_begin(self) -> int:
+        return self.__begin
+
+    def get_end(self) -> int:
+        return self.__end
+
+    def get_text(self) -> str:
+        return self.__text
+
+    def get_messages(self) -> int:
+        return self.__messages
+
+    def get_car_data(self) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+        return self.__car_data
+
+    def get_positions(self) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+        return self.__positions
+
+    def get_invalid(self) -> list[str]:
+        return self.__invalid
+
+    def get_errors(self) -> list[tuple[str, str]]:
+        return self.__errors
+
+
+def split(path: str | Path, start: int = 0, chunk_bytes: int = CHUNK_BYTES) -> tuple[list[tuple[int, int]], int]:
+    """Split the complete lines of a file after an offset into chunks.
+
+    Args:
+        path: Path to the recorded feed.
+        start: Byte offset to start from, at the beginning of a line.
+        chunk_bytes: Approximate size of a chunk.
+
+    Returns:
+        (begin, end) byte ranges of the chunks, each ending just after a line break, and the
+        offset just after the last complete line, where following the file continues.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size <= start:
+            return [], start
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # a partly written last line is left to the tail reader
+            end = data.rfind(b'\n', start) + 1
+            if end <= start:
+                return [], start
+            ranges = []
+            begin = start
+            while begin < end:
+                cut = data.find(b'\n', min(begin + chunk_bytes, end) - 1) + 1
+                ranges.append((begin, cut))
+                begin = cut
+            return ranges, end
+
+
+def read_lines(path: str | Path, begin: int, end: int) -> list[str]:
+    """Read the lines of a chunk of the source file."""
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return data[begin:end].decode('utf-8', errors='replace').splitlines()
+
+
+def decode_range(path: str | Path, begin: int, end: int) -> ChunkResult:
+    """Decode a chunk of the source file, in a backfill worker.
+
+    Args:
+        path: Path to the recorded feed.
+        begin: Byte offset of the first line of the chunk.
+        end: Byte offset just after the last line of the chunk.
+
+    Returns:
+        The decoded chunk.
+    """
+    texts = []
+    car_data: dict[int, list[tuple[numpy.ndarray, numpy.ndarray]]] = {}
+    positions: dict[int, list[tuple[numpy.ndarray, numpy.ndarray]]] = {}
+    invalid = []
+    errors = []
+    for line in read_lines(path, begin, end):
+        line = line.strip()
+        if not line:
+            continue
+        topic = line_topic(line)
+        try:
+            if topic not in telemetry.COMPRESSED:
+                texts.append(decoder.to_json(line))
+                continue
+            msg = decoder.decode(line)
+        except ValueError:
+            invalid.append(line)
+            continue
+        try:
+            msg = telemetry.expand(msg)
+        except ValueError as e:
+            errors.append((str(e), topic))
+            continue
+        if not isinstance(msg, list) or len(msg) < 3:
+            # left to Race.handle_message, which logs it
+            texts.append(json.dumps(msg))
+        elif msg[0] == 'CarData':
+            _collect(car_data, telemetry.car_data_arrays(msg[1]))
+        elif msg[0] == 'Position':
+            _collect(positions, telemetry.position_arrays(msg[1]))
+    return ChunkResult(begin, end, f"[{','.join(texts)}]", len(texts), _concatenate(car_data),
+                       _concatenate(positions), invalid, errors)
+
+
+def _collect(into: dict[int, list], arrays: dict[int, tuple[numpy.ndarray, numpy.ndarray]]):
+    for no, samples in arrays.items():
+        into.setdefault(no, []).append(samples)
+
+
+def _concatenate(parts: dict[int, list]) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+    # one pair of arrays per driver and chunk pickles far faster than one per message
+    return {no: (numpy.concatenate([times for times, _ in samples]),
+                 numpy.concatenate([values for _, values in samples]))
+            for no, samples in parts.items()}
+
+
+def decode_chunks(path: str | Path, ranges: list[tuple[int, int]], executor: Executor | None,
+                  window: int) -> Iterator[ChunkResult]:
+    """Decode chunks in a pool, yielding the results in file order.
+
+    Args:
+        path: Path to the recorded feed.
+        ranges: (begin, end) byte ranges of the chunks.
+        executor: Pool decoding the chunks, None to decode them in the calling process.
+        window: Number of chunks submitted ahead of the one being yielded, bounding the memory
+            held by results waiting their turn.
+
+    Yields:
+        The decoded chunks, in the order of ranges.
+    """
+    if executor is None:
+        for begin, end in ranges:
+            yield decode_range(path, begin, end)
+        return
+    futures = deque()
+    remaining = iter(ranges)
+    for begin, end in remaining:
+        futures.append(executor.submit(decode_range, path, begin, end))
+        if len(futures) >= window:
+            break
+    while futures:
+        result = futures.popleft().result()
+        for begin, end in remaining:
+            futures.append(executor.submit(decode_range, path, begin, end))
+            break
+        yield result
+
+
+def apply(race, path: str | Path, result: ChunkResult):
+    """Apply a decoded chunk to the race, the way the live pipeline would apply its lines.
+
+    Args:
+        race: Race to update.
+        path: Path to the recorded feed the chunk was decoded from.
+        result: Chunk decoded by decode_range.
+    """
+    log = race.get_config().get_log()
+    for error, topic in result.get_errors():
+        log.warning("%s %s", error, topic)
+    try:
+        messages = json.loads(result.get_text())
+    except ValueError:
+        messages = None
+    if messages is None:
+        # a line rewritten by the fast path is not a valid message; handle the chunk line by line
+        # to log it as read
+        invalid = set(result.get_invalid())
+        for line in read_lines(path, result.get_begin(), result.get_end()):
+            line = line.strip()
+            if line and (line_topic(line) not in telemetry.COMPRESSED or line in invalid):
+                race.handle(line)
+    else:
+        for line in result.get_invalid():
+            log.warning("Undecodable message %s", line)
+        for msg in messages:
+            race.handle_message(msg)
+    store = race.get_telemetry_store()
+    if store.extend_car_data(result.get_car_data()):
+        race.mark_dirty(CAR_DATA)
+    if store.extend_positions(result.get_positions()):
+        race.mark_dirty(TRACK_POSITIONS)
+
+
+def backfill(race, path: str | Path, offset: int, workers: int | None = None,
+             chunk_bytes: int = CHUNK_BYTES) -> int:
+    """Handle the complete lines of a source file after an offset, decoding them in parallel.
+
+    Args:
+        race: Race to update.
+        path: Path to the recorded feed, a plain text recording.
+        offset: Byte offset to start from, e.g. the one restored from a checkpoint.
+        workers: Number of decoding processes, None for one per CPU, 0 to decode in this process.
+        chunk_bytes: Approximate size of the chunks handed to the workers.
+
+    Returns:
+        Byte offset just after the last line handled, to follow the file from.
+    """
+    ranges, end = split(path, offset, chunk_bytes)
+    if not ranges:
+        return offset
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    log = race.get_config().get_log()
+    log.info("backfilling %d bytes of %s in %d chunks with %d workers", end - offset, path, len(ranges), workers)
+    # the tracker's other threads may already run, e.g. another feed's dashboard server
+    executor = process_pool(min(workers, len(ranges))) if workers > 0 and len(ranges) > 1 else None
+    try:
+        for result in decode_chunks(path, ranges, executor, 2 * workers):
+            apply(race, path, result)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    race.apply_pending()
+    race.flush_logs()
+    return end
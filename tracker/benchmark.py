@@ -0,0 +1,400 @@
+"""Benchmarks for the live tracker.
+
+Usage:
+    python -m tracker.benchmark decoder live/data/source/2025_AbuDhabi_Race.txt
+    python -m tracker.benchmark logs --messages 2000
+    python -m tracker.benchmark race --rate 50 --burst-every 90 --burst-size 200
+    python -m tracker.benchmark plotter --repeat 5
+    python -m tracker.benchmark telemetry --cars 20 --seconds 600 --window 300
+    python -m tracker.benchmark backfill --laps 60 --workers 8
+    python -m tracker.benchmark tables --tables 20 --tabs 2
+    python -m tracker.benchmark livedata --laps 58 --rate 58 --cycles 6
+
+race, plotter, telemetry, backfill, tables and livedata run in a fresh process each, so that the peak RSS
+they report is their own.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import util
+from tracker import decoder
+from tracker.synthetic import SyntheticFeed, offline_session, telemetry_lines
+
+
+def legacy_decode(line: str):
+    """Decode a line the way Race.handle did before tracker.decoder existed.
+
+    Args:
+        line: One line of the recorded feed.
+
+    Returns:
+        The decoded message.
+    """
+    return json.loads(line.replace("'", '"').replace('True', 'true').replace('False', 'false'))
+
+
+def measure(decode, lines: list[str], repeat: int) -> tuple[float, int]:
+    """Decode every line repeatedly and report the best throughput.
+
+    Args:
+        decode: Function decoding one line.
+        lines: Lines to decode.
+        repeat: Number of passes over the lines; the fastest pass is reported.
+
+    Returns:
+        Messages per second of the fastest pass and the number of lines that failed to decode.
+    """
+    best = float('inf')
+    errors = 0
+    for _ in range(repeat):
+        errors = 0
+        started = time.perf_counter()
+        for line in lines:
+            try:
+                decode(line)
+            except ValueError:
+                errors += 1
+        best = min(best, time.perf_counter() - started)
+    return len(lines) / best, errors
+
+
+def bench_decoder(source: Path, repeat: int):
+    with source.open('r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    print(f"{len(lines)} lines from {source}")
+    for name, decode in (("legacy", legacy_decode), ("decoder", decoder.decode)):
+        rate, errors = measure(decode, lines, repeat)
+        print(f"{name:>8}: {rate:12,.0f} msg/s, {errors} parse errors")
+
+
+def bench_logs(messages: int):
+    lines = [util.join_with_colon(f"2025-12-07T13:{i // 60 % 60:02d}:{i % 60:02d}Z",
+                                  str({'Category': 'Flag', 'Flag': 'YELLOW', 'Message': f"YELLOW IN TRACK SECTOR {i}"}))
+             for i in range(messages)]
+    with tempfile.TemporaryDirectory() as d:
+        started = time.perf_counter()
+        for line in lines:
+            util.write_to_file_top(os.path.join(d, 'top.txt'), line)
+        print(f"write_to_file_top: {(time.perf_counter() - started) * 1000:10.1f} ms for {messages} messages")
+
+        started = time.perf_counter()
+        with util.AppendLog(os.path.join(d, 'append.txt')) as log_file:
+            for line in lines:
+                log_file.write(line)
+        print(f"        AppendLog: {(time.perf_counter() - started) * 1000:10.1f} ms for {messages} messages")
+
+        started = time.perf_counter()
+        util.read_newest_first(os.path.join(d, 'append.txt'))
+        print(f"read_newest_first: {(time.perf_counter() - started) * 1000:10.1f} ms")
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    """Get the 50th and 99th percentile of samples.
+
+    Args:
+        samples: At least one sample.
+
+    Returns:
+        p50 and p99.
+    """
+    if len(samples) == 1:
+        return samples[0], samples[0]
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49], cuts[98]
+
+
+def peak_rss_mb() -> float:
+    """Get the peak resident set size of this process in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def race_handle(cars: int, laps: int, rate: float, burst_every: float, burst_size: int) -> str:
+    """Feed a synthetic race into Race.handle one message at a time.
+
+    Returns:
+        Report of throughput, per-message latency and peak RSS.
+    """
+    from tracker.tracking import Config, Race
+    lines = list(SyntheticFeed(cars, laps, rate, burst_every, burst_size).lines())
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as d:
+        race = Race(Config(logging.getLogger(__name__), d))
+        latencies = []
+        started = time.perf_counter()
+        for line in lines:
+            t = time.perf_counter_ns()
+            race.handle(line)
+            latencies.append((time.perf_counter_ns() - t) / 1000)
+        seconds = time.perf_counter() - started
+        race.close()
+    p50, p99 = percentiles(latencies)
+    return (f"Race.handle: {len(lines)} messages, {len(lines) / seconds:10,.0f} msg/s, "
+            f"p50 {p50:.1f} us, p99 {p99:.1f} us, peak RSS {peak_rss_mb():.0f} MB "
+            f"({peak_rss_mb() - baseline:+.0f} MB over the generated feed)")
+
+
+def plotter_functions(repeat: int) -> str:
+    """Draw every chart of a synthetic 20-car, 70-lap race repeatedly.
+
+    Returns:
+        Report of per-call latency of each plotter function and peak RSS.
+    """
+    from tracker import plotter
+    from tracker.render import running_order
+    from tracker.tracking import Config, Race
+    logging.getLogger(plotter.__name__).setLevel(logging.WARNING)
+    report = []
+    with tempfile.TemporaryDirectory() as d:
+        plotter.images_path = d
+        race = Race(Config(logging.getLogger(__name__), d))
+        for line in SyntheticFeed().lines():
+            race.handle(line)
+        laps, order = race.get_lap_store(), running_order(race)
+        functions = {
+            'plot_tyres': lambda: plotter.plot_tyres(race.get_stint_store(), order),
+            'plot_gap_to_ahead': lambda: plotter.plot_gap_to_ahead(laps, "gap_ahead", 6),
+            'plot_gap_to_top': lambda: plotter.plot_gap_to_top(laps, "gap_top", 30),
+            'plot_positions': lambda: plotter.plot_positions(laps, "position"),
+            'plot_laptime': lambda: plotter.plot_laptime(laps, "laptime", 7),
+            'plot_laptime_diff': lambda: plotter.plot_laptime_diff(laps, order, "laptime_diffs"),
+            'plot_weather': lambda: plotter.plot_weather(race.get_weather_store()),
+        }
+        for name, plot in functions.items():
+            latencies = []
+            try:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    plot()
+                    latencies.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                report.append(f"{name:>18}: failed, {type(e).__name__}: {str(e).strip().splitlines()[0]}")
+                continue
+            p50, p99 = percentiles(latencies)
+            report.append(f"{name:>18}: p50 {p50:8.1f} ms, p99 {p99:8.1f} ms, first {latencies[0]:8.1f} ms")
+        race.close()
+    report.append(f"peak RSS {peak_rss_mb():.0f} MB")
+    return "\n".join(report)
+
+
+def telemetry_handle(cars: int, seconds: int, window: float) -> str:
+    """Feed synthetic CarData.z and Position.z lines at 4 Hz into Race.handle.
+
+    Returns:
+        Report of decoding throughput against the feed rate, per-message latency and memory.
+    """
+    from tracker.telemetry import TelemetryStore
+    from tracker.tracking import Config, Race
+    lines = list(telemetry_lines(cars, seconds))
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as d:
+        race = Race(Config(logging.getLogger(__name__), d), TelemetryStore(window))
+        latencies = []
+        started = time.perf_counter()
+        for line in lines:
+            t = time.perf_counter_ns()
+            race.handle(line)
+            latencies.append((time.perf_counter_ns() - t) / 1000)
+        elapsed = time.perf_counter() - started
+        race.close()
+    store: TelemetryStore = race.get_telemetry_store()
+    samples = store.get_samples()
+    held = sum(len(store.get_car_data(no)) + len(store.get_positions(no)) for no in store.get_driver_numbers())
+    p50, p99 = percentiles(latencies)
+    return (f"telemetry: {len(lines)} messages, {samples:,} samples in {elapsed:.2f} s, "
+            f"{samples / elapsed:,.0f} samples/s = {seconds / elapsed:.0f}x the {cars}-car 4 Hz feed\n"
+            f"per message p50 {p50:.0f} us, p99 {p99:.0f} us; {held:,} samples held for a {window:.0f} s window, "
+            f"peak RSS {peak_rss_mb():.0f} MB ({peak_rss_mb() - baseline:+.0f} MB over the generated feed)")
+
+
+def backfill_handle(cars: int, laps: int, rate: float, workers: int | None) -> str:
+    """Catch up with a synthetic race recording with telemetry, serially and with tracker.backfill.
+
+    Returns:
+        Report of both times and the speedup.
+    """
+    import heapq
+    from tracker import backfill
+    from tracker.replay import message_time
+    from tracker.tracking import Config, Race
+    feed = list(SyntheticFeed(cars, laps, rate).lines())
+    duration = int((message_time(feed[-1]) - message_time(feed[0])).total_seconds())
+    lines = list(heapq.merge(feed, telemetry_lines(cars, duration), key=message_time))
+    log = logging.getLogger(__name__)
+    with tempfile.TemporaryDirectory() as d:
+        source = Path(d) / 'race.txt'
+        source.write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+        serial_path, backfill_path = Path(d) / 'serial', Path(d) / 'backfill'
+        serial_path.mkdir()
+        backfill_path.mkdir()
+        race = Race(Config(log, str(serial_path)), coalesce_window=0.2)
+        started = time.perf_counter()
+        with open(source, encoding='utf-8') as file:
+            for line in file:
+                race.handle(line.strip())
+        race.apply_pending()
+        race.flush_logs()
+        serial = time.perf_counter() - started
+        race.close()
+        race = Race(Config(log, str(backfill_path)), coalesce_window=0.2)
+        started = time.perf_counter()
+        backfill.backfill(race, source, 0, workers)
+        parallel = time.perf_counter() - started
+        race.close()
+        size = source.stat().st_size
+    return (f"backfill: {len(lines)} lines, {size / 2 ** 20:.0f} MB, {duration / 60:.0f} feed minutes\n"
+            f"serial Race.handle {serial:.2f} s, backfill with {workers if workers is not None else os.cpu_count()} "
+            f"workers on {os.cpu_count()} CPUs {parallel:.2f} s = {serial / parallel:.1f}x")
+
+
+def livedata_cycles(cars: int, laps: int, rate: float, cycles: int) -> str:
+    """Follow a growing synthetic recording the way track.py does: update the live data, then the session tables.
+
+    The Sessions are built offline (synthetic.offline_session) and the feed starts with the lines
+    fastf1 builds laps from (SyntheticFeed.session_lines). Each cycle sets the tables with
+    IncrementalSession.update() and, for comparison, with the session.load() track.py used to
+    call on a second Session.
+
+    Returns:
+        Report of the time of each cycle's live data update, IncrementalSession.update and session.load.
+    """
+    import fastf1
+    from tracker.livedata import IncrementalLiveTimingData
+    from tracker.livesession import IncrementalSession
+    logging.disable(logging.WARNING)
+    fastf1.set_log_level('ERROR')
+    lines = list(SyntheticFeed(cars, laps, rate).session_lines())
+    session = offline_session()
+    loaded_session = offline_session()
+    log = logging.getLogger(__name__)
+    report = [f"livedata: {len(lines)} lines of a {cars}-car, {laps}-lap race in {cycles} cycles"]
+    with tempfile.TemporaryDirectory() as d:
+        source = Path(d) / 'race.txt'
+        data = IncrementalLiveTimingData(source, log)
+        tables = IncrementalSession(session, data)
+        step = -(-len(lines) // cycles)
+        for cycle in range(cycles):
+            with open(source, 'a', encoding='utf-8') as file:
+                file.writelines(line + '\n' for line in lines[cycle * step:(cycle + 1) * step])
+            started = time.perf_counter()
+            parsed = data.update()
+            updated = time.perf_counter()
+            tables.update()
+            built = time.perf_counter()
+            loaded_session.load(livedata=data, telemetry=False)
+            loaded = time.perf_counter()
+            report.append(f"cycle {cycle + 1}: update {parsed} new lines {updated - started:.2f} s, "
+                          f"IncrementalSession.update {built - updated:.3f} s, {len(session.laps)} laps, "
+                          f"session.load {loaded - built:.2f} s, {len(loaded_session.laps)} laps")
+    return "\n".join(report)
+
+
+def table_exports(tables: int, tabs: int) -> str:
+    """Export lap-difference-sized plotly tables with fig.write_image and with image_export.
+
+    Returns:
+        Report of the per-table export times and the browser startup of the long-lived renderer.
+    """
+    import random
+    from plotly import graph_objects
+    import image_export
+    rng = random.Random(0)
+    figures = [graph_objects.Figure(data=[graph_objects.Table(
+        header={'values': ['lap'] + [str(no) for no in range(1, 21)]},
+        cells={'values': [list(range(60, 1, -1))] + [[f"{rng.uniform(-1, 1):.3f}" for _ in range(59)]
+                                                    for _ in range(20)]})])
+        for _ in range(tables)]
+    with tempfile.TemporaryDirectory() as d:
+        one_shot = []
+        for i, fig in enumerate(figures):
+            started = time.perf_counter()
+            fig.write_image(os.path.join(d, f"one_shot_{i}.png"), width=1920, height=1080)
+            one_shot.append(time.perf_counter() - started)
+        renderer = image_export.FigureRenderer(tabs)
+        renderer.start()
+        persistent = []
+        for i, fig in enumerate(figures):
+            started = time.perf_counter()
+            [image] = renderer.render([(fig, 1920, 1080)])
+            Path(d, f"persistent_{i}.png").write_bytes(image)
+            persistent.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        renderer.render([(fig, 1920, 1080) for fig in figures])
+        batch = time.perf_counter() - started
+        renderer.close()
+    one_shot_p50, one_shot_p99 = percentiles(one_shot)
+    persistent_p50, persistent_p99 = percentiles(persistent)
+    return (f"tables: {tables} tables of 21 columns x 59 laps at 1920x1080\n"
+            f"fig.write_image      p50 {one_shot_p50 * 1000:6.0f} ms, p99 {one_shot_p99 * 1000:6.0f} ms per table\n"
+            f"image_export         p50 {persistent_p50 * 1000:6.0f} ms, p99 {persistent_p99 * 1000:6.0f} ms per table "
+            f"after a {renderer.get_startup_seconds():.2f} s browser startup\n"
+            f"image_export batch   {batch / tables * 1000:6.0f} ms per table with {tabs} tabs")
+
+
+def in_fresh_process(fn, *args):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def __main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='target', required=True)
+    p = sub.add_parser('decoder', help="line decoding throughput against the legacy json path")
+    p.add_argument('source', type=Path, help="recorded SignalRClient file")
+    p.add_argument('--repeat', type=int, default=5)
+    p = sub.add_parser('logs', help="race control log writing against write_to_file_top")
+    p.add_argument('--messages', type=int, default=2000)
+    p = sub.add_parser('race', help="Race.handle on a synthetic feed")
+    p.add_argument('--cars', type=int, default=20)
+    p.add_argument('--laps', type=int, default=70)
+    p.add_argument('--rate', type=float, default=0.0, help="average messages per feed second to pad up to")
+    p.add_argument('--burst-every', type=float, default=0.0, help="feed seconds between bursts")
+    p.add_argument('--burst-size', type=int, default=0, help="messages in a burst")
+    p = sub.add_parser('plotter', help="each plotter function on a synthetic 20-car, 70-lap race")
+    p.add_argument('--repeat', type=int, default=5)
+    p = sub.add_parser('telemetry', help="CarData.z and Position.z decoding into the ring buffers")
+    p.add_argument('--cars', type=int, default=20)
+    p.add_argument('--seconds', type=int, default=600, help="feed seconds to generate")
+    p.add_argument('--window', type=float, default=300.0, help="seconds kept per driver")
+    p = sub.add_parser('backfill', help="catching up with a race recording in parallel against Race.handle")
+    p.add_argument('--cars', type=int, default=20)
+    p.add_argument('--laps', type=int, default=60)
+    p.add_argument('--rate', type=float, default=30.0, help="average messages per feed second to pad up to")
+    p.add_argument('--workers', type=int, default=None, help="decoding processes (default one per CPU)")
+    p = sub.add_parser('tables', help="plotly table export with fig.write_image against image_export")
+    p.add_argument('--tables', type=int, default=20)
+    p.add_argument('--tabs', type=int, default=2, help="browser tabs of the long-lived renderer")
+    p = sub.add_parser('livedata', help="track.py cycles: incremental session tables against session.load")
+    p.add_argument('--cars', type=int, default=20)
+    p.add_argument('--laps', type=int, default=58)
+    p.add_argument('--rate', type=float, default=58.0, help="average messages per feed second to pad up to")
+    p.add_argument('--cycles', type=int, default=6, help="updates the recording is appended in")
+    args = parser.parse_args()
+    if args.target == 'decoder':
+        bench_decoder(args.source, args.repeat)
+    if args.target == 'logs':
+        bench_logs(args.messages)
+    if args.target == 'race':
+        print(in_fresh_process(race_handle, args.cars, args.laps, args.rate, args.burst_every, args.burst_size))
+    if args.target == 'plotter':
+        print(in_fresh_process(plotter_functions, args.repeat))
+    if args.target == 'telemetry':
+        print(in_fresh_process(telemetry_handle, args.cars, args.seconds, args.window))
+    if args.target == 'backfill':
+        print(in_fresh_process(backfill_handle, args.cars, args.laps, args.rate, args.workers))
+    if args.target == 'tables':
+        print(in_fresh_process(table_exports, args.tables, args.tabs))
+    if args.target == 'livedata':
+        print(in_fresh_process(livedata_cycles, args.cars, args.laps, args.rate, args.cycles))
+
+
+if __name__ == "__main__":
+    __main()
@@ -0,0 +1,126 @@
+"""Crash-safe snapshots of the Race state, so a restarted tracker only parses the tail of the source file."""
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Final
+
+VERSION: Final = 4
+# bytes at the start of the source file identifying the recording a checkpoint belongs to
+HEAD_BYTES: Final = 4096
+
+
+def source_head(source: str | Path, size: int) -> str:
+    """Hash the start of a source file.
+
+    A recording only ever grows, so its first bytes identify it even if it was copied or moved.
+
+    Args:
+        source: Path to the source file.
+        size: Number of bytes to hash.
+
+    Returns:
+        Hex digest of the first size bytes.
+    """
+    with open(source, 'rb') as file:
+        return hashlib.sha1(file.read(size)).hexdigest()
+
+
+def save(path: str | Path, race, source: str | Path, offset: int, log_names: tuple[str, ...]):
+    """Write the stores of a race and the consumed byte offset atomically.
+
+    The file is written next to the checkpoint and renamed over it, so a crash while saving
+    leaves the previous checkpoint intact.
+
+    Args:
+        path: Path to the checkpoint file.
+        race: Race whose stores are saved. Its logs must have been flushed.
+        source: Path to the source file the offset belongs to.
+        offset: Byte offset just after the last line handled by the race.
+        log_names: Names of the logs the race appends to in its logs path.
+    """
+    logs_path = race.get_config().get_logs_path()
+    state = {
+        'version': VERSION,
+        'source': str(source),
+        # only the consumed part is known not to change
+        'head': source_head(source, min(HEAD_BYTES, offset)),
+        'offset': offset,
+        'logs': {name: _size(os.path.join(logs_path, name)) for name in log_names},
+        'lap_store': race.get_lap_store(),
+        'stint_store': race.get_stint_store(),
+        'weather_store': race.get_weather_store(),
+        'pit_store': race.get_pit_store(),
+        'degradation_store': race.get_degradation_store(),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def restore(path: str | Path, race, source: str | Path, log) -> int | None:
+    """Restore the stores of a race from a checkpoint of the same source file.
+
+    The logs are cut back to their size at the checkpoint, so that the lines parsed again
+    from the offset are not written twice.
+
+    Args:
+        path: Path to the checkpoint file.
+        race: Race whose stores are replaced.
+        source: Path to the source file about to be followed.
+        log: Logger instance for logging messages.
+
+    Returns:
+        Byte offset to continue reading the source file from, or None if there is no usable
+        checkpoint and the source has to be read from the beginning.
+    """
+    try:
+        with open(path, 'rb') as file:
+            state = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # a corrupt or incompatible file can fail in many ways; parsing the source again is always safe
+        log.warning("checkpoint is unreadable, ignoring it %s: %s", path, e)
+        return None
+    if not isinstance(state, dict) or state.get('version') != VERSION:
+        log.warning("checkpoint has version %s, expected %s, ignoring it",
+                    state.get('version') if isinstance(state, dict) else None, VERSION)
+        return None
+    try:
+        if (os.path.getsize(source) < state['offset']
+                or source_head(source, min(HEAD_BYTES, state['offset'])) != state['head']):
+            log.warning("checkpoint belongs to another recording of %s, ignoring it", state['source'])
+            return None
+        stores = (state['lap_store'], state['stint_store'], state['weather_store'], state['pit_store'],
+                  state['degradation_store'])
+        logs = dict(state['logs'])
+    except FileNotFoundError:
+        return None
+    except (KeyError, TypeError, ValueError) as e:
+        log.warning("checkpoint is unreadable, ignoring it %s: %s", path, e)
+        return None
+    current = (race.get_lap_store(), race.get_stint_store(), race.get_weather_store(), race.get_pit_store(),
+               race.get_degradation_store())
+    if any(type(store) is not type(expected) for store, expected in zip(stores, current)):
+        log.warning("checkpoint holds stores of other types, ignoring it %s", path)
+        return None
+
+    logs_path = race.get_config().get_logs_path()
+    for name, size in logs.items():
+        log_path = os.path.join(logs_path, name)
+        if _size(log_path) > size:
+            os.truncate(log_path, size)
+    race.restore(*stores)
+    log.info("restored checkpoint %s at offset %d", path, state['offset'])
+    return state['offset']
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,134 @@
+import collections
+import datetime
+
+# fields of a fragment that start a new lap; the fragments before it belong to the previous lap
+LAP_BOUNDARY = ('NumberOfLaps', 'LastLapTime')
+
+
+def merge(into: dict, update: dict):
+    """Merge a TimingData fragment into another in place, later values winning.
+
+    Nested dicts such as Sectors or IntervalToPositionAhead are merged key by key, the way the
+    feed means its partial updates; any other value replaces the previous one.
+
+    Args:
+        into: Fragment merged so far.
+        update: Later fragment.
+    """
+    for key, value in update.items():
+        current = into.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merge(current, value)
+        elif isinstance(value, dict):
+            into[key] = merge_copy(value)
+        else:
+            into[key] = value
+
+
+def merge_copy(fragment: dict) -> dict:
+    """Copy the nested dicts of a fragment, so that merging into it never changes a decoded message."""
+    return {key: merge_copy(value) if isinstance(value, dict) else value for key, value in fragment.items()}
+
+
+class TimingCoalescer:
+    """Merges the TimingData fragments of each driver over a window of feed time.
+
+    Around pit stops and restarts the feed sends many small fragments per driver per second.
+    Held back for the window, they are merged into one update per driver, so the handler runs
+    once per driver instead of once per fragment. A fragment completing a lap closes the
+    driver's pending update first, so positions and gaps sent before it still apply to the
+    previous lap, as when the fragments are handled one by one.
+
+    Attributes:
+        __window: Feed time a pending update collects fragments for.
+        __pending: Map of driver -> (merged fragment, number of fragments), in first-seen order.
+        __opened: Feed time of the first fragment pending, None if nothing is pending.
+        __fragments: Number of fragments added.
+        __updates: Number of merged updates returned.
+        __histogram: Map of fragments per update -> number of updates.
+    """
+
+    def __init__(self, window: float = 0.2):
+        """Initialize TimingCoalescer.
+
+        Args:
+            window: Seconds of feed time to merge fragments over.
+        """
+        self.__window = datetime.timedelta(seconds=window)
+        self.__pending: dict[str, list] = {}
+        self.__opened: datetime.datetime | None = None
+        self.__fragments = 0
+        self.__updates = 0
+        self.__histogram: collections.Counter[int] = collections.Counter()
+
+    def get_fragments(self) -> int:
+        return self.__fragments
+
+    def get_updates(self) -> int:
+        return self.__updates
+
+    def get_histogram(self) -> dict[int, int]:
+        """Get how many raw fragments collapsed into each applied update.
+
+        Returns:
+            Map of fragments per update -> number of updates.
+        """
+        return dict(sorted(self.__histogram.items()))
+
+    def get_pending(self) -> int:
+        """Get the number of drivers with an update held back."""
+        return len(self.__pending)
+
+    def add(self, data, t: datetime.datetime | None) -> list[dict]:
+        """Add a TimingData message.
+
+        Args:
+            data: The message data, {'Lines': {driver: fragment}}.
+            t: Feed time of the message, None if unknown.
+
+        Returns:
+            TimingData messages ready to be handled, in order; empty while the window is open.
+        """
+        ready = []
+        if t is not None and self.__opened is not None and t - self.__opened >= self.__window:
+            ready.extend(self.flush())
+        lines = data.get('Lines') if isinstance(data, dict) else None
+        if not isinstance(lines, dict):
+            return ready
+        for driver, fragment in lines.items():
+            if not isinstance(fragment, dict):
+                continue
+            if driver in self.__pending and any(key in fragment for key in LAP_BOUNDARY):
+                ready.append(self.__pop(driver))
+            pending = self.__pending.setdefault(driver, [{}, 0])
+            merge(pending[0], fragment)
+            pending[1] += 1
+            self.__fragments += 1
+        if self.__pending and self.__opened is None:
+            self.__opened = t
+        return ready
+
+    def flush(self) -> list[dict]:
+        """Release every pending update.
+
+        Returns:
+            One TimingData message holding the merged fragment of each pending driver, or none.
+        """
+        self.__opened = None
+        if not self.__pending:
+            return []
+        lines = {}
+        for driver, (fragment, count) in self.__pending.items():
+            lines[driver] = fragment
+            self.__record(count)
+        self.__pending = {}
+        return [{'Lines': lines}]
+
+    def __pop(self, driver: str) -> dict:
+        fragment, count = self.__pending.pop(driver)
+        self.__record(count)
+        return {'Lines': {driver: fragment}}
+
+    def __record(self, count: int):
+        self.__updates += 1
+        self.__histogram[count] += 1
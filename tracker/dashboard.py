@@ -0,0 +1,468 @@
+"""Live dashboard: one HTML page drawing the race with plotly.js, updated over Server-Sent Events.
+
+Instead of rendering images on the server, the tracker publishes what changed in the race
+state since the previous tick as compact JSON; browsers keep the data and redraw themselves.
+"""
+import datetime
+import json
+import math
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy
+
+import constants
+from tracker.domain.weather import COLUMNS as WEATHER_COLUMNS
+
+# seconds between keep-alive comments on an idle event stream
+KEEPALIVE = 15.0
+# deltas waiting for a slow client before it is sent a snapshot instead
+CLIENT_QUEUE_SIZE = 64
+_RESYNC = object()
+_CLOSE = object()
+
+
+def _number(value) -> float | None:
+    """Convert a store value to JSON, NaN becoming null."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 3)
+
+
+def driver_style(no: int) -> dict:
+    """Get the colour, dash and label of a driver's lines, as the plotter draws them.
+
+    Args:
+        no: Car number.
+
+    Returns:
+        Map with 'color', 'dash' and 'label'.
+    """
+    year = datetime.datetime.now().year
+    return {'color': constants.team_color.get(year, {}).get(no, '#808080'),
+            'dash': 'solid' if constants.camera.get(year, {}).get(no, 'black') == 'black' else 'dash',
+            'label': constants.abbreviation.get(year, {}).get(no, str(no))}
+
+
+class Deltas:
+    """Compares the race stores with what was already published, one tick at a time.
+
+    A delta holds only the rows that changed, keyed like the stores:
+    ``{'drivers': {no: style}, 'laps': {no: [[lap, time, position, gap_to_top, gap_to_ahead], ...]},
+    'stints': {no: [[stint, compound, new, start_laps, total_laps], ...]},
+    'weather': [[epoch_ms, air_temp, rain_fall, track_temp, wind_speed], ...]}``.
+    Unknown values are null; keys without changes are left out.
+
+    Attributes:
+        __laps: Map of driver number -> columns x laps array last published.
+        __stints: Map of driver number -> stint rows last published.
+        __weather: Map of epoch milliseconds -> weather row last published.
+    """
+
+    def __init__(self):
+        self.__laps: dict[int, numpy.ndarray] = {}
+        self.__stints: dict[int, list[list]] = {}
+        self.__weather: dict[int, list] = {}
+
+    def collect(self, race) -> dict:
+        """Get what changed since the previous call and remember it as published.
+
+        Args:
+            race: Race whose stores are read.
+
+        Returns:
+            The delta, empty if nothing changed.
+        """
+        delta = {}
+        drivers = {}
+        laps = {}
+        lap_store = race.get_lap_store()
+        for no in lap_store.get_driver_numbers():
+            if no not in self.__laps:
+                drivers[str(no)] = driver_style(no)
+            rows = self.__lap_rows(lap_store, no)
+            if rows:
+                laps[str(no)] = rows
+        stints = {}
+        stint_store = race.get_stint_store()
+        for no in stint_store.get_driver_numbers():
+            rows = [[s.get_stint_number(), s.get_compound(), bool(s.get_is_new()), int(s.get_start_laps()),
+                     int(s.get_total_laps())] for s in stint_store.get_stints(no)]
+            previous = self.__stints.get(no, [])
+            changed = [row for i, row in enumerate(rows) if i >= len(previous) or previous[i] != row]
+            if changed:
+                stints[str(no)] = changed
+                self.__stints[no] = rows
+        weather = self.__weather_rows(race.get_weather_store())
+        for key, value in (('drivers', drivers), ('laps', laps), ('stints', stints), ('weather', weather)):
+            if value:
+                delta[key] = value
+        return delta
+
+    def __lap_rows(self, lap_store, no: int) -> list[list]:
+        present = lap_store.get_present(no)
+        current = numpy.vstack([lap_store.get_times(no), lap_store.get_positions(no),
+                                lap_store.get_gaps_to_top(no), lap_store.get_gaps_to_ahead(no)])
+        previous = numpy.full_like(current, numpy.nan)
+        published = self.__laps.get(no)
+        if published is not None:
+            n = min(published.shape[1], current.shape[1])
+            previous[:, :n] = published[:, :n]
+        same = (current == previous) | (numpy.isnan(current) & numpy.isnan(previous))
+        changed = numpy.flatnonzero(~same.all(axis=0) & present)
+        self.__laps[no] = current.copy()
+        return [[int(lap)] + [_number(v) for v in current[:, lap]] for lap in changed]
+
+    def __weather_rows(self, weather_store) -> list[list]:
+        times = weather_store.get_times().astype('datetime64[ms]').astype(numpy.int64)
+        values = [weather_store.get_values(column) for column in WEATHER_COLUMNS]
+        rows = []
+        for i, t in enumerate(times):
+            row = [int(t)] + [_number(column[i]) for column in values]
+            if self.__weather.get(row[0]) != row:
+                self.__weather[row[0]] = row
+                rows.append(row)
+        return rows
+
+
+def merge(state: dict, delta: dict):
+    """Apply a delta to an accumulated state of the same shape, as the page does.
+
+    Args:
+        state: Map of 'drivers', 'laps', 'stints' and 'weather' to rows keyed by their first value.
+        delta: Delta from Deltas.collect.
+    """
+    state['drivers'].update(delta.get('drivers', {}))
+    for key in ('laps', 'stints'):
+        for no, rows in delta.get(key, {}).items():
+            state[key].setdefault(no, {}).update((row[0], row) for row in rows)
+    state['weather'].update((row[0], row) for row in delta.get('weather', []))
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+class Dashboard:
+    """HTTP server of the live page, pushing each published delta to every connected browser.
+
+    publish() is called by the tracker between state updates, so the stores are never read while
+    they change; request threads only see the accumulated state and queued deltas. A browser that
+    falls CLIENT_QUEUE_SIZE deltas behind has them dropped and gets a fresh snapshot instead.
+
+    Attributes:
+        __log: Logger instance for logging messages.
+        __deltas: Diff against what was published.
+        __lock: Guards the state and the clients.
+        __state: Everything published so far, in delta form, for new clients.
+        __clients: Queues of the connected event streams.
+        __published: Number of non-empty deltas published.
+        __published_bytes: Total size of the published deltas.
+        __resyncs: Number of snapshots sent to clients that fell behind.
+        __server: The HTTP server.
+        __thread: Thread serving requests.
+    """
+
+    def __init__(self, log, port: int = 0, host: str = '127.0.0.1'):
+        """Initialize Dashboard.
+
+        Args:
+            log: Logger instance for logging messages.
+            port: Port to listen on, 0 for any free port.
+            host: Address to listen on.
+        """
+        self.__log = log
+        self.__deltas = Deltas()
+        self.__lock = threading.Lock()
+        self.__state: dict = {'drivers': {}, 'laps': {}, 'stints': {}, 'weather': {}}
+        self.__clients: set[queue.Queue] = set()
+        self.__published = 0
+        self.__published_bytes = 0
+        self.__resyncs = 0
+        self.__server = ThreadingHTTPServer((host, port), _handler(self))
+        self.__server.daemon_threads = True
+        self.__thread: threading.Thread | None = None
+
+    def get_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def get_log(self):
+        return self.__log
+
+    def get_published(self) -> int:
+        return self.__published
+
+    def get_published_bytes(self) -> int:
+        return self.__published_bytes
+
+    def get_resyncs(self) -> int:
+        return self.__resyncs
+
+    def get_client_count(self) -> int:
+        with self.__lock:
+            return len(self.__clients)
+
+    def start(self):
+        """Serve in a background thread."""
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="dashboard", daemon=True)
+        self.__thread.start()
+        self.__log.info("dashboard at %s", self.get_url())
+
+    def stop(self):
+        """Close the event streams and stop serving."""
+        with self.__lock:
+            for client in self.__clients:
+                try:
+                    client.put_nowait(_CLOSE)
+                except queue.Full:
+                    # a stuck client would block the tracker; it is closing, so its backlog is of no use
+                    with client.mutex:
+                        client.queue.clear()
+                    client.put_nowait(_CLOSE)
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def publish(self, race) -> int:
+        """Push what changed in the race since the previous call to every connected browser.
+
+        Args:
+            race: Race whose stores are read; it must not change during the call.
+
+        Returns:
+            Size in bytes of the pushed delta, 0 if nothing changed.
+        """
+        delta = self.__deltas.collect(race)
+        if not delta:
+            return 0
+        message = _encode(delta)
+        with self.__lock:
+            merge(self.__state, delta)
+            self.__published += 1
+            self.__published_bytes += len(message)
+            for client in self.__clients:
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    # drop what the client did not read yet; the snapshot covers it
+                    with client.mutex:
+                        client.queue.clear()
+                    client.put_nowait(_RESYNC)
+                    self.__resyncs += 1
+        return len(message)
+
+    def subscribe(self) -> tuple[queue.Queue, bytes]:
+        """Register an event stream.
+
+        Returns:
+            The queue the following deltas are put on, and the snapshot of everything before them.
+        """
+        client: queue.Queue = queue.Queue(CLIENT_QUEUE_SIZE)
+        with self.__lock:
+            self.__clients.add(client)
+            return client, self.__snapshot()
+
+    def unsubscribe(self, client: queue.Queue):
+        with self.__lock:
+            self.__clients.discard(client)
+
+    def snapshot(self) -> bytes:
+        """Get everything published so far as one delta."""
+        with self.__lock:
+            return self.__snapshot()
+
+    def __snapshot(self) -> bytes:
+        state = self.__state
+        return _encode({'drivers': state['drivers'],
+                        'laps': {no: list(rows.values()) for no, rows in state['laps'].items()},
+                        'stints': {no: list(rows.values()) for no, rows in state['stints'].items()},
+                        'weather': sorted(state['weather'].values())})
+
+
+def _handler(dashboard: Dashboard) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            dashboard.get_log().debug("dashboard %s", format % args)
+
+        def do_GET(self):
+            if self.path == '/':
+                self.__send(PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+            elif self.path == '/plotly.js':
+                self.__send(_plotly_js(), 'application/javascript', 'max-age=86400')
+            elif self.path == '/snapshot':
+                self.__send(dashboard.snapshot(), 'application/json')
+            elif self.path == '/events':
+                self.__stream()
+            else:
+                self.send_error(404)
+
+        def __send(self, body: bytes, content_type: str, cache: str = 'no-cache'):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', cache)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def __stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.close_connection = True
+            client, snapshot = dashboard.subscribe()
+            try:
+                self.__event(snapshot, 'snapshot')
+                while True:
+                    try:
+                        message = client.get(timeout=KEEPALIVE)
+                    except queue.Empty:
+                        self.wfile.write(b':\n\n')
+                        self.wfile.flush()
+                        continue
+                    if message is _CLOSE:
+                        return
+                    if message is _RESYNC:
+                        self.__event(dashboard.snapshot(), 'snapshot')
+                    else:
+                        self.__event(message)
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                dashboard.unsubscribe(client)
+
+        def __event(self, data: bytes, event: str | None = None):
+            head = f"event: {event}\n".encode() if event else b''
+            self.wfile.write(head + b'data: ' + data + b'\n\n')
+            self.wfile.flush()
+
+    return Handler
+
+
+_plotly_js_cache: list[bytes] = []
+
+
+def _plotly_js() -> bytes:
+    """plotly.js bundled with the plotly package, so the page works without internet access."""
+    if not _plotly_js_cache:
+        from plotly.offline import get_plotlyjs
+        _plotly_js_cache.append(get_plotlyjs().encode('utf-8'))
+    return _plotly_js_cache[0]
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Live race</title>
+<script src="plotly.js"></script>
+<style>
+body { margin: 0; font-family: sans-serif; background: #fff; }
+#status { position: fixed; top: 4px; right: 8px; font-size: 12px; color: #666; }
+.chart { width: 100%; height: 480px; }
+</style>
+</head>
+<body>
+<div id="status">connecting</div>
+<div id="laptime" class="chart"></div>
+<div id="gap_top" class="chart"></div>
+<div id="gap_ahead" class="chart"></div>
+<div id="position" class="chart"></div>
+<div id="tyres" class="chart"></div>
+<div id="weather" class="chart"></div>
+<script>
+const COMPOUND_COLORS = __COMPOUND_COLORS__;
+const WEATHER = ['Air temp', 'Rainfall', 'Track temp', 'Wind speed'];
+let state;
+let pending = false;
+
+function reset() {
+  state = {drivers: {}, laps: {}, stints: {}, weather: {}};
+}
+
+function apply(delta) {
+  Object.assign(state.drivers, delta.drivers || {});
+  for (const key of ['laps', 'stints']) {
+    for (const [no, rows] of Object.entries(delta[key] || {})) {
+      const byNumber = state[key][no] || (state[key][no] = {});
+      for (const row of rows) byNumber[row[0]] = row;
+    }
+  }
+  for (const row of delta.weather || []) state.weather[row[0]] = row;
+  if (!pending) {
+    pending = true;
+    requestAnimationFrame(draw);
+  }
+}
+
+function order() {
+  const latest = no => {
+    const rows = Object.values(state.laps[no] || {});
+    const last = rows.length ? rows[rows.length - 1][2] : null;
+    return last == null ? 99 : last;
+  };
+  return Object.keys(state.laps).sort((a, b) => latest(a) - latest(b));
+}
+
+function lines(column) {
+  return order().map(no => {
+    const rows = Object.values(state.laps[no]).filter(row => row[0] > 0);
+    const style = state.drivers[no] || {color: '#808080', dash: 'solid', label: no};
+    return {x: rows.map(row => row[0]), y: rows.map(row => row[column]), name: style.label, mode: 'lines',
+            line: {color: style.color, dash: style.dash, width: 1}};
+  });
+}
+
+function layout(title, reversed) {
+  return {title: {text: title}, uirevision: title, margin: {t: 40, r: 20},
+          yaxis: {autorange: reversed ? 'reversed' : true}, xaxis: {title: {text: 'Lap'}}};
+}
+
+function tyres() {
+  const traces = [];
+  for (const no of order()) {
+    let start = 0;
+    for (const [stint, compound, isNew, startLaps, totalLaps] of Object.values(state.stints[no] || {})) {
+      const width = startLaps ? totalLaps - startLaps : totalLaps;
+      if (!totalLaps) continue;
+      traces.push({type: 'bar', orientation: 'h', y: [(state.drivers[no] || {}).label || no], x: [width],
+                   base: start, text: [String(startLaps)], textposition: 'inside', showlegend: false,
+                   marker: {color: COMPOUND_COLORS[compound] || 'gray',
+                            line: {color: isNew ? 'black' : 'gray', width: 1}}});
+      start += width;
+    }
+  }
+  return traces;
+}
+
+function weather() {
+  const rows = Object.values(state.weather).sort((a, b) => a[0] - b[0]);
+  const x = rows.map(row => new Date(row[0]));
+  return WEATHER.map((name, i) => ({x, y: rows.map(row => row[i + 1]), name, mode: 'lines',
+                                    xaxis: i === 0 ? 'x' : 'x' + (i + 1), yaxis: i === 0 ? 'y' : 'y' + (i + 1)}));
+}
+
+function draw() {
+  pending = false;
+  Plotly.react('laptime', lines(1), layout('Lap time', false));
+  Plotly.react('gap_top', lines(3), layout('Gap to top', true));
+  Plotly.react('gap_ahead', lines(4), layout('Gap to ahead', true));
+  Plotly.react('position', lines(2), layout('Position', true));
+  Plotly.react('tyres', tyres(), {title: {text: 'Tyres'}, uirevision: 'tyres', barmode: 'stack',
+                                  yaxis: {autorange: 'reversed'}, xaxis: {title: {text: 'Lap'}}});
+  Plotly.react('weather', weather(), {title: {text: 'Weather'}, uirevision: 'weather',
+                                      grid: {rows: 4, columns: 1, pattern: 'independent'}});
+  document.getElementById('status').textContent = 'updated ' + new Date().toLocaleTimeString();
+}
+
+reset();
+const source = new EventSource('events');
+source.addEventListener('snapshot', event => { reset(); apply(JSON.parse(event.data)); });
+source.onmessage = event => apply(JSON.parse(event.data));
+source.onerror = () => { document.getElementById('status').textContent = 'reconnecting'; };
+</script>
+</body>
+</html>
+""".replace('__COMPOUND_COLORS__', json.dumps(constants.compound_color))
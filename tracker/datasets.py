@@ -0,0 +1,19 @@
+"""Names of the datasets Race records as changed; render.CHARTS maps each chart to the datasets it draws."""
+
+LAP_TIMES = 'lap_times'
+POSITIONS = 'positions'
+GAPS_TO_TOP = 'gaps_to_top'
+GAPS_TO_AHEAD = 'gaps_to_ahead'
+STINTS = 'stints'
+PIT_STOPS = 'pit_stops'
+DEGRADATION = 'degradation'
+AIR_TEMP = 'air_temp'
+RAIN_FALL = 'rain_fall'
+TRACK_TEMP = 'track_temp'
+WIND_SPEED = 'wind_speed'
+CAR_DATA = 'car_data'
+TRACK_POSITIONS = 'track_positions'
+LAPS = frozenset({LAP_TIMES, POSITIONS, GAPS_TO_TOP, GAPS_TO_AHEAD})
+WEATHER = frozenset({AIR_TEMP, RAIN_FALL, TRACK_TEMP, WIND_SPEED})
+TELEMETRY = frozenset({CAR_DATA, TRACK_POSITIONS})
+ALL = LAPS | WEATHER | TELEMETRY | {STINTS, PIT_STOPS, DEGRADATION}
@@ -0,0 +1,150 @@
+import ast
+import datetime
+import json
+import re
+from typing import Final
+
+# a string literal without escapes, single-quoted or, when it holds an apostrophe, double-quoted, or a constant
+_TOKEN: Final = re.compile(r"""'[^'\\]*'|"[^"\\]*"|True|False|None""")
+_CONSTANTS: Final = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+def decode(line: str):
+    """Decode one line written by fastf1's SignalRClient.
+
+    The client writes each message with str(), i.e. as a Python repr such as
+    ``['TimingData', {'Lines': {'1': {'InPit': False}}}, '2025-12-07T13:00:00.1Z']``.
+    When no string in the line contains a quote, the line is turned into JSON with the same
+    number of C-level replacements the legacy path made and parsed by json.loads; the few lines
+    with None, constants in lists or escapes JSON does not share with Python fail that and are
+    parsed more carefully. Python repr only produces a ``"`` for strings containing quotes
+    (e.g. race control texts such as "DRIVER'S"); those lines are rewritten string literal by
+    string literal before json.loads, unless they also contain a backslash, i.e. strings with
+    both kinds of quotes, which are parsed with ast.literal_eval. No path corrupts string
+    contents.
+
+    Args:
+        line: One line of the recorded feed, without the trailing line break.
+
+    Returns:
+        The decoded message, usually a list of [category, data, timestamp].
+
+    Raises:
+        ValueError: If the line is not a valid message.
+    """
+    if '"' in line:
+        if '\\' in line:
+            return _literal_eval(line)
+        return json.loads(_quoted_json(line))
+    try:
+        # as cheap as the legacy replacements; a None or a constant in a list is invalid JSON and retried
+        return json.loads(line.replace("': True", "': true").replace("': False", "': false").replace("'", '"'))
+    except ValueError:
+        pass
+    try:
+        return json.loads(_fast_json(line))
+    except ValueError:
+        # an escape JSON does not share with Python, e.g. \x07
+        return _literal_eval(line)
+
+
+def parse_time(text: str) -> datetime.datetime:
+    """Parse a feed timestamp such as 2025-12-07T13:00:00.1234567Z.
+
+    Before Python 3.11, datetime.fromisoformat accepts neither the Z suffix nor fractions of
+    other than 3 or 6 digits, while the feed sends 1 to 7. The suffix is spelled +00:00 and
+    the fraction padded or cut to microseconds.
+
+    Args:
+        text: ISO 8601 timestamp, with or without an offset.
+
+    Returns:
+        The timestamp, aware if it had an offset or Z.
+
+    Raises:
+        ValueError: If the text is not a timestamp.
+    """
+    text = text.replace('Z', '+00:00')
+    dot = text.find('.')
+    if dot >= 0:
+        end = dot + 1
+        while end < len(text) and text[end].isdigit():
+            end += 1
+        text = text[:dot + 1] + text[dot + 1:end][:6].ljust(6, '0') + text[end:]
+    return datetime.datetime.fromisoformat(text)
+
+
+def to_json(line: str) -> str:
+    """Turn one line written by fastf1's SignalRClient into JSON text, see decode().
+
+    Used where many lines are parsed by a single json.loads call. Lines without backslashes
+    are only rewritten, so the result may not be valid JSON if the line is not a valid message.
+
+    Args:
+        line: One line of the recorded feed, without the trailing line break.
+
+    Returns:
+        JSON text of the message.
+
+    Raises:
+        ValueError: If the line contains backslashes and is not a valid message.
+    """
+    if '\\' in line:
+        return json.dumps(_literal_eval(line))
+    if '"' in line:
+        return _quoted_json(line)
+    return _fast_json(line)
+
+
+def _fast_json(line: str) -> str:
+    # without quote characters inside strings, "': True" can only be a dict value
+    fixed = line.replace("': True", "': true").replace("': False", "': false").replace("': None", "': null")
+    if 'True' in fixed or 'False' in fixed or 'None' in fixed:
+        fixed = _replace_constants_outside_strings(fixed)
+    return fixed.replace("'", '"')
+
+
+def _replace_constants_outside_strings(line: str) -> str:
+    """Replace Python constants by their JSON spelling, leaving string contents untouched.
+
+    Args:
+        line: Python repr line whose strings contain neither quotes nor backslashes.
+
+    Returns:
+        The line with True, False and None outside strings replaced.
+    """
+    parts = line.split("'")
+    # even parts are outside string literals, odd parts are their contents
+    parts[::2] = [p.replace('True', 'true').replace('False', 'false').replace('None', 'null') for p in parts[::2]]
+    return "'".join(parts)
+
+
+def _quoted_json(line: str) -> str:
+    """Rewrite a line whose strings contain quotes, but no backslashes, as JSON.
+
+    Args:
+        line: Python repr line without backslashes.
+
+    Returns:
+        The line with each string literal double-quoted and True, False and None outside
+        strings replaced.
+    """
+    return _TOKEN.sub(_json_token, line)
+
+
+def _json_token(match: re.Match) -> str:
+    token = match.group()
+    if token[0] == "'":
+        # repr single-quotes strings holding a '"' unless they also hold an apostrophe
+        return '"' + token[1:-1].replace('"', '\\"') + '"'
+    if token[0] == '"':
+        return token
+    return _CONSTANTS[token]
+
+
+def _literal_eval(line: str):
+    try:
+        return ast.literal_eval(line)
+    # TypeError for unhashable keys such as {[1]: 'x'}
+    except (SyntaxError, TypeError, MemoryError, RecursionError) as e:
+        raise ValueError(f"invalid message: {e}") from e
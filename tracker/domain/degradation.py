@@ -0,0 +1,297 @@
+import math
+
+import numpy
+
+# column name -> (dtype, default); the running sums of a least-squares fit of lap time on tyre age
+COLUMNS = {'laps': (numpy.int64, 0), 'sum_age': (float, 0.0), 'sum_time': (float, 0.0),
+           'sum_age2': (float, 0.0), 'sum_age_time': (float, 0.0)}
+# fewer clean laps than this give no fit
+MIN_LAPS = 3
+
+
+class DegradationStore:
+    """Preallocated drivers x stints running sums of a least-squares fit of lap time against tyre age.
+
+    Adding a lap updates five sums, so a fit is never recomputed from the laps. Laps count
+    toward the fit unless they are the first lap of the race, were touched by a safety car
+    or virtual safety car, are an in-lap or out-lap (the caller tells), or are slower than
+    slow_lap_factor times the stint's mean so far, e.g. after an incident. Every completed
+    lap ages the tyres, clean or not.
+
+    Attributes:
+        __index: Map of driver number -> row.
+        __numbers: Driver numbers in row order.
+        __columns: Map of column name -> drivers x stints array. 'laps' holds the number of
+            clean laps fitted, the others the sums of tyre age, lap time, squared tyre age
+            and tyre age times lap time over them.
+        __stints: Stint number the tyre age of each row is counted for, -1 before the first lap.
+        __ages: Tyre age in laps at the latest completed lap of each row.
+        __last_laps: Number of the latest completed lap of each row, so a repeated lap is counted once.
+        __neutralised: Whether the lap each row is on was touched by a safety car.
+        __track_neutralised: Whether a safety car or virtual safety car is out.
+        __slow_lap_factor: Laps slower than this times the stint's mean are left out of the fit.
+    """
+
+    def __init__(self, drivers: int = 24, stints: int = 8, slow_lap_factor: float = 1.07):
+        """Initialize DegradationStore with a capacity.
+
+        Args:
+            drivers: Number of driver rows to preallocate.
+            stints: Number of stint columns to preallocate.
+            slow_lap_factor: Laps slower than this times the stint's mean are left out of the fit.
+        """
+        self.__index: dict[int, int] = {}
+        self.__numbers: list[int] = []
+        self.__columns = {name: numpy.full((drivers, stints), default, dtype=dtype)
+                          for name, (dtype, default) in COLUMNS.items()}
+        self.__stints = numpy.full(drivers, -1, dtype=numpy.int64)
+        self.__ages = numpy.zeros(drivers, dtype=numpy.int64)
+        self.__last_laps = numpy.zeros(drivers, dtype=numpy.int64)
+        self.__neutralised = numpy.zeros(drivers, dtype=bool)
+        self.__track_neutralised = False
+        self.__slow_lap_factor = slow_lap_factor
+
+    def get_driver_numbers(self) -> list[int]:
+        """Get the driver numbers known to the store.
+
+        Returns:
+            Driver numbers in the order they were first seen.
+        """
+        return self.__numbers
+
+    def ensure_driver(self, driver_number: int) -> int:
+        """Ensure a row exists for a driver, creating it if necessary.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The row of the driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            row = len(self.__numbers)
+            if row >= self.__stints.shape[0]:
+                self.__grow(row * 2, self.__columns['laps'].shape[1])
+            self.__index[driver_number] = row
+            self.__numbers.append(driver_number)
+            self.__neutralised[row] = self.__track_neutralised
+        return row
+
+    def set_neutralised(self, neutralised: bool):
+        """Record whether a safety car or virtual safety car is out.
+
+        The lap every driver is on when it comes out is left out of the fits, and so is every
+        lap completed until it goes in.
+
+        Args:
+            neutralised: True while the track is neutralised.
+        """
+        self.__track_neutralised = neutralised
+        if neutralised:
+            self.__neutralised[:] = True
+
+    def get_stint_number(self, driver_number: int) -> int:
+        """Get the stint the driver's tyre age is counted for.
+
+        Returns:
+            The stint number, -1 before the driver's first lap.
+        """
+        row = self.__index.get(driver_number)
+        return -1 if row is None else int(self.__stints[row])
+
+    def get_age(self, driver_number: int) -> int:
+        """Get the driver's tyre age at its latest completed lap.
+
+        Returns:
+            Laps on the current tyres, 0 before the driver's first lap.
+        """
+        row = self.__index.get(driver_number)
+        return 0 if row is None else int(self.__ages[row])
+
+    def get_last_lap(self, driver_number: int) -> int:
+        """Get the number of the driver's latest completed lap, 0 before its first lap."""
+        row = self.__index.get(driver_number)
+        return 0 if row is None else int(self.__last_laps[row])
+
+    def get_fit(self, driver_number: int, stint_number: int) -> 'DegradationFit | None':
+        """Get the view of the fit of a stint.
+
+        Args:
+            driver_number: The driver's car number.
+            stint_number: The stint number.
+
+        Returns:
+            The view, None for an unknown driver or stint.
+        """
+        row = self.__index.get(driver_number)
+        if row is None or not 0 <= stint_number < self.__columns['laps'].shape[1]:
+            return None
+        return DegradationFit(self, row, stint_number)
+
+    def get_current_fit(self, driver_number: int) -> 'DegradationFit | None':
+        """Get the view of the fit of the stint the driver is on.
+
+        Returns:
+            The view, None before the driver's first lap.
+        """
+        return self.get_fit(driver_number, self.get_stint_number(driver_number))
+
+    def get_crossover_lap(self, driver_number: int, pit_loss: float) -> float:
+        """Project the lap at which the current stint has lost a pit stop's worth of time to wear.
+
+        Args:
+            driver_number: The driver's car number.
+            pit_loss: Seconds a pit stop costs.
+
+        Returns:
+            The lap number, earlier than the latest completed lap once the crossover is past;
+            inf if the tyres do not wear, NaN without a fit.
+        """
+        fit = self.get_current_fit(driver_number)
+        if fit is None:
+            return math.nan
+        return self.get_last_lap(driver_number) + fit.get_crossover_age(pit_loss) - self.get_age(driver_number)
+
+    def add_lap(self, driver_number: int, stint_number: int, start_laps: int, lap_number: int, lap_time: float,
+                clean: bool = True) -> bool:
+        """Age the tyres by a completed lap and add it to the stint's fit if it is clean.
+
+        Args:
+            driver_number: The driver's car number.
+            stint_number: The stint the lap was driven on.
+            start_laps: Tyre age when the stint started, for tyres used before.
+            lap_number: Number of the completed lap.
+            lap_time: Its time in seconds.
+            clean: False for an in-lap or out-lap, or any other lap known not to be clean.
+
+        Returns:
+            True if the lap was not counted before, i.e. the tyre age changed, whether or not
+            the fit did.
+        """
+        row = self.ensure_driver(driver_number)
+        if lap_number <= self.__last_laps[row]:
+            return False
+        self.__last_laps[row] = lap_number
+        if stint_number >= self.__columns['laps'].shape[1]:
+            self.__grow(self.__stints.shape[0], max(stint_number + 1, self.__columns['laps'].shape[1] * 2))
+        if stint_number != self.__stints[row]:
+            self.__stints[row] = stint_number
+            self.__ages[row] = start_laps
+        self.__ages[row] += 1
+        neutralised = self.__neutralised[row]
+        # the next lap starts under the track status this one ended with
+        self.__neutralised[row] = self.__track_neutralised
+        if not clean or neutralised or lap_number <= 1 or not math.isfinite(lap_time) or lap_time <= 0:
+            return True
+        fit = DegradationFit(self, row, stint_number)
+        if lap_time > fit.get_mean_time() * self.__slow_lap_factor:
+            return True
+        fit.add(float(self.__ages[row]), lap_time)
+        return True
+
+    def get_column(self, column: str) -> numpy.ndarray:
+        """Get a whole drivers x stints column, for views and snapshots.
+
+        Args:
+            column: One of COLUMNS.
+
+        Returns:
+            The underlying array, valid until the store grows.
+        """
+        return self.__columns[column]
+
+    def __grow(self, drivers: int, stints: int):
+        old_drivers, old_stints = self.__columns['laps'].shape
+
+        def grown(column: numpy.ndarray, fill) -> numpy.ndarray:
+            result = numpy.full((drivers, stints), fill, dtype=column.dtype)
+            result[:old_drivers, :old_stints] = column
+            return result
+
+        def grown_rows(column: numpy.ndarray, fill) -> numpy.ndarray:
+            result = numpy.full(drivers, fill, dtype=column.dtype)
+            result[:old_drivers] = column
+            return result
+
+        self.__columns = {name: grown(self.__columns[name], default) for name, (_, default) in COLUMNS.items()}
+        self.__stints = grown_rows(self.__stints, -1)
+        self.__ages = grown_rows(self.__ages, 0)
+        self.__last_laps = grown_rows(self.__last_laps, 0)
+        self.__neutralised = grown_rows(self.__neutralised, False)
+
+
+class DegradationFit:
+    """View of the least-squares fit of one stint of one driver inside a DegradationStore."""
+    __slots__ = ('__store', '__row', '__stint_number')
+
+    def __init__(self, store: DegradationStore, row: int, stint_number: int):
+        self.__store = store
+        self.__row = row
+        self.__stint_number = stint_number
+
+    def get_stint_number(self) -> int:
+        return self.__stint_number
+
+    def get_laps(self) -> int:
+        """Get the number of clean laps fitted."""
+        return int(self.__get('laps'))
+
+    def get_mean_time(self) -> float:
+        """Get the mean of the clean laps, NaN without any."""
+        laps = self.get_laps()
+        return self.__get('sum_time') / laps if laps else math.nan
+
+    def get_slope(self) -> float:
+        """Get the lap time lost per lap of tyre age in seconds, NaN with fewer than MIN_LAPS laps."""
+        laps = self.get_laps()
+        sum_age = self.__get('sum_age')
+        denominator = laps * self.__get('sum_age2') - sum_age * sum_age
+        # a single tyre age leaves the slope undetermined
+        if laps < MIN_LAPS or denominator <= 0:
+            return math.nan
+        return (laps * self.__get('sum_age_time') - sum_age * self.__get('sum_time')) / denominator
+
+    def get_intercept(self) -> float:
+        """Get the lap time the fit projects on fresh tyres, at tyre age 0, NaN without a fit."""
+        laps = self.get_laps()
+        slope = self.get_slope()
+        if math.isnan(slope):
+            return math.nan
+        return (self.__get('sum_time') - slope * self.__get('sum_age')) / laps
+
+    def get_lap_time(self, age: float) -> float:
+        """Get the lap time the fit projects at a tyre age, NaN without a fit."""
+        return self.get_intercept() + self.get_slope() * age
+
+    def get_crossover_age(self, pit_loss: float) -> float:
+        """Get the tyre age at which the time lost to wear in this stint reaches the pit loss.
+
+        Against fresh tyres running at the intercept, lap a of the stint is slope * a slower,
+        so the stint has lost slope * a * (a + 1) / 2 by tyre age a. Beyond the crossover a
+        stop and fresh tyres pay for themselves over a stint of the same length.
+
+        Args:
+            pit_loss: Seconds a pit stop costs.
+
+        Returns:
+            The tyre age in laps, rounded up; inf if the tyres do not wear, NaN without a fit.
+        """
+        slope = self.get_slope()
+        if math.isnan(slope) or math.isnan(pit_loss):
+            return math.nan
+        if slope <= 0:
+            return math.inf
+        return float(math.ceil((math.sqrt(1 + 8 * pit_loss / slope) - 1) / 2))
+
+    def add(self, age: float, lap_time: float):
+        """Add a clean lap to the sums."""
+        column = self.__store.get_column
+        column('laps')[self.__row, self.__stint_number] += 1
+        column('sum_age')[self.__row, self.__stint_number] += age
+        column('sum_time')[self.__row, self.__stint_number] += lap_time
+        column('sum_age2')[self.__row, self.__stint_number] += age * age
+        column('sum_age_time')[self.__row, self.__stint_number] += age * lap_time
+
+    def __get(self, column: str):
+        return self.__store.get_column(column)[self.__row, self.__stint_number]
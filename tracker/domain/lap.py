@@ -1,27 +1,261 @@
+import math
+
+import numpy
+
+COLUMNS = ('time', 'position', 'gap_to_top', 'gap_to_ahead')
+
+
+class LapStore:
+    """Preallocated drivers x laps arrays of lap time, position and gaps.
+
+    Each driver owns one row, each lap number one column. Unknown values are NaN, so a row
+    sliced up to the driver's latest lap is a contiguous array that can be plotted directly.
+    Capacity doubles when a driver or lap number does not fit.
+
+    Attributes:
+        __index: Map of driver number -> row.
+        __numbers: Driver numbers in row order.
+        __columns: Map of column name -> drivers x laps array. 'time' holds lap times in seconds
+            (NaN if not set); 'position', 'gap_to_top' and 'gap_to_ahead' are NaN for laps that
+            do not exist.
+        __present: Whether the lap exists for the driver.
+        __latest: Highest existing lap number per row, -1 if the driver has no lap yet.
+    """
+
+    def __init__(self, drivers: int = 24, laps: int = 100):
+        """Initialize LapStore with a capacity.
+
+        Args:
+            drivers: Number of driver rows to preallocate.
+            laps: Number of lap columns to preallocate.
+        """
+        self.__index: dict[int, int] = {}
+        self.__numbers: list[int] = []
+        self.__columns = {name: numpy.full((drivers, laps), numpy.nan) for name in COLUMNS}
+        self.__present = numpy.zeros((drivers, laps), dtype=bool)
+        self.__latest = numpy.full(drivers, -1, dtype=numpy.int64)
+
+    def get_driver_numbers(self) -> list[int]:
+        """Get the driver numbers known to the store.
+
+        Returns:
+            Driver numbers in the order they were first seen.
+        """
+        return self.__numbers
+
+    def ensure_driver(self, driver_number: int) -> int:
+        """Ensure a row exists for a driver, creating it if necessary.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The row of the driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            row = len(self.__numbers)
+            if row >= self.__present.shape[0]:
+                self.__grow(row * 2, self.__present.shape[1])
+            self.__index[driver_number] = row
+            self.__numbers.append(driver_number)
+        return row
+
+    def has_laps(self, driver_number: int) -> bool:
+        """Check whether a driver has at least one lap.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            True if a lap exists for the driver.
+        """
+        row = self.__index.get(driver_number)
+        return row is not None and self.__latest[row] >= 0
+
+    def has_lap(self, driver_number: int, lap_number: int) -> bool:
+        """Check whether a lap exists for a driver.
+
+        Args:
+            driver_number: The driver's car number.
+            lap_number: The lap number.
+
+        Returns:
+            True if the lap exists.
+        """
+        row = self.__index.get(driver_number)
+        return row is not None and 0 <= lap_number <= self.__latest[row] and bool(self.__present[row, lap_number])
+
+    def add_lap(self, driver_number: int, lap_number: int, time: float = math.nan) -> 'Lap':
+        """Create or replace a lap, carrying the position over from the driver's latest lap.
+
+        Args:
+            driver_number: The driver's car number.
+            lap_number: The lap number.
+            time: Lap time in seconds, NaN if unknown.
+
+        Returns:
+            The view of the new lap.
+        """
+        row = self.ensure_driver(driver_number)
+        if lap_number >= self.__present.shape[1]:
+            self.__grow(self.__present.shape[0], max(lap_number + 1, self.__present.shape[1] * 2))
+        latest = self.__latest[row]
+        position = self.__columns['position']
+        position[row, lap_number] = position[row, latest] if latest >= 0 else 0
+        self.__columns['time'][row, lap_number] = time
+        self.__columns['gap_to_top'][row, lap_number] = 0
+        self.__columns['gap_to_ahead'][row, lap_number] = 0
+        self.__present[row, lap_number] = True
+        if lap_number > latest:
+            self.__latest[row] = lap_number
+        return Lap(self, row, lap_number)
+
+    def get_lap(self, driver_number: int, lap_number: int) -> 'Lap | None':
+        """Get the view of a lap.
+
+        Args:
+            driver_number: The driver's car number.
+            lap_number: The lap number.
+
+        Returns:
+            The view of the lap, or None if it does not exist.
+        """
+        if not self.has_lap(driver_number, lap_number):
+            return None
+        return Lap(self, self.__index[driver_number], lap_number)
+
+    def get_max_lap(self, driver_number: int) -> 'Lap':
+        """Get the view of the most recent lap for a driver.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The view of the lap with the highest lap number.
+        """
+        row = self.__index[driver_number]
+        return Lap(self, row, int(self.__latest[row]))
+
+    def get_max_lap_number(self, driver_number: int | None = None) -> int:
+        """Get the highest lap number of a driver or of the whole field.
+
+        Args:
+            driver_number: The driver's car number, or None for all drivers.
+
+        Returns:
+            The highest lap number, -1 if there is no lap.
+        """
+        if driver_number is None:
+            return int(self.__latest[:len(self.__numbers)].max(initial=-1))
+        row = self.__index.get(driver_number)
+        return -1 if row is None else int(self.__latest[row])
+
+    def get_times(self, driver_number: int) -> numpy.ndarray:
+        """Get the lap times of a driver indexed by lap number, up to the latest lap.
+
+        Returns:
+            A read-only view; NaN where no time is known.
+        """
+        return self.__row_view(self.__columns['time'], driver_number)
+
+    def get_positions(self, driver_number: int) -> numpy.ndarray:
+        """Get the positions of a driver indexed by lap number, up to the latest lap.
+
+        Returns:
+            A read-only view; NaN for laps that do not exist.
+        """
+        return self.__row_view(self.__columns['position'], driver_number)
+
+    def get_gaps_to_top(self, driver_number: int) -> numpy.ndarray:
+        """Get the gaps to the leader of a driver indexed by lap number, up to the latest lap.
+
+        Returns:
+            A read-only view; NaN for laps that do not exist.
+        """
+        return self.__row_view(self.__columns['gap_to_top'], driver_number)
+
+    def get_gaps_to_ahead(self, driver_number: int) -> numpy.ndarray:
+        """Get the intervals to the car ahead of a driver indexed by lap number, up to the latest lap.
+
+        Returns:
+            A read-only view; NaN for laps that do not exist.
+        """
+        return self.__row_view(self.__columns['gap_to_ahead'], driver_number)
+
+    def get_present(self, driver_number: int) -> numpy.ndarray:
+        """Get which laps exist for a driver, indexed by lap number, up to the latest lap.
+
+        Returns:
+            A read-only boolean view.
+        """
+        return self.__row_view(self.__present, driver_number)
+
+    def get_column(self, column: str) -> numpy.ndarray:
+        """Get a whole drivers x laps column, for views and snapshots.
+
+        Args:
+            column: One of COLUMNS.
+
+        Returns:
+            The underlying array, valid until the store grows.
+        """
+        return self.__columns[column]
+
+    def __row_view(self, column: numpy.ndarray, driver_number: int) -> numpy.ndarray:
+        row = self.__index[driver_number]
+        view = column[row, :self.__latest[row] + 1]
+        view.flags.writeable = False
+        return view
+
+    def __grow(self, drivers: int, laps: int):
+        old_drivers, old_laps = self.__present.shape
+
+        def grown(column: numpy.ndarray, fill) -> numpy.ndarray:
+            result = numpy.full((drivers, laps), fill, dtype=column.dtype)
+            result[:old_drivers, :old_laps] = column
+            return result
+
+        self.__columns = {name: grown(column, numpy.nan) for name, column in self.__columns.items()}
+        self.__present = grown(self.__present, False)
+        latest = numpy.full(drivers, -1, dtype=numpy.int64)
+        latest[:old_drivers] = self.__latest
+        self.__latest = latest
+
+
 class Lap:
-    def __init__(self, time=0):
-        self.__time = time
-        self.__position = 0
-        self.__gap_to_ahead = 0
-        self.__gap_to_top = 0
+    """View of one lap of one driver inside a LapStore."""
+    __slots__ = ('__store', '__row', '__lap_number')
+
+    def __init__(self, store: LapStore, row: int, lap_number: int):
+        self.__store = store
+        self.__row = row
+        self.__lap_number = lap_number
+
+    def get_lap_number(self) -> int:
+        return self.__lap_number
 
     def get_time(self):
-        return self.__time
+        return self.__get('time')
 
     def get_position(self):
-        return self.__position
+        return int(self.__get('position'))
 
     def get_gap_to_ahead(self):
-        return self.__gap_to_ahead
+        return self.__get('gap_to_ahead')
 
     def get_gap_to_top(self):
-        return self.__gap_to_top
+        return self.__get('gap_to_top')
 
     def set_position(self, position: int):
-        self.__position = position
+        self.__store.get_column('position')[self.__row, self.__lap_number] = position
 
     def set_gap_to_ahead(self, gap_to_ahead: float):
-        self.__gap_to_ahead = gap_to_ahead
+        self.__store.get_column('gap_to_ahead')[self.__row, self.__lap_number] = gap_to_ahead
 
     def set_gap_to_top(self, gap_to_top: float):
-        self.__gap_to_top = gap_to_top
+        self.__store.get_column('gap_to_top')[self.__row, self.__lap_number] = gap_to_top
+
+    def __get(self, column: str) -> float:
+        value = float(self.__store.get_column(column)[self.__row, self.__lap_number])
+        return 0 if math.isnan(value) else value
@@ -0,0 +1,346 @@
+import collections
+import datetime
+import math
+
+import numpy
+
+# column name -> (dtype, default)
+COLUMNS = {'in_lap': (numpy.int64, -1), 'in_time': ('datetime64[ms]', numpy.datetime64('NaT')),
+           'out_time': ('datetime64[ms]', numpy.datetime64('NaT')), 'pit_lane': (float, numpy.nan),
+           'in_lap_time': (float, numpy.nan), 'out_lap_time': (float, numpy.nan), 'baseline': (float, numpy.nan),
+           'loss': (float, numpy.nan)}
+
+
+class CleanLapBaseline:
+    """Mean of a driver's latest clean laps, with a running sum so that adding a lap is O(1).
+
+    Attributes:
+        __laps: Latest clean lap times in seconds, oldest first.
+        __sum: Sum of __laps.
+    """
+
+    def __init__(self, laps: int = 5):
+        """Initialize CleanLapBaseline.
+
+        Args:
+            laps: Number of clean laps averaged.
+        """
+        self.__laps: collections.deque[float] = collections.deque(maxlen=laps)
+        self.__sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self.__laps)
+
+    def add(self, lap_time: float):
+        """Add a clean lap, dropping the oldest one once the window is full."""
+        if len(self.__laps) == self.__laps.maxlen:
+            self.__sum -= self.__laps[0]
+        self.__laps.append(lap_time)
+        self.__sum += lap_time
+
+    def get_mean(self) -> float:
+        """Get the mean of the clean laps, NaN without any."""
+        return self.__sum / len(self.__laps) if self.__laps else math.nan
+
+
+class PitStore:
+    """Preallocated drivers x stops arrays of pit stops, and the clean-lap pace their loss is measured against.
+
+    A stop opens when the driver enters the pit lane, during its in-lap, and closes when the
+    driver leaves it. Its loss is the time of the in-lap and the out-lap minus twice the mean
+    of the driver's latest clean laps before the stop, so it is known once the out-lap is
+    completed. Laps are clean unless they are an in-lap or out-lap, were completed in the pit
+    lane, or are slower than slow_lap_factor times the baseline, e.g. behind a safety car.
+
+    Attributes:
+        __index: Map of driver number -> row.
+        __numbers: Driver numbers in row order.
+        __columns: Map of column name -> drivers x stops array. 'in_lap' holds the lap the
+            driver entered the pit lane on, 'in_time' and 'out_time' the feed times it entered
+            and left it, 'pit_lane' the pit lane time reported by the feed, 'in_lap_time' and
+            'out_lap_time' the times of the laps around the stop, 'baseline' the clean-lap mean
+            at entry and 'loss' the time lost, all in seconds.
+        __stops: Number of stops per row.
+        __in_pit: Whether the driver is in the pit lane.
+        __baselines: Map of driver number -> clean-lap baseline.
+        __baseline_laps: Number of clean laps a baseline averages.
+        __slow_lap_factor: Laps slower than this times the baseline are not clean.
+    """
+
+    def __init__(self, drivers: int = 24, stops: int = 4, baseline_laps: int = 5, slow_lap_factor: float = 1.07):
+        """Initialize PitStore with a capacity.
+
+        Args:
+            drivers: Number of driver rows to preallocate.
+            stops: Number of stop columns to preallocate.
+            baseline_laps: Number of clean laps the baseline averages.
+            slow_lap_factor: Laps slower than this times the baseline are left out of it.
+        """
+        self.__index: dict[int, int] = {}
+        self.__numbers: list[int] = []
+        self.__columns = {name: numpy.full((drivers, stops), default, dtype=dtype)
+                          for name, (dtype, default) in COLUMNS.items()}
+        self.__stops = numpy.zeros(drivers, dtype=numpy.int64)
+        self.__in_pit = numpy.zeros(drivers, dtype=bool)
+        self.__baselines: dict[int, CleanLapBaseline] = {}
+        self.__baseline_laps = baseline_laps
+        self.__slow_lap_factor = slow_lap_factor
+
+    def get_driver_numbers(self) -> list[int]:
+        """Get the driver numbers known to the store.
+
+        Returns:
+            Driver numbers in the order they were first seen.
+        """
+        return self.__numbers
+
+    def ensure_driver(self, driver_number: int) -> int:
+        """Ensure a row exists for a driver, creating it if necessary.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The row of the driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            row = len(self.__numbers)
+            if row >= self.__stops.shape[0]:
+                self.__grow(row * 2, self.__columns['in_lap'].shape[1])
+            self.__index[driver_number] = row
+            self.__numbers.append(driver_number)
+            self.__baselines[driver_number] = CleanLapBaseline(self.__baseline_laps)
+        return row
+
+    def get_stops(self, driver_number: int) -> list['PitStop']:
+        """Get the views of all stops of a driver in order.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            Views of the stops, empty for an unknown driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            return []
+        return [PitStop(self, row, i) for i in range(self.__stops[row])]
+
+    def get_latest_stop(self, driver_number: int) -> 'PitStop | None':
+        """Get the view of the latest stop of a driver.
+
+        Returns:
+            The view, None if the driver has not stopped.
+        """
+        row = self.__index.get(driver_number)
+        if row is None or self.__stops[row] == 0:
+            return None
+        return PitStop(self, row, int(self.__stops[row]) - 1)
+
+    def is_in_pit(self, driver_number: int) -> bool:
+        row = self.__index.get(driver_number)
+        return row is not None and bool(self.__in_pit[row])
+
+    def get_baseline(self, driver_number: int) -> float:
+        """Get the mean of the driver's latest clean laps.
+
+        Returns:
+            Seconds, NaN before the first clean lap.
+        """
+        baseline = self.__baselines.get(driver_number)
+        return math.nan if baseline is None else baseline.get_mean()
+
+    def get_expected_loss(self, driver_number: int) -> float:
+        """Get the time the driver's next stop is expected to cost.
+
+        Returns:
+            Seconds lost to the driver's latest stop whose loss is known, else the median
+            loss of the field, NaN before any loss is known.
+        """
+        row = self.__index.get(driver_number)
+        losses = self.__columns['loss'][:len(self.__numbers)]
+        if row is not None:
+            known = losses[row, :self.__stops[row]]
+            known = known[~numpy.isnan(known)]
+            if len(known):
+                return float(known[-1])
+        known = losses[~numpy.isnan(losses)]
+        return float(numpy.median(known)) if len(known) else math.nan
+
+    def enter(self, driver_number: int, in_lap: int, t: datetime.datetime | None) -> 'PitStop | None':
+        """Open a stop as the driver enters the pit lane.
+
+        Args:
+            driver_number: The driver's car number.
+            in_lap: Number of the lap the driver is on.
+            t: Feed time of the entry, None if unknown.
+
+        Returns:
+            The view of the new stop, None if the driver already is in the pit lane.
+        """
+        row = self.ensure_driver(driver_number)
+        if self.__in_pit[row]:
+            return None
+        self.__in_pit[row] = True
+        stop = self.__add(row)
+        stop.set('in_lap', in_lap)
+        stop.set('in_time', _to_datetime64(t))
+        stop.set('baseline', self.__baselines[driver_number].get_mean())
+        return stop
+
+    def leave(self, driver_number: int, t: datetime.datetime | None) -> 'PitStop | None':
+        """Close the open stop as the driver leaves the pit lane.
+
+        Args:
+            driver_number: The driver's car number.
+            t: Feed time of the exit, None if unknown.
+
+        Returns:
+            The view of the closed stop, None if the driver was not in the pit lane.
+        """
+        row = self.__index.get(driver_number)
+        if row is None or not self.__in_pit[row]:
+            return None
+        self.__in_pit[row] = False
+        stop = PitStop(self, row, int(self.__stops[row]) - 1)
+        stop.set('out_time', _to_datetime64(t))
+        return stop
+
+    def set_pit_lane(self, driver_number: int, lap: int, seconds: float) -> 'PitStop':
+        """Record the pit lane time the feed reports for a stop.
+
+        Args:
+            driver_number: The driver's car number.
+            lap: Lap of the stop as reported by the feed.
+            seconds: Time spent in the pit lane.
+
+        Returns:
+            The view of the stop, created if the entry was missed, e.g. before the tracker started.
+        """
+        row = self.ensure_driver(driver_number)
+        # the latest stop is the one reported almost always, so the search stops right away
+        for i in range(int(self.__stops[row]) - 1, -1, -1):
+            if self.__columns['in_lap'][row, i] == lap:
+                stop = PitStop(self, row, i)
+                break
+        else:
+            stop = self.get_latest_stop(driver_number)
+            # the feed may count the lap differently; a stop without a pit lane time yet is this one
+            if stop is None or not math.isnan(stop.get_pit_lane()):
+                stop = self.__add(row)
+                stop.set('in_lap', lap)
+        stop.set('pit_lane', seconds)
+        return stop
+
+    def add_lap(self, driver_number: int, lap_number: int, lap_time: float) -> 'PitStop | None':
+        """Account for a completed lap: the in-lap or out-lap of the latest stop, or a clean lap.
+
+        Args:
+            driver_number: The driver's car number.
+            lap_number: Number of the completed lap.
+            lap_time: Its time in seconds.
+
+        Returns:
+            The view of the stop whose in-lap or out-lap it is, None for any other lap.
+        """
+        row = self.ensure_driver(driver_number)
+        stop = self.get_latest_stop(driver_number)
+        if stop is not None and lap_number == stop.get_in_lap():
+            stop.set('in_lap_time', lap_time)
+            stop.update_loss()
+            return stop
+        if stop is not None and lap_number == stop.get_in_lap() + 1:
+            stop.set('out_lap_time', lap_time)
+            stop.update_loss()
+            return stop
+        baseline = self.__baselines[driver_number]
+        mean = baseline.get_mean()
+        if (not self.__in_pit[row] and math.isfinite(lap_time) and lap_time > 0
+                and not lap_time > mean * self.__slow_lap_factor):
+            baseline.add(lap_time)
+        return None
+
+    def get_column(self, column: str) -> numpy.ndarray:
+        """Get a whole drivers x stops column, for views and snapshots.
+
+        Args:
+            column: One of COLUMNS.
+
+        Returns:
+            The underlying array, valid until the store grows.
+        """
+        return self.__columns[column]
+
+    def __add(self, row: int) -> 'PitStop':
+        stop_number = int(self.__stops[row])
+        if stop_number >= self.__columns['in_lap'].shape[1]:
+            self.__grow(self.__stops.shape[0], stop_number * 2)
+        self.__stops[row] += 1
+        return PitStop(self, row, stop_number)
+
+    def __grow(self, drivers: int, stops: int):
+        old_drivers, old_stops = self.__columns['in_lap'].shape
+
+        def grown(column: numpy.ndarray, fill) -> numpy.ndarray:
+            result = numpy.full((drivers, stops), fill, dtype=column.dtype)
+            result[:old_drivers, :old_stops] = column
+            return result
+
+        self.__columns = {name: grown(self.__columns[name], default) for name, (_, default) in COLUMNS.items()}
+        stop_counts = numpy.zeros(drivers, dtype=numpy.int64)
+        stop_counts[:old_drivers] = self.__stops
+        self.__stops = stop_counts
+        in_pit = numpy.zeros(drivers, dtype=bool)
+        in_pit[:old_drivers] = self.__in_pit
+        self.__in_pit = in_pit
+
+
+class PitStop:
+    """View of one pit stop of one driver inside a PitStore."""
+    __slots__ = ('__store', '__row', '__stop_number')
+
+    def __init__(self, store: PitStore, row: int, stop_number: int):
+        self.__store = store
+        self.__row = row
+        self.__stop_number = stop_number
+
+    def get_stop_number(self) -> int:
+        return self.__stop_number
+
+    def get_in_lap(self) -> int:
+        return int(self.__store.get_column('in_lap')[self.__row, self.__stop_number])
+
+    def get_in_time(self) -> numpy.datetime64:
+        return self.__store.get_column('in_time')[self.__row, self.__stop_number]
+
+    def get_out_time(self) -> numpy.datetime64:
+        return self.__store.get_column('out_time')[self.__row, self.__stop_number]
+
+    def get_pit_lane(self) -> float:
+        return float(self.__store.get_column('pit_lane')[self.__row, self.__stop_number])
+
+    def get_baseline(self) -> float:
+        return float(self.__store.get_column('baseline')[self.__row, self.__stop_number])
+
+    def get_loss(self) -> float:
+        """Get the time lost to the stop in seconds, NaN until the out-lap is completed."""
+        return float(self.__store.get_column('loss')[self.__row, self.__stop_number])
+
+    def set(self, column: str, value):
+        self.__store.get_column(column)[self.__row, self.__stop_number] = value
+
+    def update_loss(self):
+        """Compute the loss from the in-lap, the out-lap and the baseline, NaN while one is unknown."""
+        column = self.__store.get_column
+        self.set('loss', column('in_lap_time')[self.__row, self.__stop_number]
+                 + column('out_lap_time')[self.__row, self.__stop_number]
+                 - 2 * column('baseline')[self.__row, self.__stop_number])
+
+
+def _to_datetime64(t: datetime.datetime | None) -> numpy.datetime64:
+    if t is None:
+        return numpy.datetime64('NaT')
+    if t.tzinfo is not None:
+        t = t.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return numpy.datetime64(t, 'ms')
@@ -1,30 +1,195 @@
+import numpy
+
+# column name -> (dtype, default)
+COLUMNS = {'compound': (object, 'UNKNOWN'), 'is_new': (bool, False), 'start_laps': (numpy.int64, 0),
+           'total_laps': (numpy.int64, 0)}
+
+
+class StintStore:
+    """Preallocated drivers x stints arrays of tyre compound, freshness and lap counters.
+
+    Attributes:
+        __index: Map of driver number -> row.
+        __numbers: Driver numbers in row order.
+        __columns: Map of column name -> drivers x stints array. 'compound' holds compound names,
+            'is_new' whether the tyres were new when fitted, 'start_laps' the tyre age when the
+            stint started and 'total_laps' the tyre age so far.
+        __present: Whether the stint exists for the driver.
+        __latest: Highest existing stint number per row, -1 if the driver has no stint yet.
+    """
+
+    def __init__(self, drivers: int = 24, stints: int = 8):
+        """Initialize StintStore with a capacity.
+
+        Args:
+            drivers: Number of driver rows to preallocate.
+            stints: Number of stint columns to preallocate.
+        """
+        self.__index: dict[int, int] = {}
+        self.__numbers: list[int] = []
+        self.__columns = {name: numpy.full((drivers, stints), default, dtype=dtype)
+                          for name, (dtype, default) in COLUMNS.items()}
+        self.__present = numpy.zeros((drivers, stints), dtype=bool)
+        self.__latest = numpy.full(drivers, -1, dtype=numpy.int64)
+
+    def get_driver_numbers(self) -> list[int]:
+        """Get the driver numbers known to the store.
+
+        Returns:
+            Driver numbers in the order they were first seen.
+        """
+        return self.__numbers
+
+    def ensure_driver(self, driver_number: int) -> int:
+        """Ensure a row exists for a driver, creating it if necessary.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The row of the driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            row = len(self.__numbers)
+            if row >= self.__present.shape[0]:
+                self.__grow(row * 2, self.__present.shape[1])
+            self.__index[driver_number] = row
+            self.__numbers.append(driver_number)
+        return row
+
+    def has_stint(self, driver_number: int, stint_number: int) -> bool:
+        """Check whether a stint exists for a driver.
+
+        Args:
+            driver_number: The driver's car number.
+            stint_number: The stint number.
+
+        Returns:
+            True if the stint exists.
+        """
+        row = self.__index.get(driver_number)
+        return row is not None and 0 <= stint_number <= self.__latest[row] and bool(self.__present[row, stint_number])
+
+    def add_stint(self, driver_number: int, stint_number: int) -> 'Stint':
+        """Create a stint with default values.
+
+        Args:
+            driver_number: The driver's car number.
+            stint_number: The stint number.
+
+        Returns:
+            The view of the new stint.
+        """
+        row = self.ensure_driver(driver_number)
+        if stint_number >= self.__present.shape[1]:
+            self.__grow(self.__present.shape[0], max(stint_number + 1, self.__present.shape[1] * 2))
+        self.__present[row, stint_number] = True
+        if stint_number > self.__latest[row]:
+            self.__latest[row] = stint_number
+        return Stint(self, row, stint_number)
+
+    def get_stint(self, driver_number: int, stint_number: int) -> 'Stint | None':
+        """Get the view of a stint.
+
+        Args:
+            driver_number: The driver's car number.
+            stint_number: The stint number.
+
+        Returns:
+            The view of the stint, or None if it does not exist.
+        """
+        if not self.has_stint(driver_number, stint_number):
+            return None
+        return Stint(self, self.__index[driver_number], stint_number)
+
+    def get_stints(self, driver_number: int) -> list['Stint']:
+        """Get the views of all stints of a driver in stint order.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            Views of the existing stints, empty for an unknown driver.
+        """
+        row = self.__index.get(driver_number)
+        if row is None:
+            return []
+        return [Stint(self, row, i) for i in range(self.__latest[row] + 1) if self.__present[row, i]]
+
+    def get_max_stint_number(self, driver_number: int) -> int:
+        """Get the highest stint number of a driver.
+
+        Args:
+            driver_number: The driver's car number.
+
+        Returns:
+            The highest stint number, -1 if there is no stint.
+        """
+        row = self.__index.get(driver_number)
+        return -1 if row is None else int(self.__latest[row])
+
+    def get_column(self, column: str) -> numpy.ndarray:
+        """Get a whole drivers x stints column, for views and snapshots.
+
+        Args:
+            column: One of COLUMNS.
+
+        Returns:
+            The underlying array, valid until the store grows.
+        """
+        return self.__columns[column]
+
+    def __grow(self, drivers: int, stints: int):
+        old_drivers, old_stints = self.__present.shape
+
+        def grown(column: numpy.ndarray, fill) -> numpy.ndarray:
+            result = numpy.full((drivers, stints), fill, dtype=column.dtype)
+            result[:old_drivers, :old_stints] = column
+            return result
+
+        self.__columns = {name: grown(self.__columns[name], default) for name, (_, default) in COLUMNS.items()}
+        self.__present = grown(self.__present, False)
+        latest = numpy.full(drivers, -1, dtype=numpy.int64)
+        latest[:old_drivers] = self.__latest
+        self.__latest = latest
+
+
 class Stint:
-    def __init__(self):
-        self.__compound = 'UNKNOWN'
-        self.__is_new = False
-        self.__start_laps = 0
-        self.__total_laps = 0
+    """View of one stint of one driver inside a StintStore."""
+    __slots__ = ('__store', '__row', '__stint_number')
+
+    def __init__(self, store: StintStore, row: int, stint_number: int):
+        self.__store = store
+        self.__row = row
+        self.__stint_number = stint_number
+
+    def get_stint_number(self) -> int:
+        return self.__stint_number
 
     def get_compound(self) -> str:
-        return self.__compound
+        return self.__store.get_column('compound')[self.__row, self.__stint_number]
 
     def get_is_new(self) -> bool:
-        return self.__is_new
+        return bool(self.__store.get_column('is_new')[self.__row, self.__stint_number])
 
     def get_start_laps(self) -> int:
-        return self.__start_laps
+        return int(self.__store.get_column('start_laps')[self.__row, self.__stint_number])
 
     def get_total_laps(self) -> int:
-        return self.__total_laps
+        return int(self.__store.get_column('total_laps')[self.__row, self.__stint_number])
 
     def set_compound(self, value: str):
-        self.__compound = value
+        self.__store.get_column('compound')[self.__row, self.__stint_number] = value
 
-    def set_is_new(self, value: bool):
-        self.__is_new = value
+    def set_is_new(self, value: bool | str):
+        # the feed sends 'true' / 'false' strings
+        if isinstance(value, str):
+            value = value.lower() == 'true'
+        self.__store.get_column('is_new')[self.__row, self.__stint_number] = value
 
     def set_start_laps(self, value: int):
-        self.__start_laps = value
+        self.__store.get_column('start_laps')[self.__row, self.__stint_number] = value
 
     def set_total_laps(self, value: int):
-        self.__total_laps = value
+        self.__store.get_column('total_laps')[self.__row, self.__stint_number] = value
@@ -1,30 +1,119 @@
+import datetime
+
+import numpy
+
+from tracker.ring import RingBuffer
+
+COLUMNS = ('air_temp', 'rain_fall', 'track_temp', 'wind_speed')
+
+
+class WeatherStore:
+    """Time-ordered weather samples in a fixed-capacity ring buffer.
+
+    The feed sends about one sample a minute, so the default capacity holds a whole day; in a
+    longer session the oldest samples are overwritten and memory stays the same.
+
+    Attributes:
+        __ring: The samples, oldest first, 0 for values not set.
+    """
+
+    def __init__(self, capacity: int = 1440):
+        """Initialize WeatherStore with a capacity.
+
+        Args:
+            capacity: Maximum number of samples kept.
+        """
+        self.__ring = RingBuffer(capacity, COLUMNS)
+
+    def __len__(self) -> int:
+        return len(self.__ring)
+
+    def get_capacity(self) -> int:
+        return self.__ring.get_capacity()
+
+    def ensure(self, t: datetime.datetime) -> 'Weather':
+        """Ensure a sample exists for a timestamp, creating it if necessary.
+
+        Args:
+            t: The timestamp of the sample.
+
+        Returns:
+            The view of the sample, valid until the next sample is created.
+        """
+        stamp = _to_datetime64(t)
+        ring = self.__ring
+        latest = ring.get_latest_time()
+        if latest is None or stamp > latest:
+            ring.append(stamp, (0.0,) * len(COLUMNS))
+            return Weather(ring, -1)
+        if stamp == latest:
+            return Weather(ring, -1)
+        # samples arrive in order; keep them sorted for the rare late one
+        row = ring.search(stamp)
+        if ring.get_times()[row] != stamp:
+            if row == 0 and len(ring) == ring.get_capacity():
+                # older than everything a full store keeps: the sample is set and dropped at once
+                discarded = RingBuffer(1, COLUMNS)
+                discarded.append(stamp, (0.0,) * len(COLUMNS))
+                return Weather(discarded, 0)
+            ring.insert(row, stamp, (0.0,) * len(COLUMNS))
+            row = ring.search(stamp)
+        return Weather(ring, row)
+
+    def get_times(self) -> numpy.ndarray:
+        """Get the timestamps of all samples in UTC.
+
+        Returns:
+            A datetime64[ms] array in ascending order.
+        """
+        return self.__ring.get_times()
+
+    def get_values(self, column: str) -> numpy.ndarray:
+        """Get one column of all samples.
+
+        Args:
+            column: One of COLUMNS.
+
+        Returns:
+            An array aligned with get_times.
+        """
+        return self.__ring.get_values(column)
+
+
 class Weather:
-    def __init__(self):
-        self.__air_temp = 0
-        self.__rain_fall = 0
-        self.__track_temp = 0
-        self.__wind_speed = 0
+    """View of one weather sample inside a WeatherStore."""
+    __slots__ = ('__ring', '__row')
+
+    def __init__(self, ring: RingBuffer, row: int):
+        self.__ring = ring
+        self.__row = row
 
     def get_air_temp(self):
-        return self.__air_temp
+        return self.__ring.get_value(self.__row, 'air_temp')
 
     def get_rain_fall(self):
-        return self.__rain_fall
+        return self.__ring.get_value(self.__row, 'rain_fall')
 
     def get_track_temp(self):
-        return self.__track_temp
+        return self.__ring.get_value(self.__row, 'track_temp')
 
     def get_wind_speed(self):
-        return self.__wind_speed
+        return self.__ring.get_value(self.__row, 'wind_speed')
 
     def set_air_temp(self, v: float):
-        self.__air_temp = v
+        self.__ring.set_value(self.__row, 'air_temp', v)
 
     def set_rain_fall(self, v: float):
-        self.__rain_fall = v
+        self.__ring.set_value(self.__row, 'rain_fall', v)
 
     def set_track_temp(self, v: float):
-        self.__track_temp = v
+        self.__ring.set_value(self.__row, 'track_temp', v)
 
     def set_wind_speed(self, v: float):
-        self.__wind_speed = v
+        self.__ring.set_value(self.__row, 'wind_speed', v)
+
+
+def _to_datetime64(t: datetime.datetime) -> numpy.datetime64:
+    if t.tzinfo is not None:
+        t = t.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return numpy.datetime64(t, 'ms')
@@ -0,0 +1,277 @@
+"""Live timing client feeding the tracker in-process, without polling the recorded file.
+
+Usage:
+    python -m tracker.live
+    python -m tracker.live --url http://127.0.0.1:8765/signalrcore
+"""
+import argparse
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+
+import requests
+from fastf1.internals.f1auth import get_auth_token
+from fastf1.livetiming.client import SignalRClient
+from signalrcore.hub_connection_builder import HubConnectionBuilder
+from signalrcore.messages.completion_message import CompletionMessage
+
+import setup
+import util
+from tracker import archive
+from tracker.render import Renderer
+from tracker.tracking import LOG_FILES, Config, Race
+
+
+def format_message(msg) -> list[str]:
+    """Format a received message into lines the way SignalRClient records them.
+
+    Args:
+        msg: A feed invocation's arguments, or the completion of the Subscribe call holding
+            the initial state of every topic.
+
+    Returns:
+        Recorded lines.
+    """
+    if isinstance(msg, CompletionMessage):
+        return [str([key, json.dumps(value), '']) for key, value in (msg.result or {}).items()]
+    return [str(msg)]
+
+
+class Archiver:
+    """Appends lines to the recording from a background thread.
+
+    Writing and flushing every message in the receive thread delays the next message; here
+    the receive thread only enqueues, and the file is flushed whenever the queue runs empty.
+
+    Attributes:
+        __lines: Lines waiting to be written; None asks the thread to stop.
+        __log: Logger instance for logging messages.
+        __thread: The writing thread, None until started.
+    """
+
+    def __init__(self, log):
+        self.__lines: queue.Queue[str | None] = queue.Queue()
+        self.__log = log
+        self.__thread: threading.Thread | None = None
+
+    def put(self, line: str):
+        """Queue a line to be appended."""
+        self.__lines.put(line)
+
+    def start(self, file):
+        """Start writing the queued lines to an open text file.
+
+        Args:
+            file: File to append to, or an ArchiveWriter; it stays owned by the caller.
+        """
+        self.__thread = threading.Thread(target=self.__run, args=(file,), name="archiver", daemon=True)
+        self.__thread.start()
+
+    def close(self):
+        """Write the lines queued so far and stop the thread."""
+        self.__lines.put(None)
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __run(self, file):
+        while True:
+            line = self.__lines.get()
+            if line is None:
+                file.flush()
+                return
+            try:
+                file.write(line + '\n')
+                if self.__lines.empty():
+                    file.flush()
+            except Exception:
+                self.__log.exception("Exception while writing message to file")
+
+
+class QueueingSignalRClient(SignalRClient):
+    """SignalRClient handing every message to an in-memory queue as well as to the recording.
+
+    Messages are put on the queue as recorded lines, so the consumer handles exactly what a
+    tracker following the file would read. None is put on the queue once the client exits.
+
+    Attributes:
+        __messages: Queue the consumer reads lines from.
+        __archiver: Writes the lines to the recording in the background.
+        __stopped: Set to make the client exit.
+    """
+
+    def __init__(self, filename: str, messages: queue.Queue, filemode: str = 'a', timeout: int = 1800,
+                 logger=None, no_auth: bool = False, url: str | None = None):
+        """Initialize QueueingSignalRClient.
+
+        Args:
+            filename: Recording to append the raw lines to, an archive (tracker.archive) if it ends in .f1a.
+            messages: Queue the lines are put on.
+            filemode: 'a' to append to or 'w' to overwrite the recording.
+            timeout: Seconds without a message after which the client exits, 0 to disable.
+            logger: Logger instance for logging messages.
+            no_auth: Whether to connect without authentication.
+            url: Base URL of another SignalR Core endpoint, e.g. a StandInServer.
+        """
+        super().__init__(filename, filemode=filemode, timeout=timeout, logger=logger, no_auth=no_auth)
+        if url is not None:
+            self._connection_url = url
+            self._negotiate_url = url + '/negotiate'
+        self.__messages = messages
+        self.__archiver = Archiver(self.logger)
+        self.__stopped = threading.Event()
+
+    def stop(self):
+        """Make start() return, from another thread."""
+        self.__stopped.set()
+
+    def _on_message(self, msg):
+        self._t_last_message = time.time()
+        if not isinstance(msg, (list, CompletionMessage)):
+            self.logger.error(f"Unknown message type: {type(msg)}")
+            return
+        for line in format_message(msg):
+            self.__messages.put(line)
+            self.__archiver.put(line)
+
+    def _run(self):
+        # as SignalRClient._run, but the archiver writes the file and, without auth, no
+        # access_token_factory is passed at all: signalrcore 1.x rejects None
+        if archive.is_archive(self.filename):
+            # the archiver's flushes seal a chunk every few seconds
+            self._output_file = archive.ArchiveWriter(self.filename, self.filemode)
+        else:
+            self._output_file = open(self.filename, self.filemode, encoding='utf-8')
+        self.__archiver.start(self._output_file)
+
+        r = requests.options(self._negotiate_url, headers=self.headers)
+        self.headers.update({"Cookie": f"AWSALBCORS={r.cookies['AWSALBCORS']}"})
+        options = {"verify_ssl": True, "headers": self.headers}
+        if not self._no_auth:
+            options["access_token_factory"] = get_auth_token
+        self._connection = HubConnectionBuilder() \
+            .with_url(self._connection_url, options=options) \
+            .configure_logging(logging.INFO) \
+            .build()
+        self._connection.on_open(self._on_connect)
+        self._connection.on_close(self._on_close)
+        self._connection.on('feed', self._on_message)
+        self._connection.start()
+
+        while not self._is_connected:
+            time.sleep(0.1)
+        self._connection.send("Subscribe", [self.topics], on_invocation=self._on_message)
+
+    def _supervise(self):
+        self._t_last_message = time.time()
+        while not self.__stopped.wait(1):
+            if self.timeout != 0 and time.time() - self._t_last_message > self.timeout:
+                self.logger.warning(f"Timeout - received no data for more than {self.timeout} seconds!")
+                break
+        self._exit()
+
+    def _exit(self):
+        self._connection.stop()
+        self.__archiver.close()
+        self._output_file.close()
+        self.__messages.put(None)
+
+
+def consume(messages: queue.Queue, race: Race, renderer: Renderer, max_rate: float = 1.0,
+            on_render=lambda: None):
+    """Handle queued lines until None arrives, rendering at most max_rate times per second.
+
+    Args:
+        messages: Queue of recorded lines, ended by None.
+        race: Race handling the lines.
+        renderer: Renderer of the changed charts.
+        max_rate: Maximum number of renders per second.
+        on_render: Called after each render, e.g. to write a timestamp.
+    """
+    interval = 1.0 / max_rate if max_rate > 0 else 0.0
+    rendered = 0.0
+    done = False
+    while not done:
+        try:
+            line = messages.get(timeout=max(interval, 0.1))
+        except queue.Empty:
+            line = ''
+        # handle everything already queued before rendering once
+        while line is not None:
+            if line:
+                race.handle(line)
+            try:
+                line = messages.get_nowait()
+            except queue.Empty:
+                break
+        done = line is None
+        if done or time.monotonic() - rendered >= interval:
+            # TimingData held back by the coalescer is applied before the state is drawn
+            race.apply_pending()
+            race.flush_logs()
+            renderer.render(race)
+            on_render()
+            rendered = time.monotonic()
+
+
+def __main():
+    """Record the live feed and track it in the same process.
+
+    Expected config keys are those of tracker.tracking. The recording is appended to
+    live/data/source/<FileName> as live.py does, and the tracker's outputs are the same as
+    tracking.py's, without checkpoints: nothing is re-read from the recording.
+
+    After a restart the recording therefore keeps everything received before it, while the race
+    state starts over from the initial state the subscription returns, so the laps before the
+    restart are missing from the plots. Running tracker.tracking on the recording recovers them.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="SignalR Core endpoint instead of the live timing one, e.g. a stand-in")
+    parser.add_argument('--no-auth', action='store_true', help="connect without authentication")
+    args = parser.parse_args()
+    log = setup.log()
+
+    root = Path(__file__).resolve().parents[1]
+    results_path = root / 'live' / 'data' / 'results'
+    logs_path = results_path / 'logs'
+    (results_path / 'images').mkdir(parents=True, exist_ok=True)
+    logs_path.mkdir(parents=True, exist_ok=True)
+    for name in LOG_FILES:
+        try:
+            (logs_path / name).unlink()
+        except FileNotFoundError:
+            pass
+    with (root / 'config.json').open('r', encoding='utf-8') as file:
+        config = json.load(file)
+    tracker_config = config.get('Tracker', {})
+
+    messages: queue.Queue[str | None] = queue.Queue()
+    client = QueueingSignalRClient(str(root / 'live' / 'data' / 'source' / config['FileName']), messages,
+                                   logger=log, no_auth=args.no_auth or args.url is not None, url=args.url)
+    race = Race(Config(log, str(logs_path)), coalesce_window=tracker_config.get('CoalesceWindow', 0.2))
+    renderer = Renderer(log, workers=tracker_config.get('RenderWorkers', 2))
+
+    def write_timestamp():
+        try:
+            (logs_path / 'timestamp.txt').unlink()
+        except FileNotFoundError:
+            pass
+        util.write_to_file_top(str(logs_path / 'timestamp.txt'), f"{datetime.datetime.now()}")
+
+    receiver = threading.Thread(target=client.start, name="signalr client", daemon=True)
+    receiver.start()
+    try:
+        consume(messages, race, renderer, tracker_config.get('MaxRenderRate', 1.0), write_timestamp)
+    except KeyboardInterrupt:
+        client.stop()
+    finally:
+        receiver.join()
+        renderer.close()
+        race.close()
+
+
+if __name__ == "__main__":
+    __main()
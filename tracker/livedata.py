@@ -0,0 +1,102 @@
+from datetime import datetime
+from pathlib import Path
+
+from fastf1.livetiming.data import LiveTimingData
+
+from tracker import archive
+
+SKIPPED_CATEGORY = 'SessionInfo'
+
+
+class IncrementalLiveTimingData(LiveTimingData):
+    """LiveTimingData following a growing recording, parsing only the lines appended since the last update.
+
+    The same instance is passed to session.load() cycle after cycle; update() adds the new lines to
+    the data already parsed instead of reading the whole file again. SessionInfo lines are skipped,
+    as track.py used to filter them into a temporary copy of the recording.
+
+    LiveTimingData takes the session start from the 'Started' session status and falls back to the
+    first timestamp. When the status only arrives in a later update, the session times already
+    parsed are shifted onto the new start, so that the data matches a full load of the same file.
+
+    session.load() would still build the laps from every message parsed so far; track.py passes
+    the data to tracker.livesession.IncrementalSession instead, which handles only the new entries.
+
+    Attributes:
+        __reader: Follows the recording.
+        __log: Logger instance for logging messages.
+        __started: Whether the start date was taken from the 'Started' session status.
+        __resets: Reader restarts already handled.
+        __generation: Incremented whenever entries already parsed are dropped or their session times shifted.
+    """
+
+    def __init__(self, path: str | Path, log):
+        """Initialize IncrementalLiveTimingData.
+
+        Args:
+            path: Path to the recording, plain or an archive (tracker.archive). It does not need to exist yet.
+            log: Logger instance for logging messages.
+        """
+        super().__init__(str(path))
+        self.__reader = archive.open_reader(path, log)
+        self.__log = log
+        self.__started = False
+        self.__resets = 0
+        self.__generation = 0
+
+    def get_generation(self) -> int:
+        """Get the generation of the parsed data; entries parsed in an older generation are no longer valid."""
+        return self.__generation
+
+    def get_offset(self) -> int:
+        """Get the byte offset of the recording parsed so far."""
+        return self.__reader.get_offset()
+
+    def load(self):
+        """Parse what was appended so far; called by LiveTimingData on first access."""
+        self.update()
+
+    def update(self) -> int:
+        """Parse the lines appended to the recording since the previous update.
+
+        If the recording was truncated or replaced, the parsed data is dropped and the new file is
+        parsed from the beginning.
+
+        Returns:
+            Number of lines parsed.
+        """
+        lines = [line for line in self.__reader.read_lines() if SKIPPED_CATEGORY not in line]
+        if self.__reader.get_resets() != self.__resets:
+            self.__resets = self.__reader.get_resets()
+            self.__log.warning("recording restarted, dropping the parsed live timing data")
+            self.data = dict()
+            self.errorcount = 0
+            self._start_date = None
+            self.__started = False
+            self.__generation += 1
+        if not self.__started:
+            self.__find_start_date(lines)
+        for line in lines:
+            self._parse_line(line)
+        self._files_read = True
+        return len(lines)
+
+    def __find_start_date(self, lines: list[str]):
+        if not any('SessionStatus' in line and 'Started' in line for line in lines):
+            return
+        previous: datetime | None = self._start_date
+        self._start_date = None
+        try:
+            self._try_set_correct_start_date(lines)
+        except (KeyError, TypeError):
+            self.__log.warning("could not read the session start date")
+        if self._start_date is None:
+            self._start_date = previous
+            return
+        self.__started = True
+        if previous is not None and previous != self._start_date:
+            shift = previous - self._start_date
+            self.__generation += 1
+            for entries in self.data.values():
+                for entry in entries:
+                    entry[0] += shift
@@ -0,0 +1,499 @@
+"""The session tables track.py draws from, kept up to date from the live timing data instead of session.load()."""
+import bisect
+import collections
+import datetime
+import re
+from typing import Final
+
+import pandas
+from fastf1.core import Laps, SessionResults
+from fastf1.utils import to_datetime, to_timedelta
+
+from tracker.livedata import IncrementalLiveTimingData
+
+# values up to five seconds late still belong to the lap completed before them, as in fastf1
+LATE: Final = datetime.timedelta(seconds=5)
+# longer lap times are discarded by fastf1, they are usually associated with the wrong lap
+MAX_LAP_TIME: Final = datetime.timedelta(seconds=150)
+# drivers first declared later than this are ignored by fastf1
+NEW_DRIVER_CUTOFF: Final = datetime.timedelta(minutes=60)
+ACCURACY_TOLERANCE: Final = datetime.timedelta(milliseconds=3)
+# track statuses under which a lap can be accurate: green and yellow flags
+ACCURATE_TRACK_STATUSES: Final = ('1', '2', '12', '21')
+SAFETY_CAR: Final = '4'
+SECTORS: Final = (('0', 'Sector1Time', 'Sector1SessionTime'), ('1', 'Sector2Time', 'Sector2SessionTime'),
+                  ('2', 'Sector3Time', 'Sector3SessionTime'))
+# DriverList key -> SessionResults column
+DRIVER_COLUMNS: Final = {'BroadcastName': 'BroadcastName', 'Tla': 'Abbreviation', 'TeamName': 'TeamName',
+                         'TeamColour': 'TeamColor', 'FirstName': 'FirstName', 'LastName': 'LastName',
+                         'HeadshotUrl': 'HeadshotUrl', 'CountryCode': 'CountryCode'}
+# WeatherData key -> converter, a missing or invalid value converts 0 as in fastf1
+WEATHER_COLUMNS: Final = {'AirTemp': float, 'Humidity': float, 'Pressure': float, 'Rainfall': lambda v: v == '1',
+                          'TrackTemp': float, 'WindDirection': int, 'WindSpeed': float}
+# RaceControlMessages key -> converter, a missing or invalid value is None
+MESSAGE_COLUMNS: Final = {'Category': str, 'Message': str, 'Status': str, 'Flag': str, 'Scope': str, 'Sector': int,
+                          'RacingNumber': str, 'Lap': int}
+# categories whose entries go into the laps; any other table is made from a single category
+LAP_CATEGORIES: Final = frozenset({'DriverList', 'SessionStatus', 'TrackStatus', 'TimingAppData', 'TimingData',
+                                   'RaceControlMessages'})
+DELETED: Final = re.compile(r"CAR (\d{1,2}) .* TIME (\d:\d\d\.\d\d\d) DELETED - (.*)")
+REINSTATED: Final = re.compile(r"CAR (\d{1,2}) .* TIME (\d:\d\d\.\d\d\d) .*REINSTATED.*")
+
+
+class DriverLaps:
+    """The laps of one driver, completed one TimingData update at a time.
+
+    Follows the rules of fastf1's lap parser, which needs the whole session and a look-ahead pass:
+    a lap only counts once the car has left the pit lane, lap and sector times up to LATE after
+    the line still belong to the lap just completed, and a pit exit less than LATE before the line
+    belongs to the next lap.
+
+    Attributes:
+        __laps: Completed laps, oldest first, as dicts of Laps columns.
+        __current: The lap being driven.
+        __lap_count: Highest NumberOfLaps received.
+        __pit_stops: Pit exits so far, -1 until the car first leaves the pit lane.
+        __in_past: Whether the feed went back to a lap already completed, whose data is ignored.
+    """
+
+    def __init__(self):
+        """Initialize DriverLaps."""
+        self.__laps: list[dict] = []
+        self.__current = new_lap()
+        self.__lap_count = 0
+        self.__pit_stops = -1
+        self.__in_past = False
+
+    def get_laps(self) -> list[dict]:
+        """Get the completed laps, oldest first."""
+        return self.__laps
+
+    def add(self, t: datetime.timedelta, data: dict):
+        """Apply a TimingData update of the driver.
+
+        Args:
+            t: Session time of the update.
+            data: The driver's entry of the update's Lines.
+        """
+        lap_count = data.get('NumberOfLaps')
+        if isinstance(lap_count, int):
+            if self.__in_past and lap_count == self.__lap_count:
+                self.__in_past = False
+            elif lap_count < self.__lap_count:
+                self.__in_past = True
+        if self.__in_past:
+            return
+        lap = self.__current
+        if self.__laps and t - self.__laps[-1]['Time'] < LATE:
+            lap = self.__laps[-1]
+
+        if isinstance(data.get('Sectors'), dict):
+            for key, column, session_column in SECTORS:
+                sector = data['Sectors'].get(key)
+                if isinstance(sector, dict) and sector.get('Value'):
+                    lap[column] = to_timedelta(sector['Value'])
+                    lap[session_column] = t
+        if isinstance(data.get('LastLapTime'), dict) and data['LastLapTime'].get('Value') is not None:
+            # None for an empty value: the lap has no time of its own, it is taken from the sectors
+            lap_time = to_timedelta(data['LastLapTime']['Value'])
+            if lap_time is None or lap_time < MAX_LAP_TIME:
+                lap['LapTime'] = lap_time
+
+        if data.get('InPit') is True:
+            if self.__pit_stops >= 0:
+                self.__current['PitInTime'] = t
+        elif 'InPit' in data:
+            self.__current['PitOutTime'] = t
+            self.__pit_stops += 1
+
+        if isinstance(lap_count, int) and lap_count > self.__lap_count:
+            self.__lap_count += 1
+            if self.__pit_stops >= 0:
+                self.__complete(t)
+
+    def __complete(self, t: datetime.timedelta):
+        lap = self.__current
+        self.__current = new_lap()
+        lap['Time'] = t
+        lap['LapNumber'] = len(self.__laps) + 1
+        if lap['PitOutTime'] is not None and t - lap['PitOutTime'] < LATE:
+            self.__current['PitOutTime'] = lap['PitOutTime']
+            lap['PitOutTime'] = None
+        self.__laps.append(lap)
+
+
+class IncrementalSession:
+    """Keeps the laps, results, weather, track status and race control messages of a fastf1 Session
+    up to date, handling only the live timing entries parsed since the previous update.
+
+    session.load() rebuilds every table from all the messages parsed so far, which took seconds
+    per cycle late in a race. The laps are completed per driver as TimingData arrives (see
+    DriverLaps) and the other tables only get the new rows; what is rebuilt per update is the
+    DataFrames of the tables that changed, about 0.1 s for a full race (see python -m
+    tracker.benchmark livedata).
+
+    The laps follow the rules of fastf1's parser, with these differences: only completed laps are
+    listed, the lap end times are not aligned between drivers on the gaps to the leader, and no
+    lap is generated for a driver who retired on the first lap.
+
+    Attributes:
+        __session: Session whose tables are replaced.
+        __livedata: Live timing data the entries are taken from.
+        __handlers: Map of category -> method handling one of its entries.
+        __generation: Generation of the live timing data the state was built from.
+        __consumed: Map of category -> number of its entries already handled.
+        __changed: Categories with entries handled since the tables were last set.
+        __drivers: Map of driver number -> DriverLaps.
+        __driver_list: Map of driver number -> DriverList fields.
+        __stint_times: Map of driver number -> session times of the TimingAppData stint updates.
+        __stint_numbers: Map of driver number -> stint number of each of those updates.
+        __stints: Map of driver number -> stint number -> TimingAppData fields.
+        __track_status: Map of Time, Status and Message -> values, in session time order.
+        __session_status: Map of Time and Status -> values.
+        __weather: Map of WeatherData column -> values.
+        __messages: Map of RaceControlMessages column -> values.
+        __deleted: Map of (driver number, lap time) -> reason of the deleted laps.
+    """
+
+    def __init__(self, session, livedata: IncrementalLiveTimingData):
+        """Initialize IncrementalSession.
+
+        Args:
+            session: fastf1 Session the tables are set on, instead of calling its load().
+            livedata: Live timing data of the session, updated by the caller.
+        """
+        self.__session = session
+        self.__livedata = livedata
+        self.__handlers = {'DriverList': self.__handle_driver_list, 'SessionStatus': self.__handle_session_status,
+                           'TrackStatus': self.__handle_track_status, 'TimingAppData': self.__handle_timing_app_data,
+                           'TimingData': self.__handle_timing_data, 'WeatherData': self.__handle_weather,
+                           'RaceControlMessages': self.__handle_race_control}
+        self.__reset()
+
+    def __reset(self):
+        self.__generation = self.__livedata.get_generation()
+        self.__consumed: dict[str, int] = collections.defaultdict(int)
+        # every table is set on the first update, also without entries
+        self.__changed: set[str] = set(self.__handlers)
+        self.__drivers: dict[str, DriverLaps] = {}
+        self.__driver_list: dict[str, dict] = {}
+        self.__stint_times: dict[str, list[datetime.timedelta]] = collections.defaultdict(list)
+        self.__stint_numbers: dict[str, list[int]] = collections.defaultdict(list)
+        self.__stints: dict[str, dict[int, dict]] = collections.defaultdict(dict)
+        self.__track_status: dict[str, list] = {'Time': [], 'Status': [], 'Message': []}
+        self.__session_status: dict[str, list] = {'Time': [], 'Status': []}
+        self.__weather: dict[str, list] = {'Time': [], **{column: [] for column in WEATHER_COLUMNS}}
+        self.__messages: dict[str, list] = {'Time': [], **{column: [] for column in MESSAGE_COLUMNS}}
+        self.__deleted: dict[tuple[str, str], str] = {}
+
+    def get_session(self):
+        """Get the Session the tables are set on."""
+        return self.__session
+
+    def update(self) -> int:
+        """Handle the entries parsed since the previous update and set the session's tables.
+
+        Only the tables the new entries go into are built again. If the live timing data was
+        dropped or its session times shifted, everything parsed so far is handled again.
+
+        Returns:
+            Number of entries handled.
+        """
+        if self.__livedata.get_generation() != self.__generation:
+            self.__reset()
+        handled = 0
+        for category, handler in self.__handlers.items():
+            entries = self.__livedata.data.get(category, ())
+            for t, data in entries[self.__consumed[category]:]:
+                if isinstance(data, dict):
+                    handler(t, data)
+            if len(entries) > self.__consumed[category]:
+                handled += len(entries) - self.__consumed[category]
+                self.__consumed[category] = len(entries)
+                self.__changed.add(category)
+        self.__set_tables(self.__changed)
+        self.__changed = set()
+        return handled
+
+    def __handle_driver_list(self, t: datetime.timedelta, data: dict):
+        for number, patch in data.items():
+            if not isinstance(patch, dict):
+                continue
+            if number not in self.__driver_list:
+                if t >= NEW_DRIVER_CUTOFF:
+                    continue
+                self.__driver_list[number] = {}
+            self.__driver_list[number].update(patch)
+
+    def __handle_session_status(self, t: datetime.timedelta, data: dict):
+        if 'Status' in data:
+            self.__session_status['Time'].append(t)
+            self.__session_status['Status'].append(data['Status'])
+
+    def __handle_track_status(self, t: datetime.timedelta, data: dict):
+        self.__track_status['Time'].append(t)
+        self.__track_status['Status'].append(data.get('Status', ''))
+        self.__track_status['Message'].append(data.get('Message', ''))
+
+    def __handle_timing_app_data(self, t: datetime.timedelta, data: dict):
+        if not isinstance(data.get('Lines'), dict):
+            return
+        for number, line in data['Lines'].items():
+            update = line.get('Stints') if isinstance(line, dict) else None
+            if not update:
+                continue
+            # a list holds the stints from the first, a dict the stints that changed
+            for stint_number, stint in (update.items() if isinstance(update, dict) else enumerate(update)):
+                if not isinstance(stint, dict):
+                    continue
+                self.__stint_times[number].append(t)
+                self.__stint_numbers[number].append(int(stint_number))
+                self.__stints[number].setdefault(int(stint_number), {}).update(stint)
+
+    def __handle_timing_data(self, t: datetime.timedelta, data: dict):
+        if not isinstance(data.get('Lines'), dict):
+            return
+        for number, line in data['Lines'].items():
+            if isinstance(line, dict):
+                if number not in self.__drivers:
+                    self.__drivers[number] = DriverLaps()
+                self.__drivers[number].add(t, line)
+
+    def __handle_weather(self, t: datetime.timedelta, data: dict):
+        self.__weather['Time'].append(t)
+        for column, convert in WEATHER_COLUMNS.items():
+            try:
+                self.__weather[column].append(convert(data[column]))
+            except (KeyError, ValueError):
+                self.__weather[column].append(convert(0))
+
+    def __handle_race_control(self, _: datetime.timedelta, data: dict):
+        messages = data.get('Messages', ())
+        for message in messages.values() if isinstance(messages, dict) else messages:
+            if not isinstance(message, dict) or 'Utc' not in message:
+                continue
+            self.__messages['Time'].append(to_datetime(message['Utc']))
+            for column, convert in MESSAGE_COLUMNS.items():
+                try:
+                    self.__messages[column].append(convert(message[column]))
+                except (KeyError, ValueError):
+                    self.__messages[column].append(None)
+            text = str(message.get('Message', ''))
+            if match := DELETED.match(text):
+                self.__deleted[(match.group(1), match.group(2))] = match.group(3)
+            elif match := REINSTATED.match(text):
+                self.__deleted.pop((match.group(1), match.group(2)), None)
+
+    def __set_tables(self, changed: set[str]):
+        session = self.__session
+        start = next((t for t, status in zip(self.__session_status['Time'], self.__session_status['Status'])
+                      if status == 'Started'), None)
+        if 'SessionStatus' in changed:
+            session._session_status = pandas.DataFrame(self.__session_status)
+            session._session_start_time = start
+        if 'DriverList' in changed:
+            session._results = self.__results()
+        if 'TrackStatus' in changed:
+            session._track_status = pandas.DataFrame(self.__track_status)
+        if 'WeatherData' in changed:
+            session._weather_data = pandas.DataFrame(self.__weather)
+        if 'RaceControlMessages' in changed:
+            session._race_control_messages = pandas.DataFrame(self.__messages)
+        if changed & LAP_CATEGORIES:
+            session._laps = Laps(self.__lap_rows(start), session=session, _force_default_cols=True)
+
+    def __results(self) -> SessionResults:
+        rows = {'DriverNumber': [], **{column: [] for column in DRIVER_COLUMNS.values()}, 'FullName': []}
+        for number, driver in self.__driver_list.items():
+            rows['DriverNumber'].append(driver.get('RacingNumber') or number)
+            for key, column in DRIVER_COLUMNS.items():
+                rows[column].append(driver.get(key))
+            rows['FullName'].append(f"{driver.get('FirstName')} {driver.get('LastName')}")
+        return SessionResults(rows, index=rows['DriverNumber'], _force_default_cols=True)
+
+    def __lap_rows(self, start: datetime.timedelta | None) -> list[dict]:
+        rows = []
+        for number, driver in self.__drivers.items():
+            laps = driver.get_laps()
+            if laps and not has_data(laps[0]):
+                # a pseudo out-lap without data, fastf1 drops it
+                laps = laps[1:]
+            if not laps:
+                continue
+            team = self.__driver_list.get(number, {}).get('TeamName')
+            abbreviation = self.__driver_list.get(number, {}).get('Tla')
+            driver_rows = []
+            for i, lap in enumerate(laps):
+                row = dict(lap)
+                row['LapNumber'] = i + 1
+                row['LapTime'] = checked_lap_time(lap)
+                row['Time'] = lap_end(lap, driver_rows[-1]['Time'] if driver_rows else None)
+                driver_rows.append(row)
+            sync_lap_ends(driver_rows)
+            stint_laps: dict[int, int] = collections.defaultdict(int)
+            previous = None
+            for row in driver_rows:
+                row['DriverNumber'] = number
+                row['Driver'] = abbreviation
+                row['Team'] = team
+                if previous is None and start is not None and row['PitOutTime'] is not None \
+                        and row['PitOutTime'] < start:
+                    row['PitOutTime'] = None
+                row['LapStartTime'] = previous['Time'] if previous is not None else start
+                if row['LapStartTime'] is None:
+                    row['LapStartTime'] = row['PitOutTime']
+                self.__set_stint(row, number, stint_laps)
+                row['TrackStatus'] = self.__lap_track_status(row['LapStartTime'], row['Time'])
+                row['IsAccurate'] = is_accurate(row, previous)
+                row['IsPersonalBest'] = False
+                row['FastF1Generated'] = False
+                lap_time = row['LapTime']
+                reason = None
+                if lap_time is not None:
+                    minutes, seconds = divmod(lap_time.total_seconds(), 60)
+                    reason = self.__deleted.get((number, f"{int(minutes)}:{seconds:06.3f}"))
+                row['Deleted'] = reason is not None
+                row['DeletedReason'] = reason or ''
+                rows.append(row)
+                previous = row
+        # positions follow the order in which the drivers completed each lap
+        by_lap: dict[int, list[dict]] = collections.defaultdict(list)
+        for row in rows:
+            by_lap[row['LapNumber']].append(row)
+        for lap_rows in by_lap.values():
+            lap_rows.sort(key=lambda r: r['Time'])
+            for position, row in enumerate(lap_rows, start=1):
+                row['Position'] = position
+        return rows
+
+    def __set_stint(self, row: dict, number: str, stint_laps: dict[int, int]):
+        """Set the stint columns of a lap from the last TimingAppData stint update before its end.
+
+        A new stint sent with the in-lap's end belongs to the out-lap.
+        """
+        i = bisect.bisect_left(self.__stint_times[number], row['Time'])
+        if i == 0:
+            row.update(Stint=None, Compound='', FreshTyre=False, TyreLife=None)
+            return
+        stint_number = self.__stint_numbers[number][i - 1]
+        stint = self.__stints[number][stint_number]
+        stint_laps[stint_number] += 1
+        start_laps = stint.get('StartLaps')
+        row['Stint'] = stint_number + 1
+        row['Compound'] = stint.get('Compound', '')
+        row['FreshTyre'] = stint.get('New') == 'true'
+        row['TyreLife'] = start_laps + stint_laps[stint_number] if isinstance(start_laps, int) else None
+
+    def __lap_track_status(self, start: datetime.timedelta | None, end: datetime.timedelta) -> str:
+        """Join the track statuses in force at any time during a lap, as fastf1 does."""
+        times = self.__track_status['Time']
+        # a status lasts until the next one; without a start only the status at the end counts
+        first = max(bisect.bisect_left(times, start if start is not None else end) - 1, 0)
+        status = ''
+        for s in self.__track_status['Status'][first:bisect.bisect_right(times, end)]:
+            if s not in status:
+                status += s
+        return status
+
+
+def new_lap() -> dict:
+    """Create an empty lap, as a dict of the Laps columns the parser fills."""
+    # LapTime is only set once the feed sent one
+    return {'Time': None, 'LapNumber': None, 'PitInTime': None, 'PitOutTime': None,
+            'Sector1Time': None, 'Sector2Time': None, 'Sector3Time': None,
+            'Sector1SessionTime': None, 'Sector2SessionTime': None, 'Sector3SessionTime': None}
+
+
+def has_data(lap: dict) -> bool:
+    """Whether the feed sent a lap or sector time for a lap."""
+    return lap.get('LapTime') is not None or any(lap[column] is not None for _, column, _ in SECTORS)
+
+
+def checked_lap_time(lap: dict) -> datetime.timedelta | None:
+    """Get the time of a lap as fastf1 does, None if it is unknown or shorter than its sectors."""
+    if 'LapTime' not in lap:
+        return None
+    sectors = [lap[column] for _, column, _ in SECTORS]
+    sector_sum = sum((sector for sector in sectors if sector is not None), datetime.timedelta(0))
+    if lap['LapTime'] is None:
+        return sector_sum if None not in sectors else None
+    return lap['LapTime'] if sector_sum <= lap['LapTime'] else None
+
+
+def lap_end(lap: dict, previous_end: datetime.timedelta | None) -> datetime.timedelta:
+    """Get the session time a lap ended, from the earliest of the sector triggers as fastf1 does.
+
+    Args:
+        lap: The lap, its Time being that of the update that completed it.
+        previous_end: End of the driver's lap before it, None for the first lap.
+
+    Returns:
+        The end of the lap, its Time if the sectors would put it before the previous lap's end.
+    """
+    end = lap['Time']
+    sector_sum = datetime.timedelta(0)
+    for column, session_column in ((None, 'Sector3SessionTime'), ('Sector3Time', 'Sector2SessionTime'),
+                                   ('Sector2Time', 'Sector1SessionTime')):
+        if lap[session_column] is None:
+            continue
+        if column is not None:
+            if lap[column] is None:
+                break
+            sector_sum += lap[column]
+        end = min(end, lap[session_column] + sector_sum)
+    if previous_end is not None and end < previous_end:
+        return lap['Time']
+    return end
+
+
+def sync_lap_ends(laps: list[dict]):
+    """Move the ends of a driver's laps earlier where a lap time says so, as fastf1 does.
+
+    A lap cannot end later than the previous lap's end plus its lap time, nor start later than
+    its own end minus its lap time; the earlier trigger is the more exact one.
+
+    Args:
+        laps: The driver's laps, oldest first, with their LapTime checked and Time from lap_end().
+    """
+    for i in range(len(laps) - 1, 0, -1):
+        if laps[i]['LapTime'] is None:
+            continue
+        start = laps[i]['Time'] - laps[i]['LapTime']
+        if start < laps[i - 1]['Time'] and (i == 1 or start >= laps[i - 2]['Time']):
+            laps[i - 1]['Time'] = start
+    for previous, lap in zip(laps, laps[1:]):
+        if lap['LapTime'] is None:
+            continue
+        lap['Time'] = min(lap['Time'], previous['Time'] + lap['LapTime'])
+        # the sectors are triggered no later than the previous lap's end plus the sector times
+        end = previous['Time']
+        for _, column, session_column in SECTORS:
+            if lap[column] is None:
+                break
+            end += lap[column]
+            if lap[session_column] is not None and end < lap[session_column]:
+                lap[session_column] = end
+
+
+def is_accurate(lap: dict, previous: dict | None) -> bool:
+    """Check a lap the way fastf1's lap accuracy check does.
+
+    Args:
+        lap: The lap, with its LapTime checked and TrackStatus set.
+        previous: The driver's lap before it, None for the first lap.
+
+    Returns:
+        Whether the lap is not a pit lap, was driven under green or yellow flags, not right after a
+        safety car, and its lap time matches both its sector times and the time since the previous lap.
+    """
+    sectors = [lap[column] for _, column, _ in SECTORS]
+    if (lap['PitInTime'] is not None or lap['PitOutTime'] is not None or lap['LapTime'] is None
+            or None in sectors or lap['TrackStatus'] not in ACCURATE_TRACK_STATUSES):
+        return False
+    if abs(sum(sectors, datetime.timedelta(0)) - lap['LapTime']) > ACCURACY_TOLERANCE:
+        return False
+    if previous is None:
+        return True
+    if previous['TrackStatus'] == SAFETY_CAR:
+        return False
+    return abs(lap['Time'] - previous['Time'] - lap['LapTime']) <= ACCURACY_TOLERANCE
@@ -0,0 +1,143 @@
+import os
+import resource
+from pathlib import Path
+from typing import Callable, Final, Iterable
+
+# noinspection PyPackageRequirements
+from opentelemetry import metrics, trace
+# noinspection PyPackageRequirements
+from opentelemetry.metrics import CallbackOptions, Meter, Observation
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.metrics import MeterProvider
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.resources import Resource
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.trace import TracerProvider
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+CONSOLE: Final = "console"
+FILE: Final = "file"
+METRICS_FILE: Final = "metrics.jsonl"
+SPANS_FILE: Final = "spans.jsonl"
+
+
+def _rss(options: CallbackOptions) -> Iterable[Observation]:
+    try:
+        with open('/proc/self/statm', 'r', encoding='ascii') as file:
+            pages = int(file.read().split()[1])
+        yield Observation(pages * os.sysconf('SC_PAGE_SIZE'))
+    except (OSError, ValueError, IndexError):
+        # without procfs only the peak is known; ru_maxrss is in KiB on Linux
+        yield Observation(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+class TrackerMetrics:
+    """OpenTelemetry instruments of the live tracking loop.
+
+    Without an SDK provider configured (see configure) the instruments are the API's no-op ones,
+    so the tracker can record unconditionally.
+
+    Attributes:
+        __lines: Counter of lines read from the source file.
+        __parse_failures: Counter of lines that are not valid messages.
+        __handle_duration: Histogram of seconds handling one message, by category.
+        __render_duration: Histogram of seconds drawing one chart, by chart.
+        __latency: Histogram of seconds from reading a line to the chart showing it being drawn, by chart.
+        __categories: Map of category -> attributes, so that recording does not build a dict per message.
+    """
+
+    def __init__(self, meter: Meter | None = None):
+        """Initialize TrackerMetrics.
+
+        Args:
+            meter: Meter creating the instruments, None for the global provider's.
+        """
+        meter = meter if meter is not None else metrics.get_meter(__name__)
+        self.__lines = meter.create_counter(
+            "tracker.lines", unit="{line}", description="Lines read from the source file")
+        self.__parse_failures = meter.create_counter(
+            "tracker.parse_failures", unit="{line}", description="Lines that are not valid messages")
+        self.__handle_duration = meter.create_histogram(
+            "tracker.handle.duration", unit="s", description="Time handling one message")
+        self.__render_duration = meter.create_histogram(
+            "tracker.render.duration", unit="s", description="Time drawing one chart")
+        self.__latency = meter.create_histogram(
+            "tracker.file_to_plot.latency", unit="s",
+            description="Time from reading a line to the chart showing it being drawn")
+        meter.create_observable_gauge(
+            "tracker.memory.rss", callbacks=[_rss], unit="By", description="Resident memory of the tracker")
+        self.__categories: dict[str, dict[str, str]] = {}
+
+    def add_lines(self, count: int):
+        self.__lines.add(count)
+
+    def add_parse_failure(self):
+        self.__parse_failures.add(1)
+
+    def record_handle(self, category: str, seconds: float):
+        """Record the time one message of a category took to handle."""
+        attributes = self.__categories.get(category)
+        if attributes is None:
+            attributes = self.__categories[category] = {"category": str(category)}
+        self.__handle_duration.record(seconds, attributes)
+
+    def record_render(self, chart: str, seconds: float, latency: float | None = None):
+        """Record one drawn chart.
+
+        Args:
+            chart: Name of the chart.
+            seconds: Time drawing it.
+            latency: Time since the oldest line it shows was read, None if unknown.
+        """
+        attributes = {"chart": chart}
+        self.__render_duration.record(seconds, attributes)
+        if latency is not None:
+            self.__latency.record(latency, attributes)
+
+
+def configure(exporter: str, results_path: Path, interval: float = 60.0) -> Callable[[], None]:
+    """Install SDK providers exporting the tracker's metrics and spans.
+
+    Args:
+        exporter: CONSOLE to print them, FILE to append them as JSON lines to metrics.jsonl and
+            spans.jsonl in results_path.
+        results_path: Directory of the files.
+        interval: Seconds between two metric exports.
+
+    Returns:
+        Function flushing and shutting the providers down.
+
+    Raises:
+        ValueError: If the exporter is unknown.
+    """
+    files = []
+    if exporter == CONSOLE:
+        metrics_exporter = ConsoleMetricExporter()
+        spans_exporter = ConsoleSpanExporter()
+    elif exporter == FILE:
+        files = [open(results_path / METRICS_FILE, 'a', encoding='utf-8'),
+                 open(results_path / SPANS_FILE, 'a', encoding='utf-8')]
+        # one JSON document per line, so that the files can be read while the session runs
+        metrics_exporter = ConsoleMetricExporter(out=files[0], formatter=lambda data: data.to_json(indent=None) + "\n")
+        spans_exporter = ConsoleSpanExporter(out=files[1], formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        raise ValueError(f"unknown metrics exporter {exporter}")
+    service = Resource.create({"service.name": "tracker"})
+    meter_provider = MeterProvider(
+        resource=service,
+        metric_readers=[PeriodicExportingMetricReader(metrics_exporter, export_interval_millis=interval * 1000)])
+    tracer_provider = TracerProvider(resource=service)
+    tracer_provider.add_span_processor(BatchSpanProcessor(spans_exporter))
+    metrics.set_meter_provider(meter_provider)
+    trace.set_tracer_provider(tracer_provider)
+
+    def shutdown():
+        meter_provider.shutdown()
+        tracer_provider.shutdown()
+        for file in files:
+            file.close()
+
+    return shutdown
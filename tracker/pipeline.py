@@ -0,0 +1,313 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable
+
+# noinspection PyPackageRequirements
+from opentelemetry import trace
+
+from tracker import decoder, telemetry
+from tracker.metrics import TrackerMetrics
+from tracker.render import Renderer
+from tracker.tail import TailReader
+from tracker.watcher import FileWatcher
+
+DECODE = "decode"
+STATE = "state"
+RENDER = "render"
+STAGES = (DECODE, STATE, RENDER)
+
+tracer = trace.get_tracer(__name__)
+
+
+class StageStats:
+    """Counters of the queue feeding one pipeline stage.
+
+    For the render scheduler, an item is a render, its lag is the time since the first state
+    update it renders, and its depth is the number of state updates it renders at once.
+
+    Attributes:
+        __items: Number of items the stage took from its queue.
+        __lag_seconds: Total seconds items waited in the queue.
+        __max_lag: Longest wait of a single item.
+        __peak_depth: Largest queue depth seen when taking an item.
+    """
+
+    def __init__(self):
+        self.__items = 0
+        self.__lag_seconds = 0.0
+        self.__max_lag = 0.0
+        self.__peak_depth = 0
+
+    def get_items(self) -> int:
+        return self.__items
+
+    def get_mean_lag(self) -> float:
+        return self.__lag_seconds / self.__items if self.__items else 0.0
+
+    def get_max_lag(self) -> float:
+        return self.__max_lag
+
+    def get_peak_depth(self) -> int:
+        return self.__peak_depth
+
+    def record(self, lag: float, depth: int):
+        """Record an item taken from the queue.
+
+        Args:
+            lag: Seconds the item waited in the queue.
+            depth: Queue depth before the item was taken.
+        """
+        self.__items += 1
+        self.__lag_seconds += lag
+        self.__max_lag = max(self.__max_lag, lag)
+        self.__peak_depth = max(self.__peak_depth, depth)
+
+
+def decode_lines(lines: list[str], log, metrics: TrackerMetrics | None = None) -> list:
+    """Decode a batch of lines, logging and dropping the ones that are not valid messages.
+
+    CarData.z and Position.z payloads are inflated here too, so that the costliest part of
+    handling telemetry stays on the decoding executor.
+
+    Args:
+        lines: Lines written by SignalRClient.
+        log: Logger instance for logging messages.
+        metrics: Instruments the invalid lines are counted in, None for none.
+
+    Returns:
+        The decoded messages.
+    """
+    messages = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            messages.append(telemetry.expand(decoder.decode(line)))
+        except ValueError:
+            log.warning("Undecodable message %s", line)
+            if metrics is not None:
+                metrics.add_parse_failure()
+    return messages
+
+
+class Pipeline:
+    """Asyncio pipeline following the source file: reader -> decoder -> state -> render scheduler.
+
+    Stages are connected by bounded queues of batches, so a slow stage makes the previous ones
+    wait instead of buffering without limit: when decoding falls behind, the reader stops
+    advancing and the unread part simply stays in the file. Reading and decoding run on
+    executors, the race state is only touched by the event loop thread, and rendering is
+    requested through a flag rather than a queue, so any number of state updates made while a
+    render is running or rate limited collapse into one render of the latest state.
+
+    Attributes:
+        __race: Race the decoded messages are applied to.
+        __reader: Follows the source file.
+        __watcher: Wakes the reader when the source file changes.
+        __renderer: Renders the charts whose data changed.
+        __log: Logger instance for logging messages.
+        __queue_size: Maximum number of batches waiting in front of each stage.
+        __batch: Maximum number of lines in a batch.
+        __min_interval: Minimum number of seconds between two renders.
+        __executor: Executor decoding the batches, None for the loop's default one.
+        __on_state: Called with the source offset after each applied batch, e.g. to checkpoint.
+        __on_render: Called after each render, e.g. to write a timestamp.
+        __metrics: Instruments lines, parse failures, handler and render times are recorded to, None for none.
+        __stats: Stage name -> counters of the queue feeding it.
+        __updates: Number of applied batches, each asking for a render.
+        __renders: Number of renders.
+        __pending: State updates since the last render.
+        __pending_since: Monotonic time of the first of them.
+        __pending_read: Monotonic time the oldest line applied since the last render was read.
+        __logged: Monotonic time the counters were last logged.
+        __stopping: Set to make the reader stop at the end of the file.
+    """
+
+    def __init__(self, race, reader: TailReader, watcher: FileWatcher | None, renderer: Renderer, log,
+                 queue_size: int = 16, batch: int = 1000, max_rate: float = 1.0, executor: Executor | None = None,
+                 on_state: Callable[[int], None] = lambda offset: None, on_render: Callable[[], None] = lambda: None,
+                 metrics: TrackerMetrics | None = None):
+        """Initialize Pipeline.
+
+        Args:
+            race: Race the decoded messages are applied to.
+            reader: Follows the source file.
+            watcher: Wakes the reader when the source file changes, None to stop at the end of the file.
+            renderer: Renders the charts whose data changed. It is called in the event loop, where
+                it only snapshots the race and queues the charts when it has workers; without
+                workers, each render holds up every stage of every feed.
+            log: Logger instance for logging messages.
+            queue_size: Maximum number of batches waiting in front of each stage.
+            batch: Maximum number of lines in a batch.
+            max_rate: Maximum number of renders per second.
+            executor: Executor decoding the batches, None for the loop's default one.
+            on_state: Called with the source offset after each applied batch.
+            on_render: Called after each render.
+            metrics: Instruments lines, parse failures and handler times are recorded to; render
+                times are recorded by the renderer, given the time the lines were read.
+        """
+        self.__race = race
+        self.__reader = reader
+        self.__watcher = watcher
+        self.__renderer = renderer
+        self.__log = log
+        self.__queue_size = queue_size
+        self.__batch = batch
+        self.__min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.__executor = executor
+        self.__on_state = on_state
+        self.__on_render = on_render
+        self.__metrics = metrics
+        self.__stats = {stage: StageStats() for stage in STAGES}
+        self.__updates = 0
+        self.__renders = 0
+        self.__pending = 0
+        self.__pending_since = 0.0
+        self.__pending_read = 0.0
+        self.__logged = time.monotonic()
+        self.__stopping = False
+
+    def get_stats(self) -> dict[str, StageStats]:
+        """Get the counters of the queue in front of each stage."""
+        return self.__stats
+
+    def get_renders(self) -> int:
+        return self.__renders
+
+    def get_coalesced(self) -> int:
+        """Get the number of render requests folded into a later render."""
+        return self.__updates - self.__stats[RENDER].get_items()
+
+    def stop(self):
+        """Make the reader stop at the end of the file; the queued batches are still processed."""
+        self.__stopping = True
+
+    async def run(self):
+        """Run the stages until the reader stops and every queued batch is rendered."""
+        decode_queue: asyncio.Queue = asyncio.Queue(self.__queue_size)
+        state_queue: asyncio.Queue = asyncio.Queue(self.__queue_size)
+        dirty = asyncio.Event()
+        done = asyncio.Event()
+        # the reader blocks in FileWatcher.wait; a thread of its own keeps it off the decoding executor
+        io = ThreadPoolExecutor(1, thread_name_prefix="pipeline reader")
+        tasks = [asyncio.create_task(self.__read(io, decode_queue)),
+                 asyncio.create_task(self.__decode(decode_queue, state_queue)),
+                 asyncio.create_task(self.__apply(state_queue, dirty, done)),
+                 asyncio.create_task(self.__schedule_renders(dirty, done))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            io.shutdown(wait=False)
+            self.__log_stats()
+
+    async def __read(self, io: Executor, out: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            lines = await loop.run_in_executor(io, self.__reader.read_lines)
+            if lines:
+                offset = self.__reader.get_offset()
+                read = time.monotonic()
+                if self.__metrics is not None:
+                    self.__metrics.add_lines(len(lines))
+                for i in range(0, len(lines), self.__batch):
+                    # only the last batch of a read ends at the reader's offset
+                    end = offset if i + self.__batch >= len(lines) else None
+                    await out.put((time.monotonic(), lines[i:i + self.__batch], end, read))
+                continue
+            if self.__watcher is None or self.__stopping:
+                break
+            await loop.run_in_executor(io, self.__watcher.wait, 1.0)
+        await out.put(None)
+
+    async def __decode(self, inp: asyncio.Queue, out: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while (item := await self.__take(DECODE, inp)) is not None:
+            _, lines, offset, read = item
+            messages = await loop.run_in_executor(self.__executor, decode_lines, lines, self.__log, self.__metrics)
+            await out.put((time.monotonic(), messages, offset, read))
+        await out.put(None)
+
+    async def __apply(self, inp: asyncio.Queue, dirty: asyncio.Event, done: asyncio.Event):
+        while (item := await self.__take(STATE, inp)) is not None:
+            _, messages, offset, read = item
+            with tracer.start_as_current_span("apply") as span:
+                span.set_attribute("messages", len(messages))
+                if self.__metrics is None:
+                    for msg in messages:
+                        self.__race.handle_message(msg)
+                else:
+                    self.__handle_timed(messages)
+                # TimingData held back by the coalescer is applied before the state is checkpointed or drawn
+                self.__race.apply_pending()
+                self.__race.flush_logs()
+                if offset is not None:
+                    self.__on_state(offset)
+            self.__updates += 1
+            if self.__pending == 0:
+                self.__pending_since = time.monotonic()
+                self.__pending_read = read
+            self.__pending += 1
+            dirty.set()
+            # a queue holding batches returns them without suspending; yield so that the other
+            # feeds' pipelines in the same loop get their turn between batches
+            await asyncio.sleep(0)
+        done.set()
+        dirty.set()
+
+    async def __schedule_renders(self, dirty: asyncio.Event, done: asyncio.Event):
+        rendered = float('-inf')
+        while not done.is_set():
+            try:
+                # render at least once a minute so that the timestamp shows the tracker is alive
+                await asyncio.wait_for(dirty.wait(), 60)
+            except asyncio.TimeoutError:
+                pass
+            delay = rendered + self.__min_interval - time.monotonic()
+            if delay > 0 and not done.is_set():
+                # state updates arriving meanwhile only set the flag again
+                await asyncio.sleep(delay)
+            dirty.clear()
+            since = None
+            if self.__pending:
+                self.__stats[RENDER].record(time.monotonic() - self.__pending_since, self.__pending)
+                self.__pending = 0
+                since = self.__pending_read
+            with tracer.start_as_current_span("render") as span:
+                span.set_attribute("charts", self.__renderer.render(self.__race, since))
+                self.__on_render()
+            self.__renders += 1
+            rendered = time.monotonic()
+            if rendered - self.__logged >= 60:
+                self.__log_stats()
+
+    def __handle_timed(self, messages: list):
+        race = self.__race
+        metrics = self.__metrics
+        for msg in messages:
+            started = time.perf_counter()
+            race.handle_message(msg)
+            category = msg[0] if isinstance(msg, list) and msg and isinstance(msg[0], str) else ""
+            metrics.record_handle(category, time.perf_counter() - started)
+
+    async def __take(self, stage: str, queue: asyncio.Queue):
+        depth = queue.qsize()
+        item = await queue.get()
+        if item is not None:
+            self.__stats[stage].record(time.monotonic() - item[0], depth)
+        return item
+
+    def __log_stats(self):
+        self.__logged = time.monotonic()
+        self.__log.info("pipeline counters (items, mean/max lag, peak depth) %s, renders=%d coalesced=%d",
+                        ", ".join(f"{stage}={stats.get_items()} {stats.get_mean_lag():.3f}s/"
+                                  f"{stats.get_max_lag():.3f}s {stats.get_peak_depth()}"
+                                  for stage, stats in self.__stats.items()),
+                        self.__renders, self.get_coalesced())
+        coalescer = self.__race.get_coalescer()
+        if coalescer is not None:
+            self.__log.info("timing data coalesced: %d fragments into %d updates, fragments per update %s",
+                            coalescer.get_fragments(), coalescer.get_updates(), coalescer.get_histogram())
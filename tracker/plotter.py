@@ -1,15 +1,24 @@
 import datetime
 import logging
 import os
-from typing import Final
+from typing import Callable, Final
 
-from matplotlib import pyplot
+import numpy
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from PIL import Image
 from plotly import graph_objects
 
 import constants
-from tracker.domain.lap import Lap
-from tracker.domain.stint import Stint
-from tracker.domain.weather import Weather
+import image_export
+from tracker.domain.degradation import DegradationStore
+from tracker.domain.lap import LapStore
+from tracker.domain.pit import PitStore
+from tracker.domain.stint import StintStore
+from tracker.domain.weather import WeatherStore
+from tracker.ring import downsample_min_max
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +32,11 @@ log = logging.getLogger(__name__)
 results_path: Final = "../live/data/results"
 logs_path: Final = results_path + "/logs"
 images_path: Final = results_path + "/images"
+# samples drawn per line at most; a 1920 px wide image cannot show more
+MAX_POINTS: Final = 1920
+# weather column -> image file name
+WEATHER_FILENAMES: Final[dict[str, str]] = {'air_temp': 'air_temp', 'rain_fall': 'rainfall', 'track_temp': 'track_temp',
+                                            'wind_speed': 'wind_speed'}
 
 
 def set_style(no: int) -> dict[str, str]:
@@ -33,18 +47,140 @@ def set_style(no: int) -> dict[str, str]:
     return style
 
 
-def plot_tyres(stint_map: dict[int, dict[int, Stint]], order: list[int]):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150, layout='tight')
+class LineChart:
+    """Long-lived figure of one output image whose lines are updated in place.
+
+    Building a figure, its axes and one Line2D per driver costs more than drawing it, so the
+    figure is kept across ticks and only the data of its lines changes. Zoomed variants of the
+    same image are saved by moving the y limits only.
+
+    Attributes:
+        __figure: The figure, drawn by its own Agg canvas outside pyplot.
+        __axes: The only axes of the figure.
+        __lines: Map of key (driver number, or 0 for a single line) -> line.
+        __legend: Whether a legend of the line labels is drawn.
+        __layout_stale: Whether the margins have to be fitted again before the next save.
+    """
+
+    def __init__(self, invert_y: bool = False, legend: bool = True):
+        """Initialize LineChart with an empty figure.
+
+        Args:
+            invert_y: Whether smaller values are drawn at the top, as for positions and gaps.
+            legend: Whether a legend of the line labels is drawn.
+        """
+        self.__figure = Figure(figsize=(12.8, 7.2), dpi=150)
+        self.__canvas = FigureCanvasAgg(self.__figure)
+        self.__axes = self.__figure.subplots()
+        self.__axes.grid(True)
+        if invert_y:
+            self.__axes.invert_yaxis()
+        self.__lines: dict[int, Line2D] = {}
+        self.__legend = legend
+        self.__layout_stale = True
+
+    def get_figure(self) -> Figure:
+        return self.__figure
+
+    def get_axes(self) -> Axes:
+        return self.__axes
+
+    def get_lines(self) -> dict[int, Line2D]:
+        return self.__lines
+
+    def set_lines(self, data: dict[int, tuple], style: Callable[[int], dict] = lambda key: {}):
+        """Replace the data of the lines, creating the lines seen for the first time.
+
+        Args:
+            data: Map of key -> (x, y).
+            style: Function returning the Line2D properties of a new line.
+        """
+        added = False
+        for key, (x, y) in data.items():
+            line = self.__lines.get(key)
+            if line is None:
+                # the first plot also sets up the unit converters, e.g. for datetime64
+                self.__lines[key], = self.__axes.plot(x, y, **style(key))
+                added = True
+            else:
+                line.set_data(x, y)
+        if added:
+            self.__layout_stale = True
+            if self.__legend:
+                self.__axes.legend(fontsize='small')
+
+    def relayout(self):
+        """Fit the margins again on the next save, after artists were replaced outside set_lines."""
+        self.__layout_stale = True
+
+    def autoscale(self):
+        """Fit both axes to the current data, undoing limits set for a zoomed variant."""
+        self.__axes.relim()
+        self.__axes.set_autoscaley_on(True)
+        self.__axes.autoscale_view()
+
+    def save(self, filename: str):
+        """Draw the figure and write it to the images directory.
+
+        Args:
+            filename: File name without extension, relative to the images directory or absolute.
+        """
+        output_path = os.path.join(images_path, f"{filename}.png")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # a layout engine or bbox_inches='tight' would draw everything twice on every save
+        if self.__layout_stale:
+            self.__figure.tight_layout()
+            self.__layout_stale = False
+        self.__canvas.draw()
+        # the background is opaque, so alpha only slows the encoder down
+        image = Image.frombuffer('RGBA', self.__canvas.get_width_height(), self.__canvas.buffer_rgba())
+        image.convert('RGB').save(output_path, compress_level=1)
+        log.info(f"Saved plot to {output_path}")
+
+
+# file name -> chart, kept for the lifetime of the process
+_charts: dict[str, LineChart] = {}
+
+
+def get_chart(filename: str, invert_y: bool = False, legend: bool = True) -> LineChart:
+    """Get the chart of an output image, creating it on first use.
+
+    Args:
+        filename: File name without extension.
+        invert_y: Whether smaller values are drawn at the top, used on creation only.
+        legend: Whether a legend of the line labels is drawn, used on creation only.
+
+    Returns:
+        The chart of the image.
+    """
+    chart = _charts.get(filename)
+    if chart is None:
+        chart = _charts[filename] = LineChart(invert_y, legend)
+    return chart
+
+
+def _lap_axis(n: int, start: int = 0) -> numpy.ndarray:
+    """Get lap numbers from start, shared by all lines instead of an arange per line."""
+    global _laps
+    if len(_laps) < start + n:
+        _laps = numpy.arange(max(start + n, len(_laps) * 2))
+    return _laps[start:start + n]
+
+
+_laps = numpy.arange(128)
+
+
+def plot_tyres(stint_store: StintStore, order: list[int], filename: str = "tyres"):
+    # bars change shape every stint, so the figure is kept and only the axes are redrawn
+    chart = get_chart(filename, legend=False)
+    ax = chart.get_axes()
+    ax.clear()
     max_lap = 0
     y = 0
     for driver_number in order:
-        if driver_number not in stint_map:
-            continue
-        stints = stint_map[driver_number]
-        stint_keys = sorted(stints.keys())
+        stints = stint_store.get_stints(driver_number)
         start = 0
-        for i in stint_keys:
-            stint = stints[i]
+        for stint in stints:
             if stint.get_total_laps() == 0:
                 continue
             width = stint.get_total_laps()
@@ -64,142 +200,132 @@ def plot_tyres(stint_map: dict[int, dict[int, Stint]], order: list[int]):
         y += 1
     ax.grid(True)
     ax.set(yticks=[i for i in range(0, len(order))], yticklabels=[str(i) for i in order], xlim=(0, max_lap))
-    pyplot.grid(axis='x', linestyle=':', alpha=0.7)
-    output_path: str = f"{images_path}/tyres.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+    ax.grid(axis='x', linestyle=':', alpha=0.7)
+    chart.relayout()
+    chart.save(filename)
 
 
-def plot_gap_to_top(dicts: dict[int, dict[int, Lap]], filename: str, d: int):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150, layout='tight')
-    for no, data in dicts.items():
-        style = set_style(no)
-        x = sorted(list(data.keys()))
-        y = [data[i].get_gap_to_top() for i in x]
-        ax.plot(x, y, **style)
-    ax.grid(True)
-    ax.legend(fontsize='small')
-    ax.invert_yaxis()
-    output_path = f"{images_path}/{filename}.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
-    if d is not None:
-        ax.set_ylim(d, 0)
-        output_path = f"{images_path}/{filename}_{d}.png"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        fig.savefig(output_path, bbox_inches='tight')
-        log.info(f"Saved plot to {output_path}")
-        pyplot.close(fig)
+def plot_pit_stops(pit_store: PitStore, order: list[int], filename: str = "pit_stops"):
+    """Plot the time each driver lost to its pit stops, one bar segment per stop.
 
+    Stops whose out-lap is not completed yet are drawn with their pit lane time in gray.
 
-def plot_gap_to_ahead(dicts: dict[int, dict[int, Lap]], filename: str, d: int):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150, layout='tight')
-    for no, data in dicts.items():
-        style = set_style(no)
-        x = sorted(list(data.keys()))
-        y = [data[i].get_gap_to_ahead() for i in x]
-        ax.plot(x, y, **style)
+    Args:
+        pit_store: Pit store to read the stops from.
+        order: Driver numbers from the top row down.
+        filename: File name without extension.
+    """
+    chart = get_chart(filename, legend=False)
+    ax = chart.get_axes()
+    ax.clear()
+    max_loss = 0.0
+    for y, driver_number in enumerate(order):
+        start = 0.0
+        for stop in pit_store.get_stops(driver_number):
+            loss = stop.get_loss()
+            known = not numpy.isnan(loss)
+            width = loss if known else stop.get_pit_lane()
+            if numpy.isnan(width) or width <= 0:
+                continue
+            bar = ax.barh(y=y, width=width, left=start, color=set_style(driver_number)["color"] if known else 'gray',
+                          edgecolor='black')
+            ax.bar_label(bar, labels=[f"L{stop.get_in_lap()} {width:.1f}"], label_type="center", fontsize='small')
+            start += width
+        max_loss = max(max_loss, start)
     ax.grid(True)
-    ax.legend(fontsize='small')
-    ax.invert_yaxis()
-    output_path = f"{images_path}/{filename}.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+    ax.set(yticks=list(range(len(order))), yticklabels=[str(i) for i in order], xlim=(0, max(max_loss, 1.0)),
+           xlabel="pit loss (s)")
+    ax.grid(axis='x', linestyle=':', alpha=0.7)
+    chart.relayout()
+    chart.save(filename)
+
+
+def plot_lap_lines(laps: LapStore, get_values: Callable[[int], numpy.ndarray], filename: str,
+                   d: int | None = None):
+    """Plot one line per driver against lap numbers, with upper values at the top.
+
+    Args:
+        laps: Lap store to read the drivers from.
+        get_values: Function returning the values of a driver indexed by lap number.
+        filename: File name without extension.
+        d: If given, also save {filename}_{d} zoomed in to [0, d].
+    """
+    chart = get_chart(filename, invert_y=True)
+    data = {}
+    for no in laps.get_driver_numbers():
+        y = get_values(no)
+        data[no] = (_lap_axis(len(y)), y)
+    chart.set_lines(data, set_style)
+    chart.autoscale()
+    chart.save(filename)
     if d is not None:
-        ax.set_ylim(d, 0)
-        output_path = f"{images_path}/{filename}_{d}.png"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        fig.savefig(output_path, bbox_inches='tight')
-        log.info(f"Saved plot to {output_path}")
-        pyplot.close(fig)
+        chart.get_axes().set_ylim(d, 0)
+        chart.save(f"{filename}_{d}")
 
 
-def plot_positions(dicts: dict[int, dict[int, Lap]], filename: str):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150, layout='tight')
-    for no, data in dicts.items():
-        style = set_style(no)
-        x = sorted(list(data.keys()))
-        y = [data[i].get_position() for i in x]
-        ax.plot(x, y, **style)
-    ax.grid(True)
-    ax.legend(fontsize='small')
-    ax.invert_yaxis()
-    output_path: str = f"{images_path}/{filename}.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+def plot_gap_to_top(laps: LapStore, filename: str, d: int):
+    plot_lap_lines(laps, laps.get_gaps_to_top, filename, d)
 
 
-def plot_laptime(dicts: dict[int, dict[int, Lap]], filename: str, d: int):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150, layout='tight')
-    all_y = []
-    for no, data in dicts.items():
-        style = set_style(no)
+def plot_gap_to_ahead(laps: LapStore, filename: str, d: int):
+    plot_lap_lines(laps, laps.get_gaps_to_ahead, filename, d)
 
-        x = []
-        y = []
-        for i in sorted(list(data.keys())):
-            if i < 1:
-                continue
-            lap = data[i]
-            if lap.get_time() == 0:
-                continue
-            x.append(i)
-            y.append(lap.get_time())
-        all_y += y
-        ax.plot(x, y, **style)
-    min_time = min(all_y) if len(all_y) > 0 else 0
-    ax.grid(True)
+
+def plot_positions(laps: LapStore, filename: str):
+    plot_lap_lines(laps, laps.get_positions, filename)
+
+
+def plot_laptime(laps: LapStore, filename: str, d: int):
+    chart = get_chart(filename)
+    ax = chart.get_axes()
+    min_time = numpy.inf
+    data = {}
+    for no in laps.get_driver_numbers():
+        # lap 0 only carries positions and gaps; NaN (no time) is not drawn
+        y = laps.get_times(no)[1:]
+        data[no] = (_lap_axis(len(y), 1), y)
+        if numpy.any(y > 0):
+            min_time = min(min_time, float(numpy.nanmin(y[y > 0])))
+    chart.set_lines(data, set_style)
+    chart.autoscale()
+    has_times = bool(numpy.isfinite(min_time))
+    min_time = min_time if has_times else 0
     ax.set_ylim(min_time + 20, min_time)
-    ax.legend(fontsize='small')
-    output_path: str = f"{images_path}/{filename}.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
-    if all_y and d is not None:
+    chart.save(filename)
+    if has_times and d is not None:
         threshold = min_time + d
-        capped_max_time = max(v for v in all_y if v <= threshold)
+        capped_max_time = max(
+            float(y[(y > 0) & (y <= threshold)].max(initial=min_time))
+            for _, y in data.values()
+        )
         log.info(f"min: {min_time}, capped max: {capped_max_time}")
-        ax.grid(True)
         ax.set_ylim(capped_max_time, min_time)
-        output_path: str = f"{images_path}/{filename}_{d}.png"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        fig.savefig(output_path, bbox_inches='tight')
-        log.info(f"Saved plot to {output_path}")
-        pyplot.close(fig)
+        chart.save(f"{filename}_{d}")
 
 
-def plot_laptime_diff(dicts: dict[int, dict[int, Lap]], order: list[int], filename: str):
-    _, max_laps_dict = max(
-        dicts.items(),
-        key=lambda item: len(item[1])
-    )
+def plot_laptime_diff(laps: LapStore, order: list[int], filename: str):
     header = ['Lap']
-    max_lap_key = max(max_laps_dict.keys())
+    max_lap_key = laps.get_max_lap_number()
     numbers = [i for i in range(max_lap_key, 1, -1)]
     data_rows = [numbers]
     fill_colors = [["#f0f0f0"] * len(numbers)]
 
     for no in order:
-        data = dicts[no]
         header.append(str(no))
+        times = laps.get_times(no)
+        present = laps.get_present(no)
         lap_times = []
         colors = []
         for i in range(max_lap_key, 1, -1):
-            if i not in data or i - 1 not in data:
+            if i >= len(times) or not present[i] or not present[i - 1]:
                 lap_times.append('---')
                 colors.append('#808080')  # gray
                 continue
-            diff = data[i].get_time() - data[i - 1].get_time()
-            if diff < -10 or diff > 10:
+            diff = times[i] - times[i - 1]
+            if numpy.isnan(diff):
+                lap_times.append('---')
+                colors.append('#808080')  # gray
+            elif diff < -10 or diff > 10:
                 lap_times.append("{:.3f}".format(diff))
                 colors.append('#808080')  # gray
             elif diff > 0.1:
@@ -217,53 +343,75 @@ def plot_laptime_diff(dicts: dict[int, dict[int, Lap]], order: list[int], filena
         header={'values': header, 'fill_color': 'lightgrey', 'align': 'center'},
         cells={'values': data_rows, 'fill_color': fill_colors, 'align': 'center'}
     )], layout={'width': 1920, 'height': 1080, 'margin': {'l': 20, 'r': 20, 't': 20, 'b': 20}})
-    output_path: str = f"{images_path}/{filename}.png"
+    output_path: str = os.path.join(images_path, f"{filename}.png")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=1080)
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")
 
 
-def plot_weather(m: dict[datetime.datetime, Weather]):
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150)
-    x = [i for i in sorted(m.keys())]
-    y = [m[i].get_air_temp() for i in x]
-    ax.plot(x, y)
-    ax.grid(True)
-    output_path = f"{images_path}/air_temp.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+def plot_degradation(degradation: DegradationStore, stints: StintStore, pits: PitStore, order: list[int],
+                     filename: str = "degradation"):
+    """Save a table of each driver's tyre degradation on the current stint and its projected crossover lap.
 
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150)
-    x = [i for i in sorted(m.keys())]
-    y = [m[i].get_rain_fall() for i in x]
-    ax.plot(x, y)
-    ax.grid(True)
-    output_path = f"{images_path}/rainfall.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+    The crossover is the lap at which the stint has lost the driver's expected pit loss to
+    wear against the fit's fresh-tyre lap time; it is highlighted once it is 3 laps away.
 
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150)
-    x = [i for i in sorted(m.keys())]
-    y = [m[i].get_track_temp() for i in x]
-    ax.plot(x, y)
-    ax.grid(True)
-    output_path = f"{images_path}/track_temp.png"
+    Args:
+        degradation: Degradation store to read the fits from.
+        stints: Stint store to read the compounds from.
+        pits: Pit store to read the expected pit losses from.
+        order: Driver numbers from the top row down.
+        filename: File name without extension.
+    """
+    columns = [[], [], [], [], [], [], [], [], [], []]
+    colors = []
+    for no in order:
+        fit = degradation.get_current_fit(no)
+        stint = stints.get_stint(no, degradation.get_stint_number(no))
+        age = degradation.get_age(no)
+        pit_loss = pits.get_expected_loss(no)
+        crossover = degradation.get_crossover_lap(no, pit_loss)
+        slope = fit.get_slope() if fit is not None else numpy.nan
+        laps_left = crossover - degradation.get_last_lap(no)
+        row = [str(no), stint.get_compound() if stint is not None else '---', str(age),
+               str(fit.get_laps()) if fit is not None else '0', _format(slope, "{:+.3f}"),
+               _format(fit.get_intercept() if fit is not None else numpy.nan, "{:.3f}"),
+               _format(fit.get_lap_time(age) if fit is not None else numpy.nan, "{:.3f}"),
+               _format(pit_loss, "{:.1f}"), _format(crossover, "{:.0f}"), _format(laps_left, "{:.0f}")]
+        for column, value in zip(columns, row):
+            column.append(value)
+        if numpy.isnan(laps_left) or numpy.isinf(laps_left):
+            colors.append('#ffffff')  # white
+        elif laps_left <= 0:
+            colors.append('#FF8488')  # light red
+        elif laps_left <= 3:
+            colors.append('#FFD580')  # light orange
+        else:
+            colors.append('#ffffff')  # white
+    header = ['Car', 'Tyre', 'Age', 'Laps fitted', 'Deg (s/lap)', 'Fresh', 'Now', 'Pit loss', 'Crossover',
+              'Laps left']
+    fig = graph_objects.Figure(data=[graph_objects.Table(
+        header={'values': header, 'fill_color': 'lightgrey', 'align': 'center'},
+        cells={'values': columns, 'fill_color': [colors] * len(columns), 'align': 'center'}
+    )], layout={'width': 1920, 'height': 1080, 'margin': {'l': 20, 'r': 20, 't': 20, 'b': 20}})
+    output_path: str = os.path.join(images_path, f"{filename}.png")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
 
-    fig, ax = pyplot.subplots(figsize=(12.8, 7.2), dpi=150)
-    x = [i for i in sorted(m.keys())]
-    y = [m[i].get_wind_speed() for i in x]
-    ax.plot(x, y)
-    ax.grid(True)
-    output_path = f"{images_path}/wind_speed.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.savefig(output_path, bbox_inches='tight')
-    log.info(f"Saved plot to {output_path}")
-    pyplot.close(fig)
+
+def _format(value: float, pattern: str) -> str:
+    return '---' if numpy.isnan(value) or numpy.isinf(value) else pattern.format(value)
+
+
+def plot_weather(weather: WeatherStore):
+    for column, filename in WEATHER_FILENAMES.items():
+        plot_weather_column(weather, column, filename)
+
+
+def plot_weather_column(weather: WeatherStore, column: str, filename: str):
+    chart = get_chart(filename, legend=False)
+    # more points than pixels are invisible; keep each bucket's extremes instead
+    chart.set_lines({0: downsample_min_max(weather.get_times(), weather.get_values(column), MAX_POINTS)})
+    chart.autoscale()
+    chart.save(filename)
@@ -0,0 +1,46 @@
+"""Process pools safe to start while the tracker's other threads are running."""
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """Get the start method of the tracker's worker processes.
+
+    Pools start their workers lazily, on the first submit, when the event loop's executor
+    threads, the dashboard server and the metrics exporters may already be running. A forked
+    worker would inherit any lock one of them holds and could deadlock on it. A forkserver is
+    started from a fresh interpreter without those threads; where it is not available, workers
+    are spawned.
+
+    Returns:
+        The forkserver context, or the spawn context.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """Create a process pool whose workers are not forked from the calling process.
+
+    Args:
+        workers: Number of worker processes.
+
+    Returns:
+        The pool. Functions submitted to it must be importable by name, e.g. module-level ones.
+    """
+    return ProcessPoolExecutor(workers, mp_context=pool_context())
+
+
+def render_pool(workers: int) -> Executor:
+    """Create the pool drawing the charts of every feed.
+
+    Without workers, a single thread of the tracker process draws them instead, still from
+    snapshots, so that the ingest loop does not wait for a chart either way.
+
+    Args:
+        workers: Number of worker processes, 0 for the thread.
+
+    Returns:
+        The pool; a renderer using it keeps max(workers, 1) renders in flight.
+    """
+    return process_pool(workers) if workers > 0 else ThreadPoolExecutor(1, thread_name_prefix="render")
@@ -0,0 +1,375 @@
+import copy
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, Future
+from typing import Callable, Final
+
+from tracker import plotter
+from tracker.pools import process_pool
+from tracker.datasets import DEGRADATION, GAPS_TO_AHEAD, GAPS_TO_TOP, LAP_TIMES, PIT_STOPS, POSITIONS, STINTS
+from tracker.metrics import TrackerMetrics
+
+
+class Chart:
+    """An output image and the datasets it is drawn from.
+
+    Attributes:
+        __name: Name of the chart, used in logs and counters.
+        __inputs: Datasets whose change requires re-rendering the chart.
+        __draw: Function drawing the chart from a Race and the running order.
+    """
+
+    def __init__(self, name: str, inputs: frozenset[str], draw: Callable):
+        self.__name = name
+        self.__inputs = inputs
+        self.__draw = draw
+
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_inputs(self) -> frozenset[str]:
+        return self.__inputs
+
+    def draw(self, race, order: list[int]):
+        self.__draw(race, order)
+
+    def __reduce__(self):
+        # draw functions are lambdas; a worker process looks the chart up by name instead
+        return _get_chart, (self.__name,)
+
+
+def image_name(race, filename: str) -> str:
+    """Get the file name a chart of a race is saved under.
+
+    Args:
+        race: Race or Snapshot whose images directory is used.
+        filename: File name without extension.
+
+    Returns:
+        filename in the race's own images directory, or as is for the plotter's default one.
+    """
+    images_path = race.get_images_path()
+    return os.path.join(images_path, filename) if images_path else filename
+
+
+CHARTS: Final[tuple[Chart, ...]] = (
+    Chart("tyres", frozenset({STINTS, POSITIONS}),
+          lambda race, order: plotter.plot_tyres(race.get_stint_store(), order, image_name(race, "tyres"))),
+    Chart("pit_stops", frozenset({PIT_STOPS, POSITIONS}),
+          lambda race, order: plotter.plot_pit_stops(race.get_pit_store(), order, image_name(race, "pit_stops"))),
+    # the compound comes from the stint store
+    Chart("degradation", frozenset({DEGRADATION, STINTS, PIT_STOPS, POSITIONS}),
+          lambda race, order: plotter.plot_degradation(race.get_degradation_store(), race.get_stint_store(),
+                                                       race.get_pit_store(), order, image_name(race, "degradation"))),
+    Chart("gap_ahead", frozenset({GAPS_TO_AHEAD}),
+          lambda race, order: plotter.plot_gap_to_ahead(race.get_lap_store(), image_name(race, "gap_ahead"), 6)),
+    Chart("gap_top", frozenset({GAPS_TO_TOP}),
+          lambda race, order: plotter.plot_gap_to_top(race.get_lap_store(), image_name(race, "gap_top"), 30)),
+    Chart("position", frozenset({POSITIONS}),
+          lambda race, order: plotter.plot_positions(race.get_lap_store(), image_name(race, "position"))),
+    Chart("laptime", frozenset({LAP_TIMES}),
+          lambda race, order: plotter.plot_laptime(race.get_lap_store(), image_name(race, "laptime"), 7)),
+    Chart("laptime_diffs", frozenset({LAP_TIMES, POSITIONS}),
+          lambda race, order: plotter.plot_laptime_diff(race.get_lap_store(), order,
+                                                        image_name(race, "laptime_diffs"))),
+    # weather datasets are named after their WeatherStore column
+    *(Chart(filename, frozenset({column}),
+            lambda race, order, column=column, filename=filename:
+            plotter.plot_weather_column(race.get_weather_store(), column, image_name(race, filename)))
+      for column, filename in plotter.WEATHER_FILENAMES.items()),
+)
+
+
+_CHARTS_BY_NAME: Final[dict[str, Chart]] = {chart.get_name(): chart for chart in CHARTS}
+
+
+def _get_chart(name: str) -> Chart:
+    return _CHARTS_BY_NAME[name]
+
+
+class Snapshot:
+    """Copy of the stores of a Race at one tick, handed to render workers.
+
+    Ingest keeps mutating the Race while a worker draws, so workers only ever see a snapshot.
+    It has the same getters as Race, so chart draw functions accept either.
+
+    Attributes:
+        __lap_store: Copy of the lap store.
+        __stint_store: Copy of the stint store.
+        __weather_store: Copy of the weather store.
+        __pit_store: Copy of the pit store.
+        __degradation_store: Copy of the degradation store.
+        __images_path: Directory the charts of the race are saved in, None for the plotter's default.
+    """
+
+    def __init__(self, race):
+        self.__lap_store = copy.deepcopy(race.get_lap_store())
+        self.__stint_store = copy.deepcopy(race.get_stint_store())
+        self.__weather_store = copy.deepcopy(race.get_weather_store())
+        self.__pit_store = copy.deepcopy(race.get_pit_store())
+        self.__degradation_store = copy.deepcopy(race.get_degradation_store())
+        self.__images_path = race.get_images_path()
+
+    def get_lap_store(self):
+        return self.__lap_store
+
+    def get_stint_store(self):
+        return self.__stint_store
+
+    def get_weather_store(self):
+        return self.__weather_store
+
+    def get_pit_store(self):
+        return self.__pit_store
+
+    def get_degradation_store(self):
+        return self.__degradation_store
+
+    def get_images_path(self) -> str | None:
+        return self.__images_path
+
+
+def _draw(chart: Chart, snapshot: Snapshot, order: list[int]) -> float:
+    """Draw one chart, in a render worker.
+
+    Returns:
+        Seconds spent drawing.
+    """
+    started = time.perf_counter()
+    chart.draw(snapshot, order)
+    return time.perf_counter() - started
+
+
+def running_order(race) -> list[int]:
+    """Sort drivers by the position of their latest lap.
+
+    Args:
+        race: Race whose lap store is read.
+
+    Returns:
+        Driver numbers, drivers without laps last.
+    """
+    laps = race.get_lap_store()
+    return sorted(
+        laps.get_driver_numbers(),
+        key=lambda car: laps.get_max_lap(car).get_position() if laps.has_laps(car) else 99
+    )
+
+
+# seconds close() waits for the queued renders before it gives up on them
+CLOSE_TIMEOUT: Final = 60.0
+
+
+class Renderer:
+    """Re-renders only the charts whose datasets changed since the previous tick.
+
+    With workers, charts are drawn from snapshots in a pool so that ingest never waits for a
+    render. Each chart has at most one render in flight; a newer request for a chart replaces
+    the one still waiting, so a slow chart is drawn from the latest data instead of falling
+    behind.
+
+    Several renderers, e.g. one per feed, can share a pool. As each keeps at most workers renders
+    in flight and otherwise only its latest request per chart, a busy feed cannot fill the pool's
+    queue and the feeds' renders take turns.
+
+    Should the pool break, e.g. because a worker was killed, the renders waiting for it are
+    dropped and later ticks render nothing, instead of waiting for a pool that will not run them.
+
+    Attributes:
+        __log: Logger instance for logging messages.
+        __charts: Charts to render.
+        __workers: Number of render workers, 0 to draw in the calling thread.
+        __executor: Pool the charts are drawn in, None without workers.
+        __owns_executor: Whether close() shuts the pool down, False for a pool shared with other renderers.
+        __metrics: Instruments the render times and file-to-plot latencies are recorded to, None for none.
+        __lock: Guards the queue and the counters, which pool callbacks update.
+        __pending: Map of chart name -> (snapshot, running order, read time) waiting for a worker.
+        __running: Map of chart name -> (render in flight, read time).
+        __rendered: Map of chart name -> number of ticks it was rendered.
+        __skipped: Map of chart name -> number of ticks it was skipped.
+        __replaced: Map of chart name -> number of waiting requests replaced by a newer one.
+        __seconds: Map of chart name -> total seconds spent rendering it.
+        __max_seconds: Map of chart name -> longest single render in seconds.
+        __peak_queue_depth: Highest number of charts waiting for a worker.
+        __broken: Whether the pool broke and no longer runs renders.
+    """
+
+    def __init__(self, log, charts: tuple[Chart, ...] = CHARTS, workers: int = 0,
+                 pool: Callable[[int], Executor] = process_pool, metrics: TrackerMetrics | None = None,
+                 executor: Executor | None = None):
+        """Initialize Renderer.
+
+        Args:
+            log: Logger instance for logging messages.
+            charts: Charts to render.
+            workers: Number of render workers, 0 to draw in the calling thread. That thread then
+                waits for every chart, so the tracker never draws without workers; see
+                pools.render_pool.
+            pool: Factory of the executor taking the number of workers.
+            metrics: Instruments the render times and file-to-plot latencies are recorded to.
+            executor: Pool shared with other renderers, used instead of pool(workers) and left
+                running by close().
+        """
+        self.__log = log
+        self.__charts = charts
+        self.__workers = workers
+        self.__owns_executor = executor is None
+        if executor is None and workers > 0:
+            executor = pool(workers)
+        self.__executor = executor if workers > 0 else None
+        self.__metrics = metrics
+        self.__lock = threading.Condition()
+        self.__pending: dict[str, tuple[Snapshot, list[int], float | None]] = {}
+        self.__running: dict[str, tuple[Future, float | None]] = {}
+        self.__rendered = {chart.get_name(): 0 for chart in charts}
+        self.__skipped = {chart.get_name(): 0 for chart in charts}
+        self.__replaced = {chart.get_name(): 0 for chart in charts}
+        self.__seconds = {chart.get_name(): 0.0 for chart in charts}
+        self.__max_seconds = {chart.get_name(): 0.0 for chart in charts}
+        self.__peak_queue_depth = 0
+        self.__broken = False
+
+    def is_broken(self) -> bool:
+        return self.__broken
+
+    def get_rendered(self) -> dict[str, int]:
+        return self.__rendered
+
+    def get_skipped(self) -> dict[str, int]:
+        return self.__skipped
+
+    def get_replaced(self) -> dict[str, int]:
+        return self.__replaced
+
+    def get_seconds(self) -> dict[str, float]:
+        return self.__seconds
+
+    def get_max_seconds(self) -> dict[str, float]:
+        return self.__max_seconds
+
+    def get_queue_depth(self) -> int:
+        with self.__lock:
+            return len(self.__pending)
+
+    def get_peak_queue_depth(self) -> int:
+        return self.__peak_queue_depth
+
+    def render(self, race, since: float | None = None) -> list[str]:
+        """Render the charts whose inputs changed and log the per-chart counters.
+
+        Args:
+            race: Race whose changed datasets are popped and whose stores are drawn.
+            since: time.monotonic() the oldest line not yet drawn was read at, to record the
+                file-to-plot latency of each chart once it is drawn; None if unknown.
+
+        Returns:
+            Names of the charts rendered, or queued for rendering with workers.
+        """
+        dirty = race.pop_dirty()
+        if not dirty:
+            self.__log.info("plot is skipped")
+            return []
+        order = running_order(race)
+        charts = []
+        for chart in self.__charts:
+            if chart.get_inputs() & dirty:
+                charts.append(chart)
+            else:
+                self.__skipped[chart.get_name()] += 1
+        if self.__executor is None:
+            for chart in charts:
+                self.__record(chart.get_name(), _draw(chart, race, order), since)
+        elif self.__broken:
+            self.__log.error("render pool is broken, skipping %s", ", ".join(chart.get_name() for chart in charts))
+            return []
+        else:
+            snapshot = Snapshot(race)
+            with self.__lock:
+                for chart in charts:
+                    oldest = since
+                    waiting = self.__pending.get(chart.get_name())
+                    if waiting is not None:
+                        self.__replaced[chart.get_name()] += 1
+                        # the newer snapshot also shows the lines the replaced one was waiting to show
+                        if waiting[2] is not None:
+                            oldest = waiting[2] if since is None else min(since, waiting[2])
+                    self.__pending[chart.get_name()] = (snapshot, order, oldest)
+                self.__peak_queue_depth = max(self.__peak_queue_depth, len(self.__pending))
+                self.__dispatch()
+        self.__log_counters()
+        return [chart.get_name() for chart in charts]
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Wait for the queued renders and shut the workers down, unless the pool is shared.
+
+        Args:
+            timeout: Seconds to wait for the queued renders; the ones not done by then are
+                cancelled, or abandoned if already running.
+        """
+        if self.__executor is None:
+            return
+        with self.__lock:
+            done = self.__lock.wait_for(lambda: not self.__pending and not self.__running, timeout)
+            if not done:
+                self.__log.warning("renders of %s did not finish in %.0f s, abandoning them",
+                                   ", ".join([*self.__pending, *self.__running]), timeout)
+                self.__pending.clear()
+                # a cancelled render is popped by its callback right away
+                for future, _ in list(self.__running.values()):
+                    future.cancel()
+        if self.__owns_executor:
+            self.__executor.shutdown(wait=done, cancel_futures=True)
+        self.__log_counters()
+
+    def __dispatch(self):
+        # called with the lock held; keeps at most one render per chart and per worker in flight
+        for name in list(self.__pending):
+            if len(self.__running) >= self.__workers:
+                break
+            if name in self.__running or name not in self.__pending:
+                continue
+            snapshot, order, since = self.__pending.pop(name)
+            chart = next(chart for chart in self.__charts if chart.get_name() == name)
+            try:
+                future = self.__executor.submit(_draw, chart, snapshot, order)
+            except (BrokenExecutor, RuntimeError) as e:
+                # RuntimeError: the shared pool was shut down
+                self.__break(e)
+                return
+            self.__running[name] = (future, since)
+            future.add_done_callback(lambda f, name=name: self.__done(name, f))
+
+    def __done(self, name: str, future: Future):
+        with self.__lock:
+            _, since = self.__running.pop(name)
+            try:
+                self.__record(name, future.result(), since)
+            except BrokenExecutor as e:
+                self.__break(e)
+            except Exception as e:
+                self.__log.warning("render of %s failed: %s", name, e)
+            if not self.__broken:
+                self.__dispatch()
+            self.__lock.notify_all()
+
+    def __break(self, e: Exception):
+        # called with the lock held; nothing waiting will ever be picked up
+        self.__log.error("render pool is broken, dropping %d waiting renders: %s", len(self.__pending), e)
+        self.__broken = True
+        self.__pending.clear()
+        self.__lock.notify_all()
+
+    def __record(self, name: str, seconds: float, since: float | None):
+        self.__seconds[name] += seconds
+        self.__max_seconds[name] = max(self.__max_seconds[name], seconds)
+        self.__rendered[name] += 1
+        if self.__metrics is not None:
+            self.__metrics.record_render(name, seconds, time.monotonic() - since if since is not None else None)
+
+    def __log_counters(self):
+        self.__log.info("render counters (rendered/skipped/replaced, seconds, max) queue=%d peak=%d %s",
+                        self.get_queue_depth(), self.__peak_queue_depth, ", ".join(
+                            f"{name}={self.__rendered[name]}/{self.__skipped[name]}/{self.__replaced[name]} "
+                            f"{self.__seconds[name]:.1f}s {self.__max_seconds[name]:.2f}s"
+                            for name in self.__rendered))
@@ -0,0 +1,215 @@
+"""Replays a recorded SignalRClient file, paced by the timestamps of its messages.
+
+Usage:
+    python -m tracker.replay live/data/source/2025_AbuDhabi_Race.txt --speed 10 --output live/data/source/replay.txt
+    python -m tracker.replay live/data/source/2025_AbuDhabi_Race.txt --speed max --race --render
+    python -m tracker.replay live/data/source/2025_AbuDhabi_Race.f1a --start 2025-12-07T14:10:00Z --speed 10 --race
+"""
+import argparse
+import datetime
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import setup
+import util
+from tracker import decoder
+
+
+def message_time(line: str) -> datetime.datetime | None:
+    """Get the timestamp of a recorded line without decoding the message.
+
+    Args:
+        line: One line of the recorded feed, ['Category', data, 'timestamp'].
+
+    Returns:
+        The timestamp, or None if the line has none (e.g. completion messages).
+    """
+    end = line.rfind("'")
+    start = line.rfind("'", 0, end)
+    if start < 0:
+        return None
+    try:
+        return decoder.parse_time(line[start + 1:end])
+    except ValueError:
+        return None
+
+
+class ReplayStats:
+    """Counters of one replay run.
+
+    Attributes:
+        __messages: Number of lines delivered.
+        __seconds: Wall-clock seconds the run took.
+        __feed_seconds: Feed time covered by the delivered lines.
+        __max_lag: Longest delay in seconds of a line behind its scheduled time.
+    """
+
+    def __init__(self, messages: int, seconds: float, feed_seconds: float, max_lag: float):
+        self.__messages = messages
+        self.__seconds = seconds
+        self.__feed_seconds = feed_seconds
+        self.__max_lag = max_lag
+
+    def get_messages(self) -> int:
+        return self.__messages
+
+    def get_seconds(self) -> float:
+        return self.__seconds
+
+    def get_feed_seconds(self) -> float:
+        return self.__feed_seconds
+
+    def get_max_lag(self) -> float:
+        return self.__max_lag
+
+    def get_rate(self) -> float:
+        """Get the delivered lines per wall-clock second."""
+        return self.__messages / self.__seconds if self.__seconds > 0 else float('inf')
+
+    def get_speed(self) -> float:
+        """Get the achieved feed seconds per wall-clock second."""
+        return self.__feed_seconds / self.__seconds if self.__seconds > 0 else float('inf')
+
+
+class Replay:
+    """Delivers recorded lines to a sink at a multiple of the pace they were recorded at.
+
+    The first timestamped line is delivered at once; every later line is delivered when the
+    wall clock has advanced by its feed time since the first line, divided by the speed.
+    Lines without a timestamp, and lines whose timestamp goes backwards, go out with the
+    previous line. A sink that cannot keep up shows up as a growing lag behind the schedule.
+
+    Attributes:
+        __sink: Function receiving each line.
+        __speed: Feed seconds per wall-clock second, None for as fast as possible.
+        __on_idle: Called whenever the replay is ahead of the schedule and about to sleep,
+            every batch lines, and at the end, e.g. to flush or render.
+        __batch: Number of lines after which on_idle is called even without sleeping.
+        __clock: Monotonic clock in seconds.
+        __sleep: Function sleeping for seconds.
+    """
+
+    def __init__(self, sink: Callable[[str], None], speed: float | None = 1.0,
+                 on_idle: Callable[[], None] = lambda: None, batch: int = 1000,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """Initialize Replay.
+
+        Args:
+            sink: Function receiving each line.
+            speed: Feed seconds per wall-clock second, None for as fast as possible.
+            on_idle: Called when the replay waits, every batch lines and at the end.
+            batch: Number of lines after which on_idle is called even without sleeping.
+            clock: Monotonic clock in seconds.
+            sleep: Function sleeping for seconds.
+        """
+        self.__sink = sink
+        self.__speed = speed
+        self.__on_idle = on_idle
+        self.__batch = batch
+        self.__clock = clock
+        self.__sleep = sleep
+
+    def run(self, lines: Iterable[str]) -> ReplayStats:
+        """Deliver lines to the sink.
+
+        Args:
+            lines: Recorded lines; blank lines are skipped.
+
+        Returns:
+            Counters of the run.
+        """
+        started = self.__clock()
+        first: datetime.datetime | None = None
+        feed_seconds = 0.0
+        max_lag = 0.0
+        messages = 0
+        since_idle = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            t = message_time(line)
+            if t is not None:
+                if first is None:
+                    first = t
+                feed_seconds = max(feed_seconds, (t - first).total_seconds())
+            if self.__speed is not None:
+                delay = started + feed_seconds / self.__speed - self.__clock()
+                if delay > 0:
+                    self.__on_idle()
+                    since_idle = 0
+                    delay = started + feed_seconds / self.__speed - self.__clock()
+                    if delay > 0:
+                        self.__sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            self.__sink(line)
+            messages += 1
+            since_idle += 1
+            if since_idle >= self.__batch:
+                self.__on_idle()
+                since_idle = 0
+        self.__on_idle()
+        return ReplayStats(messages, self.__clock() - started, feed_seconds, max_lag)
+
+
+def parse_speed(value: str) -> float | None:
+    """Parse a --speed argument, 'max' for as fast as possible."""
+    if value == 'max':
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def __main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', type=Path, help="recorded SignalRClient file, or an archive (tracker.archive)")
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help="1, 10, 100, ... or max (default 1)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', type=Path, help="file to append the lines to, for a tracker to follow")
+    target.add_argument('--race', action='store_true', help="feed the lines directly into Race.handle")
+    parser.add_argument('--render', action='store_true', help="with --race, render the charts whenever idle")
+    parser.add_argument('--logs', type=Path, default=Path('live/data/results/logs'), help="logs path for --race")
+    parser.add_argument('--batch', type=int, default=1000, help="lines between flushes when not waiting")
+    parser.add_argument('--start', type=decoder.parse_time,
+                        help="with an archive, skip to this feed time (UTC) without reading what precedes it")
+    args = parser.parse_args()
+    log = setup.log()
+
+    if args.output:
+        with util.AppendLog(str(args.output), truncate=True) as output:
+            stats = __replay(args, output.write, output.flush)
+    else:
+        # imported here so that replaying into a file does not load the plotting stack
+        from tracker.render import Renderer
+        from tracker.tracking import Config, Race
+        args.logs.mkdir(parents=True, exist_ok=True)
+        race = Race(Config(log, str(args.logs)))
+        renderer = Renderer(log) if args.render else None
+
+        def on_idle():
+            race.flush_logs()
+            if renderer is not None:
+                renderer.render(race)
+
+        stats = __replay(args, race.handle, on_idle)
+        race.close()
+    log.info("replayed %d messages in %.1f s: %.0f msg/s, %.1fx feed speed, max lag %.3f s",
+             stats.get_messages(), stats.get_seconds(), stats.get_rate(), stats.get_speed(), stats.get_max_lag())
+
+
+def __replay(args, sink: Callable[[str], None], on_idle: Callable[[], None]) -> ReplayStats:
+    # imported here: tracker.archive reads timestamps with message_time
+    from tracker import archive
+    if archive.is_archive(args.source):
+        lines = archive.ArchiveReader(args.source).lines(args.start)
+        return Replay(sink, args.speed, on_idle, args.batch).run(lines)
+    with args.source.open('r', encoding='utf-8') as source:
+        return Replay(sink, args.speed, on_idle, args.batch).run(source)
+
+
+if __name__ == "__main__":
+    __main()
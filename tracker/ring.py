@@ -0,0 +1,199 @@
+import numpy
+
+
+class RingBuffer:
+    """Fixed-capacity series of timestamped samples with named float columns.
+
+    Appending to a full buffer overwrites the oldest samples, so memory stays the same however
+    long the session runs. Samples are expected in time order; reads return them oldest first.
+
+    Attributes:
+        __columns: Map of column name -> index in the values array.
+        __times: capacity array of sample times in datetime64[ms].
+        __values: capacity x columns array of sample values, NaN where unknown.
+        __start: Index of the oldest sample.
+        __size: Number of samples held.
+        __dropped: Number of samples overwritten since the buffer was created.
+    """
+
+    def __init__(self, capacity: int, columns: tuple[str, ...]):
+        """Initialize RingBuffer.
+
+        Args:
+            capacity: Maximum number of samples held.
+            columns: Names of the value columns.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.__columns = {name: i for i, name in enumerate(columns)}
+        self.__times = numpy.zeros(capacity, dtype='datetime64[ms]')
+        self.__values = numpy.full((capacity, len(columns)), numpy.nan)
+        self.__start = 0
+        self.__size = 0
+        self.__dropped = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def get_capacity(self) -> int:
+        return len(self.__times)
+
+    def get_columns(self) -> tuple[str, ...]:
+        return tuple(self.__columns)
+
+    def get_dropped(self) -> int:
+        """Get the number of samples overwritten because the buffer was full."""
+        return self.__dropped
+
+    def append(self, t: numpy.datetime64, values: tuple[float, ...]):
+        """Append one sample.
+
+        Args:
+            t: Sample time.
+            values: One value per column.
+        """
+        capacity = len(self.__times)
+        position = (self.__start + self.__size) % capacity
+        self.__times[position] = t
+        self.__values[position] = values
+        if self.__size == capacity:
+            self.__dropped += 1
+            self.__start = (self.__start + 1) % capacity
+        else:
+            self.__size += 1
+
+    def extend(self, times: numpy.ndarray, values: numpy.ndarray):
+        """Append samples in one vectorized write.
+
+        Args:
+            times: n sample times.
+            values: n x columns array of values.
+        """
+        n = len(times)
+        if n == 0:
+            return
+        capacity = len(self.__times)
+        if n > capacity:
+            self.__dropped += n - capacity
+            times, values, n = times[-capacity:], values[-capacity:], capacity
+        positions = (self.__start + self.__size + numpy.arange(n)) % capacity
+        self.__times[positions] = times
+        self.__values[positions] = values
+        total = self.__size + n
+        if total > capacity:
+            self.__dropped += total - capacity
+            self.__start = (self.__start + total - capacity) % capacity
+            self.__size = capacity
+        else:
+            self.__size = total
+
+    def get_times(self) -> numpy.ndarray:
+        """Get the sample times, oldest first.
+
+        Returns:
+            A datetime64[ms] array; a copy, as the samples wrap around the end of the buffer.
+        """
+        return self.__ordered(self.__times)
+
+    def get_values(self, column: str) -> numpy.ndarray:
+        """Get one column, aligned with get_times.
+
+        Args:
+            column: One of the column names.
+
+        Returns:
+            A float array, copied like get_times.
+        """
+        return self.__ordered(self.__values[:, self.__columns[column]])
+
+    def get_value(self, index: int, column: str) -> float:
+        """Get one value by position, 0 being the oldest sample and -1 the newest."""
+        return float(self.__values[self.__physical(index), self.__columns[column]])
+
+    def set_value(self, index: int, column: str, value: float):
+        """Set one value by position, 0 being the oldest sample and -1 the newest."""
+        self.__values[self.__physical(index), self.__columns[column]] = value
+
+    def insert(self, index: int, t: numpy.datetime64, values: tuple[float, ...]):
+        """Insert a sample before a position, for the rare sample arriving out of order.
+
+        Rewrites the buffer in order, so it costs O(capacity); appending stays the common path.
+        A full buffer drops its oldest sample, which may be the inserted one.
+
+        Args:
+            index: Position to insert at, 0 for before the oldest sample.
+            t: Sample time.
+            values: One value per column.
+        """
+        times = numpy.insert(self.get_times(), index, numpy.datetime64(t, 'ms'))
+        table = numpy.insert(self.__ordered(self.__values), index, numpy.asarray(values, dtype=float), axis=0)
+        self.__start = 0
+        self.__size = 0
+        self.extend(times, table)
+
+    def search(self, t: numpy.datetime64) -> int:
+        """Find the position of the first sample at or after a time, as numpy.searchsorted does."""
+        return int(numpy.searchsorted(self.get_times(), t, side='left'))
+
+    def get_latest_time(self) -> numpy.datetime64 | None:
+        """Get the time of the newest sample, None if the buffer is empty."""
+        if self.__size == 0:
+            return None
+        return self.__times[(self.__start + self.__size - 1) % len(self.__times)]
+
+    def since(self, t: numpy.datetime64) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Get the samples at or after a time.
+
+        Args:
+            t: Earliest sample time to return.
+
+        Returns:
+            The sample times and the samples x columns values.
+        """
+        times = self.get_times()
+        first = int(numpy.searchsorted(times, t, side='left'))
+        return times[first:], self.__ordered(self.__values)[first:]
+
+    def __physical(self, index: int) -> int:
+        if not -self.__size <= index < self.__size:
+            raise IndexError(f"sample {index} out of {self.__size}")
+        return (self.__start + index % self.__size) % len(self.__times)
+
+    def __ordered(self, array: numpy.ndarray) -> numpy.ndarray:
+        end = self.__start + self.__size
+        if end <= len(array):
+            return array[self.__start:end].copy()
+        return numpy.concatenate((array[self.__start:], array[:end - len(array)]))
+
+
+def downsample_min_max(times: numpy.ndarray, values: numpy.ndarray,
+                       max_points: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Reduce a series to at most max_points samples, keeping each bucket's minimum and maximum.
+
+    Samples are split into max_points // 2 buckets of equal count, and the smallest and largest
+    sample of each bucket are kept in time order, so spikes and drops stay visible however many
+    samples are drawn into the same pixels. NaN samples are only kept from all-NaN buckets.
+
+    Args:
+        times: Sample times in ascending order.
+        values: Values aligned with times.
+        max_points: Maximum number of samples to return, at least 2.
+
+    Returns:
+        The kept times and values; the inputs themselves when they are short enough.
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    padded = numpy.full(buckets * size, numpy.nan)
+    padded[:n] = values
+    table = padded.reshape(buckets, size)
+    missing = numpy.isnan(table)
+    base = numpy.arange(buckets) * size
+    lows = base + numpy.argmin(numpy.where(missing, numpy.inf, table), axis=1)
+    highs = base + numpy.argmax(numpy.where(missing, -numpy.inf, table), axis=1)
+    kept = numpy.unique(numpy.concatenate((lows, highs)))
+    kept = kept[kept < n]
+    return times[kept], values[kept]
@@ -0,0 +1,231 @@
+"""Local stand-in for the F1 live timing SignalR Core endpoint, replaying a recorded file.
+
+It speaks just enough of the protocol for fastf1's SignalRClient: the pre-negotiation cookie,
+negotiation, the WebSocket upgrade, the JSON hub protocol handshake and the Subscribe call.
+After the subscription every recorded line is sent as a 'feed' invocation.
+
+Usage:
+    python -m tracker.standin live/data/source/2025_AbuDhabi_Race.txt --port 8765 --speed 10
+    python -m tracker.live --url http://127.0.0.1:8765/signalrcore
+"""
+import argparse
+import base64
+import hashlib
+import json
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import setup
+from tracker import decoder
+from tracker.replay import Replay
+
+RECORD_SEPARATOR = '\x1e'
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC11B85'
+# hub protocol message types
+INVOCATION = 1
+COMPLETION = 3
+PING = 6
+CLOSE = 7
+# seconds between server pings; a client blocked reading the socket only notices its own close
+# once something arrives
+KEEPALIVE = 0.5
+
+
+class StandInServer:
+    """SignalR Core server replaying the lines of a recorded file to every subscriber.
+
+    Attributes:
+        __lines: Recorded lines to replay.
+        __speed: Replay speed, None for as fast as possible.
+        __log: Logger instance for logging messages.
+        __server: The HTTP server, which also upgrades to WebSocket.
+        __thread: Thread serving requests.
+    """
+
+    def __init__(self, source: str | Path, log, speed: float | None = None, port: int = 0):
+        """Initialize StandInServer.
+
+        Args:
+            source: Recorded SignalRClient file to replay.
+            log: Logger instance for logging messages.
+            speed: Replay speed, None for as fast as possible.
+            port: Port to listen on, 0 for any free port.
+        """
+        with open(source, 'r', encoding='utf-8') as f:
+            self.__lines = [line.strip() for line in f if line.strip()]
+        self.__speed = speed
+        self.__log = log
+        self.__server = ThreadingHTTPServer(('127.0.0.1', port), _handler(self))
+        self.__server.daemon_threads = True
+        self.__thread: threading.Thread | None = None
+
+    def get_url(self) -> str:
+        """Get the URL to pass to the client in place of the live timing one."""
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/signalrcore"
+
+    def get_lines(self) -> list[str]:
+        return self.__lines
+
+    def get_speed(self) -> float | None:
+        return self.__speed
+
+    def get_log(self):
+        return self.__log
+
+    def start(self):
+        """Serve in a background thread."""
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="stand-in server", daemon=True)
+        self.__thread.start()
+
+    def serve_forever(self):
+        self.__server.serve_forever()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+
+def _handler(server: StandInServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            server.get_log().debug("stand-in %s", format % args)
+
+        def do_OPTIONS(self):
+            # fastf1 pre-negotiates only to pick up the load balancer cookie
+            self.send_response(200)
+            self.send_header('Set-Cookie', 'AWSALBCORS=stand-in; Path=/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            body = json.dumps({'negotiateVersion': 1, 'connectionId': 'stand-in', 'connectionToken': 'stand-in',
+                               'availableTransports': [{'transport': 'WebSockets',
+                                                        'transferFormats': ['Text', 'Binary']}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.headers.get('Upgrade', '').lower() != 'websocket':
+                self.send_error(400)
+                return
+            accept = base64.b64encode(hashlib.sha1(
+                (self.headers['Sec-WebSocket-Key'] + WEBSOCKET_GUID).encode()).digest()).decode()
+            self.send_response(101)
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            self.wfile.flush()
+            self.close_connection = True
+            try:
+                self.__hub()
+            except (ConnectionError, OSError) as e:
+                server.get_log().info("stand-in client went away: %s", e)
+
+        def __hub(self):
+            lock = threading.Lock()
+
+            def send(message: dict):
+                with lock:
+                    self.wfile.write(_frame(json.dumps(message) + RECORD_SEPARATOR))
+                    self.wfile.flush()
+
+            def keepalive():
+                try:
+                    while not closed.wait(KEEPALIVE):
+                        send({'type': PING})
+                except (ConnectionError, OSError, ValueError):
+                    pass
+
+            # handshake request, answered with an empty object
+            self.__receive()
+            with lock:
+                self.wfile.write(_frame('{}' + RECORD_SEPARATOR))
+                self.wfile.flush()
+            closed = threading.Event()
+            threading.Thread(target=keepalive, name="stand-in keepalive", daemon=True).start()
+            try:
+                self.__dispatch(send)
+            finally:
+                closed.set()
+
+        def __dispatch(self, send):
+            while True:
+                text = self.__receive()
+                if text is None:
+                    return
+                for record in filter(None, text.split(RECORD_SEPARATOR)):
+                    message = json.loads(record)
+                    if message.get('type') == CLOSE:
+                        return
+                    if message.get('type') == INVOCATION and message.get('target') == 'Subscribe':
+                        send({'type': COMPLETION, 'invocationId': message.get('invocationId'), 'result': {}})
+                        threading.Thread(target=self.__replay, args=(send,), name="stand-in replay",
+                                         daemon=True).start()
+
+        def __replay(self, send):
+            def feed(line: str):
+                try:
+                    send({'type': INVOCATION, 'target': 'feed', 'arguments': decoder.decode(line)})
+                except ValueError:
+                    server.get_log().warning("stand-in skipped an undecodable line %s", line)
+
+            try:
+                stats = Replay(feed, server.get_speed()).run(server.get_lines())
+                server.get_log().info("stand-in replayed %d messages", stats.get_messages())
+            except (ConnectionError, OSError) as e:
+                server.get_log().info("stand-in client went away: %s", e)
+
+        def __receive(self) -> str | None:
+            """Read one client frame, unmasking it; None when the client closes."""
+            header = self.rfile.read(2)
+            if len(header) < 2:
+                return None
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', self.rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', self.rfile.read(8))[0]
+            mask = self.rfile.read(4) if header[1] & 0x80 else b'\0\0\0\0'
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(length)))
+            if opcode == 0x8:
+                return None
+            return payload.decode('utf-8')
+
+    return Handler
+
+
+def _frame(text: str) -> bytes:
+    """Build an unmasked, unfragmented WebSocket text frame."""
+    payload = text.encode('utf-8')
+    if len(payload) <= 125:
+        return bytes([0x81, len(payload)]) + payload
+    if len(payload) <= 0xFFFF:
+        return bytes([0x81, 126]) + struct.pack('>H', len(payload)) + payload
+    return bytes([0x81, 127]) + struct.pack('>Q', len(payload)) + payload
+
+
+def __main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', type=Path, help="recorded SignalRClient file")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=None, help="replay speed (default as fast as possible)")
+    args = parser.parse_args()
+    log = setup.log()
+    server = StandInServer(args.source, log, args.speed, args.port)
+    log.info("serving %s at %s", args.source, server.get_url())
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    __main()
@@ -0,0 +1,265 @@
+"""Synthetic live-timing feed in the SignalRClient file format, for tests and benchmarks.
+
+Usage:
+    python -m tracker.synthetic /tmp/synthetic.txt --cars 20 --laps 70 --rate 50 --burst-every 90 --burst-size 200
+"""
+import argparse
+import base64
+import datetime
+import json
+import random
+import zlib
+from pathlib import Path
+from typing import Final, Iterator
+
+CAR_NUMBERS: Final = (1, 81, 4, 63, 16, 44, 12, 14, 55, 23, 87, 31, 22, 6, 27, 18, 10, 5, 30, 43, 7, 20, 24, 77)
+START: Final = datetime.datetime(2025, 12, 7, 13, 3, tzinfo=datetime.timezone.utc)
+PIT_LOSS: Final = 22.0
+# seconds in the pit lane before and after the timing line
+PIT_ENTRY: Final = 12.0
+PIT_EXIT: Final = 14.0
+
+
+def format_lap_time(seconds: float) -> str:
+    """Format seconds the way the feed sends lap times, e.g. 1:31.234."""
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes)}:{rest:06.3f}"
+
+
+def format_timestamp(t: datetime.datetime) -> str:
+    """Format a timestamp the way the feed does, e.g. 2025-12-07T13:03:00.123Z."""
+    return t.strftime('%Y-%m-%dT%H:%M:%S.') + f"{t.microsecond // 1000:03d}Z"
+
+
+def deflate(data) -> str:
+    """Compress data the way the feed sends CarData.z and Position.z: raw deflate of JSON, in base64."""
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw = compressor.compress(json.dumps(data, separators=(',', ':')).encode()) + compressor.flush()
+    return base64.b64encode(raw).decode('ascii')
+
+
+def telemetry_lines(cars: int = 20, seconds: int = 60, rate: int = 4, seed: int = 0) -> Iterator[str]:
+    """Generate CarData.z and Position.z lines, one of each per second holding rate samples per car.
+
+    Args:
+        cars: Number of cars, at most len(CAR_NUMBERS).
+        seconds: Feed seconds to generate.
+        rate: Samples per second per car and topic.
+        seed: Seed of the random generator.
+
+    Yields:
+        Lines of the form ['CarData.z', payload, 'timestamp'] and ['Position.z', payload, 'timestamp'].
+    """
+    rng = random.Random(seed)
+    numbers = CAR_NUMBERS[:cars]
+    for second in range(seconds):
+        stamps = [format_timestamp(START + datetime.timedelta(seconds=second + i / rate)) for i in range(rate)]
+        car_data = {'Entries': [{'Utc': utc, 'Cars': {str(no): {'Channels': {
+            '0': rng.randint(9000, 12000), '2': rng.randint(80, 330), '3': rng.randint(2, 8),
+            '4': rng.randint(0, 100), '5': rng.choice((0, 100)), '45': rng.choice((0, 8, 12))}} for no in numbers}}
+            for utc in stamps]}
+        positions = {'Position': [{'Timestamp': utc, 'Entries': {str(no): {
+            'Status': 'OnTrack', 'X': rng.randint(-8000, 8000), 'Y': rng.randint(-8000, 8000),
+            'Z': rng.randint(-200, 200)} for no in numbers}} for utc in stamps]}
+        sent = format_timestamp(START + datetime.timedelta(seconds=second + 1))
+        yield str(['CarData.z', deflate(car_data), sent])
+        yield str(['Position.z', deflate(positions), sent])
+
+
+class SyntheticFeed:
+    """Generates a race of TimingData, TimingAppData, WeatherData, PitLaneTimeCollection and RaceControlMessages.
+
+    Each car laps at its own base pace plus tyre degradation and noise, and pits once from
+    MEDIUM to HARD, losing PIT_LOSS seconds on its in-lap. Positions and gaps follow from the
+    cumulative race times. Padding messages (speed trap updates) bring the average rate up to
+    the requested one, and bursts put many messages on the same timestamp, as a safety car or
+    the start does.
+
+    Attributes:
+        __cars: Number of cars.
+        __laps: Number of laps.
+        __rate: Average messages per feed second to pad up to, 0 for no padding.
+        __burst_every: Feed seconds between bursts, 0 for no bursts.
+        __burst_size: Number of messages in a burst.
+        __seed: Seed of the random generator, so that the same arguments give the same feed.
+    """
+
+    def __init__(self, cars: int = 20, laps: int = 70, rate: float = 0.0, burst_every: float = 0.0,
+                 burst_size: int = 0, seed: int = 0):
+        """Initialize SyntheticFeed.
+
+        Args:
+            cars: Number of cars, at most len(CAR_NUMBERS).
+            laps: Number of laps.
+            rate: Average messages per feed second to pad up to, 0 for no padding.
+            burst_every: Feed seconds between bursts, 0 for no bursts.
+            burst_size: Number of messages in a burst.
+            seed: Seed of the random generator.
+        """
+        if cars > len(CAR_NUMBERS):
+            raise ValueError(f"at most {len(CAR_NUMBERS)} cars are supported")
+        self.__cars = cars
+        self.__laps = laps
+        self.__rate = rate
+        self.__burst_every = burst_every
+        self.__burst_size = burst_size
+        self.__seed = seed
+
+    def lines(self) -> Iterator[str]:
+        """Generate the feed in timestamp order.
+
+        Yields:
+            Lines of the form ['Category', data, 'timestamp'].
+        """
+        for t, _, category, data in sorted(self.__events()):
+            yield str([category, data, format_timestamp(START + datetime.timedelta(seconds=t))])
+
+    def session_lines(self) -> Iterator[str]:
+        """Generate the feed preceded by the lines fastf1 needs to build laps from it.
+
+        These are the driver list, the session and track status, the lap count and the cars
+        leaving the pit lane, sent before the start.
+
+        Yields:
+            Lines of the form ['Category', data, 'timestamp'].
+        """
+        numbers = CAR_NUMBERS[:self.__cars]
+        started = format_timestamp(START - datetime.timedelta(minutes=3))
+        yield str(['DriverList', {str(no): {'RacingNumber': str(no), 'Tla': f"D{no:02d}", 'Line': i + 1}
+                                  for i, no in enumerate(numbers)},
+                   format_timestamp(START - datetime.timedelta(minutes=8))])
+        yield str(['SessionData', {'StatusSeries': {'1': {'Utc': started, 'SessionStatus': 'Started'}}}, started])
+        yield str(['SessionStatus', {'Status': 'Started'}, started])
+        yield str(['TrackStatus', {'Status': '1', 'Message': 'AllClear'}, started])
+        yield str(['LapCount', {'CurrentLap': 1, 'TotalLaps': self.__laps}, started])
+        yield str(['TimingData', {'Lines': {str(no): {'InPit': False, 'PitOut': True, 'NumberOfLaps': 0}
+                                            for no in numbers}}, started])
+        yield from self.lines()
+
+    def __events(self) -> list[tuple[float, int, str, dict]]:
+        rng = random.Random(self.__seed)
+        cars = CAR_NUMBERS[:self.__cars]
+        events: list[tuple[float, int, str, dict]] = []
+
+        def add(t: float, category: str, data: dict):
+            events.append((t, len(events), category, data))
+
+        add(0.0, 'RaceControlMessages', {'Messages': [{'Category': 'Flag', 'Flag': 'GREEN',
+                                                       'Message': 'GREEN LIGHT - PIT EXIT OPEN'}]})
+        for no in cars:
+            add(0.0, 'TimingAppData', {'Lines': {str(no): {'Stints': [
+                {'Compound': 'MEDIUM', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}]}}})
+
+        # cumulative race time of every car at the end of every lap
+        finished: dict[int, list[float]] = {}
+        for rank, no in enumerate(cars):
+            pace = 90.0 + rank * 0.08
+            pit_lap = rng.randint(self.__laps // 4, self.__laps // 2) if self.__laps > 3 else 0
+            elapsed = rank * 0.2
+            age = 0
+            stint = 0
+            finished[no] = []
+            for lap in range(1, self.__laps + 1):
+                age += 1
+                lap_time = pace + 0.04 * age + rng.gauss(0, 0.2)
+                if lap == pit_lap:
+                    lap_time += PIT_LOSS
+                for sector in (1, 2):
+                    add(elapsed + lap_time * sector / 3, 'TimingData', {'Lines': {str(no): {'Sectors': {
+                        str(sector - 1): {'Value': f"{lap_time / 3:.3f}", 'PersonalFastest': False}}}}})
+                elapsed += lap_time
+                finished[no].append(elapsed)
+                add(elapsed, 'TimingData', {'Lines': {str(no): {
+                    'LastLapTime': {'Value': format_lap_time(lap_time)}, 'NumberOfLaps': lap,
+                    'Sectors': {'2': {'Value': f"{lap_time / 3:.3f}"}}}}})
+                add(elapsed, 'TimingAppData', {'Lines': {str(no): {'Stints': {str(stint): {'TotalLaps': age}}}}})
+                if lap == pit_lap:
+                    # the pit lane starts before the timing line and ends after it
+                    add(elapsed - PIT_ENTRY, 'TimingData', {'Lines': {str(no): {'InPit': True}}})
+                    add(elapsed + PIT_EXIT, 'TimingData', {'Lines': {str(no): {'InPit': False, 'PitOut': True}}})
+                    add(elapsed + PIT_EXIT, 'PitLaneTimeCollection', {'PitTimes': {str(no): {
+                        'RacingNumber': str(no), 'Duration': f"{PIT_ENTRY + PIT_EXIT:.1f}", 'Lap': str(lap)}}})
+                    stint += 1
+                    age = 0
+                    add(elapsed, 'TimingAppData', {'Lines': {str(no): {'Stints': {str(stint): {
+                        'Compound': 'HARD', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}}}}})
+
+        for lap in range(self.__laps):
+            order = sorted(cars, key=lambda car: finished[car][lap])
+            leader = finished[order[0]][lap]
+            for position, no in enumerate(order, start=1):
+                t = finished[no][lap]
+                gap = f"LAP {lap + 1}" if position == 1 else f"+{t - leader:.3f}"
+                interval = '' if position == 1 else f"+{t - finished[order[position - 2]][lap]:.3f}"
+                add(t, 'TimingData', {'Lines': {str(no): {'Position': str(position), 'GapToLeader': gap,
+                                                          'IntervalToPositionAhead': {'Value': interval}}}})
+
+        end = max(times[-1] for times in finished.values()) if self.__laps else 0.0
+        for minute in range(int(end // 60) + 1):
+            add(minute * 60.0, 'WeatherData', {
+                'AirTemp': f"{25 + minute * 0.01:.1f}", 'Humidity': '45.0', 'Pressure': '1013.0',
+                'Rainfall': '0', 'TrackTemp': f"{32 - minute * 0.02:.1f}", 'WindDirection': '180',
+                'WindSpeed': f"{rng.uniform(0.5, 3):.1f}"})
+        add(end, 'RaceControlMessages', {'Messages': [{'Category': 'Flag', 'Flag': 'CHEQUERED',
+                                                       'Message': 'CHEQUERED FLAG'}]})
+
+        def speed_trap(t: float):
+            add(t, 'TimingData', {'Lines': {str(rng.choice(cars)): {'Speeds': {
+                'I1': {'Value': str(rng.randint(280, 330))}}}}})
+
+        if self.__burst_every > 0:
+            t = self.__burst_every
+            while t < end:
+                for _ in range(self.__burst_size):
+                    speed_trap(t)
+                t += self.__burst_every
+        padding = int(self.__rate * end) - len(events)
+        for i in range(max(padding, 0)):
+            speed_trap(end * (i + 0.5) / padding)
+        return events
+
+
+def offline_session():
+    """Build a fastf1 Session for the synthetic race that never goes online.
+
+    fastf1's cache is switched to offline mode and disabled, so that loading the session only
+    reads the live timing data passed to it.
+
+    Returns:
+        The Race session of a made-up round with the date of START.
+    """
+    import fastf1
+    import pandas
+    from fastf1.events import Event
+    fastf1.Cache.offline_mode(True)
+    fastf1.Cache.set_disabled()
+    sessions = {f"Session{i}": name for i, name in enumerate(
+        ('Practice 1', 'Practice 2', 'Practice 3', 'Qualifying', 'Race'), 1)}
+    dates = {f"Session{i}DateUtc": pandas.Timestamp('2025-12-07 13:00') for i in range(1, 6)}
+    event = Event(pandas.Series({'RoundNumber': 24, 'Country': 'United Arab Emirates', 'Location': 'Yas Island',
+                                 'OfficialEventName': 'Abu Dhabi Grand Prix', 'EventName': 'Abu Dhabi Grand Prix',
+                                 'EventDate': pandas.Timestamp('2025-12-07'), 'EventFormat': 'conventional',
+                                 'F1ApiSupport': True, **sessions, **dates,
+                                 **{f"Session{i}Date": pandas.Timestamp('2025-12-07 17:00+04:00')
+                                    for i in range(1, 6)}}), year=2025)
+    return fastf1.core.Session(event, 'Race', f1_api_support=True)
+
+
+def __main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', type=Path, help="file to write the feed to")
+    parser.add_argument('--cars', type=int, default=20)
+    parser.add_argument('--laps', type=int, default=70)
+    parser.add_argument('--rate', type=float, default=0.0, help="average messages per feed second to pad up to")
+    parser.add_argument('--burst-every', type=float, default=0.0, help="feed seconds between bursts")
+    parser.add_argument('--burst-size', type=int, default=0, help="messages in a burst")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    feed = SyntheticFeed(args.cars, args.laps, args.rate, args.burst_every, args.burst_size, args.seed)
+    with args.output.open('w', encoding='utf-8') as f:
+        for line in feed.lines():
+            f.write(line + '\n')
+
+
+if __name__ == "__main__":
+    __main()
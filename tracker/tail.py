@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+
+class TailReader:
+    """Follows an append-only text file by remembering the byte offset already consumed.
+
+    Only complete lines are returned; a partly written last line stays unconsumed until its
+    newline arrives. If the file shrinks (truncation) or is replaced by another file (rotation),
+    reading restarts from the beginning of the new content.
+
+    Attributes:
+        __path: Path to the followed file.
+        __log: Logger instance for logging messages.
+        __offset: Byte offset just after the last complete line returned.
+        __identity: (device, inode) pair of the file the offset belongs to.
+        __resets: Number of times reading restarted from the beginning.
+    """
+
+    def __init__(self, path: str | Path, log, offset: int = 0):
+        """Initialize TailReader for a file.
+
+        Args:
+            path: Path to the followed file. It does not need to exist yet.
+            log: Logger instance for logging messages.
+            offset: Byte offset to start reading from.
+        """
+        self.__path = Path(path)
+        self.__log = log
+        self.__offset = offset
+        self.__identity: tuple[int, int] | None = None
+        self.__resets = 0
+
+    def get_path(self) -> Path:
+        """Get the followed file path.
+
+        Returns:
+            The path to the followed file.
+        """
+        return self.__path
+
+    def get_offset(self) -> int:
+        """Get the byte offset just after the last complete line returned.
+
+        Returns:
+            The consumed byte offset.
+        """
+        return self.__offset
+
+    def get_resets(self) -> int:
+        """Get the number of times the file was truncated or replaced.
+
+        Returns:
+            The number of restarts from the beginning of the file.
+        """
+        return self.__resets
+
+    def read_lines(self) -> list[str]:
+        """Read the complete lines appended since the previous call.
+
+        Returns:
+            New lines without trailing line breaks. Empty if nothing complete was appended.
+        """
+        try:
+            st = os.stat(self.__path)
+        except FileNotFoundError:
+            return []
+        identity = (st.st_dev, st.st_ino)
+        if self.__identity is not None and identity != self.__identity:
+            self.__log.warning("source file was replaced, reading from the beginning %s", self.__path)
+            self.__offset = 0
+            self.__resets += 1
+        elif st.st_size < self.__offset:
+            self.__log.warning("source file was truncated, reading from the beginning %s", self.__path)
+            self.__offset = 0
+            self.__resets += 1
+        self.__identity = identity
+        if st.st_size == self.__offset:
+            return []
+
+        with self.__path.open('rb') as f:
+            f.seek(self.__offset)
+            chunk = f.read(st.st_size - self.__offset)
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            # only a partly written line so far
+            return []
+        self.__offset += end + 1
+        # split on '\n' only: str.splitlines would also break on separators inside message text
+        return [line.rstrip('\r') for line in chunk[:end].decode('utf-8', errors='replace').split('\n')]
@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+import zlib
+
+import numpy
+
+from tracker.ring import RingBuffer
+
+# CarData channel number -> column
+CAR_CHANNELS = {'0': 'rpm', '2': 'speed', '3': 'gear', '4': 'throttle', '5': 'brake', '45': 'drs'}
+CAR_COLUMNS = tuple(CAR_CHANNELS.values())
+POSITION_COLUMNS = ('x', 'y', 'z', 'on_track')
+# topics sent compressed, and the category their inflated messages are handled as
+COMPRESSED = {'CarData.z': 'CarData', 'Position.z': 'Position'}
+
+
+def inflate(payload: str):
+    """Decode a compressed topic payload: base64 of raw deflate (no zlib header) of JSON.
+
+    Args:
+        payload: The message data of a CarData.z or Position.z line.
+
+    Returns:
+        The decoded JSON.
+
+    Raises:
+        ValueError: If the payload is not valid base64, deflate or JSON.
+    """
+    try:
+        return json.loads(zlib.decompress(base64.b64decode(payload), -zlib.MAX_WBITS))
+    except (binascii.Error, zlib.error, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid compressed payload: {e}") from e
+
+
+def expand(msg):
+    """Inflate a decoded CarData.z or Position.z message, leaving other messages as they are.
+
+    Args:
+        msg: Decoded line, usually [category, data, timestamp].
+
+    Returns:
+        [CarData or Position, inflated data, timestamp] for a compressed topic, else msg.
+
+    Raises:
+        ValueError: If a compressed payload is invalid.
+    """
+    if isinstance(msg, list) and len(msg) >= 3 and msg[0] in COMPRESSED and isinstance(msg[1], str):
+        return [COMPRESSED[msg[0]], inflate(msg[1]), *msg[2:]]
+    return msg
+
+
+def parse_times(stamps: list[str]) -> numpy.ndarray:
+    """Parse feed timestamps such as 2025-12-07T13:00:00.1234567Z at millisecond precision.
+
+    Args:
+        stamps: UTC timestamps.
+
+    Returns:
+        A datetime64[ms] array.
+    """
+    # numpy parses ISO strings itself, but warns about the zone designator
+    return numpy.array([s[:23].rstrip('Z') for s in stamps], dtype='datetime64[ms]')
+
+
+def car_data_arrays(data) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+    """Split an inflated CarData message into per-driver arrays.
+
+    Args:
+        data: {'Entries': [{'Utc': ..., 'Cars': {'1': {'Channels': {'0': rpm, '2': speed, ...}}}}]}.
+
+    Returns:
+        Map of driver number -> (sample times, samples x CAR_COLUMNS values).
+    """
+    entries = data.get('Entries', []) if isinstance(data, dict) else []
+    return _per_driver(entries, 'Utc', 'Cars',
+                       lambda car: [car.get('Channels', {}).get(k, numpy.nan) for k in CAR_CHANNELS])
+
+
+def position_arrays(data) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+    """Split an inflated Position message into per-driver arrays.
+
+    Args:
+        data: {'Position': [{'Timestamp': ..., 'Entries': {'1': {'Status': 'OnTrack', 'X': .., 'Y': .., 'Z': ..}}}]}.
+
+    Returns:
+        Map of driver number -> (sample times, samples x POSITION_COLUMNS values).
+    """
+    entries = data.get('Position', []) if isinstance(data, dict) else []
+    return _per_driver(entries, 'Timestamp', 'Entries',
+                       lambda car: [car.get('X', numpy.nan), car.get('Y', numpy.nan), car.get('Z', numpy.nan),
+                                    1.0 if car.get('Status') == 'OnTrack' else 0.0])
+
+
+def _per_driver(entries: list, time_key: str, cars_key: str, row) -> dict[int, tuple[numpy.ndarray, numpy.ndarray]]:
+    entries = [e for e in entries if isinstance(e, dict) and time_key in e]
+    if not entries:
+        return {}
+    times = parse_times([e[time_key] for e in entries])
+    rows: dict[str, list] = {}
+    indices: dict[str, list[int]] = {}
+    for i, entry in enumerate(entries):
+        for no, car in entry.get(cars_key, {}).items():
+            rows.setdefault(no, []).append(row(car))
+            indices.setdefault(no, []).append(i)
+    # one array per driver and message instead of one ring write per sample
+    return {int(no): (times[indices[no]], numpy.array(values, dtype=float)) for no, values in rows.items()}
+
+
+class TelemetryStore:
+    """Per-driver ring buffers of car data and track positions over the last minutes.
+
+    Each buffer holds window seconds at twice the nominal sample rate, so bursts and late
+    messages fit; older samples are overwritten and memory stays the same for the whole session.
+
+    Attributes:
+        __capacity: Samples per driver and topic.
+        __car_data: Map of driver number -> ring of CAR_COLUMNS samples.
+        __positions: Map of driver number -> ring of POSITION_COLUMNS samples.
+        __samples: Number of samples added.
+    """
+
+    def __init__(self, window: float = 600.0, rate: float = 4.0):
+        """Initialize TelemetryStore.
+
+        Args:
+            window: Seconds of samples to keep per driver.
+            rate: Nominal samples per second per driver and topic.
+        """
+        self.__capacity = max(int(window * rate * 2), 1)
+        self.__car_data: dict[int, RingBuffer] = {}
+        self.__positions: dict[int, RingBuffer] = {}
+        self.__samples = 0
+
+    def get_driver_numbers(self) -> list[int]:
+        return sorted(self.__car_data.keys() | self.__positions.keys())
+
+    def get_car_data(self, driver_number: int) -> RingBuffer | None:
+        return self.__car_data.get(driver_number)
+
+    def get_positions(self, driver_number: int) -> RingBuffer | None:
+        return self.__positions.get(driver_number)
+
+    def get_samples(self) -> int:
+        return self.__samples
+
+    def add_car_data(self, data) -> int:
+        """Add the samples of an inflated CarData message.
+
+        Returns:
+            Number of samples added.
+        """
+        return self.extend_car_data(car_data_arrays(data))
+
+    def add_positions(self, data) -> int:
+        """Add the samples of an inflated Position message.
+
+        Returns:
+            Number of samples added.
+        """
+        return self.extend_positions(position_arrays(data))
+
+    def extend_car_data(self, arrays: dict[int, tuple[numpy.ndarray, numpy.ndarray]]) -> int:
+        """Add car data already split per driver, e.g. by car_data_arrays in another process.
+
+        Returns:
+            Number of samples added.
+        """
+        return self.__add(self.__car_data, CAR_COLUMNS, arrays)
+
+    def extend_positions(self, arrays: dict[int, tuple[numpy.ndarray, numpy.ndarray]]) -> int:
+        """Add track positions already split per driver, e.g. by position_arrays in another process.
+
+        Returns:
+            Number of samples added.
+        """
+        return self.__add(self.__positions, POSITION_COLUMNS, arrays)
+
+    def __add(self, rings: dict[int, RingBuffer], columns: tuple[str, ...],
+              arrays: dict[int, tuple[numpy.ndarray, numpy.ndarray]]) -> int:
+        added = 0
+        for no, (times, values) in arrays.items():
+            ring = rings.get(no)
+            if ring is None:
+                ring = rings[no] = RingBuffer(self.__capacity, columns)
+            ring.extend(times, values)
+            added += len(times)
+        self.__samples += added
+        return added
@@ -0,0 +1,95 @@
+import datetime
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from tracker import archive
+from tracker.archive import ArchiveReader, ArchiveTail, ArchiveWriter
+from tracker.replay import message_time
+from tracker.synthetic import SyntheticFeed
+from tracker.tail import TailReader
+
+log = logging.getLogger(__name__)
+
+
+class Archive(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.dir.name) / 'race.txt'
+        self.path = Path(self.dir.name) / 'race.f1a'
+        self.lines = list(SyntheticFeed(cars=4, laps=10, rate=20).lines())
+        self.source.write_text(''.join(line + '\n' for line in self.lines), encoding='utf-8')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_pack_round_trip(self):
+        chunks = archive.pack(self.source, self.path, archive.ZLIB, chunk_lines=500)
+        reader = ArchiveReader(self.path)
+        self.assertEqual(archive.ZLIB, reader.get_codec())
+        self.assertEqual(chunks, len(reader.get_chunks()))
+        self.assertEqual(len(self.lines), sum(chunk.get_lines() for chunk in reader.get_chunks()))
+        self.assertEqual(self.lines, list(reader.lines()))
+        self.assertLess(self.path.stat().st_size, self.source.stat().st_size / 4)
+
+    def test_seek_by_time_and_topic(self):
+        archive.pack(self.source, self.path, chunk_lines=200)
+        reader = ArchiveReader(self.path)
+        times = [message_time(line) for line in self.lines]
+        start = times[len(times) * 3 // 4]
+        expected = [line for line, t in zip(self.lines, times) if t is not None and t >= start]
+        self.assertEqual(expected, list(reader.lines(start)))
+        # the index sends a seek past most chunks without decompressing them
+        first = reader.find(start)
+        self.assertGreater(first, len(reader.get_chunks()) // 2)
+        self.assertGreaterEqual(reader.get_chunks()[first].get_end(), start)
+
+        naive = start.replace(tzinfo=None)
+        end = start + datetime.timedelta(seconds=30)
+        expected = [line for line, t in zip(self.lines, times)
+                    if line.startswith("['TimingAppData'") and t is not None and start <= t < end]
+        self.assertEqual(expected, list(reader.lines(naive, end, {'TimingAppData'})))
+
+    def test_tail_follows_writer(self):
+        with ArchiveWriter(self.path, 'w', chunk_lines=1000, chunk_seconds=3600) as writer:
+            tail = archive.open_reader(self.path, log)
+            self.assertIsInstance(tail, ArchiveTail)
+            self.assertIsInstance(archive.open_reader(self.source, log), TailReader)
+            for line in self.lines[:10]:
+                writer.write(line + '\n')
+                writer.flush()
+            # flushes seal a chunk only once it is large or old enough
+            self.assertEqual([], tail.read_lines())
+            writer.seal()
+            self.assertEqual(self.lines[:10], tail.read_lines())
+            offset = tail.get_offset()
+            writer.write(self.lines[10] + '\n' + self.lines[11][:20])
+            writer.write(self.lines[11][20:] + '\n')
+            writer.seal()
+        self.assertEqual(self.lines[10:12], tail.read_lines())
+        resumed = ArchiveTail(self.path, log, offset)
+        self.assertEqual(self.lines[10:12], resumed.read_lines())
+        self.assertEqual([], resumed.read_lines())
+
+    def test_append_drops_unindexed_chunk(self):
+        with ArchiveWriter(self.path, 'w', archive.ZLIB) as writer:
+            for line in self.lines[:50]:
+                writer.write_line(line)
+        # a chunk written before a crash, without its index line
+        with open(self.path, 'ab') as file:
+            file.write(b'partial chunk')
+        with ArchiveWriter(self.path, 'a') as writer:
+            for line in self.lines[50:100]:
+                writer.write_line(line)
+        self.assertEqual(2, writer.get_chunks())
+        self.assertEqual(self.lines[:100], list(ArchiveReader(self.path).lines()))
+
+    def test_not_an_archive(self):
+        archive.index_path(self.path).write_text('{"format": "other"}\n', encoding='utf-8')
+        with self.assertRaises(ValueError):
+            ArchiveReader(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
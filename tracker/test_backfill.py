@@ -0,0 +1,99 @@
+import logging
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy
+
+from tracker import backfill
+from tracker.datasets import CAR_DATA, LAP_TIMES, TRACK_POSITIONS
+from tracker.synthetic import SyntheticFeed, telemetry_lines
+from tracker.tracking import LOG_FILES, Config, Race
+
+log = logging.getLogger(__name__)
+
+
+def race_control(t: str, message: str) -> str:
+    return str(['RaceControlMessages', {'Messages': {'12': {'Utc': t, 'Category': 'Other', 'Message': message}}}, t])
+
+
+class Backfill(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.dir.name) / 'race.txt'
+        feed = list(SyntheticFeed(cars=4, laps=6, rate=20).lines())
+        samples = list(telemetry_lines(cars=4, seconds=120))
+        # telemetry interleaved with the timing feed, a message quoting a name and a broken line
+        self.lines = [line for pair in zip(feed, samples) for line in pair] + feed[len(samples):]
+        self.lines.insert(100, race_control('2025-12-07T13:05:00.000Z', "CAR 1 (VER) DRIVER'S LAP TIME DELETED"))
+        self.lines.insert(200, "['TimingData', {'Lines': {'1'")
+        self.source.write_text(''.join(line + '\n' for line in self.lines), encoding='utf-8')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def race(self, name: str) -> Race:
+        logs_path = Path(self.dir.name) / name
+        logs_path.mkdir()
+        return Race(Config(log, str(logs_path)), coalesce_window=0.2)
+
+    def test_split_at_line_boundaries(self):
+        with open(self.source, 'a', encoding='utf-8') as file:
+            file.write("['TimingData', {'Li")
+        size = self.source.stat().st_size
+        complete = size - len("['TimingData', {'Li")
+        start = len(self.lines[0]) + 1
+        ranges, end = backfill.split(self.source, start, chunk_bytes=10000)
+        self.assertEqual(complete, end)
+        self.assertGreater(len(ranges), 5)
+        self.assertEqual(start, ranges[0][0])
+        self.assertEqual(end, ranges[-1][1])
+        data = self.source.read_bytes()
+        for (_, previous_end), (begin, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(previous_end, begin)
+            self.assertEqual(b'\n', data[begin - 1:begin])
+        self.assertEqual(([], complete), backfill.split(self.source, complete))
+
+    def test_matches_serial_handling(self):
+        expected = self.race('serial')
+        for line in self.lines:
+            expected.handle(line)
+        expected.apply_pending()
+        expected.flush_logs()
+
+        for workers in (0, 2):
+            race = self.race(f'workers{workers}')
+            with self.assertLogs(log, logging.WARNING) as logs:
+                end = backfill.backfill(race, self.source, 0, workers, chunk_bytes=20000)
+            self.assertEqual(self.source.stat().st_size, end)
+            self.assertEqual([f"WARNING:{__name__}:Undecodable message {self.lines[200]}"], logs.output)
+            self.assertTrue({CAR_DATA, TRACK_POSITIONS, LAP_TIMES} <= race.pop_dirty())
+
+            laps, expected_laps = race.get_lap_store(), expected.get_lap_store()
+            self.assertEqual(expected_laps.get_driver_numbers(), laps.get_driver_numbers())
+            for no in laps.get_driver_numbers():
+                numpy.testing.assert_array_equal(expected_laps.get_times(no), laps.get_times(no))
+                numpy.testing.assert_array_equal(expected_laps.get_positions(no), laps.get_positions(no))
+                numpy.testing.assert_array_equal(expected_laps.get_gaps_to_top(no), laps.get_gaps_to_top(no))
+            store, expected_store = race.get_telemetry_store(), expected.get_telemetry_store()
+            self.assertEqual(expected_store.get_samples(), store.get_samples())
+            for no in store.get_driver_numbers():
+                for ring, expected_ring in ((store.get_car_data(no), expected_store.get_car_data(no)),
+                                            (store.get_positions(no), expected_store.get_positions(no))):
+                    numpy.testing.assert_array_equal(expected_ring.get_times(), ring.get_times())
+                    for column in ring.get_columns():
+                        numpy.testing.assert_array_equal(expected_ring.get_values(column), ring.get_values(column))
+            for name in LOG_FILES:
+                serial_log = os.path.join(expected.get_config().get_logs_path(), name)
+                log_path = os.path.join(race.get_config().get_logs_path(), name)
+                self.assertEqual(os.path.exists(serial_log), os.path.exists(log_path))
+                if os.path.exists(serial_log):
+                    self.assertEqual(Path(serial_log).read_text(encoding='utf-8'),
+                                     Path(log_path).read_text(encoding='utf-8'))
+            race.close()
+        expected.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import logging
+import os
+import pickle
+import tempfile
+import unittest
+
+from tracker import checkpoint
+from tracker.datasets import ALL
+from tracker.tail import TailReader
+from tracker.tracking import LOG_FILES, RACE_CONTROL_LOG, Config, Race
+
+log = logging.getLogger(__name__)
+
+
+def timing(lap: int) -> str:
+    return str(['TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:31.000'}, 'NumberOfLaps': lap}}},
+                '2025-12-07T13:00:00.000Z'])
+
+
+def race_control(message: str) -> str:
+    return str(['RaceControlMessages', {'Messages': [{'Category': 'Flag', 'Message': message}]},
+                '2025-12-07T13:00:00.000Z'])
+
+
+class Checkpoint(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.dir.name, 'source.txt')
+        self.path = os.path.join(self.dir.name, 'checkpoint.pkl')
+        self.race = Race(Config(log, self.dir.name))
+
+    def tearDown(self):
+        self.race.close()
+        self.dir.cleanup()
+
+    def follow(self, race: Race, reader: TailReader, lines: list[str]):
+        with open(self.source, 'a', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+        for line in reader.read_lines():
+            race.handle(line)
+        race.flush_logs()
+
+    def test_restore_continues_from_offset(self):
+        reader = TailReader(self.source, log)
+        self.follow(self.race, reader, [timing(1), race_control("GREEN LIGHT")])
+        checkpoint.save(self.path, self.race, self.source, reader.get_offset(), LOG_FILES)
+        # handled after the checkpoint, then the tracker crashed
+        self.follow(self.race, reader, [timing(2), race_control("YELLOW")])
+        self.race.close()
+
+        resumed = Race(Config(log, self.dir.name))
+        self.race = resumed
+        offset = checkpoint.restore(self.path, resumed, self.source, log)
+        self.assertEqual(ALL, resumed.pop_dirty())
+        self.assertEqual(1, resumed.get_lap_store().get_max_lap_number(1))
+        reader = TailReader(self.source, log, offset)
+        self.follow(resumed, reader, [])
+        self.assertEqual(2, resumed.get_lap_store().get_max_lap_number(1))
+        with open(os.path.join(self.dir.name, RACE_CONTROL_LOG), encoding='utf-8') as f:
+            messages = f.read()
+        self.assertEqual(1, messages.count("GREEN LIGHT"))
+        self.assertEqual(1, messages.count("YELLOW"))
+
+    def test_restore_ignores_other_recording(self):
+        reader = TailReader(self.source, log)
+        self.follow(self.race, reader, [timing(1)])
+        checkpoint.save(self.path, self.race, self.source, reader.get_offset(), LOG_FILES)
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(timing(5) + '\n')
+        self.assertIsNone(checkpoint.restore(self.path, Race(Config(log, self.dir.name)), self.source, log))
+
+    def test_restore_without_checkpoint(self):
+        self.assertIsNone(checkpoint.restore(self.path, self.race, self.source, log))
+
+    def test_restore_ignores_broken_checkpoint(self):
+        open(self.source, 'w').close()
+        with open(self.path, 'wb') as f:
+            f.write(b'\x80\x05broken')
+        self.assertIsNone(checkpoint.restore(self.path, self.race, self.source, log))
+        # unsupported protocol, a REDUCE raising ValueError (int('x')), a state that is no dict
+        for data in (b'\x80\x09', b'\x80\x04cbuiltins\nint\n(X\x01\x00\x00\x00xtR.', pickle.dumps([1, 2])):
+            with open(self.path, 'wb') as f:
+                f.write(data)
+            with self.assertLogs(log, logging.WARNING):
+                self.assertIsNone(checkpoint.restore(self.path, self.race, self.source, log))
+
+    def test_restore_ignores_incompatible_state(self):
+        reader = TailReader(self.source, log)
+        self.follow(self.race, reader, [timing(1)])
+        checkpoint.save(self.path, self.race, self.source, reader.get_offset(), LOG_FILES)
+        with open(self.path, 'rb') as f:
+            state = pickle.load(f)
+        for key, value in (('lap_store', None), ('logs', None), ('offset', 'x')):
+            broken = dict(state, **{key: value})
+            with open(self.path, 'wb') as f:
+                pickle.dump(broken, f)
+            with self.assertLogs(log, logging.WARNING):
+                self.assertIsNone(checkpoint.restore(self.path, Race(Config(log, self.dir.name)), self.source, log))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import datetime
+import logging
+import tempfile
+import unittest
+
+import numpy
+
+from tracker.coalesce import TimingCoalescer, merge
+from tracker.synthetic import SyntheticFeed
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+T0 = datetime.datetime(2025, 12, 7, 13, 1, tzinfo=datetime.timezone.utc)
+
+
+def at(ms: int) -> datetime.datetime:
+    return T0 + datetime.timedelta(milliseconds=ms)
+
+
+class Coalescer(unittest.TestCase):
+    def test_merge_nested_fragments(self):
+        into = {'Sectors': {'0': {'Value': '30.1'}}, 'Position': '3'}
+        merge(into, {'Sectors': {'1': {'Value': '31.2'}}, 'Position': '2'})
+        self.assertEqual({'Sectors': {'0': {'Value': '30.1'}, '1': {'Value': '31.2'}}, 'Position': '2'}, into)
+
+    def test_merges_per_driver_within_window(self):
+        coalescer = TimingCoalescer(0.2)
+        self.assertEqual([], coalescer.add({'Lines': {'1': {'Position': '2'}}}, at(0)))
+        self.assertEqual([], coalescer.add({'Lines': {'1': {'GapToLeader': '+1.0'}, '4': {'Position': '1'}}}, at(50)))
+        self.assertEqual([], coalescer.add({'Lines': {'1': {'GapToLeader': '+1.2'}}}, at(199)))
+        ready = coalescer.add({'Lines': {'4': {'GapToLeader': ''}}}, at(200))
+        self.assertEqual([{'Lines': {'1': {'Position': '2', 'GapToLeader': '+1.2'}, '4': {'Position': '1'}}}], ready)
+        self.assertEqual(1, coalescer.get_pending())
+        self.assertEqual([{'Lines': {'4': {'GapToLeader': ''}}}], coalescer.flush())
+        self.assertEqual([], coalescer.flush())
+        self.assertEqual(5, coalescer.get_fragments())
+        self.assertEqual(3, coalescer.get_updates())
+        self.assertEqual({1: 2, 3: 1}, coalescer.get_histogram())
+
+    def test_lap_boundary_closes_pending_update(self):
+        coalescer = TimingCoalescer(0.2)
+        coalescer.add({'Lines': {'1': {'Position': '2'}}}, at(0))
+        ready = coalescer.add({'Lines': {'1': {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': 5}}}, at(10))
+        self.assertEqual([{'Lines': {'1': {'Position': '2'}}}], ready)
+        coalescer.add({'Lines': {'1': {'Position': '1'}}}, at(20))
+        self.assertEqual([{'Lines': {'1': {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': 5, 'Position': '1'}}}],
+                         coalescer.flush())
+
+    def test_does_not_change_decoded_messages(self):
+        coalescer = TimingCoalescer(0.2)
+        first = {'Lines': {'1': {'Sectors': {'0': {'Value': '30.1'}}}}}
+        coalescer.add(first, at(0))
+        coalescer.add({'Lines': {'1': {'Sectors': {'0': {'Value': '29.9'}}}}}, at(10))
+        coalescer.flush()
+        self.assertEqual({'Lines': {'1': {'Sectors': {'0': {'Value': '30.1'}}}}}, first)
+
+    def test_race_state_matches_uncoalesced(self):
+        lines = list(SyntheticFeed(cars=6, laps=6, rate=40, burst_every=30, burst_size=100).lines())
+        with tempfile.TemporaryDirectory() as d:
+            expected = Race(Config(log, d))
+            race = Race(Config(log, d), coalesce_window=0.2)
+            for line in lines:
+                expected.handle(line)
+                race.handle(line)
+            race.apply_pending()
+            expected.close()
+            race.close()
+        coalescer = race.get_coalescer()
+        self.assertGreater(coalescer.get_fragments(), coalescer.get_updates())
+        self.assertEqual(coalescer.get_updates(), sum(coalescer.get_histogram().values()))
+        self.assertEqual(coalescer.get_fragments(), sum(k * v for k, v in coalescer.get_histogram().items()))
+        laps, expected_laps = race.get_lap_store(), expected.get_lap_store()
+        self.assertEqual(expected_laps.get_driver_numbers(), laps.get_driver_numbers())
+        for no in laps.get_driver_numbers():
+            numpy.testing.assert_array_equal(expected_laps.get_times(no), laps.get_times(no))
+            numpy.testing.assert_array_equal(expected_laps.get_positions(no), laps.get_positions(no))
+            numpy.testing.assert_array_equal(expected_laps.get_gaps_to_top(no), laps.get_gaps_to_top(no))
+
+
+if __name__ == '__main__':
+    unittest.main()
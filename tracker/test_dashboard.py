@@ -0,0 +1,147 @@
+import http.client
+import json
+import logging
+import queue
+import tempfile
+import threading
+import unittest
+
+from tracker import dashboard as dashboard_module
+from tracker.dashboard import CLIENT_QUEUE_SIZE, Dashboard, Deltas
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+def timing(no: int, data: dict) -> str:
+    return str(['TimingData', {'Lines': {str(no): data}}, '2025-12-07T13:01:00.000Z'])
+
+
+def read_event(response) -> tuple[str | None, dict]:
+    event = None
+    while True:
+        line = response.fp.readline().decode().rstrip('\n')
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: '):
+            data = json.loads(line[len('data: '):])
+            response.fp.readline()
+            return event, data
+
+
+class DashboardTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.race = Race(Config(log, self.dir.name))
+
+    def tearDown(self):
+        self.race.close()
+        self.dir.cleanup()
+
+    def test_deltas_hold_only_changes(self):
+        deltas = Deltas()
+        self.assertEqual({}, deltas.collect(self.race))
+        self.race.handle(timing(1, {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': 1}))
+        self.race.handle(timing(1, {'Position': '1'}))
+        self.race.handle(str(['WeatherData', {'AirTemp': '25.1'}, '2025-12-07T13:01:00.000Z']))
+        delta = deltas.collect(self.race)
+        self.assertEqual({'1'}, set(delta['drivers']))
+        self.assertEqual({'1': [[1, 91.5, 1.0, 0.0, 0.0]]}, delta['laps'])
+        self.assertEqual([[1765112460000, 25.1, 0.0, 0.0, 0.0]], delta['weather'])
+        self.assertEqual({}, deltas.collect(self.race))
+
+        self.race.handle(timing(1, {'LastLapTime': {'Value': '1:32.0'}, 'NumberOfLaps': 2}))
+        self.race.handle(timing(4, {'Position': '2'}))
+        delta = deltas.collect(self.race)
+        self.assertEqual({'4'}, set(delta['drivers']))
+        self.assertEqual({'1': [[2, 92.0, 1.0, 0.0, 0.0]], '4': [[0, None, 2.0, 0.0, 0.0]]}, delta['laps'])
+        self.assertNotIn('weather', delta)
+
+    def test_event_stream(self):
+        dashboard = Dashboard(log)
+        dashboard.start()
+        try:
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': 1}))
+            dashboard.publish(self.race)
+            host, port = dashboard.get_url()[len('http://'):].rstrip('/').split(':')
+            page = http.client.HTTPConnection(host, int(port), timeout=5)
+            page.request('GET', '/')
+            self.assertIn(b'EventSource', page.getresponse().read())
+            page.close()
+
+            events = http.client.HTTPConnection(host, int(port), timeout=5)
+            events.request('GET', '/events')
+            response = events.getresponse()
+            self.assertEqual('text/event-stream', response.getheader('Content-Type'))
+            event, snapshot = read_event(response)
+            self.assertEqual('snapshot', event)
+            self.assertEqual([[1, 91.5, 0.0, 0.0, 0.0]], snapshot['laps']['1'])
+
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:32.0'}, 'NumberOfLaps': 2}))
+            size = dashboard.publish(self.race)
+            event, delta = read_event(response)
+            self.assertIsNone(event)
+            self.assertEqual({'laps': {'1': [[2, 92.0, 0.0, 0.0, 0.0]]}}, delta)
+            self.assertEqual(len(json.dumps(delta, separators=(',', ':'))), size)
+            self.assertEqual(0, dashboard.publish(self.race))
+            self.assertEqual(1, dashboard.get_client_count())
+            events.close()
+        finally:
+            dashboard.stop()
+
+    def test_slow_client_resyncs_and_does_not_block_stop(self):
+        dashboard = Dashboard(log)
+        dashboard.start()
+        client, _ = dashboard.subscribe()
+        for lap in range(1, CLIENT_QUEUE_SIZE + 2):
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': lap}))
+            dashboard.publish(self.race)
+        self.assertEqual(1, dashboard.get_resyncs())
+        self.assertEqual([dashboard_module._RESYNC], list(client.queue))
+
+        for lap in range(CLIENT_QUEUE_SIZE + 2, 2 * CLIENT_QUEUE_SIZE + 1):
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': lap}))
+            dashboard.publish(self.race)
+        self.assertTrue(client.full())
+        stopper = threading.Thread(target=dashboard.stop, daemon=True)
+        stopper.start()
+        stopper.join(5)
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual([dashboard_module._CLOSE], list(client.queue))
+
+    def test_event_stream_resync(self):
+        dashboard = Dashboard(log)
+        clients: list[queue.Queue] = []
+        subscribe = dashboard.subscribe
+
+        def capture() -> tuple[queue.Queue, bytes]:
+            client, snapshot = subscribe()
+            clients.append(client)
+            return client, snapshot
+
+        dashboard.subscribe = capture
+        dashboard.start()
+        try:
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:31.5'}, 'NumberOfLaps': 1}))
+            dashboard.publish(self.race)
+            host, port = dashboard.get_url()[len('http://'):].rstrip('/').split(':')
+            events = http.client.HTTPConnection(host, int(port), timeout=5)
+            events.request('GET', '/events')
+            response = events.getresponse()
+            self.assertEqual('snapshot', read_event(response)[0])
+
+            self.race.handle(timing(1, {'LastLapTime': {'Value': '1:32.0'}, 'NumberOfLaps': 2}))
+            dashboard.publish(self.race)
+            self.assertIsNone(read_event(response)[0])
+            # what publish puts for a client that fell CLIENT_QUEUE_SIZE deltas behind
+            clients[0].put_nowait(dashboard_module._RESYNC)
+            event, snapshot = read_event(response)
+            self.assertEqual('snapshot', event)
+            self.assertEqual([[1, 91.5, 0.0, 0.0, 0.0], [2, 92.0, 0.0, 0.0, 0.0]], snapshot['laps']['1'])
+            events.close()
+        finally:
+            dashboard.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
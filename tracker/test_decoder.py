@@ -0,0 +1,72 @@
+import datetime
+import json
+import unittest
+
+from tracker.decoder import decode, parse_time, to_json
+
+
+class Decoder(unittest.TestCase):
+    def test_decode_timing_data(self):
+        msg = ['TimingData', {'Lines': {'1': {'InPit': False, 'PitOut': True, 'NumberOfLaps': 3,
+                                              'LastLapTime': {'Value': '1:31.234'}}}}, '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_none(self):
+        msg = ['WeatherData', {'AirTemp': None}, '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_apostrophe(self):
+        msg = ['RaceControlMessages', {'Messages': {'5': {'Message': "DRIVER'S LAP DELETED", 'Lap': 3}}},
+               '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_constants_in_text(self):
+        msg = ['RaceControlMessages', {'Messages': {'5': {'Message': 'True, False or None: True', 'Flag': True}}},
+               '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_constant_in_list(self):
+        msg = ['TimingData', {'Values': [True, False, None]}, '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_quotes_and_escapes(self):
+        msg = ['RaceControlMessages', {'Message': 'both \' and " and \t'}, '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+
+    def test_decode_escapes_without_quotes(self):
+        msg = ['RaceControlMessages', {'Message': 'tab\t bell\x07 back\\slash \u2028 \U000e0001'},
+               '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+        self.assertEqual(msg, json.loads(to_json(str(msg))))
+
+    def test_decode_quotes_without_escapes(self):
+        msg = ['RaceControlMessages', {'Messages': [{'Message': 'CAR 1 "VER" TRUE', 'Flag': None},
+                                                    {'Message': "DRIVER'S None", 'Flag': False}]},
+               '2025-12-07T13:00:00.1Z']
+        self.assertEqual(msg, decode(str(msg)))
+        self.assertEqual(msg, json.loads(to_json(str(msg))))
+
+    def test_decode_invalid(self):
+        with self.assertRaises(ValueError):
+            decode("['TimingData', {'Lines': ")
+        with self.assertRaises(ValueError):
+            decode("['TimingData', \"unterminated]")
+        with self.assertRaises(ValueError):
+            decode("['X', {[1]: \"it's\"}, 'x']")
+        with self.assertRaises(ValueError):
+            decode("['X', {[1]: 'it\\'s'}, 'x']")
+
+    def test_parse_time(self):
+        utc = datetime.timezone.utc
+        self.assertEqual(datetime.datetime(2025, 12, 7, 13, 0, 0, 123456, tzinfo=utc),
+                         parse_time('2025-12-07T13:00:00.1234567Z'))
+        self.assertEqual(datetime.datetime(2025, 12, 7, 13, 0, 0, 100000, tzinfo=utc),
+                         parse_time('2025-12-07T13:00:00.1Z'))
+        self.assertEqual(datetime.datetime(2025, 12, 7, 13, 0, tzinfo=utc), parse_time('2025-12-07T13:00:00Z'))
+        self.assertEqual(datetime.datetime(2025, 12, 7, 13, 0, 0, 500000), parse_time('2025-12-07T13:00:00.5'))
+        with self.assertRaises(ValueError):
+            parse_time('')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import inspect
+import logging
+import queue
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from fastf1.livetiming.client import SignalRClient
+from signalrcore.messages.completion_message import CompletionMessage
+
+from tracker.datasets import LAP_TIMES
+from tracker.live import QueueingSignalRClient, consume, format_message
+from tracker.render import Chart, Renderer
+from tracker.standin import StandInServer
+from tracker.synthetic import SyntheticFeed
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+class Live(unittest.TestCase):
+    def test_signalr_client_internals(self):
+        # QueueingSignalRClient overrides private methods of fastf1's client and relies on its
+        # private attributes; an upgrade that changes them has to fail here, not on race day
+        for name in ('_run', '_supervise', '_exit', '_on_connect', '_on_close'):
+            self.assertEqual(['self'], list(inspect.signature(getattr(SignalRClient, name)).parameters), name)
+        self.assertEqual(['self', 'msg'], list(inspect.signature(SignalRClient._on_message).parameters))
+        start = inspect.getsource(SignalRClient.start)
+        self.assertLess(start.index('self._run()'), start.index('self._supervise()'))
+        self.assertIn('self._exit()', start)
+        self.assertTrue({'filename', 'filemode', 'timeout', 'logger', 'no_auth'}
+                        <= set(inspect.signature(SignalRClient.__init__).parameters))
+        for name in ('_connection_url', '_negotiate_url'):
+            self.assertIsInstance(getattr(SignalRClient, name), str, name)
+        with tempfile.TemporaryDirectory() as d:
+            client = SignalRClient(str(Path(d) / 'recording.txt'), logger=log)
+        for name in ('headers', 'topics', 'filename', 'filemode', 'timeout', 'logger', '_no_auth', '_connection',
+                     '_is_connected', '_output_file', '_t_last_message'):
+            self.assertTrue(hasattr(client, name), name)
+
+    def test_format_message(self):
+        line = ['WeatherData', {'AirTemp': '25.1'}, '2025-12-07T13:01:00.000Z']
+        self.assertEqual([str(line)], format_message(line))
+        completion = CompletionMessage('id', {'Heartbeat': {'Utc': '2025-12-07T13:00:00Z'}}, None)
+        self.assertEqual(["['Heartbeat', '{\"Utc\": \"2025-12-07T13:00:00Z\"}', '']"], format_message(completion))
+        self.assertEqual([], format_message(CompletionMessage('id', None, None)))
+
+    def test_consume_applies_coalesced_timing_data(self):
+        with tempfile.TemporaryDirectory() as d:
+            race = Race(Config(log, d), coalesce_window=60.0)
+            drawn = []
+            renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: drawn.append(
+                race.get_lap_store().get_max_lap_number())),))
+            messages = queue.Queue()
+            for lap in range(1, 4):
+                messages.put(str(['TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:31.0'},
+                                                                 'NumberOfLaps': lap}}}, '2025-12-07T13:01:00.000Z']))
+            messages.put(None)
+            try:
+                consume(messages, race, renderer, max_rate=0)
+            finally:
+                race.close()
+        # all three laps fall in one window, held back until the render
+        self.assertEqual([3], drawn)
+
+    def test_client_against_stand_in(self):
+        with tempfile.TemporaryDirectory() as d:
+            source = Path(d) / 'source.txt'
+            lines = list(SyntheticFeed(cars=3, laps=4).lines())
+            source.write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+            server = StandInServer(source, log)
+            server.start()
+            messages = queue.Queue()
+            recording = Path(d) / 'recording.txt'
+            client = QueueingSignalRClient(str(recording), messages, filemode='w', timeout=0, logger=log,
+                                           no_auth=True, url=server.get_url())
+            receiver = threading.Thread(target=client.start, daemon=True)
+            receiver.start()
+
+            race = Race(Config(log, d), coalesce_window=0.2)
+            drawn = []
+            renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}),
+                                            lambda race, order: drawn.append(1)),))
+            handled = []
+            original = race.handle
+
+            def handle(line: str):
+                handled.append(line)
+                original(line)
+                if len(handled) == len(lines):
+                    client.stop()
+
+            race.handle = handle
+            try:
+                consume(messages, race, renderer, max_rate=0)
+            finally:
+                client.stop()
+                receiver.join(10)
+                server.stop()
+                race.close()
+            self.assertFalse(receiver.is_alive())
+            self.assertEqual(lines, handled)
+            self.assertEqual(lines, recording.read_text(encoding='utf-8').splitlines())
+        laps = race.get_lap_store()
+        self.assertEqual([1, 4, 81], sorted(laps.get_driver_numbers()))
+        self.assertEqual(4, laps.get_max_lap_number(1))
+        self.assertTrue(drawn)
+
+
+if __name__ == '__main__':
+    unittest.main()
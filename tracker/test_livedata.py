@@ -0,0 +1,87 @@
+import logging
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+
+from fastf1.livetiming.data import LiveTimingData
+
+from tracker.livedata import IncrementalLiveTimingData
+
+log = logging.getLogger(__name__)
+
+
+def line(category: str, data: dict, t: str) -> str:
+    return str([category, data, t]) + '\n'
+
+
+LINES = [
+    line('WeatherData', {'AirTemp': '25.1'}, '2025-12-07T12:59:00.000Z'),
+    line('SessionInfo', {'Meeting': {'Name': 'Abu Dhabi Grand Prix'}}, '2025-12-07T12:59:01.000Z'),
+    line('TimingData', {'Lines': {'1': {'NumberOfLaps': 0}}}, '2025-12-07T12:59:30.000Z'),
+    line('SessionData', {'StatusSeries': {'1': {'Utc': '2025-12-07T13:00:00.000Z', 'SessionStatus': 'Started'}}},
+         '2025-12-07T13:00:00.000Z'),
+    line('TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': 1}}},
+         '2025-12-07T13:01:40.000Z'),
+    line('WeatherData', {'AirTemp': '25.3'}, '2025-12-07T13:02:00.000Z'),
+]
+
+
+class IncrementalLoad(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'source.txt'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def append(self, lines: list[str]):
+        with self.path.open('a', encoding='utf-8') as f:
+            f.writelines(lines)
+
+    def full_load(self) -> LiveTimingData:
+        filtered = Path(self.dir.name) / 'tmp.txt'
+        filtered.write_text(''.join(l for l in self.path.read_text(encoding='utf-8').splitlines(keepends=True)
+                                    if 'SessionInfo' not in l), encoding='utf-8')
+        data = LiveTimingData(str(filtered))
+        data.load()
+        return data
+
+    def test_matches_full_load_across_updates(self):
+        data = IncrementalLiveTimingData(self.path, log)
+        self.append(LINES[:3])
+        self.assertEqual(2, data.update())
+        # no start status yet: the first timestamp is the start
+        self.assertEqual(timedelta(0), data.get('WeatherData')[0][0])
+        self.append(LINES[3:])
+        self.assertEqual(3, data.update())
+        self.assertEqual(0, data.update())
+        self.assertEqual(self.full_load().data, data.data)
+        self.assertEqual(timedelta(seconds=-60), data.get('WeatherData')[0][0])
+        self.assertFalse(data.has('SessionInfo'))
+
+    def test_only_new_lines_are_parsed(self):
+        data = IncrementalLiveTimingData(self.path, log)
+        self.append(LINES[:4])
+        data.load()
+        parsed = []
+        original = data._parse_line
+        data._parse_line = lambda elem: (parsed.append(elem), original(elem))
+        self.append(LINES[4:])
+        data.update()
+        self.assertEqual([l.strip() for l in LINES[4:]], parsed)
+        self.assertEqual(os.path.getsize(self.path), data.get_offset())
+
+    def test_truncated_recording_is_parsed_again(self):
+        data = IncrementalLiveTimingData(self.path, log)
+        self.append(LINES)
+        data.update()
+        self.path.write_text(LINES[0], encoding='utf-8')
+        data.update()
+        self.assertEqual(['WeatherData'], data.list_categories())
+        self.assertEqual(1, len(data.get('WeatherData')))
+
+
+if __name__ == '__main__':
+    unittest.main()
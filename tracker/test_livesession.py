@@ -0,0 +1,125 @@
+import logging
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+
+import pandas
+
+from tracker.livedata import IncrementalLiveTimingData
+from tracker.livesession import DriverLaps, IncrementalSession
+from tracker.synthetic import SyntheticFeed, offline_session
+
+log = logging.getLogger(__name__)
+
+LINES = list(SyntheticFeed(cars=3, laps=6).session_lines())
+COLUMNS = ['DriverNumber', 'Driver', 'LapNumber', 'LapTime', 'Position', 'PitInTime', 'PitOutTime', 'Stint',
+           'Compound', 'FreshTyre', 'TyreLife', 'TrackStatus', 'IsAccurate', 'Sector1Time', 'Sector2Time',
+           'Sector3Time']
+
+
+def seconds(value: float) -> timedelta:
+    return timedelta(seconds=value)
+
+
+class IncrementalSessionTables(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'source.txt'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def append(self, lines: list[str]):
+        with self.path.open('a', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+
+    def test_matches_session_load(self):
+        self.append(LINES)
+        data = IncrementalLiveTimingData(self.path, log)
+        data.update()
+        tables = IncrementalSession(offline_session(), data)
+        tables.update()
+        session = tables.get_session()
+        loaded = offline_session()
+        loaded.load(livedata=data, telemetry=False)
+
+        laps = session.laps.sort_values(['DriverNumber', 'LapNumber']).reset_index(drop=True)
+        expected = loaded.laps.sort_values(['DriverNumber', 'LapNumber']).reset_index(drop=True)
+        self.assertEqual(18, len(laps))
+        pandas.testing.assert_frame_equal(expected[COLUMNS], laps[COLUMNS])
+        # fastf1 also aligns the lap ends between the drivers on their gaps, by a few milliseconds
+        self.assertLessEqual((expected['Time'] - laps['Time']).abs().max(), pandas.Timedelta('5ms'))
+        self.assertEqual(sorted(loaded.drivers), sorted(session.drivers))
+        pandas.testing.assert_frame_equal(loaded.weather_data, session.weather_data)
+        pandas.testing.assert_frame_equal(loaded.track_status, session.track_status)
+        self.assertEqual(loaded.session_start_time, session.session_start_time)
+
+    def test_updates_handle_only_new_entries(self):
+        data = IncrementalLiveTimingData(self.path, log)
+        tables = IncrementalSession(offline_session(), data)
+        handled = 0
+        step = len(LINES) // 4 + 1
+        for i in range(0, len(LINES), step):
+            self.append(LINES[i:i + step])
+            data.update()
+            handled += tables.update()
+        self.assertEqual(0, tables.update())
+        categories = ('DriverList', 'SessionStatus', 'TrackStatus', 'TimingAppData', 'TimingData', 'WeatherData',
+                      'RaceControlMessages')
+        self.assertEqual(sum(len(data.get(c)) for c in categories if data.has(c)), handled)
+
+        once = IncrementalSession(offline_session(), data)
+        once.update()
+        pandas.testing.assert_frame_equal(once.get_session().laps, tables.get_session().laps)
+
+    def test_restarted_recording_is_handled_again(self):
+        self.append(LINES)
+        data = IncrementalLiveTimingData(self.path, log)
+        data.update()
+        tables = IncrementalSession(offline_session(), data)
+        tables.update()
+        self.assertEqual(18, len(tables.get_session().laps))
+        self.path.write_text(''.join(line + '\n' for line in LINES[:6]), encoding='utf-8')
+        data.update()
+        tables.update()
+        self.assertEqual(0, len(tables.get_session().laps))
+        self.assertEqual(3, len(tables.get_session().drivers))
+
+
+class DriverLapRules(unittest.TestCase):
+    def test_no_lap_before_leaving_the_pit_lane(self):
+        laps = DriverLaps()
+        laps.add(seconds(0), {'NumberOfLaps': 1, 'LastLapTime': {'Value': '1:30.000'}})
+        self.assertEqual([], laps.get_laps())
+        laps.add(seconds(10), {'InPit': False})
+        laps.add(seconds(100), {'NumberOfLaps': 2, 'LastLapTime': {'Value': '1:30.000'}})
+        self.assertEqual([1], [lap['LapNumber'] for lap in laps.get_laps()])
+        self.assertEqual(seconds(10), laps.get_laps()[0]['PitOutTime'])
+
+    def test_late_values_and_pit_exits_near_the_line(self):
+        laps = DriverLaps()
+        laps.add(seconds(0), {'InPit': False})
+        laps.add(seconds(90), {'NumberOfLaps': 1})
+        # less than five seconds after the line, the lap time is the completed lap's
+        laps.add(seconds(92), {'LastLapTime': {'Value': '1:30.000'}})
+        laps.add(seconds(170), {'InPit': True})
+        # the car leaves the pit lane just before crossing the line: the exit starts the next lap
+        laps.add(seconds(178), {'InPit': False})
+        laps.add(seconds(180), {'NumberOfLaps': 2, 'LastLapTime': {'Value': '1:30.000'}})
+        # late data of a completed lap is ignored until the current lap count is sent again
+        laps.add(seconds(200), {'NumberOfLaps': 1, 'LastLapTime': {'Value': '1:20.000'}})
+        laps.add(seconds(201), {'Sectors': {'0': {'Value': '20.000'}}})
+        laps.add(seconds(202), {'NumberOfLaps': 2})
+        laps.add(seconds(270), {'NumberOfLaps': 3, 'LastLapTime': {'Value': '1:30.000'}})
+        first, second, third = laps.get_laps()
+        self.assertEqual(seconds(90), first['LapTime'])
+        self.assertEqual(seconds(170), second['PitInTime'])
+        self.assertIsNone(second['PitOutTime'])
+        self.assertEqual(seconds(178), third['PitOutTime'])
+        self.assertEqual(seconds(90), third['LapTime'])
+        self.assertIsNone(third['Sector1Time'])
+
+
+if __name__ == '__main__':
+    unittest.main()
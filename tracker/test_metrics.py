@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.metrics import MeterProvider
+# noinspection PyPackageRequirements
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from tracker import metrics
+from tracker.datasets import LAP_TIMES
+from tracker.metrics import TrackerMetrics
+from tracker.pipeline import Pipeline
+from tracker.render import Chart, Renderer
+from tracker.synthetic import SyntheticFeed
+from tracker.tail import TailReader
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+def collect(reader: InMemoryMetricReader) -> dict[str, list]:
+    points = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points[metric.name] = list(metric.data.data_points)
+    return points
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.dir.name) / 'source.txt'
+        self.lines = list(SyntheticFeed(cars=4, laps=4).lines())
+        self.source.write_text(''.join(line + '\n' for line in self.lines) + "{'broken\n", encoding='utf-8')
+        self.reader = InMemoryMetricReader()
+        self.provider = MeterProvider(metric_readers=[self.reader])
+
+    def tearDown(self):
+        self.provider.shutdown()
+        self.dir.cleanup()
+
+    def test_pipeline_records_metrics(self):
+        tracker_metrics = TrackerMetrics(self.provider.get_meter(__name__))
+        race = Race(Config(log, self.dir.name))
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: None),),
+                            metrics=tracker_metrics)
+        asyncio.run(Pipeline(race, TailReader(self.source, log), None, renderer, log, batch=50, max_rate=0,
+                             metrics=tracker_metrics).run())
+        race.close()
+
+        points = collect(self.reader)
+        self.assertEqual(len(self.lines) + 1, points['tracker.lines'][0].value)
+        self.assertEqual(1, points['tracker.parse_failures'][0].value)
+        handled = {p.attributes['category']: p.count for p in points['tracker.handle.duration']}
+        self.assertIn('TimingData', handled)
+        self.assertEqual(len(self.lines), sum(handled.values()))
+        [rendered] = points['tracker.render.duration']
+        self.assertEqual({'chart': 'laptime'}, dict(rendered.attributes))
+        [latency] = points['tracker.file_to_plot.latency']
+        self.assertEqual(rendered.count, latency.count)
+        self.assertGreater(latency.min, 0)
+        self.assertGreater(points['tracker.memory.rss'][0].value, 0)
+
+    def test_unknown_exporter(self):
+        with self.assertRaises(ValueError):
+            metrics.configure('otlp', Path(self.dir.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from tracker.datasets import LAP_TIMES
+from tracker.pipeline import DECODE, RENDER, STATE, Pipeline, decode_lines
+from tracker.render import Chart, Renderer
+from tracker.synthetic import SyntheticFeed
+from tracker.tail import TailReader
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.dir.name) / 'source.txt'
+        self.lines = list(SyntheticFeed(cars=4, laps=6).lines())
+        self.source.write_text(''.join(line + '\n' for line in self.lines), encoding='utf-8')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_decode_lines_drops_invalid(self):
+        self.assertEqual([['R', {}, 't']], decode_lines(["['R', {}, 't']", "", "{'"], log))
+
+    def test_follows_file_like_handle(self):
+        expected = Race(Config(log, self.dir.name))
+        for line in self.lines:
+            expected.handle(line)
+        expected.close()
+
+        race = Race(Config(log, self.dir.name))
+        offsets = []
+        renders = []
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: None),))
+        pipeline = Pipeline(race, TailReader(self.source, log), None, renderer, log, queue_size=2, batch=50,
+                            max_rate=0, on_state=offsets.append, on_render=lambda: renders.append(1))
+        asyncio.run(pipeline.run())
+        race.close()
+
+        laps = race.get_lap_store()
+        self.assertEqual(sorted(expected.get_lap_store().get_driver_numbers()), sorted(laps.get_driver_numbers()))
+        for no in laps.get_driver_numbers():
+            self.assertEqual(expected.get_lap_store().get_max_lap(no).get_position(),
+                             laps.get_max_lap(no).get_position())
+        self.assertEqual(os.path.getsize(self.source), offsets[-1])
+        stats = pipeline.get_stats()
+        batches = (len(self.lines) + 49) // 50
+        self.assertEqual(batches, stats[DECODE].get_items())
+        self.assertEqual(batches, stats[STATE].get_items())
+        self.assertLessEqual(stats[DECODE].get_peak_depth(), 2)
+        self.assertEqual(len(renders), pipeline.get_renders())
+
+    def test_slow_render_coalesces(self):
+        race = Race(Config(log, self.dir.name))
+
+        def draw(race, order):
+            time.sleep(0.05)
+
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), draw),))
+        pipeline = Pipeline(race, TailReader(self.source, log), None, renderer, log, batch=10, max_rate=10)
+        asyncio.run(pipeline.run())
+        race.close()
+        batches = (len(self.lines) + 9) // 10
+        rendered = pipeline.get_stats()[RENDER]
+        # every batch was applied but far fewer renders drew them, each covering several batches
+        self.assertEqual(batches, pipeline.get_stats()[STATE].get_items())
+        self.assertLess(pipeline.get_renders(), batches // 2)
+        self.assertEqual(batches, rendered.get_items() + pipeline.get_coalesced())
+        self.assertGreater(rendered.get_peak_depth(), 1)
+
+    def test_pipelines_take_turns(self):
+        busy = Path(self.dir.name) / 'busy.txt'
+        busy.write_text(''.join(line + '\n' for line in SyntheticFeed(cars=6, laps=10, rate=20).lines()),
+                        encoding='utf-8')
+        applied = []
+        directory = self.dir.name
+
+        class Recording(Race):
+            def __init__(self, name: str):
+                super().__init__(Config(log, directory))
+                self.name = name
+
+            def flush_logs(self):
+                # called once per applied batch
+                applied.append(self.name)
+                super().flush_logs()
+
+        def pipeline(source: Path, name: str) -> Pipeline:
+            return Pipeline(Recording(name), TailReader(source, log), None, Renderer(log, ()), log, batch=20,
+                            max_rate=0)
+
+        async def follow_both():
+            await asyncio.gather(pipeline(busy, 'busy').run(), pipeline(self.source, 'quiet').run())
+
+        asyncio.run(follow_both())
+        # the quiet feed is done long before the busy one, instead of waiting for its backlog
+        last_quiet = len(applied) - applied[::-1].index('quiet')
+        self.assertLess(last_quiet, len(applied) // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
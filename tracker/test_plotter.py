@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy
+
+import image_export
+from tracker import plotter
+from tracker.domain.degradation import DegradationStore
+from tracker.domain.lap import LapStore
+from tracker.domain.pit import PitStore
+from tracker.domain.stint import StintStore
+
+
+class Plotter(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(plotter, 'images_path', self.dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        charts = mock.patch.object(plotter, '_charts', {})
+        charts.start()
+        self.addCleanup(charts.stop)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_line_chart_updates_lines_in_place(self):
+        chart = plotter.get_chart("chart", invert_y=True)
+        chart.set_lines({1: ([0, 1], [1.0, 2.0])})
+        line = chart.get_lines()[1]
+        chart.set_lines({1: ([0, 1, 2], [1.0, 2.0, 3.0]), 4: ([0], [5.0])})
+        self.assertIs(line, chart.get_lines()[1])
+        self.assertEqual([1.0, 2.0, 3.0], list(line.get_ydata()))
+        self.assertEqual(2, len(chart.get_axes().get_lines()))
+        self.assertIs(chart, plotter.get_chart("chart"))
+
+    def test_plot_gap_to_top_saves_both_variants(self):
+        laps = LapStore()
+        for lap in range(3):
+            laps.add_lap(1, lap).set_gap_to_top(lap * 20.0)
+        plotter.plot_gap_to_top(laps, "gap_top", 30)
+        laps.add_lap(1, 3).set_gap_to_top(60.0)
+        plotter.plot_gap_to_top(laps, "gap_top", 30)
+        bottom, top = plotter.get_chart("gap_top").get_axes().get_ylim()
+        self.assertEqual((30, 0), (bottom, top))
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, "gap_top.png")))
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, "gap_top_30.png")))
+
+    def test_plot_pit_stops(self):
+        laps = LapStore()
+        pits = PitStore()
+        for no in (1, 4):
+            laps.add_lap(no, 20).set_position(no)
+            for lap in range(1, 6):
+                pits.add_lap(no, lap, 90.0)
+            pits.enter(no, 6, None)
+            pits.leave(no, None)
+            pits.set_pit_lane(no, 6, 21.5)
+        pits.add_lap(1, 6, 110.0)
+        pits.add_lap(1, 7, 91.0)
+        plotter.plot_pit_stops(pits, [1, 4, 16])
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, "pit_stops.png")))
+
+    def test_plot_degradation(self):
+        stints = StintStore()
+        stints.add_stint(1, 0).set_compound('MEDIUM')
+        degradation = DegradationStore()
+        for lap in range(2, 8):
+            degradation.add_lap(1, 0, 0, lap, 90.0 + 0.5 * lap)
+        pits = PitStore()
+        with mock.patch.object(image_export, 'write_image') as write_image:
+            plotter.plot_degradation(degradation, stints, pits, [1, 4])
+            pits.add_lap(4, 1, 90.0)
+            pits.add_lap(4, 2, 90.0)
+            pits.enter(4, 3, None)
+            pits.add_lap(4, 3, 110.0)
+            pits.add_lap(4, 4, 100.0)
+            plotter.plot_degradation(degradation, stints, pits, [1, 4])
+        self.assertEqual(2, write_image.call_count)
+        cells = write_image.call_args.args[0].data[0].cells.values
+        # 0.5 * a * (a + 1) / 2 reaches the field's 30 s at tyre age 11
+        self.assertEqual(('1', 'MEDIUM', '6', '6', '+0.500', '90.500', '93.500', '30.0', '12', '5'),
+                         tuple(column[0] for column in cells))
+        self.assertEqual(('4', '---', '0', '0', '---', '---', '---', '30.0', '---', '---'),
+                         tuple(column[1] for column in cells))
+        self.assertEqual(os.path.join(self.dir.name, "degradation.png"), write_image.call_args.args[1])
+
+    def test_autoscale_follows_new_data(self):
+        chart = plotter.get_chart("chart")
+        chart.set_lines({0: (numpy.arange(2), numpy.array([1.0, 2.0]))})
+        chart.get_axes().set_ylim(0, 1)
+        chart.set_lines({0: (numpy.arange(3), numpy.array([1.0, 2.0, 50.0]))})
+        chart.autoscale()
+        self.assertGreaterEqual(chart.get_axes().get_ylim()[1], 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import logging
+import pickle
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from tracker.datasets import AIR_TEMP, LAP_TIMES, STINTS
+from tracker.pools import render_pool
+from tracker.render import CHARTS, Chart, Renderer, Snapshot
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+class BrokenPool(ThreadPoolExecutor):
+    """Pool whose worker died: every render fails as a broken process pool does."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        return future
+
+
+class Render(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.race = Race(Config(log, self.dir.name))
+        self.drawn = []
+        self.renderer = Renderer(log, (
+            Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: self.drawn.append("laptime")),
+            Chart("tyres", frozenset({STINTS}), lambda race, order: self.drawn.append("tyres")),
+            Chart("air_temp", frozenset({AIR_TEMP}), lambda race, order: self.drawn.append("air_temp")),
+        ))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_render_nothing_changed(self):
+        self.assertEqual([], self.renderer.render(self.race))
+        self.assertEqual({"laptime": 0, "tyres": 0, "air_temp": 0}, self.renderer.get_skipped())
+
+    def test_render_only_weather(self):
+        self.race.handle(str(['WeatherData', {'AirTemp': '25.1'}, '2025-12-07T13:01:00.000Z']))
+        self.assertEqual(["air_temp"], self.renderer.render(self.race))
+        self.assertEqual({"laptime": 1, "tyres": 1, "air_temp": 0}, self.renderer.get_skipped())
+        self.assertEqual([], self.renderer.render(self.race))
+
+    def test_render_new_lap(self):
+        self.race.handle(str(['TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': 1}}},
+                              '2025-12-07T13:01:00.000Z']))
+        self.assertEqual(["laptime"], self.renderer.render(self.race))
+        self.assertEqual({"laptime": 1, "tyres": 0, "air_temp": 0}, self.renderer.get_rendered())
+
+    def test_render_pool_replaces_waiting_request(self):
+        started = threading.Event()
+        release = threading.Event()
+        drawn = []
+
+        def draw(race, order):
+            drawn.append(race.get_lap_store().get_max_lap_number())
+            started.set()
+            release.wait(5)
+
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), draw),), workers=1,
+                            pool=ThreadPoolExecutor)
+        for lap in range(1, 4):
+            self.race.handle(str(['TimingData', {'Lines': {'1': {
+                'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': lap}}}, '2025-12-07T13:01:00.000Z']))
+            renderer.render(self.race)
+            started.wait(5)
+        self.assertEqual(1, renderer.get_queue_depth())
+        self.assertEqual({"laptime": 1}, renderer.get_replaced())
+        release.set()
+        renderer.close()
+        # lap 2 was replaced by lap 3 before a worker picked it up
+        self.assertEqual([1, 3], drawn)
+        self.assertEqual({"laptime": 2}, renderer.get_rendered())
+        self.assertEqual(0, renderer.get_queue_depth())
+        self.assertEqual(1, renderer.get_peak_queue_depth())
+
+    def test_render_pool_breaks(self):
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: None),), workers=1,
+                            pool=BrokenPool)
+        for lap in range(1, 3):
+            self.race.handle(str(['TimingData', {'Lines': {'1': {
+                'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': lap}}}, '2025-12-07T13:01:00.000Z']))
+            with self.assertLogs(log, logging.ERROR):
+                renderer.render(self.race)
+        self.assertTrue(renderer.is_broken())
+        self.assertEqual(0, renderer.get_queue_depth())
+        renderer.close(timeout=1)
+        self.assertEqual({"laptime": 0}, renderer.get_rendered())
+
+    def test_render_pool_without_workers_draws_in_a_thread(self):
+        release = threading.Event()
+        drawn = []
+
+        def draw(race, order):
+            release.wait(5)
+            drawn.append((threading.current_thread().name, race.get_lap_store().get_max_lap_number()))
+
+        pool = render_pool(0)
+        renderer = Renderer(log, (Chart("laptime", frozenset({LAP_TIMES}), draw),), workers=1, executor=pool)
+        try:
+            self.race.handle(str(['TimingData', {'Lines': {'1': {
+                'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': 1}}}, '2025-12-07T13:01:00.000Z']))
+            # returns while the chart is still being drawn
+            self.assertEqual(["laptime"], renderer.render(self.race))
+            self.race.handle(str(['TimingData', {'Lines': {'1': {
+                'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': 2}}}, '2025-12-07T13:01:30.000Z']))
+            release.set()
+            renderer.close()
+        finally:
+            pool.shutdown()
+        self.assertEqual(1, len(drawn))
+        self.assertTrue(drawn[0][0].startswith("render"))
+        self.assertEqual(1, drawn[0][1])
+
+    def test_close_gives_up_on_stuck_renders(self):
+        release = threading.Event()
+        renderer = Renderer(log, (
+            Chart("laptime", frozenset({LAP_TIMES}), lambda race, order: release.wait(5)),
+            Chart("tyres", frozenset({STINTS}), lambda race, order: None),
+        ), workers=1, pool=ThreadPoolExecutor)
+        self.race.mark_dirty(LAP_TIMES, STINTS)
+        renderer.render(self.race)
+        with self.assertLogs(log, logging.WARNING) as logs:
+            renderer.close(timeout=0.1)
+        self.assertIn("laptime", logs.output[0])
+        self.assertEqual(0, renderer.get_queue_depth())
+        release.set()
+        self.assertEqual({"laptime": 0, "tyres": 0}, renderer.get_rendered())
+
+    def test_degradation_table_follows_compound_changes(self):
+        degradation = next(chart for chart in CHARTS if chart.get_name() == "degradation")
+        self.race.handle(str(['TimingAppData', {'Lines': {'1': {'Stints': [
+            {'Compound': 'MEDIUM', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}]}}}, '2025-12-07T13:01:00.000Z']))
+        self.assertTrue(degradation.get_inputs() & self.race.pop_dirty())
+
+    def test_snapshot_is_a_copy(self):
+        self.race.handle(str(['TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:31.0'}, 'NumberOfLaps': 1}}},
+                              '2025-12-07T13:01:00.000Z']))
+        snapshot = pickle.loads(pickle.dumps(Snapshot(self.race)))
+        self.race.handle(str(['TimingData', {'Lines': {'1': {'LastLapTime': {'Value': '1:32.0'}, 'NumberOfLaps': 2}}},
+                              '2025-12-07T13:02:00.000Z']))
+        self.assertEqual(1, snapshot.get_lap_store().get_max_lap_number())
+        self.assertEqual(2, self.race.get_lap_store().get_max_lap_number())
+
+    def test_chart_pickles_by_name(self):
+        self.assertIs(CHARTS[0], pickle.loads(pickle.dumps(CHARTS[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()
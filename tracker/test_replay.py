@@ -0,0 +1,57 @@
+import datetime
+import unittest
+
+from tracker.replay import Replay, message_time
+
+
+def line(t: str) -> str:
+    return str(['WeatherData', {'AirTemp': '25.1'}, t])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+class ReplayTest(unittest.TestCase):
+    def test_message_time(self):
+        self.assertEqual(datetime.datetime(2025, 12, 7, 13, 0, 1, 500000, tzinfo=datetime.timezone.utc),
+                         message_time(line('2025-12-07T13:00:01.500Z')))
+        self.assertIsNone(message_time("['R', '{}', '']"))
+        self.assertIsNone(message_time("{}"))
+
+    def test_paced_by_timestamps(self):
+        clock = FakeClock()
+        delivered = []
+        lines = [line('2025-12-07T13:00:00Z'), line('2025-12-07T13:00:10Z'), "['R', '{}', '']",
+                 line('2025-12-07T13:00:05Z'), line('2025-12-07T13:00:30Z')]
+        stats = Replay(delivered.append, 10, clock=clock.clock, sleep=clock.sleep).run(lines)
+        self.assertEqual([line.strip() for line in lines], delivered)
+        # lines without a timestamp or going backwards go out with the previous line
+        self.assertEqual([1.0, 2.0], clock.sleeps)
+        self.assertEqual(5, stats.get_messages())
+        self.assertEqual(30.0, stats.get_feed_seconds())
+        self.assertEqual(10.0, stats.get_speed())
+
+    def test_max_speed_does_not_sleep(self):
+        clock = FakeClock()
+        idle = []
+        lines = [line(f'2025-12-07T13:00:{s:02d}Z') for s in range(5)]
+        stats = Replay(lambda _: None, None, lambda: idle.append(1), batch=2,
+                       clock=clock.clock, sleep=clock.sleep).run(lines)
+        self.assertEqual([], clock.sleeps)
+        # every 2 lines and at the end
+        self.assertEqual(3, len(idle))
+        self.assertEqual(5, stats.get_messages())
+
+
+if __name__ == '__main__':
+    unittest.main()
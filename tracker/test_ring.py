@@ -0,0 +1,65 @@
+import unittest
+
+import numpy
+
+from tracker.ring import RingBuffer, downsample_min_max
+
+
+def ms(values) -> numpy.ndarray:
+    return numpy.array(values, dtype='datetime64[ms]')
+
+
+class Ring(unittest.TestCase):
+    def test_wraps_and_keeps_newest(self):
+        ring = RingBuffer(4, ('a', 'b'))
+        ring.extend(ms([1, 2, 3]), numpy.array([[1, 10], [2, 20], [3, 30]], dtype=float))
+        ring.extend(ms([4, 5, 6]), numpy.array([[4, 40], [5, 50], [6, 60]], dtype=float))
+        self.assertEqual(4, len(ring))
+        self.assertEqual(2, ring.get_dropped())
+        numpy.testing.assert_array_equal(ms([3, 4, 5, 6]), ring.get_times())
+        numpy.testing.assert_array_equal([30, 40, 50, 60], ring.get_values('b'))
+        self.assertEqual(ms([6])[0], ring.get_latest_time())
+
+    def test_extend_larger_than_capacity(self):
+        ring = RingBuffer(3, ('a',))
+        ring.append(ms([0])[0], (0.0,))
+        ring.extend(ms(range(1, 11)), numpy.arange(1, 11, dtype=float).reshape(-1, 1))
+        numpy.testing.assert_array_equal([8, 9, 10], ring.get_values('a'))
+        self.assertEqual(8, ring.get_dropped())
+
+    def test_since(self):
+        ring = RingBuffer(8, ('a',))
+        self.assertIsNone(ring.get_latest_time())
+        ring.extend(ms(range(10)), numpy.arange(10, dtype=float).reshape(-1, 1))
+        times, values = ring.since(ms([7])[0])
+        numpy.testing.assert_array_equal(ms([7, 8, 9]), times)
+        numpy.testing.assert_array_equal([[7], [8], [9]], values)
+
+    def test_insert_keeps_order_and_capacity(self):
+        ring = RingBuffer(3, ('a',))
+        ring.extend(ms([10, 30, 40]), numpy.array([[1], [3], [4]], dtype=float))
+        ring.insert(ring.search(ms([20])[0]), ms([20])[0], (2.0,))
+        numpy.testing.assert_array_equal(ms([20, 30, 40]), ring.get_times())
+        numpy.testing.assert_array_equal([2, 3, 4], ring.get_values('a'))
+        self.assertEqual(1, ring.get_dropped())
+        ring.set_value(-1, 'a', 5.0)
+        self.assertEqual(5.0, ring.get_value(2, 'a'))
+
+    def test_downsample_keeps_extremes(self):
+        times = numpy.arange(10_000)
+        values = numpy.sin(times / 500.0)
+        values[1234] = 10.0
+        values[8765] = -10.0
+        values[5000] = numpy.nan
+        kept_times, kept_values = downsample_min_max(times, values, 200)
+        self.assertLessEqual(len(kept_values), 200)
+        self.assertIn(1234, kept_times)
+        self.assertIn(8765, kept_times)
+        self.assertFalse(numpy.isnan(kept_values).any())
+        self.assertTrue((numpy.diff(kept_times) > 0).all())
+        short = numpy.arange(5.0)
+        self.assertIs(short, downsample_min_max(times[:5], short, 200)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import logging
+import tempfile
+import unittest
+
+import numpy
+
+from tracker.replay import message_time
+from tracker.synthetic import PIT_ENTRY, PIT_EXIT, PIT_LOSS, SyntheticFeed
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+
+class Synthetic(unittest.TestCase):
+    def test_race_follows_feed(self):
+        with tempfile.TemporaryDirectory() as d:
+            race = Race(Config(log, d))
+            for line in SyntheticFeed(cars=4, laps=8).lines():
+                race.handle(line)
+            race.close()
+        laps = race.get_lap_store()
+        self.assertEqual([1, 4, 63, 81], sorted(laps.get_driver_numbers()))
+        for no in laps.get_driver_numbers():
+            self.assertEqual(8, laps.get_max_lap_number(no))
+            self.assertEqual(2, len(race.get_stint_store().get_stints(no)))
+        positions = sorted(laps.get_max_lap(no).get_position() for no in laps.get_driver_numbers())
+        self.assertEqual([1, 2, 3, 4], positions)
+        self.assertGreater(len(race.get_weather_store()), 5)
+
+    def test_pit_stops(self):
+        with tempfile.TemporaryDirectory() as d:
+            race = Race(Config(log, d))
+            for line in SyntheticFeed(cars=4, laps=12).lines():
+                race.handle(line)
+            race.close()
+        pits = race.get_pit_store()
+        for no in race.get_lap_store().get_driver_numbers():
+            [stop] = pits.get_stops(no)
+            self.assertEqual(PIT_ENTRY + PIT_EXIT, stop.get_pit_lane())
+            in_pit_lane = (stop.get_out_time() - stop.get_in_time()) / numpy.timedelta64(1, 's')
+            self.assertEqual(PIT_ENTRY + PIT_EXIT, in_pit_lane)
+            self.assertAlmostEqual(PIT_LOSS, stop.get_loss(), delta=1.5)
+            self.assertFalse(pits.is_in_pit(no))
+
+    def test_degradation(self):
+        with tempfile.TemporaryDirectory() as d:
+            race = Race(Config(log, d))
+            for line in SyntheticFeed(cars=4, laps=30).lines():
+                race.handle(line)
+            race.close()
+        degradation = race.get_degradation_store()
+        for no in race.get_lap_store().get_driver_numbers():
+            fits = [degradation.get_fit(no, stint) for stint in (0, 1)]
+            # every lap but the start, the in-lap and the out-lap
+            self.assertEqual(27, sum(fit.get_laps() for fit in fits))
+            for fit in fits:
+                # the feed loses 0.04 s per lap of tyre age
+                self.assertAlmostEqual(0.04, fit.get_slope(), delta=0.03)
+                self.assertAlmostEqual(90.0, fit.get_intercept(), delta=0.5)
+            crossover = degradation.get_crossover_lap(no, race.get_pit_store().get_expected_loss(no))
+            self.assertGreater(crossover, 30)
+
+    def test_lines_are_in_timestamp_order(self):
+        times = [message_time(line) for line in SyntheticFeed(cars=3, laps=4, burst_every=60, burst_size=10).lines()]
+        self.assertEqual(sorted(times), times)
+
+    def test_rate_and_seed(self):
+        lines = list(SyntheticFeed(cars=2, laps=3, rate=20).lines())
+        seconds = (message_time(lines[-1]) - message_time(lines[0])).total_seconds()
+        self.assertAlmostEqual(20, len(lines) / seconds, delta=1)
+        self.assertEqual(lines, list(SyntheticFeed(cars=2, laps=3, rate=20).lines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import logging
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from tracker.tail import TailReader
+
+log = logging.getLogger(__name__)
+
+
+class Tail(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'source.txt'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def append(self, text: str):
+        with self.path.open('a', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_read_lines_missing_file(self):
+        reader = TailReader(self.path, log)
+        self.assertEqual([], reader.read_lines())
+        self.assertEqual(0, reader.get_offset())
+
+    def test_read_lines_only_new(self):
+        reader = TailReader(self.path, log)
+        self.append("a\nb\n")
+        self.assertEqual(['a', 'b'], reader.read_lines())
+        self.assertEqual([], reader.read_lines())
+        self.append("c\n")
+        self.assertEqual(['c'], reader.read_lines())
+        self.assertEqual(6, reader.get_offset())
+
+    def test_read_lines_partial_line(self):
+        reader = TailReader(self.path, log)
+        self.append("a\nb")
+        self.assertEqual(['a'], reader.read_lines())
+        self.assertEqual([], reader.read_lines())
+        self.append("c\n")
+        self.assertEqual(['bc'], reader.read_lines())
+
+    def test_read_lines_truncated(self):
+        reader = TailReader(self.path, log)
+        self.append("abc\ndef\n")
+        reader.read_lines()
+        with self.path.open('w', encoding='utf-8') as f:
+            f.write("x\n")
+        self.assertEqual(['x'], reader.read_lines())
+
+    def test_read_lines_rotated(self):
+        reader = TailReader(self.path, log)
+        self.append("a\n")
+        reader.read_lines()
+        rotated = Path(self.dir.name) / 'new.txt'
+        with rotated.open('w', encoding='utf-8') as f:
+            f.write("b\nc\n")
+        os.replace(rotated, self.path)
+        self.assertEqual(['b', 'c'], reader.read_lines())
+
+
+if __name__ == '__main__':
+    unittest.main()
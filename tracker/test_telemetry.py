@@ -0,0 +1,69 @@
+import logging
+import tempfile
+import unittest
+
+import numpy
+
+from tracker.datasets import CAR_DATA, TRACK_POSITIONS
+from tracker.pipeline import decode_lines
+from tracker.synthetic import deflate, telemetry_lines
+from tracker.telemetry import TelemetryStore, expand, inflate, parse_times
+from tracker.tracking import Config, Race
+
+log = logging.getLogger(__name__)
+
+CAR_DATA_MESSAGE = {'Entries': [
+    {'Utc': '2025-12-07T13:00:00.1234567Z', 'Cars': {'1': {'Channels': {'0': 11000, '2': 301, '3': 7, '4': 100,
+                                                                        '5': 0, '45': 12}},
+                                                   '4': {'Channels': {'0': 10500, '2': 290}}}},
+    {'Utc': '2025-12-07T13:00:00.3734567Z', 'Cars': {'1': {'Channels': {'0': 11100, '2': 305, '3': 7, '4': 100,
+                                                                        '5': 0, '45': 12}}}},
+]}
+
+
+class Telemetry(unittest.TestCase):
+    def test_inflate(self):
+        self.assertEqual(CAR_DATA_MESSAGE, inflate(deflate(CAR_DATA_MESSAGE)))
+        with self.assertRaises(ValueError):
+            inflate('not base64!')
+        msg = expand(['CarData.z', deflate(CAR_DATA_MESSAGE), '2025-12-07T13:00:01Z'])
+        self.assertEqual(['CarData', CAR_DATA_MESSAGE, '2025-12-07T13:00:01Z'], msg)
+        self.assertEqual(['WeatherData', {}, 't'], expand(['WeatherData', {}, 't']))
+
+    def test_parse_times(self):
+        numpy.testing.assert_array_equal(
+            numpy.array(['2025-12-07T13:00:00.123', '2025-12-07T13:00:00'], dtype='datetime64[ms]'),
+            parse_times(['2025-12-07T13:00:00.1234567Z', '2025-12-07T13:00:00Z']))
+
+    def test_store_per_driver(self):
+        store = TelemetryStore()
+        self.assertEqual(3, store.add_car_data(CAR_DATA_MESSAGE))
+        self.assertEqual([1, 4], store.get_driver_numbers())
+        numpy.testing.assert_array_equal([301, 305], store.get_car_data(1).get_values('speed'))
+        self.assertTrue(numpy.isnan(store.get_car_data(4).get_values('gear')[0]))
+        store.add_positions({'Position': [{'Timestamp': '2025-12-07T13:00:00.5Z', 'Entries': {
+            '1': {'Status': 'OnTrack', 'X': 100, 'Y': -200, 'Z': 5}, '4': {'Status': 'OffTrack', 'X': 0}}}]})
+        numpy.testing.assert_array_equal([-200], store.get_positions(1).get_values('y'))
+        numpy.testing.assert_array_equal([0], store.get_positions(4).get_values('on_track'))
+
+    def test_store_is_bounded(self):
+        store = TelemetryStore(window=10, rate=4)
+        with tempfile.TemporaryDirectory() as d:
+            race = Race(Config(log, d), store)
+            for line in telemetry_lines(cars=2, seconds=60):
+                race.handle(line)
+            self.assertEqual({CAR_DATA, TRACK_POSITIONS}, race.pop_dirty())
+            race.close()
+        ring = store.get_car_data(1)
+        self.assertEqual(80, len(ring))
+        self.assertEqual(60 * 4 - 80, ring.get_dropped())
+        self.assertEqual(numpy.datetime64('2025-12-07T13:03:59.750'), ring.get_latest_time())
+
+    def test_pipeline_inflates_on_the_decoder(self):
+        messages = decode_lines(list(telemetry_lines(cars=1, seconds=1)), log)
+        self.assertEqual(['CarData', 'Position'], [msg[0] for msg in messages])
+        self.assertEqual(4, len(messages[0][1]['Entries']))
+
+
+if __name__ == '__main__':
+    unittest.main()
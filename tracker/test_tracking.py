@@ -0,0 +1,273 @@
+import asyncio
+import datetime
+import logging
+import math
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy
+
+from tracker.datasets import DEGRADATION, GAPS_TO_AHEAD, GAPS_TO_TOP, PIT_STOPS
+from tracker.domain.degradation import DegradationStore
+from tracker.domain.lap import LapStore
+from tracker.domain.pit import PitStore
+from tracker.domain.weather import WeatherStore
+from tracker.synthetic import SyntheticFeed
+from tracker.tracking import Config, Feed, Race, feed_configs, follow_feeds, str_to_seconds
+
+log = logging.getLogger(__name__)
+
+
+def timing(lines: dict, t: str = '2025-12-07T13:00:00.000Z') -> str:
+    return str(['TimingData', {'Lines': lines}, t])
+
+
+def completed(lap: int, lap_time: str, t: str) -> str:
+    return timing({'1': {'LastLapTime': {'Value': lap_time}, 'NumberOfLaps': lap}}, t)
+
+
+def stint(stints, t: str = '2025-12-07T13:00:00.000Z') -> str:
+    return str(['TimingAppData', {'Lines': {'1': {'Stints': stints}}}, t])
+
+
+def track_status(status: str, t: str = '2025-12-07T13:00:00.000Z') -> str:
+    return str(['TrackStatus', {'Status': status, 'Message': ''}, t])
+
+
+class Tracking(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.race = Race(Config(log, self.dir.name))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_str_to_seconds(self):
+        self.assertEqual(0, str_to_seconds(""))
+        self.assertEqual(1.5, str_to_seconds("1.5"))
+        self.assertAlmostEqual(91.234, str_to_seconds("1:31.234"))
+        self.assertEqual(3723.5, str_to_seconds("1:02:03.5"))
+
+    def test_handle_timing_data(self):
+        self.race.handle(timing({'1': {'Position': '2', 'GapToLeader': '+1.5'}}))
+        self.race.handle(timing({'1': {'LastLapTime': {'Value': '1:31.000'}, 'NumberOfLaps': 1}}))
+        self.race.handle(timing({'1': {'Position': '1', 'GapToLeader': 'LAP 2'}}))
+        laps = self.race.get_lap_store()
+        self.assertEqual([1], laps.get_driver_numbers())
+        self.assertEqual(1, laps.get_max_lap_number(1))
+        self.assertEqual(1.5, laps.get_lap(1, 0).get_gap_to_top())
+        self.assertEqual(2, laps.get_lap(1, 0).get_position())
+        self.assertEqual(91.0, self.race.get_max_lap(1).get_time())
+        self.assertEqual(1, self.race.get_max_lap(1).get_position())
+        self.assertEqual(0, self.race.get_max_lap(1).get_gap_to_top())
+        self.assertTrue(math.isnan(laps.get_times(1)[0]))
+
+    def test_handle_interval_to_position_ahead(self):
+        self.race.handle(timing({'4': {'Position': '2', 'GapToLeader': '+1.5',
+                                       'IntervalToPositionAhead': {'Value': '+0.8'}}}))
+        self.race.pop_dirty()
+        self.race.handle(timing({'4': {'IntervalToPositionAhead': {'Value': '+1.2'}}}))
+        self.assertEqual({GAPS_TO_AHEAD}, self.race.pop_dirty() & {GAPS_TO_AHEAD, GAPS_TO_TOP})
+        lap = self.race.get_max_lap(4)
+        self.assertEqual(1.2, lap.get_gap_to_ahead())
+        self.assertEqual(1.5, lap.get_gap_to_top())
+        self.race.handle(timing({'4': {'IntervalToPositionAhead': {'Value': '1L'}}}))
+        self.assertEqual(1.2, self.race.get_max_lap(4).get_gap_to_ahead())
+
+    def test_handle_timing_app_data(self):
+        self.race.handle(str(['TimingAppData', {'Lines': {'44': {'Stints': [
+            {'Compound': 'MEDIUM', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}]}}}, '2025-12-07T13:00:00Z']))
+        self.race.handle(str(['TimingAppData', {'Lines': {'44': {'Stints': {
+            '0': {'TotalLaps': 12, 'LapTime': '1:30.000', 'LapNumber': 12}}}}}, '2025-12-07T13:20:00Z']))
+        stints = self.race.get_stint_store().get_stints(44)
+        self.assertEqual(1, len(stints))
+        self.assertEqual('MEDIUM', stints[0].get_compound())
+        self.assertTrue(stints[0].get_is_new())
+        self.assertEqual(12, stints[0].get_total_laps())
+        self.assertEqual(90.0, self.race.get_lap_store().get_lap(44, 12).get_time())
+
+    def test_handle_weather(self):
+        self.race.handle(str(['WeatherData', {'AirTemp': '25.1', 'Rainfall': '0'}, '2025-12-07T13:01:00.000Z']))
+        self.race.handle(str(['WeatherData', {'AirTemp': '24.9'}, '2025-12-07T13:00:00.000Z']))
+        weather = self.race.get_weather_store()
+        self.assertEqual(2, len(weather))
+        self.assertEqual([24.9, 25.1], list(weather.get_values('air_temp')))
+        self.assertLess(weather.get_times()[0], weather.get_times()[1])
+
+    def test_pit_stop_loss(self):
+        for lap in range(1, 7):
+            # lap 3 is behind a safety car and left out of the baseline
+            self.race.handle(completed(lap, '1:50.000' if lap == 3 else f'1:30.{lap}00', '2025-12-07T13:10:00.000Z'))
+        self.race.handle(timing({'1': {'InPit': True}}, '2025-12-07T13:11:20.000Z'))
+        self.race.handle(timing({'1': {'InPit': True}}, '2025-12-07T13:11:21.000Z'))
+        self.race.handle(completed(7, '1:50.000', '2025-12-07T13:11:30.000Z'))
+        self.race.handle(timing({'1': {'InPit': False, 'PitOut': True}}, '2025-12-07T13:11:42.500Z'))
+        self.race.handle(str(['PitLaneTimeCollection', {'PitTimes': {'1': {
+            'RacingNumber': '1', 'Duration': '22.5', 'Lap': '7'}}}, '2025-12-07T13:11:43.000Z']))
+        self.assertIn(PIT_STOPS, self.race.pop_dirty())
+        pits = self.race.get_pit_store()
+        [stop] = pits.get_stops(1)
+        self.assertEqual(7, stop.get_in_lap())
+        self.assertEqual(numpy.datetime64('2025-12-07T13:11:20.000'), stop.get_in_time())
+        self.assertEqual(numpy.datetime64('2025-12-07T13:11:42.500'), stop.get_out_time())
+        self.assertEqual(22.5, stop.get_pit_lane())
+        baseline = (90.1 + 90.2 + 90.4 + 90.5 + 90.6) / 5
+        self.assertAlmostEqual(baseline, stop.get_baseline())
+        self.assertTrue(math.isnan(stop.get_loss()))
+
+        self.race.handle(completed(8, '1:32.000', '2025-12-07T13:13:02.000Z'))
+        self.assertAlmostEqual(110.0 + 92.0 - 2 * baseline, stop.get_loss())
+        self.race.handle(completed(9, '1:30.900', '2025-12-07T13:14:33.000Z'))
+        self.assertAlmostEqual((baseline * 5 - 90.1 + 90.9) / 5, pits.get_baseline(1))
+        self.assertFalse(pits.is_in_pit(1))
+
+    def test_degradation_fit(self):
+        self.race.handle(stint([{'Compound': 'MEDIUM', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}]))
+        for lap in range(1, 9):
+            if lap == 4:
+                self.race.handle(track_status('4'))
+            if lap == 5:
+                # the lap the safety car goes in on is still left out
+                self.race.handle(track_status('1'))
+            lap_time = 93.0 if lap in (4, 5) else 90.0 + 0.1 * lap
+            self.race.handle(completed(lap, f"1:{lap_time - 60:06.3f}", '2025-12-07T13:10:00.000Z'))
+        self.assertIn(DEGRADATION, self.race.pop_dirty())
+        degradation = self.race.get_degradation_store()
+        fit = degradation.get_current_fit(1)
+        # lap 1 is the start, laps 4 and 5 were touched by the safety car
+        self.assertEqual(5, fit.get_laps())
+        self.assertAlmostEqual(0.1, fit.get_slope())
+        self.assertAlmostEqual(90.0, fit.get_intercept())
+        self.assertAlmostEqual(90.8, fit.get_lap_time(8))
+        # a repeated lap is counted once
+        self.race.handle(completed(8, '1:30.800', '2025-12-07T13:10:00.000Z'))
+        self.assertEqual(5, fit.get_laps())
+        self.assertNotIn(DEGRADATION, self.race.pop_dirty())
+
+        self.race.handle(timing({'1': {'InPit': True}}, '2025-12-07T13:11:20.000Z'))
+        self.race.handle(completed(9, '1:50.000', '2025-12-07T13:11:30.000Z'))
+        # the in-lap is left out of the fit but ages the tyres, which the table shows
+        self.assertEqual(5, fit.get_laps())
+        self.assertIn(DEGRADATION, self.race.pop_dirty())
+        self.race.handle(stint({'1': {'Compound': 'HARD', 'New': 'true', 'TotalLaps': 0, 'StartLaps': 0}}))
+        self.race.handle(timing({'1': {'InPit': False, 'PitOut': True}}, '2025-12-07T13:11:42.500Z'))
+        self.race.handle(completed(10, '1:35.000', '2025-12-07T13:13:02.000Z'))
+        for lap in range(11, 14):
+            lap_time = 89.5 + 0.05 * (lap - 9)
+            self.race.handle(completed(lap, f"1:{lap_time - 60:06.3f}", '2025-12-07T13:20:00.000Z'))
+        self.assertEqual(5, degradation.get_fit(1, 0).get_laps())
+        fit = degradation.get_current_fit(1)
+        self.assertEqual(1, fit.get_stint_number())
+        # the out-lap ages the tyres but is left out of the fit
+        self.assertEqual(3, fit.get_laps())
+        self.assertEqual(4, degradation.get_age(1))
+        self.assertAlmostEqual(0.05, fit.get_slope())
+        self.assertAlmostEqual(89.5, fit.get_intercept())
+        # 0.05 * a * (a + 1) / 2 reaches 20 s at tyre age 28
+        self.assertEqual(28, fit.get_crossover_age(20.0))
+        self.assertEqual(13 + 28 - 4, degradation.get_crossover_lap(1, 20.0))
+        pits = self.race.get_pit_store()
+        self.assertEqual(pits.get_latest_stop(1).get_loss(), pits.get_expected_loss(1))
+        # a driver without a stop of its own is expected to lose what the field does
+        self.assertEqual(pits.get_latest_stop(1).get_loss(), pits.get_expected_loss(4))
+
+    def test_degradation_store_grows(self):
+        degradation = DegradationStore(drivers=1, stints=1)
+        for stint_number in range(3):
+            for lap in range(2, 6):
+                degradation.add_lap(44, stint_number, 2, stint_number * 10 + lap, 90.0 + lap)
+        degradation.add_lap(16, 0, 0, 2, 91.0)
+        self.assertEqual(4, degradation.get_fit(44, 2).get_laps())
+        self.assertAlmostEqual(1.0, degradation.get_fit(44, 1).get_slope())
+        self.assertEqual(6, degradation.get_age(44))
+        self.assertEqual(1, degradation.get_fit(16, 0).get_laps())
+        self.assertTrue(math.isnan(degradation.get_fit(16, 0).get_slope()))
+        self.assertTrue(math.isnan(degradation.get_crossover_lap(16, 20.0)))
+        self.assertIsNone(degradation.get_current_fit(63))
+
+    def test_pit_store_grows(self):
+        pits = PitStore(drivers=1, stops=1)
+        for stop in range(3):
+            for no in (1, 4):
+                pits.enter(no, stop * 10, None)
+                pits.leave(no, None)
+        self.assertEqual([0, 10, 20], [stop.get_in_lap() for stop in pits.get_stops(4)])
+        self.assertEqual(3, len(pits.get_stops(1)))
+        # a pit lane time for a stop entered before the tracker started
+        pits.set_pit_lane(16, 5, 21.0)
+        self.assertEqual(5, pits.get_latest_stop(16).get_in_lap())
+
+    def test_weather_store_is_bounded(self):
+        weather = WeatherStore(capacity=60)
+        start = datetime.datetime(2025, 12, 7, 13, 0, tzinfo=datetime.timezone.utc)
+        for minute in range(24 * 60):
+            weather.ensure(start + datetime.timedelta(minutes=minute)).set_air_temp(minute)
+        self.assertEqual(60, len(weather))
+        self.assertEqual(list(range(24 * 60 - 60, 24 * 60)), list(weather.get_values('air_temp')))
+        # a sample older than everything kept is dropped
+        weather.ensure(start).set_air_temp(-1)
+        self.assertEqual(60, len(weather))
+        self.assertNotIn(-1, weather.get_values('air_temp'))
+
+    def test_lap_store_grows(self):
+        laps = LapStore(drivers=1, laps=2)
+        laps.add_lap(1, 0).set_position(3)
+        laps.add_lap(16, 70, 90.0)
+        self.assertEqual(3, laps.get_max_lap(1).get_position())
+        self.assertEqual(90.0, laps.get_max_lap(16).get_time())
+        self.assertEqual(71, len(laps.get_times(16)))
+        self.assertFalse(laps.has_lap(16, 69))
+        self.assertEqual(70, laps.get_max_lap_number())
+
+
+class Feeds(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.results = Path(self.dir.name) / 'results'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_source(self, name: str, feed: SyntheticFeed) -> str:
+        path = Path(self.dir.name) / name
+        path.write_text(''.join(line + '\n' for line in feed.lines()), encoding='utf-8')
+        return str(path)
+
+    def test_feed_configs(self):
+        self.assertEqual('a.txt', feed_configs({'FileName': 'a.txt'})[0]['FileName'])
+        feeds = [{'Name': 'sprint', 'FileName': 's.txt'}, {'Name': 'race', 'FileName': 'r.txt'}]
+        self.assertEqual(feeds, feed_configs({'FileName': 'a.txt', 'Tracker': {'Feeds': feeds}}))
+        with self.assertRaises(ValueError):
+            feed_configs({'Tracker': {'Feeds': [{'Name': 'race', 'FileName': 's.txt'},
+                                                {'Name': 'race', 'FileName': 'r.txt'}]}})
+
+    def test_feeds_share_one_process(self):
+        sprint = self.write_source('sprint.txt', SyntheticFeed(cars=3, laps=4))
+        race = self.write_source('race.txt', SyntheticFeed(cars=5, laps=12, rate=50))
+        tracker_config = {'RenderImages': False, 'CheckpointInterval': 0, 'RenderWorkers': 1}
+        with ThreadPoolExecutor(1) as pool:
+            feeds = [Feed({'Name': 'sprint', 'FileName': sprint}, self.results, tracker_config, log, pool, None),
+                     Feed({'Name': 'race', 'FileName': race}, self.results, tracker_config, log, pool, None)]
+            try:
+                for feed in feeds:
+                    feed.stop()
+                asyncio.run(follow_feeds(feeds))
+            finally:
+                for feed in feeds:
+                    feed.close()
+        sprint_laps, race_laps = (feed.get_race().get_lap_store() for feed in feeds)
+        self.assertEqual(3, len(sprint_laps.get_driver_numbers()))
+        self.assertEqual(4, sprint_laps.get_max_lap_number())
+        self.assertEqual(5, len(race_laps.get_driver_numbers()))
+        self.assertEqual(12, race_laps.get_max_lap_number())
+        for name in ('sprint', 'race'):
+            self.assertTrue((self.results / name / 'checkpoint.pkl').exists())
+            self.assertTrue((self.results / name / 'logs' / 'timestamp.txt').exists())
+            self.assertEqual(str(self.results / name / 'images'), feeds[0 if name == 'sprint' else 1]
+                             .get_race().get_images_path())
+
+
+if __name__ == '__main__':
+    unittest.main()
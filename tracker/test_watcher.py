@@ -0,0 +1,64 @@
+import logging
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from tracker.watcher import FileWatcher
+
+log = logging.getLogger(__name__)
+
+
+class Watcher(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'source.txt'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def append_later(self, delay: float):
+        def append():
+            time.sleep(delay)
+            with self.path.open('a', encoding='utf-8') as f:
+                f.write("line\n")
+
+        thread = threading.Thread(target=append)
+        thread.start()
+        return thread
+
+    def test_wait_timeout(self):
+        watcher = FileWatcher(self.path, log, poll_interval=0.05)
+        self.assertFalse(watcher.wait(timeout=0.1))
+        watcher.close()
+
+    def test_wait_wakes_on_append(self):
+        watcher = FileWatcher(self.path, log, max_rate=100)
+        thread = self.append_later(0.05)
+        started = time.monotonic()
+        self.assertTrue(watcher.wait(timeout=5))
+        self.assertLess(time.monotonic() - started, 2)
+        thread.join()
+        watcher.close()
+
+    def test_wait_wakes_on_append_polling(self):
+        watcher = FileWatcher(self.path, log, max_rate=100, poll_interval=0.05, use_inotify=False)
+        self.assertTrue(watcher.is_polling())
+        thread = self.append_later(0.05)
+        self.assertTrue(watcher.wait(timeout=5))
+        thread.join()
+
+    def test_wait_debounces(self):
+        watcher = FileWatcher(self.path, log, max_rate=5)
+        self.append_later(0).join()
+        self.assertTrue(watcher.wait(timeout=5))
+        started = time.monotonic()
+        self.append_later(0).join()
+        self.assertTrue(watcher.wait(timeout=5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+        watcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,38 @@
+import asyncio
 import datetime
 import json
 import logging
 import os
 import time
+from concurrent.futures import Executor
 from pathlib import Path
+from typing import Final
 
 import setup
 import util
-from tracker import plotter
-from tracker.domain.lap import Lap
-from tracker.domain.stint import Stint
-from tracker.domain.weather import Weather
+from tracker import archive, backfill, checkpoint, decoder, metrics, telemetry
+from tracker.coalesce import TimingCoalescer
+from tracker.datasets import (ALL, AIR_TEMP, CAR_DATA, DEGRADATION, GAPS_TO_AHEAD, GAPS_TO_TOP, LAPS, PIT_STOPS,
+                              POSITIONS, RAIN_FALL, STINTS, TRACK_POSITIONS, TRACK_TEMP, WIND_SPEED)
+from tracker.dashboard import Dashboard
+from tracker.domain.degradation import DegradationStore
+from tracker.domain.lap import Lap, LapStore
+from tracker.domain.pit import PitStore
+from tracker.domain.stint import Stint, StintStore
+from tracker.domain.weather import WeatherStore
+from tracker.metrics import TrackerMetrics
+from tracker.pipeline import Pipeline
+from tracker.pools import render_pool
+from tracker.render import CHARTS, Renderer
+from tracker.telemetry import TelemetryStore
+from tracker.watcher import FileWatcher
+
+RACE_CONTROL_LOG: Final = "race_control.txt"
+TRACK_STATUS_LOG: Final = "track_status.txt"
+# every log Race appends to, so that a checkpoint can cut them back to a consistent size
+LOG_FILES: Final = (RACE_CONTROL_LOG, TRACK_STATUS_LOG)
+# TrackStatus codes of a safety car, a virtual safety car and a virtual safety car ending
+NEUTRALISED_STATUSES: Final = frozenset({'4', '6', '7'})
 
 
 class Config:
@@ -19,17 +41,20 @@ class Config:
     Attributes:
         __log: Logger instance for logging messages.
         __logs_path: Path to the directory where logs will be written.
+        __images_path: Path to the directory where plots will be written, None for the plotter's default.
     """
 
-    def __init__(self, log: logging.Logger, logs_path: str):
+    def __init__(self, log: logging.Logger, logs_path: str, images_path: str | None = None):
         """Initialize Config with logger and logs path.
 
         Args:
             log: Logger instance for logging messages.
             logs_path: Path to the directory where logs will be written.
+            images_path: Path to the directory where plots will be written, None for the plotter's default.
         """
         self.__log = log
         self.__logs_path = logs_path
+        self.__images_path = images_path
 
     def get_log(self):
         """Get the logger instance.
@@ -47,54 +72,149 @@ class Config:
         """
         return self.__logs_path
 
+    def get_images_path(self) -> str | None:
+        """Get the plots directory path.
+
+        Returns:
+            The path to the directory where plots are written, None for the plotter's default.
+        """
+        return self.__images_path
+
 
 class Race:
     """Main handler for race timing, stint, and weather data.
 
-    Maintains maps of lap times, stints, and weather information keyed by driver number
-    and timestamp. Processes incoming race data from live feed and updates internal state.
+    Maintains columnar stores of lap times, stints, and weather information keyed by driver
+    number and timestamp. Processes incoming race data from live feed and updates internal state.
 
     Attributes:
-        __laptime_map: Map of driver number -> lap number -> Lap object.
-        __stints_map: Map of driver number -> stint number -> Stint object.
-        __weather_map: Map of timestamp -> Weather object.
+        __lap_store: Drivers x laps arrays of lap time, position and gaps.
+        __stint_store: Drivers x stints arrays of compound and tyre age.
+        __weather_store: Time-ordered arrays of weather samples.
+        __pit_store: Drivers x stops arrays of pit stops and their time loss.
+        __degradation_store: Drivers x stints least-squares fits of lap time against tyre age.
+        __telemetry_store: Per-driver ring buffers of car data and track positions.
+        __coalescer: Merges bursts of TimingData per driver before they are handled, None to handle
+            every message as it comes.
+        __log_files: Map of log file name -> append-only log opened in the logs path.
+        __dirty: Datasets changed since the last call to pop_dirty.
+        __feed_time: Feed time of the latest TimingData message, None before the first one.
         __config: Configuration object for logging and output paths.
     """
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, telemetry_store: TelemetryStore | None = None,
+                 coalesce_window: float = 0.0):
         """Initialize Race tracker with configuration.
 
         Args:
             config: Configuration object containing logger and paths.
+            telemetry_store: Telemetry store to fill, None for one keeping the last 10 minutes.
+            coalesce_window: Seconds of feed time to merge each driver's TimingData over, 0 to
+                handle every message as it comes. Merged updates wait for apply_pending().
         """
-        self.__laptime_map: dict[int, dict[int, Lap]] = {}
-        self.__stints_map: dict[int, dict[int, Stint]] = {}
-        self.__weather_map: dict[datetime.datetime, Weather] = {}
+        self.__lap_store = LapStore()
+        self.__stint_store = StintStore()
+        self.__weather_store = WeatherStore()
+        self.__pit_store = PitStore()
+        self.__degradation_store = DegradationStore()
+        self.__telemetry_store = telemetry_store if telemetry_store is not None else TelemetryStore()
+        self.__coalescer = TimingCoalescer(coalesce_window) if coalesce_window > 0 else None
+        self.__log_files: dict[str, util.AppendLog] = {}
+        self.__dirty: set[str] = set()
+        self.__feed_time: datetime.datetime | None = None
         self.__config = config
 
-    def get_laptime_map(self):
-        """Get the lap times map.
+    def get_lap_store(self) -> LapStore:
+        """Get the lap store.
+
+        Returns:
+            Drivers x laps arrays of lap time, position and gaps.
+        """
+        return self.__lap_store
+
+    def get_stint_store(self) -> StintStore:
+        """Get the stint store.
+
+        Returns:
+            Drivers x stints arrays of compound and tyre age.
+        """
+        return self.__stint_store
+
+    def get_weather_store(self) -> WeatherStore:
+        """Get the weather store.
+
+        Returns:
+            Time-ordered arrays of weather samples.
+        """
+        return self.__weather_store
+
+    def get_pit_store(self) -> PitStore:
+        """Get the pit store.
 
         Returns:
-            Map of driver number -> lap number -> Lap object.
+            Drivers x stops arrays of pit stops and their time loss.
         """
-        return self.__laptime_map
+        return self.__pit_store
 
-    def get_stints_map(self):
-        """Get the stints map.
+    def get_degradation_store(self) -> DegradationStore:
+        """Get the degradation store.
 
         Returns:
-            Map of driver number -> stint number -> Stint object.
+            Drivers x stints least-squares fits of lap time against tyre age.
         """
-        return self.__stints_map
+        return self.__degradation_store
 
-    def get_weather_map(self):
-        """Get the weather data map.
+    def get_telemetry_store(self) -> TelemetryStore:
+        """Get the telemetry store.
 
         Returns:
-            Map of timestamp -> Weather object.
+            Per-driver ring buffers of car data and track positions.
         """
-        return self.__weather_map
+        return self.__telemetry_store
+
+    def get_coalescer(self) -> TimingCoalescer | None:
+        """Get the TimingData coalescer.
+
+        Returns:
+            TimingCoalescer: The coalescer, None if TimingData is handled as it comes.
+        """
+        return self.__coalescer
+
+    def apply_pending(self):
+        """Handle the TimingData updates the coalescer still holds back.
+
+        Called after each batch of messages, so that the state seen by renders and checkpoints
+        includes every message read so far.
+        """
+        if self.__coalescer is not None:
+            for data in self.__coalescer.flush():
+                self.handle_timing_data(data)
+
+    def restore(self, lap_store: LapStore, stint_store: StintStore, weather_store: WeatherStore,
+                pit_store: PitStore, degradation_store: DegradationStore):
+        """Replace the stores with ones restored from a checkpoint and mark every dataset changed.
+
+        Args:
+            lap_store: Restored lap store.
+            stint_store: Restored stint store.
+            weather_store: Restored weather store.
+            pit_store: Restored pit store.
+            degradation_store: Restored degradation store.
+        """
+        self.__lap_store = lap_store
+        self.__stint_store = stint_store
+        self.__weather_store = weather_store
+        self.__pit_store = pit_store
+        self.__degradation_store = degradation_store
+        self.mark_dirty(*ALL)
+
+    def get_images_path(self) -> str | None:
+        """Get the directory the plots of this race are written to.
+
+        Returns:
+            The path, None for the plotter's default.
+        """
+        return self.__config.get_images_path()
 
     def get_config(self):
         """Get the configuration object.
@@ -104,103 +224,194 @@ class Race:
         """
         return self.__config
 
-    def get_max_lap(self, driver_number: int) -> Lap:
-        """Get the most recent lap for a driver.
+    def mark_dirty(self, *datasets: str):
+        """Record that datasets changed and the charts drawing them need re-rendering.
 
         Args:
-            driver_number: The driver's car number.
+            datasets: Dataset names such as LAP_TIMES or STINTS.
+        """
+        self.__dirty.update(datasets)
+
+    def pop_dirty(self) -> set[str]:
+        """Get and clear the datasets changed since the previous call.
+
+        Returns:
+            The changed dataset names.
+        """
+        dirty, self.__dirty = self.__dirty, set()
+        return dirty
+
+    def get_log_file(self, name: str) -> util.AppendLog:
+        """Get an append-only log in the logs path, opening it on first use.
+
+        Args:
+            name: File name inside the logs path.
 
         Returns:
-            The Lap object with the highest lap number for the driver.
+            The append-only log.
         """
-        driver_laps = self.__laptime_map[driver_number]
-        return driver_laps.get(max(driver_laps.keys()))
+        if name not in self.__log_files:
+            self.__log_files[name] = util.AppendLog(f"{self.get_config().get_logs_path()}/{name}")
+        return self.__log_files[name]
+
+    def flush_logs(self):
+        """Flush buffered log lines to disk."""
+        for log_file in self.__log_files.values():
+            log_file.flush()
+
+    def close(self):
+        """Close the log files."""
+        for log_file in self.__log_files.values():
+            log_file.close()
+        self.__log_files.clear()
 
-    def _ensure_driver_laps(self, driver_number: int) -> dict:
-        """Ensure driver exists in laptime map, creating if necessary.
+    def get_max_lap(self, driver_number: int) -> Lap:
+        """Get the most recent lap for a driver.
 
         Args:
             driver_number: The driver's car number.
 
         Returns:
-            The lap times dictionary for the driver.
+            The Lap view with the highest lap number for the driver.
         """
-        if driver_number not in self.__laptime_map:
-            self.__laptime_map[driver_number] = {}
-        return self.__laptime_map[driver_number]
+        return self.__lap_store.get_max_lap(driver_number)
 
-    def _ensure_driver_stints(self, driver_number: int) -> dict:
-        """Ensure driver exists in stints map, creating if necessary.
+    def _ensure_max_lap(self, driver_number: int) -> Lap:
+        """Get the most recent lap for a driver, creating lap 0 if the driver has none.
 
         Args:
             driver_number: The driver's car number.
 
         Returns:
-            The stints dictionary for the driver.
+            The Lap view with the highest lap number for the driver.
         """
-        if driver_number not in self.__stints_map:
-            self.__stints_map[driver_number] = {}
-        return self.__stints_map[driver_number]
+        if not self.__lap_store.has_laps(driver_number):
+            self.mark_dirty(*LAPS)
+            return self.__lap_store.add_lap(driver_number, 0)
+        return self.__lap_store.get_max_lap(driver_number)
 
-    def _ensure_weather(self, t: datetime.datetime) -> Weather:
-        """Ensure weather entry exists for timestamp, creating if necessary.
+    def _ensure_stint(self, driver_number: int, stint_number: int) -> Stint:
+        """Ensure a stint exists for a driver, creating it if necessary.
 
         Args:
-            t: The timestamp for the weather data.
+            driver_number: The driver's car number.
+            stint_number: The stint number.
 
         Returns:
-            The Weather object for the given timestamp.
+            The Stint view.
         """
-        if t not in self.__weather_map:
-            self.__weather_map[t] = Weather()
-        return self.__weather_map[t]
+        stint = self.__stint_store.get_stint(driver_number, stint_number)
+        if stint is None:
+            stint = self.__stint_store.add_stint(driver_number, stint_number)
+        return stint
 
     def handle_timing_data(self, data):
         """Process timing data: lap times, positions, and gaps.
 
         Args:
             data: Dictionary containing 'Lines' key with driver-keyed timing information.
-                 Fields processed: LastLapTime, Position, GapToLeader, IntervalToPositionAhead.
+                 Fields processed: LastLapTime, Position, GapToLeader, IntervalToPositionAhead,
+                 InPit and PitOut.
         """
         if not isinstance(data, dict):
             return
+        laps = self.__lap_store
+        pits = self.__pit_store
         for driver, v in data.get('Lines', {}).items():
             driver_number = int(driver)
-            driver_laps = self._ensure_driver_laps(driver_number)
+            laps.ensure_driver(driver_number)
+            # 最新ラップは一度だけ引く (ラップ追加後に引き直す)
+            lap = None
 
             # Last lap time
             if 'LastLapTime' in v and 'NumberOfLaps' in v:
                 lap_time: str = v["LastLapTime"]["Value"]
                 if lap_time:
-                    lap = Lap(str_to_seconds(lap_time))
-                    if len(driver_laps) > 0:
-                        lap.set_position(self.get_max_lap(driver_number).get_position())
-                    lap_number = v["NumberOfLaps"]
-                    driver_laps[lap_number] = lap
+                    seconds = str_to_seconds(lap_time)
+                    laps.add_lap(driver_number, v["NumberOfLaps"], seconds)
+                    self.mark_dirty(*LAPS)
+                    # in-laps, out-laps and laps completed in the pit lane are left out of the fit
+                    clean = True
+                    if pits.add_lap(driver_number, v["NumberOfLaps"], seconds) is not None:
+                        self.mark_dirty(PIT_STOPS)
+                        clean = False
+                    self._add_degradation_lap(driver_number, v["NumberOfLaps"], seconds,
+                                              clean and not pits.is_in_pit(driver_number))
+
+            # Pit lane entry and exit; a lap completed in the same update is the one before the entry
+            if v.get('InPit') is True:
+                in_lap = laps.get_max_lap_number(driver_number) + 1 if laps.has_laps(driver_number) else 1
+                if pits.enter(driver_number, in_lap, self.__feed_time) is not None:
+                    self.mark_dirty(PIT_STOPS)
+            elif v.get('InPit') is False or v.get('PitOut') is True:
+                if pits.leave(driver_number, self.__feed_time) is not None:
+                    self.mark_dirty(PIT_STOPS)
 
             # Position
             if 'Position' in v:
                 position = int(v["Position"])
-                if len(driver_laps) == 0:
-                    driver_laps[0] = Lap()
-                self.get_max_lap(driver_number).set_position(position)
+                lap = lap or self._ensure_max_lap(driver_number)
+                lap.set_position(position)
+                self.mark_dirty(POSITIONS)
 
             # Gap to leader
             if 'GapToLeader' in v:
                 gap = v["GapToLeader"]
                 if 'L' not in gap:
-                    if len(driver_laps) == 0:
-                        driver_laps[0] = Lap()
-                    self.get_max_lap(driver_number).set_gap_to_top(str_to_seconds(gap.replace("+", "")))
+                    lap = lap or self._ensure_max_lap(driver_number)
+                    lap.set_gap_to_top(str_to_seconds(gap.replace("+", "")))
+                    self.mark_dirty(GAPS_TO_TOP)
 
             # Interval to position ahead
             if 'IntervalToPositionAhead' in v:
                 iva = v["IntervalToPositionAhead"].get("Value") if isinstance(v["IntervalToPositionAhead"],
                                                                               dict) else None
                 if iva and 'L' not in iva:
-                    if len(driver_laps) == 0:
-                        driver_laps[0] = Lap()
-                    self.get_max_lap(driver_number).set_gap_to_top(str_to_seconds(iva.replace("+", "")))
+                    lap = lap or self._ensure_max_lap(driver_number)
+                    lap.set_gap_to_ahead(str_to_seconds(iva.replace("+", "")))
+                    self.mark_dirty(GAPS_TO_AHEAD)
+
+    def _add_degradation_lap(self, driver_number: int, lap_number: int, lap_time: float, clean: bool):
+        """Add a completed lap to the degradation fit of the stint the driver is on.
+
+        Args:
+            driver_number: The driver's car number.
+            lap_number: Number of the completed lap.
+            lap_time: Its time in seconds.
+            clean: False for an in-lap, an out-lap or a lap completed in the pit lane.
+        """
+        stint_number = self.__stint_store.get_max_stint_number(driver_number)
+        if stint_number < 0:
+            return
+        start_laps = self.__stint_store.get_stint(driver_number, stint_number).get_start_laps()
+        # tyre age and laps left change with every lap, also when the lap is left out of the fit
+        if self.__degradation_store.add_lap(driver_number, stint_number, start_laps, lap_number, lap_time, clean):
+            self.mark_dirty(DEGRADATION)
+
+    def handle_track_status_data(self, data):
+        """Process track status: whether a safety car or virtual safety car is out.
+
+        Args:
+            data: Dictionary containing 'Status' key with the track status code.
+        """
+        if not isinstance(data, dict) or 'Status' not in data:
+            return
+        self.__degradation_store.set_neutralised(str(data['Status']) in NEUTRALISED_STATUSES)
+
+    def handle_pit_lane_times(self, data):
+        """Process pit lane times: the time each stop spent in the pit lane.
+
+        Args:
+            data: Dictionary containing 'PitTimes' key with driver-keyed Duration and Lap.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get('PitTimes'), dict):
+            return
+        for driver, v in data['PitTimes'].items():
+            # '_deleted' lists the entries removed from the collection
+            if not isinstance(v, dict) or not v.get('Duration') or not v.get('Lap'):
+                continue
+            self.__pit_store.set_pit_lane(int(driver), int(v['Lap']), str_to_seconds(v['Duration']))
+            self.mark_dirty(PIT_STOPS)
 
     def handle_timing_app_data(self, data):
         """Process timing app data: stint and compound information.
@@ -211,13 +422,15 @@ class Race:
         """
         if not isinstance(data, dict):
             return
+        laps = self.__lap_store
         for driver, v in data.get('Lines', {}).items():
             if 'Stints' not in v:
                 continue
             stints = v['Stints']
             driver_number = int(driver)
-            driver_laps = self._ensure_driver_laps(driver_number)
-            s = self._ensure_driver_stints(driver_number)
+            laps.ensure_driver(driver_number)
+            self.__stint_store.ensure_driver(driver_number)
+            self.mark_dirty(STINTS)
 
             # stints as dict
             if isinstance(stints, dict):
@@ -225,39 +438,34 @@ class Race:
                     # lap info
                     if 'LapTime' in stint and 'LapNumber' in stint:
                         lap_number = stint["LapNumber"]
-                        if lap_number not in driver_laps:
-                            lap = Lap(str_to_seconds(stint["LapTime"]))
-                            if len(driver_laps) > 0:
-                                lap.set_position(self.get_max_lap(driver_number).get_position())
-                            driver_laps[lap_number] = lap
+                        if not laps.has_lap(driver_number, lap_number):
+                            laps.add_lap(driver_number, lap_number, str_to_seconds(stint["LapTime"]))
+                            self.mark_dirty(*LAPS)
 
                     # stint meta
-                    stint_number = int(stint_no)
-                    if stint_number not in s:
-                        s[stint_number] = Stint()
+                    s = self._ensure_stint(driver_number, int(stint_no))
                     if 'Compound' in stint:
-                        s[stint_number].set_compound(stint['Compound'])
+                        s.set_compound(stint['Compound'])
                     if 'New' in stint:
-                        s[stint_number].set_is_new(stint['New'])
+                        s.set_is_new(stint['New'])
                     if 'TotalLaps' in stint:
-                        s[stint_number].set_total_laps(stint['TotalLaps'])
+                        s.set_total_laps(stint['TotalLaps'])
                     if 'StartLaps' in stint:
-                        s[stint_number].set_start_laps(stint['StartLaps'])
+                        s.set_start_laps(stint['StartLaps'])
 
             # stints as list (take first)
             elif isinstance(stints, list) and len(stints) > 0:
-                stint_number = max(s.keys()) + 1 if len(s) > 0 else 0
+                stint_number = self.__stint_store.get_max_stint_number(driver_number) + 1
                 stint = stints[0]
-                if stint_number not in s:
-                    s[stint_number] = Stint()
+                s = self._ensure_stint(driver_number, stint_number)
                 if 'Compound' in stint:
-                    s[stint_number].set_compound(stint['Compound'])
+                    s.set_compound(stint['Compound'])
                 if 'New' in stint:
-                    s[stint_number].set_is_new(stint['New'])
+                    s.set_is_new(stint['New'])
                 if 'TotalLaps' in stint:
-                    s[stint_number].set_total_laps(stint['TotalLaps'])
+                    s.set_total_laps(stint['TotalLaps'])
                 if 'StartLaps' in stint:
-                    s[stint_number].set_start_laps(stint['StartLaps'])
+                    s.set_start_laps(stint['StartLaps'])
 
     def handle_weather(self, data, t: datetime.datetime):
         """Process weather data at a given timestamp.
@@ -268,49 +476,87 @@ class Race:
         """
         if not isinstance(data, dict):
             return
-        weather = self._ensure_weather(t)
+        weather = self.__weather_store.ensure(t)
         if 'AirTemp' in data:
             air_temp: str = data["AirTemp"]
             if air_temp:
                 weather.set_air_temp(float(air_temp))
+                self.mark_dirty(AIR_TEMP)
         if 'Rainfall' in data:
             rainfall: str = data["Rainfall"]
             if rainfall:
                 weather.set_rain_fall(float(rainfall))
+                self.mark_dirty(RAIN_FALL)
         if 'TrackTemp' in data:
             track_temp: str = data["TrackTemp"]
             if track_temp:
                 weather.set_track_temp(float(track_temp))
+                self.mark_dirty(TRACK_TEMP)
         if 'WindSpeed' in data:
             wind_speed: str = data["WindSpeed"]
             if wind_speed:
                 weather.set_wind_speed(float(wind_speed))
+                self.mark_dirty(WIND_SPEED)
 
     def handle(self, message):
         """Route incoming message to appropriate handler based on message type.
 
         Args:
-            message: String message to parse as JSON and route to handlers.
+            message: Line written by SignalRClient to decode and route to handlers.
                     Expected format: [category, data, timestamp, ...]
-                    Categories: TimingAppData, TimingData, WeatherData, RaceControlMessages, TrackStatus.
+                    Categories: TimingAppData, TimingData, WeatherData, RaceControlMessages, TrackStatus,
+                    PitLaneTimeCollection, CarData.z and Position.z.
         """
-        json_str = to_json_style(message)
         try:
-            msg = json.loads(json_str)
-        except (json.JSONDecodeError, ValueError):
-            self.get_config().get_log().warning("Json parse error %s", message)
+            msg = decoder.decode(message)
+        except ValueError:
+            self.get_config().get_log().warning("Undecodable message %s", message)
+            return
+        self.handle_message(msg)
+
+    def handle_message(self, msg):
+        """Route an already decoded message to appropriate handler based on message type.
+
+        Args:
+            msg: Message decoded from a line written by SignalRClient, see handle().
+        """
+        if not isinstance(msg, list) or len(msg) < 3:
+            self.get_config().get_log().warning("Unexpected message %s", msg)
             return
         category = msg[0]
+        if category in telemetry.COMPRESSED:
+            try:
+                msg = telemetry.expand(msg)
+            except ValueError as e:
+                self.get_config().get_log().warning("%s %s", e, category)
+                return
+            category = msg[0]
+        if category == "CarData":
+            if self.__telemetry_store.add_car_data(msg[1]):
+                self.mark_dirty(CAR_DATA)
+        if category == "Position":
+            if self.__telemetry_store.add_positions(msg[1]):
+                self.mark_dirty(TRACK_POSITIONS)
         if category == "TimingAppData":
             self.handle_timing_app_data(msg[1])
         if category == "TimingData":
-            self.handle_timing_data(msg[1])
-        if category == "WeatherData":
-            self.handle_weather(msg[1], datetime.datetime.fromisoformat(msg[2].replace("Z", "+00:00")))
+            t = decoder.parse_time(msg[2]) if msg[2] else None
+            # pit entries and exits are timed to the message applying them, at most a window late
+            self.__feed_time = t or self.__feed_time
+            if self.__coalescer is None:
+                self.handle_timing_data(msg[1])
+            else:
+                for data in self.__coalescer.add(msg[1], t):
+                    self.handle_timing_data(data)
+        if category == "PitLaneTimeCollection":
+            self.handle_pit_lane_times(msg[1])
+        if category == "WeatherData" and msg[2]:
+            self.handle_weather(msg[1], decoder.parse_time(msg[2]))
         if category == "RaceControlMessages":
-            handle_race_control(msg[2], msg[1], self.get_config().get_logs_path())
+            handle_race_control(msg[2], msg[1], self.get_log_file(RACE_CONTROL_LOG))
         if category == "TrackStatus":
-            handle_track_status(msg[2], msg[1], self.get_config().get_logs_path())
+            handle_track_status(msg[2], msg[1], self.get_log_file(TRACK_STATUS_LOG))
+            self.handle_track_status_data(msg[1])
 
 
 def str_to_seconds(param: str) -> float:
@@ -346,124 +592,301 @@ def str_to_seconds(param: str) -> float:
         raise ValueError(f"Unsupported time format: {param}")
 
 
-def to_json_style(s: str) -> str:
-    """Normalize Python string representation to JSON-compatible format.
+def handle_race_control(t, data, log_file: util.AppendLog):
+    """Log race control messages to file.
 
-    Converts single quotes to double quotes and Python booleans (True/False) to JSON format (true/false).
+    Messages are appended, oldest first; use util.read_newest_first to list them newest first.
 
     Args:
-        s: String with Python-style syntax.
+        t: Timestamp of the race control message.
+        data: Race control message content.
+        log_file: Append-only log to write to.
+    """
+    log_file.write(util.join_with_colon(t, str(data)))
 
-    Returns:
-        String normalized to JSON-compatible syntax.
+
+def handle_track_status(t, data, log_file: util.AppendLog):
+    """Log track status messages to file.
+
+    Messages are appended, oldest first; use util.read_newest_first to list them newest first.
+
+    Args:
+        t: Timestamp of the track status message.
+        data: Track status message content.
+        log_file: Append-only log to write to.
     """
-    # normalize to JSON-friendly style: single->double quotes and lowercase booleans
-    return s.replace("'", '"').replace('True', 'true').replace('False', 'false')
+    log_file.write(util.join_with_colon(t, str(data)))
 
 
-def handle_race_control(t, data, logs_path: str):
-    """Log race control messages to file.
+class Feed:
+    """One source file followed by the tracker, with its own race state and output directories.
+
+    Several feeds, e.g. the sprint and the race of a sprint weekend, are followed by one process
+    (see follow_feeds): their pipelines run in the same event loop and decode on the same
+    executor, and their renderers share one pool, while each keeps an isolated Race.
+
+    Attributes:
+        __name: Name of the feed, "" for a single feed writing to the results directory itself.
+        __race: Race state of the feed.
+        __reader: Follows the source file, a plain recording or an archive (tracker.archive).
+        __watcher: Wakes the reader when the source file changes.
+        __renderer: Renders the charts of the feed.
+        __dashboard: Live dashboard of the feed, None if disabled.
+        __metrics: Instruments the pipeline records to, None if disabled.
+        __logs_path: Directory of the feed's logs.
+        __checkpoint_path: Checkpoint of the feed's race state.
+        __tracker_config: Tracker section of the configuration.
+        __pipeline: Pipeline following the source file, None until follow() starts.
+        __stopping: Set to make follow() return at the end of the source file.
+    """
+
+    def __init__(self, feed_config: dict, results_path: Path, tracker_config: dict, log,
+                 pool: Executor | None, tracker_metrics: TrackerMetrics | None):
+        """Open a feed, restoring its race state from its checkpoint when it belongs to the same recording.
+
+        Args:
+            feed_config: FileName, and optionally Name, DashboardPort and DashboardHost of the feed.
+            results_path: Results directory; a named feed writes to a directory of its name in it.
+            tracker_config: Tracker section of the configuration.
+            log: Logger instance for logging messages.
+            pool: Render pool shared by the feeds, see pools.render_pool; None to draw in the ingest
+                loop, which then waits for every chart, e.g. in tests.
+            tracker_metrics: Instruments the pipeline and renderer record to, None if disabled.
+        """
+        self.__name = feed_config.get('Name', '')
+        output_path = results_path / self.__name if self.__name else results_path
+        self.__logs_path = output_path / 'logs'
+        self.__logs_path.mkdir(parents=True, exist_ok=True)
+        images_path = None
+        if self.__name:
+            (output_path / 'images').mkdir(parents=True, exist_ok=True)
+            images_path = str(output_path / 'images')
+        self.__race = Race(Config(log, str(self.__logs_path), images_path),
+                           coalesce_window=tracker_config.get('CoalesceWindow', 0.2))
+
+        source_path = resolve_source_path(feed_config.get('FileName', ''))
+        self.__checkpoint_path = output_path / 'checkpoint.pkl'
+        offset = checkpoint.restore(self.__checkpoint_path, self.__race, source_path, log)
+        if offset is None:
+            offset = 0
+            for name in LOG_FILES:
+                try:
+                    os.remove(self.__logs_path / name)
+                except FileNotFoundError:
+                    pass
+        # 途中から起動したときは、溜まった分を並列にデコードしてから追いかける
+        if (not archive.is_archive(source_path) and source_path.exists()
+                and source_path.stat().st_size - offset >= tracker_config.get('BackfillBytes', 16 << 20)):
+            offset = backfill.backfill(self.__race, source_path, offset, tracker_config.get('BackfillWorkers'))
+            checkpoint.save(self.__checkpoint_path, self.__race, source_path, offset, LOG_FILES)
+
+        self.__watcher = FileWatcher(source_path, log, max_rate=tracker_config.get('MaxRenderRate', 1.0))
+        self.__reader = archive.open_reader(source_path, log, offset)
+        charts = CHARTS if tracker_config.get('RenderImages', True) else ()
+        self.__renderer = Renderer(log, charts, workers=max(tracker_config.get('RenderWorkers', 2), 1) if pool else 0,
+                                   metrics=tracker_metrics, executor=pool)
+        self.__dashboard = None
+        if feed_config.get('DashboardPort') is not None:
+            self.__dashboard = Dashboard(log, feed_config['DashboardPort'],
+                                         feed_config.get('DashboardHost', '127.0.0.1'))
+            self.__dashboard.start()
+        self.__metrics = tracker_metrics
+        self.__tracker_config = tracker_config
+        self.__pipeline: Pipeline | None = None
+        self.__stopping = False
+
+    def get_name(self) -> str:
+        """Get the name of the feed.
+
+        Returns:
+            The name, which is also the directory of its results; empty for the single feed of FileName.
+        """
+        return self.__name
+
+    def get_race(self) -> Race:
+        """Get the race state of the feed.
+
+        Returns:
+            The Race the feed's lines are applied to.
+        """
+        return self.__race
+
+    async def follow(self):
+        """Follow the source file until the tracker stops."""
+        race = self.__race
+        checkpoint_interval = self.__tracker_config.get('CheckpointInterval', 30)
+        checkpointed = time.monotonic()
+
+        def on_state(offset: int):
+            nonlocal checkpointed
+            if time.monotonic() - checkpointed >= checkpoint_interval:
+                # the offset of the batch just applied, not the reader's, which may be ahead
+                checkpoint.save(self.__checkpoint_path, race, self.__reader.get_path(), offset, LOG_FILES)
+                checkpointed = time.monotonic()
+
+        def on_render():
+            if self.__dashboard is not None:
+                # 変更のあった行だけをブラウザへ送る
+                self.__dashboard.publish(race)
+            try:
+                (self.__logs_path / 'timestamp.txt').unlink()
+            except FileNotFoundError:
+                pass
+            util.write_to_file_top(str(self.__logs_path / 'timestamp.txt'), f"{datetime.datetime.now()}")
+
+        # 読み込み→デコード→状態更新→描画を有界キューでつなぎ、描画が遅れたら最新の状態にまとめて描く
+        self.__pipeline = Pipeline(race, self.__reader, self.__watcher, self.__renderer, race.get_config().get_log(),
+                                   queue_size=self.__tracker_config.get('QueueSize', 16),
+                                   max_rate=self.__tracker_config.get('MaxRenderRate', 1.0),
+                                   on_state=on_state, on_render=on_render, metrics=self.__metrics)
+        if self.__stopping:
+            self.__pipeline.stop()
+        await self.__pipeline.run()
+
+    def stop(self):
+        """Make follow() return once the source file is read to its end."""
+        self.__stopping = True
+        if self.__pipeline is not None:
+            self.__pipeline.stop()
+
+    def close(self):
+        """Stop the dashboard, wait for the feed's renders and release the source file."""
+        if self.__dashboard is not None:
+            self.__dashboard.stop()
+        self.__renderer.close()
+        self.__watcher.close()
+        self.__race.close()
+
+
+async def follow_feeds(feeds: list[Feed]):
+    """Follow several feeds in one event loop until all of them stop.
+
+    Each pipeline yields to the others after every batch it applies, so a feed with a backlog
+    takes turns with the live ones instead of holding the loop until it catches up.
 
     Args:
-        t: Timestamp of the race control message.
-        data: Race control message content.
-        logs_path: Directory path for writing logs.
+        feeds: Feeds to follow.
     """
-    message = util.join_with_colon(t, str(data))
-    util.write_to_file_top(f"{logs_path}/race_control.txt", message)
+    await asyncio.gather(*(feed.follow() for feed in feeds))
 
 
-def handle_track_status(t, data, logs_path: str):
-    """Log track status messages to file.
+def resolve_source_path(fname: str) -> Path:
+    """Resolve a FileName from the configuration.
 
     Args:
-        t: Timestamp of the track status message.
-        data: Track status message content.
-        logs_path: Directory path for writing logs.
+        fname: Absolute path, path under live/, or file name in live/data/source.
+
+    Returns:
+        Path of the source data file.
     """
-    message = util.join_with_colon(t, str(data))
-    util.write_to_file_top(f"{logs_path}/track_status.txt", message)
+    # if FileName already contains live/data/source or is absolute, use as-is
+    if os.path.isabs(fname) or fname.startswith('live/') or 'live/data/source' in fname:
+        return Path(fname)
+    return Path(__file__).resolve().parents[1] / 'live' / 'data' / 'source' / fname
+
+
+def feed_configs(config: dict) -> list[dict]:
+    """Get the feeds to follow.
+
+    Args:
+        config: The whole configuration.
+
+    Returns:
+        Tracker.Feeds, or the single feed of FileName and the dashboard options of Tracker.
+
+    Raises:
+        ValueError: If several feeds lack a name or share one.
+    """
+    tracker_config = config.get('Tracker', {})
+    feeds = tracker_config.get('Feeds')
+    if not feeds:
+        return [{'FileName': config.get('FileName', ''), 'DashboardPort': tracker_config.get('DashboardPort'),
+                 'DashboardHost': tracker_config.get('DashboardHost', '127.0.0.1')}]
+    names = [feed.get('Name', '') for feed in feeds]
+    if len(feeds) > 1 and ('' in names or len(set(names)) != len(names)):
+        raise ValueError(f"each of several feeds needs a name of its own: {names}")
+    return feeds
 
 
 def __main():
     """Main entry point for live race tracking.
 
-    Reads configuration, monitors source data file for new lines, processes race data,
-    generates plots, and continuously loops with 60-second polling intervals.
+    Reads configuration and follows the source data files by byte offset through asyncio
+    pipelines (tracker.pipeline): newly appended lines are read, decoded on an executor, applied
+    to the race state, and the plots whose data changed are regenerated, at most MaxRenderRate
+    times per second and at least once a minute.
 
     Expected config keys:
-        FileName: Path to source data file (can be relative, absolute, or include path components).
-
-    Output:
+        FileName: Path to source data file (can be relative, absolute, or include path components); a
+            name ending in .f1a is read as an archive (tracker.archive).
+        Tracker.Feeds: Optional list of feeds to follow in this process instead of FileName, each
+            {"Name": ..., "FileName": ..., "DashboardPort": ..., "DashboardHost": ...} with only
+            Name and FileName required. Each feed has its own race state and writes to
+            results/<Name>/; the render pool and the other Tracker keys are shared.
+        Tracker.MaxRenderRate: Optional maximum number of plot updates per second (default 1).
+        Tracker.RenderWorkers: Optional number of processes drawing the plots, shared by the feeds
+            (default 2, 0 draws them in a thread of the tracker process).
+        Tracker.CheckpointInterval: Optional seconds between checkpoints of the race state (default 30).
+        Tracker.CoalesceWindow: Optional seconds of feed time to merge each driver's bursts of
+            TimingData over before applying them (default 0.2, 0 to apply every message).
+        Tracker.BackfillBytes: Optional number of unread bytes of a plain recording from which the
+            tracker catches up in parallel (tracker.backfill) before following it (default 16 MiB).
+        Tracker.BackfillWorkers: Optional number of processes decoding the backlog (default one
+            per CPU, 0 decodes it in the tracker process).
+        Tracker.QueueSize: Optional number of batches of lines waiting in front of each pipeline
+            stage (default 16).
+        Tracker.DashboardPort: Optional port of the live dashboard (tracker.dashboard), which pushes
+            the changes to browsers over Server-Sent Events; unset to disable it.
+        Tracker.DashboardHost: Optional address the dashboard listens on (default 127.0.0.1).
+        Tracker.RenderImages: Optional; false to stop rendering the plot files, e.g. when the
+            dashboard replaces them (default true).
+        Tracker.Metrics: Optional OpenTelemetry export of the tracker's metrics (lines read, parse
+            failures, handler time per category, render time and file-to-plot latency per chart,
+            memory) and spans: "console" to print them, "file" to append them to
+            metrics.jsonl and spans.jsonl; unset to disable it.
+        Tracker.MetricsInterval: Optional seconds between two metric exports (default 60).
+
+    If results/checkpoint.pkl belongs to the same recording, the race state is restored from it
+    and only the part of the source file after it is parsed.
+
+    Output (under results/<Name>/ for each of Tracker.Feeds):
         - Log files: logs/race_control.txt, logs/track_status.txt, logs/timestamp.txt
-        - Plot files: images/ directory with lap time, position, gap, tyres, and weather plots.
+        - Checkpoint: checkpoint.pkl
+        - Plot files: images/ directory with lap time, position, gap, tyres, pit stop and weather plots
+          and the tyre degradation table.
+        - Dashboard: http://<DashboardHost>:<DashboardPort>/ when enabled.
+        - Metrics: metrics.jsonl and spans.jsonl with Tracker.Metrics set to "file", for all feeds.
     """
     log = setup.log()
 
     results_path = Path(__file__).resolve().parents[1] / 'live' / 'data' / 'results'
-    logs_path = results_path / 'logs'
-    images_path = results_path / 'images'
-    images_path.mkdir(parents=True, exist_ok=True)
-
-    try:
-        os.remove(f"{logs_path}/race_control.txt")
-    except FileNotFoundError:
-        pass
-    try:
-        os.remove(f"{logs_path}/track_status.txt")
-    except FileNotFoundError:
-        pass
+    (results_path / 'images').mkdir(parents=True, exist_ok=True)
 
     cfg_path = Path(__file__).resolve().parents[1] / 'config.json'
     with cfg_path.open('r', encoding='utf-8') as file:
         config = json.load(file)
 
-    race = Race(Config(log, str(logs_path)))
-
-    start = 0  # 最初に読み込んだ行数
-    prev_start = -1  # 直前の読み込み行数（初期値は不一致にしておく）
-
-    # determine source file path: if FileName already contains live/data/source or is absolute, use as-is
-    fname = config.get('FileName', '')
-    if os.path.isabs(fname) or fname.startswith('live/') or 'live/data/source' in fname:
-        source_path = Path(fname)
-    else:
-        source_path = Path(__file__).resolve().parents[1] / 'live' / 'data' / 'source' / fname
-
-    while True:
-        with source_path.open('r', encoding='utf-8') as f:
-            lines = f.readlines()
-            new_lines = lines[start:]  # 新しい行だけ取得
-
-            for line in new_lines:
-                line = line.strip()
-                if line:
-                    race.handle(line)
-
-            prev_start, start = start, len(lines)  # 前回のstartを保存し、今回のstartを更新
-
-        # ファイルが更新されていた場合のみplotを実行
-        if start != prev_start:
-            order = sorted(
-                race.get_laptime_map().keys(),
-                key=lambda car: race.get_laptime_map()[car][max(race.get_laptime_map()[car].keys())].get_position()
-            )
-            plotter.plot_tyres(race.get_stints_map(), order)
-            plotter.plot_gap_to_ahead(race.get_laptime_map(), "gap_ahead", 6)
-            plotter.plot_gap_to_top(race.get_laptime_map(), "gap_top", 30)
-            plotter.plot_positions(race.get_laptime_map(), "position")
-            plotter.plot_laptime(race.get_laptime_map(), "laptime", 7)
-            plotter.plot_laptime_diff(race.get_laptime_map(), order, "laptime_diffs")
-
-            plotter.plot_weather(race.get_weather_map())
-        else:
-            log.info("plot is skipped")
-        try:
-            (logs_path / 'timestamp.txt').unlink()
-        except FileNotFoundError:
-            pass
-        util.write_to_file_top(str(logs_path / 'timestamp.txt'), f"{datetime.datetime.now()}")
-        time.sleep(60)
+    tracker_config = config.get('Tracker', {})
+    shutdown_metrics = None
+    tracker_metrics = None
+    if tracker_config.get('Metrics') is not None:
+        shutdown_metrics = metrics.configure(tracker_config['Metrics'], results_path,
+                                             tracker_config.get('MetricsInterval', 60.0))
+        tracker_metrics = TrackerMetrics()
+    # one pool draws the charts of every feed, instead of one pool and matplotlib state per process
+    pool = render_pool(tracker_config.get('RenderWorkers', 2))
+    feeds: list[Feed] = []
+    try:
+        for feed_config in feed_configs(config):
+            feeds.append(Feed(feed_config, results_path, tracker_config, log, pool, tracker_metrics))
+        asyncio.run(follow_feeds(feeds))
+    finally:
+        for feed in feeds:
+            feed.close()
+        if pool is not None:
+            pool.shutdown()
+        if shutdown_metrics is not None:
+            shutdown_metrics()
 
 
 if __name__ == "__main__":
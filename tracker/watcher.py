@@ -0,0 +1,161 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class FileWatcher:
+    """Blocks until a followed file changes, debouncing bursts of writes.
+
+    Uses inotify on the file's directory where available, so that appends, creation and
+    rotation wake the caller immediately, and falls back to polling os.stat otherwise.
+    Consecutive wake-ups are spaced at least 1 / max_rate seconds apart, so a burst of
+    appended lines results in a single wake-up.
+
+    Attributes:
+        __path: Path to the followed file.
+        __log: Logger instance for logging messages.
+        __min_interval: Minimum number of seconds between two wake-ups.
+        __poll_interval: Seconds between two os.stat calls in polling mode.
+        __last_wake: Monotonic time of the previous wake-up.
+        __fd: inotify file descriptor, or None in polling mode.
+        __last_stat: (inode, size, mtime) seen by the previous poll.
+    """
+
+    def __init__(self, path: str | Path, log, max_rate: float = 1.0, poll_interval: float = 0.5,
+                 use_inotify: bool = True):
+        """Initialize FileWatcher for a file.
+
+        Args:
+            path: Path to the followed file. It does not need to exist yet.
+            log: Logger instance for logging messages.
+            max_rate: Maximum number of wake-ups per second.
+            poll_interval: Seconds between two os.stat calls when inotify is unavailable.
+            use_inotify: Set to False to force polling mode.
+        """
+        self.__path = Path(path)
+        self.__log = log
+        self.__min_interval = 1 / max_rate
+        self.__poll_interval = poll_interval
+        self.__last_wake = 0.0
+        self.__fd = _inotify_watch(self.__path.parent) if use_inotify else None
+        self.__last_stat = self.__stat()
+        if self.__fd is None:
+            self.__log.info("watching %s by polling", self.__path)
+        else:
+            self.__log.info("watching %s with inotify", self.__path)
+
+    def is_polling(self) -> bool:
+        """Check whether the watcher fell back to polling.
+
+        Returns:
+            True if inotify is not used.
+        """
+        return self.__fd is None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the file changes or the timeout elapses.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait forever.
+
+        Returns:
+            True if the file changed, False if the timeout elapsed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = False
+        while not changed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if self.__fd is None:
+                changed = self.__poll(remaining)
+            else:
+                changed = self.__read_events(remaining)
+
+        # debounce: let the rest of a burst arrive and keep at most max_rate wake-ups per second
+        delay = self.__last_wake + self.__min_interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if self.__fd is not None:
+            self.__read_events(0)
+        self.__last_stat = self.__stat()
+        self.__last_wake = time.monotonic()
+        return True
+
+    def close(self):
+        """Release the inotify file descriptor."""
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __stat(self) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(self.__path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def __poll(self, timeout: float | None) -> bool:
+        time.sleep(self.__poll_interval if timeout is None else min(self.__poll_interval, timeout))
+        current = self.__stat()
+        if current != self.__last_stat:
+            self.__last_stat = current
+            return True
+        return False
+
+    def __read_events(self, timeout: float | None) -> bool:
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            buf = os.read(self.__fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        name = os.fsencode(self.__path.name)
+        changed = False
+        i = 0
+        while i < len(buf):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buf, i)
+            i += _EVENT_HEADER.size
+            if buf[i:i + length].rstrip(b'\0') == name:
+                changed = True
+            i += length
+        return changed
+
+
+def _inotify_watch(directory: Path) -> int | None:
+    """Create an inotify descriptor watching a directory for writes, creation and renames.
+
+    Args:
+        directory: Directory containing the followed file.
+
+    Returns:
+        The inotify file descriptor, or None if inotify is not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError, TypeError):
+        return None
+    fd = init(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
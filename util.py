@@ -25,3 +25,63 @@ def write_to_file_top(filepath: str, content: str):
         # ファイルがなければ新規作成して書き込む
         with open(filepath, 'w', encoding='utf-8') as file:
             file.write(content)
+
+
+class AppendLog:
+    """追記専用のログファイル。
+    バッファ付きのファイルハンドルを開いたまま保持し、書き込みのたびにファイル全体を読み書きしません。
+    新しい行ほどファイルの末尾に並ぶため、新しい順に読む場合は read_newest_first を使います。
+
+    Parameters:
+    - filepath: 書き込み対象のファイルパス
+    - truncate: True の場合は既存の内容を消してから書き込む
+    """
+
+    def __init__(self, filepath: str, truncate: bool = False):
+        self.__filepath = filepath
+        self.__file = open(filepath, 'w' if truncate else 'a', encoding='utf-8')
+
+    def get_filepath(self) -> str:
+        return self.__filepath
+
+    def write(self, content: str):
+        """1行追記します（末尾に改行は自動で追加）。"""
+        self.__file.write(content + '\n')
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_newest_first(filepath: str, limit: int | None = None) -> list[str]:
+    """AppendLog で書いたファイルを新しい行から順に読みます。
+    ファイルの末尾からブロック単位で読むため、limit を指定すると読む量はその行数分だけです。
+
+    Parameters:
+    - filepath: 読み込み対象のファイルパス
+    - limit: 読み込む最大行数（None の場合は全行）
+    """
+    lines: list[str] = []
+    with open(filepath, 'rb') as file:
+        position = file.seek(0, os.SEEK_END)
+        rest = b''
+        while position > 0 and (limit is None or len(lines) < limit):
+            size = min(64 * 1024, position)
+            position -= size
+            file.seek(position)
+            block = file.read(size) + rest
+            parts = block.split(b'\n')
+            # 先頭の断片は前のブロックと繋がっている可能性がある
+            rest = parts[0]
+            lines.extend(p.decode('utf-8') for p in reversed(parts[1:]) if p)
+        if rest and (limit is None or len(lines) < limit):
+            lines.append(rest.decode('utf-8'))
+    return lines if limit is None else lines[:limit]
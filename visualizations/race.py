@@ -13,6 +13,7 @@ from fastf1.core import Session, Laps
 from opentelemetry import trace
 
 import constants
+import image_export
 import util
 from visualizations.domain.driver import Driver
 from visualizations.domain.lap import Lap
@@ -211,7 +212,7 @@ def gap_to_ahead_table(log: structlog.stdlib.BoundLogger, filepath: str, lap_log
         layout=go.Layout(autosize=True, margin=go.layout.Margin(autoexpand=True)))
 
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    fig.write_image(filepath, width=1920, height=1620)
+    image_export.write_image(fig, filepath, width=1920, height=1620)
     log.info(f"Saved plot to {filepath}")
 
 
@@ -279,7 +280,7 @@ def gap_to_top_table(log: structlog.stdlib.BoundLogger, filepath: str, lap_logs:
         layout=go.Layout(autosize=True, margin=go.layout.Margin(autoexpand=True)))
 
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    fig.write_image(filepath, width=1920, height=1620)
+    image_export.write_image(fig, filepath, width=1920, height=1620)
     log.info(f"Saved plot to {filepath}")
 
 
@@ -529,33 +530,27 @@ def tyres(log: structlog.stdlib.BoundLogger, filepath: str, lap_logs: set[Driver
 
 @tracer.start_as_current_span("write_messages")
 def write_messages(session: Session, logs_path: str):
-    try:
-        os.remove(f"{logs_path}/race_control.txt")
-    except FileNotFoundError:
-        pass
+    """レースコントロールのメッセージを古い順に追記する。新しい順に読む場合は util.read_newest_first を使う。"""
     messages = session.race_control_messages.sort_values('Time')
-    for i in range(0, len(messages)):
-        t = session.race_control_messages.Time.iloc[i]
-        l = session.race_control_messages.Lap.iloc[i]
-        c = session.race_control_messages.Category.iloc[i]
-        f = session.race_control_messages.Flag.iloc[i]
-        s = session.race_control_messages.Scope.iloc[i]
-        n = session.race_control_messages.RacingNumber.iloc[i]
-        m = session.race_control_messages.Message.iloc[i]
-        message = util.join_with_colon(str(t), str(l), str(c), str(f), str(s), str(n), str(m))
-        util.write_to_file_top(f"{logs_path}/race_control.txt", message)
+    with util.AppendLog(f"{logs_path}/race_control.txt", truncate=True) as log_file:
+        for i in range(0, len(messages)):
+            t = session.race_control_messages.Time.iloc[i]
+            l = session.race_control_messages.Lap.iloc[i]
+            c = session.race_control_messages.Category.iloc[i]
+            f = session.race_control_messages.Flag.iloc[i]
+            s = session.race_control_messages.Scope.iloc[i]
+            n = session.race_control_messages.RacingNumber.iloc[i]
+            m = session.race_control_messages.Message.iloc[i]
+            log_file.write(util.join_with_colon(str(t), str(l), str(c), str(f), str(s), str(n), str(m)))
 
 
 @tracer.start_as_current_span("write_track_status")
 def write_track_status(session: Session, logs_path: str):
-    try:
-        os.remove(f"{logs_path}/track_status.txt")
-    except FileNotFoundError:
-        pass
+    """トラックステータスを古い順に追記する。新しい順に読む場合は util.read_newest_first を使う。"""
     messages = session.track_status.sort_values('Time')
-    for i in range(0, len(messages)):
-        t = session.race_control_messages.Time.iloc[i]
-        s = session.race_control_messages.Status.iloc[i]
-        m = session.race_control_messages.Message.iloc[i]
-        message = util.join_with_colon(str(t), str(s), str(m))
-        util.write_to_file_top(f"{logs_path}/track_status.txt", message)
+    with util.AppendLog(f"{logs_path}/track_status.txt", truncate=True) as log_file:
+        for i in range(0, len(messages)):
+            t = session.race_control_messages.Time.iloc[i]
+            s = session.race_control_messages.Status.iloc[i]
+            m = session.race_control_messages.Message.iloc[i]
+            log_file.write(util.join_with_colon(str(t), str(s), str(m)))
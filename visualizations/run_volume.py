@@ -13,6 +13,7 @@ from numpy import datetime64
 from opentelemetry import trace
 
 import constants
+import image_export
 
 tracer = trace.get_tracer(__name__)
 
@@ -125,7 +126,7 @@ def plot_laptime(session: Session, log: structlog.stdlib.BoundLogger):
 
     output_path = f"./images/{session.event.year}/{session.event.RoundNumber}_{session.event.Location}/{session.name.replace(' ', '')}/laptime_table.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=image_height)
+    image_export.write_image(fig, output_path, width=1920, height=image_height)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -187,7 +188,7 @@ def plot_pit_time(session: Session, log: structlog.stdlib.BoundLogger):
 
     output_path = f"./images/{session.event.year}/{session.event.RoundNumber}_{session.event.Location}/{session.name.replace(' ', '')}/pittime_table.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=2160)
+    image_export.write_image(fig, output_path, width=1920, height=2160)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -14,6 +14,7 @@ from fastf1.core import Session, Lap, Telemetry
 from opentelemetry import trace
 
 import constants
+import image_export
 
 tracer = trace.get_tracer(__name__)
 
@@ -100,7 +101,7 @@ def compute_and_save_segment_tables_plotly(
                 align='center'),
             cells=go.table.Cells(values=list(zip(*segment_rows)), align='center')
         )])
-    fig_segment.write_image(f"{filename_base}_durations.png", width=1920, height=1080)
+    image_export.write_image(fig_segment, f"{filename_base}_durations.png", width=1920, height=1080)
     log.info(f"Segment table saved to {filename_base}_durations.png")
 
     segment_rank_rows = []
@@ -119,7 +120,7 @@ def compute_and_save_segment_tables_plotly(
                 fill=go.table.header.Fill(color='lightgrey'),
                 align='center'),
             cells=go.table.Cells(values=list(zip(*segment_rank_rows)), align='center'))])
-    fig_ranks.write_image(f"{filename_base}_ranks.png", width=1920, height=1080)
+    image_export.write_image(fig_ranks, f"{filename_base}_ranks.png", width=1920, height=1080)
     log.info(f"Segment rank table saved to {filename_base}_ranks.png")
 
     best = session.laps.pick_fastest()
@@ -163,7 +164,7 @@ def compute_and_save_segment_tables_plotly(
             align='center'),
         cells=go.table.Cells(values=list(zip(*gap_rows)), align='center')
     )])
-    fig_gap.write_image(f"{filename_base}_gaps_to_best.png", width=1920, height=1080)
+    image_export.write_image(fig_gap, f"{filename_base}_gaps_to_best.png", width=1920, height=1080)
     log.info(f"Gap table saved to {filename_base}_gaps_to_best.png")
 
 
@@ -198,7 +199,7 @@ def plot_best_laptime(session: Session, log: structlog.stdlib.BoundLogger, key:
     fig.update_yaxes(range=[min([i[key] for i in data]) - 0.1, max([i[key] for i in data]) + 0.1], tickformat=".3f")
     output_path = f"./images/{session.event.year}/{session.event.RoundNumber}_{session.event.Location}/{session.name.replace(' ', '')}/{key}.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=1080)
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -231,7 +232,7 @@ def plot_best_speed(session: Session, log: structlog.stdlib.BoundLogger, key: st
     fig.update_yaxes(range=[min([i[key] for i in data]) - 5, max([i[key] for i in data]) + 5], tickformat=".1f")
     output_path = f"./images/{session.event.year}/{session.event.RoundNumber}_{session.event.Location}/{session.name.replace(' ', '')}/{key}.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=1080)
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")
 
 
@@ -9,6 +9,7 @@ import structlog
 from opentelemetry import trace
 
 import constants
+import image_export
 
 tracer = trace.get_tracer(__name__)
 
@@ -70,5 +71,5 @@ def plot_tyre(year: int, race_number: int, log: structlog.stdlib.BoundLogger):
 
     output_path = f"./images/{session.event.year}/{session.event.RoundNumber}_{session.event.Location}/tyres.png"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_image(output_path, width=1920, height=1080)
+    image_export.write_image(fig, output_path, width=1920, height=1080)
     log.info(f"Saved plot to {output_path}")